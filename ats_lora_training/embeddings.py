@@ -0,0 +1,14 @@
+"""Text embeddings for the training tools
+
+Uses the backend's shared embedding service (ats_web/backend/embedding_service.py),
+so the tools get the same lazy loading, micro-batching and cache as the API.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ats_web" / "backend"))
+
+from embedding_service import EmbeddingService, get_embedding_service  # noqa: E402
+
+__all__ = ["EmbeddingService", "get_embedding_service"]
@@ -2,18 +2,20 @@
 
 import json
 import argparse
+import numpy as np
 import torch
 from pathlib import Path
 from transformers import AutoModelForCausalLM, AutoTokenizer
 from peft import PeftModel
-from sentence_transformers import SentenceTransformer, util
 from tqdm import tqdm
+from config import EMBEDDING_MODEL
+from embeddings import get_embedding_service
 
 class ModelEvaluator:
     def __init__(self, model_path: str, test_data_path: str):
         self.model_path = Path(model_path)
         self.test_data_path = Path(test_data_path)
-        self.semantic_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+        self.semantic_model = get_embedding_service(EMBEDDING_MODEL)
         
     def load_model(self):
         """Load fine-tuned model"""
@@ -72,10 +74,9 @@ class ModelEvaluator:
     
     def calculate_semantic_similarity(self, text1: str, text2: str) -> float:
         """Calculate semantic similarity"""
-        emb1 = self.semantic_model.encode(text1, convert_to_tensor=True)
-        emb2 = self.semantic_model.encode(text2, convert_to_tensor=True)
-        similarity = util.cos_sim(emb1, emb2)
-        return similarity.item()
+        emb1, emb2 = self.semantic_model.encode([text1, text2])
+        norms = np.linalg.norm(emb1) * np.linalg.norm(emb2)
+        return float(np.dot(emb1, emb2) / norms) if norms else 0.0
     
     def evaluate(self):
         """Run evaluation"""
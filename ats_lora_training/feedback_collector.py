@@ -5,8 +5,8 @@ import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional
-from sentence_transformers import SentenceTransformer
-import numpy as np
+from config import EMBEDDING_MODEL
+from embeddings import get_embedding_service
 
 class FeedbackCollector:
     def __init__(self, db_path: str = "feedback_db"):
@@ -18,7 +18,7 @@ class FeedbackCollector:
         (self.db_path / "training_pairs").mkdir(exist_ok=True)
         
         self.interactions_file = self.db_path / "interactions.jsonl"
-        self.embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+        self.embedding_model = get_embedding_service(EMBEDDING_MODEL)
         
     def collect_feedback(
         self,
@@ -58,11 +58,7 @@ class FeedbackCollector:
         }
         
         # Generate embeddings
-        feedback_data["embeddings"] = {
-            "query": self.embedding_model.encode(query).tolist(),
-            "response": self.embedding_model.encode(response).tolist(),
-            "ideal": self.embedding_model.encode(feedback_data["feedback"]["ideal_response"]).tolist()
-        }
+        feedback_data["embeddings"] = self._embed(query, response, feedback_data["feedback"]["ideal_response"])
         
         # Save to JSONL
         self._save_feedback(feedback_data)
@@ -99,15 +95,20 @@ class FeedbackCollector:
         }
         
         # Generate embeddings
-        feedback_data["embeddings"] = {
-            "query": self.embedding_model.encode(query).tolist(),
-            "response": self.embedding_model.encode(response).tolist(),
-            "ideal": self.embedding_model.encode(ideal_response).tolist()
-        }
+        feedback_data["embeddings"] = self._embed(query, response, ideal_response)
         
         self._save_feedback(feedback_data)
         return feedback_data
     
+    def _embed(self, query: str, response: str, ideal_response: str) -> Dict:
+        """Query, response and ideal response embeddings (one encode call)"""
+        query_emb, response_emb, ideal_emb = self.embedding_model.encode([query, response, ideal_response])
+        return {
+            "query": query_emb.tolist(),
+            "response": response_emb.tolist(),
+            "ideal": ideal_emb.tolist()
+        }
+    
     def _save_feedback(self, feedback_data: Dict):
         """Save feedback to JSONL file"""
         with open(self.interactions_file, "a", encoding="utf-8") as f:
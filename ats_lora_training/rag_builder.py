@@ -5,9 +5,24 @@ from pathlib import Path
 from typing import List
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.vectorstores import FAISS
-from langchain.embeddings import HuggingFaceEmbeddings
+from langchain.embeddings.base import Embeddings
 from langchain.docstore.document import Document
 from config import CHUNK_SIZE, CHUNK_OVERLAP, EMBEDDING_MODEL
+from embeddings import get_embedding_service
+
+
+class ServiceEmbeddings(Embeddings):
+    """LangChain embeddings backed by the shared embedding service"""
+
+    def __init__(self, model_name: str):
+        self.service = get_embedding_service(model_name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.service.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.service.encode(text).tolist()
+
 
 class RAGBuilder:
     def __init__(self, docs_path: str, output_path: str):
@@ -15,7 +30,7 @@ class RAGBuilder:
         self.output_path = Path(output_path)
         self.output_path.mkdir(parents=True, exist_ok=True)
         
-        self.embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+        self.embeddings = ServiceEmbeddings(EMBEDDING_MODEL)
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=CHUNK_SIZE,
             chunk_overlap=CHUNK_OVERLAP,
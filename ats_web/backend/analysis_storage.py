@@ -3,10 +3,39 @@ Analysis Storage System
 Manages resume analysis results linked to job IDs
 """
 import json
+import os
+import threading
 import uuid
+from collections import deque
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+from index_log import IndexLog
+from jsonl_offset_index import JsonlOffsetIndex
+from materialized_stats import (
+    MaterializedStats, SCORE_BUCKETS, recommendation_verdict, score_bucket
+)
+from pagination import SortedKeyIndex, decode_cursor, paginate
+from leaderboard import JobLeaderboard, METRICS, score_fields
+from archive_store import archive_in_batches
+from export_stream import EXPORT_PAGE_SIZE
+
+
+# Index fields the per-job rankings depend on
+RANKING_FIELDS = ('job_id', 'created_at', *METRICS.values())
+
+
+def _moved(old: Optional[Dict], new: Optional[Dict], fields: Tuple[str, ...]) -> bool:
+    """Whether an index change affects an ordering keyed on these fields"""
+    if old is None or new is None:
+        return old is not new
+    return any(old.get(field) != new.get(field) for field in fields)
+
+
+def default_candidate_id(candidate_name: str, created_at: str) -> str:
+    """Legacy candidate key ("<name>_<timestamp>") for records saved without one"""
+    return f"{candidate_name}_{created_at}"
 
 
 class AnalysisStorage:
@@ -18,30 +47,96 @@ class AnalysisStorage:
         self.analyses_file = self.storage_dir / "analyses.jsonl"
         self.index_file = self.storage_dir / "analyses_index.json"
         self._ensure_files_exist()
+        self.index = IndexLog(self.index_file)
+        self.offsets = JsonlOffsetIndex(
+            self.analyses_file, "analysis_id", self.storage_dir / "analyses_offsets.json"
+        )
+        self._sorted: Optional[SortedKeyIndex] = None
+        self._ranked: Optional[JobLeaderboard] = None
+        # Index changes made by other workers, applied to the orderings on next use
+        self._changes: deque = deque()
+        self.index.add_listener(lambda *change: self._changes.append(change))
+        # Index reload count the derived orderings were built at
+        self._derived_reloads = self.index.reloads
+        # Held from log append to index update, so compaction never sees a
+        # half-saved analysis; also guards the derived orderings
+        self._write_lock = threading.RLock()
+        self.stats = MaterializedStats(self.storage_dir / "analyses_stats.json")
+        if not self.stats.exists:
+            self._rebuild_stats()
+        # candidate_id -> analysis_id, resume_id, candidate_name
+        candidates_file = self.storage_dir / "candidates_index.json"
+        rebuild_candidates = not candidates_file.exists()
+        self.candidates = IndexLog(candidates_file)
+        if rebuild_candidates:
+            self._rebuild_candidates()
     
     def _ensure_files_exist(self):
         """Create storage files if they don't exist"""
         if not self.analyses_file.exists():
             self.analyses_file.touch()
+    
+    def _sync_derived(self):
+        """Apply other workers' index changes to the orderings (_write_lock held)
         
-        if not self.index_file.exists():
-            self._save_index({})
+        Each change moves one entry; changes that leave the creation time and
+        scores alone (e.g. feedback counts) cost nothing. Only a reload of
+        the whole index drops the orderings.
+        """
+        self.index.refresh()
+        if self._derived_reloads != self.index.reloads:
+            self._derived_reloads = self.index.reloads
+            self._sorted = None
+            self._ranked = None
+        while self._changes:
+            analysis_id, old, new = self._changes.popleft()
+            if self._sorted is not None and _moved(old, new, ('created_at',)):
+                if old:
+                    self._sorted.remove(old['created_at'], analysis_id)
+                if new:
+                    self._sorted.add(new['created_at'], analysis_id)
+            if self._ranked is not None and _moved(old, new, RANKING_FIELDS):
+                if any(entry and any(field not in entry for field in METRICS.values())
+                       for entry in (old, new)):
+                    self._ranked = None  # needs the scores backfilled
+                    continue
+                if old:
+                    self._ranked.remove({"analysis_id": analysis_id, **old})
+                if new:
+                    self._ranked.add({"analysis_id": analysis_id, **new})
     
-    def _load_index(self) -> Dict:
-        """Load the analyses index"""
-        try:
-            with open(self.index_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
+    def _order(self) -> SortedKeyIndex:
+        """Analysis IDs ordered by creation time (built on first use)"""
+        with self._write_lock:
+            self._sync_derived()
+            if self._sorted is None:
+                self._sorted = SortedKeyIndex(
+                    (entry['created_at'], analysis_id) for analysis_id, entry in self.index.items()
+                )
+            return self._sorted
     
-    def _save_index(self, index: Dict):
-        """Save the analyses index"""
-        with open(self.index_file, 'w', encoding='utf-8') as f:
-            json.dump(index, f, indent=2)
+    def _ranking_entry(self, analysis_id: str, entry: Dict) -> Dict:
+        if any(field not in entry for field in METRICS.values()):
+            # Entries written before the scores were indexed: backfill once
+            record = self.offsets.get(analysis_id) or {}
+            scores = score_fields(record.get('analysis_result', {}))
+            entry.update(scores)
+            self.index.update(analysis_id, **scores)
+        return {"analysis_id": analysis_id, **entry}
+    
+    def _leaderboard(self) -> JobLeaderboard:
+        """Per-job score rankings (built on first use)"""
+        with self._write_lock:
+            self._sync_derived()
+            if self._ranked is None:
+                self._ranked = JobLeaderboard(
+                    self._ranking_entry(analysis_id, entry) for analysis_id, entry in self.index.items()
+                )
+            return self._ranked
     
     def save_analysis(self, job_id: str, resume_id: str, 
-                     analysis_result: Dict, candidate_name: str = "") -> Dict:
+                     analysis_result: Dict, candidate_name: str = "",
+                     candidate_id: str = "") -> Dict:
         """Save an analysis result
         
         Args:
@@ -49,6 +144,8 @@ class AnalysisStorage:
             resume_id: The resume ID being analyzed
             analysis_result: The analysis result from ATS service
             candidate_name: Candidate name
+            candidate_id: Key the UI uses for this candidate (defaults to
+                "<candidate_name>_<created_at>")
             
         Returns:
             Dict with analysis_id and details
@@ -56,10 +153,12 @@ class AnalysisStorage:
         # Generate unique ID
         analysis_id = str(uuid.uuid4())[:12]
         timestamp = datetime.now().isoformat()
+        candidate_id = candidate_id or default_candidate_id(candidate_name, timestamp)
         
         # Create analysis record
         analysis_record = {
             "analysis_id": analysis_id,
+            "candidate_id": candidate_id,
             "job_id": job_id,
             "resume_id": resume_id,
             "candidate_name": candidate_name,
@@ -70,21 +169,39 @@ class AnalysisStorage:
             "feedback_count": 0
         }
         
-        # Append to JSONL file
-        with open(self.analyses_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(analysis_record) + '\n')
-        
-        # Update index
-        index = self._load_index()
-        index[analysis_id] = {
-            "job_id": job_id,
-            "resume_id": resume_id,
-            "candidate_name": candidate_name,
-            "created_at": timestamp,
-            "overall_score": analysis_result.get('overall_score', 0),
-            "feedback_count": 0
-        }
-        self._save_index(index)
+        # Log, index and materialized stats change together (see MaterializedStats)
+        with self.stats.transaction(), self._write_lock:
+            # Append to JSONL file and record its byte offset
+            self.offsets.append(analysis_record)
+            
+            # Update index
+            self.index.set(analysis_id, {
+                "candidate_id": candidate_id,
+                "job_id": job_id,
+                "resume_id": resume_id,
+                "candidate_name": candidate_name,
+                "created_at": timestamp,
+                "overall_score": analysis_result.get('overall_score', 0),
+                "hiring_recommendation": analysis_result.get('hiring_recommendation', ''),
+                "company_name": analysis_result.get('company_name', ''),
+                "feedback_count": 0,
+                **score_fields(analysis_result)
+            })
+            if self._sorted is not None:
+                self._sorted.add(timestamp, analysis_id)
+            if self._ranked is not None:
+                self._ranked.add(self._ranking_entry(analysis_id, self.index.get(analysis_id)))
+            self.candidates.set(candidate_id, {
+                "analysis_id": analysis_id,
+                "resume_id": resume_id,
+                "candidate_name": candidate_name
+            })
+            
+            # Update materialized stats
+            summary = self._summary(analysis_id)
+            self._count_in_stats(summary, 1)
+            del summary['company_name']
+            self.stats.push_recent("analyses", summary, "analysis_id")
         
         return analysis_record
     
@@ -97,15 +214,127 @@ class AnalysisStorage:
         Returns:
             Analysis record or None if not found
         """
-        try:
-            with open(self.analyses_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    analysis = json.loads(line)
-                    if analysis['analysis_id'] == analysis_id:
-                        return analysis
-        except:
-            pass
-        return None
+        return self.offsets.get(analysis_id)
+    
+    def find_candidate(self, candidate_id: str) -> Optional[Dict]:
+        """Resolve a UI candidate_id to its analysis and resume
+        
+        Args:
+            candidate_id: The candidate key used by the UI
+            
+        Returns:
+            Dict with analysis_id, resume_id and candidate_name, or None
+        """
+        return self.candidates.get(candidate_id)
+    
+    def tail_position(self) -> Tuple[str, int]:
+        """Current end of the analysis log, as a starting point for read_since"""
+        with open(self.analyses_file, 'rb') as f:
+            return self.offsets.epoch(f), os.fstat(f.fileno()).st_size
+    
+    def read_since(self, position: Tuple[str, int]) -> Tuple[List[Dict], Tuple[str, int], bool]:
+        """Read analyses appended after a position
+        
+        Args:
+            position: (rewrite epoch, byte offset) from tail_position() or a
+                previous read_since()
+            
+        Returns:
+            Tuple of (new full analysis records in write order, new position,
+            rewritten). When analyses.jsonl was rewritten since the position
+            (archive), nothing is read, the position moves to the current end
+            and rewritten is True: the caller should reload what it keeps.
+        """
+        with open(self.analyses_file, 'rb') as f:
+            epoch, size = self.offsets.epoch(f), os.fstat(f.fileno()).st_size
+            epoch_then, offset = position
+            if epoch_then != epoch or offset > size:
+                return [], (epoch, size), True
+            records = []
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break  # partial line still being written
+                offset += len(raw)
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue
+                if record.get('analysis_id') in self.index:
+                    records.append(record)
+        return records, (epoch, offset), False
+    
+    def iter_analyses(self):
+        """Yield full analysis records in file order (full scan)"""
+        with open(self.analyses_file, 'rb') as f:
+            for raw in f:
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue
+                if record.get('analysis_id') in self.index:
+                    yield record
+    
+    def iter_export(self, job_id: Optional[str] = None,
+                    date_from: Optional[str] = None, date_to: Optional[str] = None,
+                    min_score: Optional[float] = None, max_score: Optional[float] = None):
+        """Yield full analysis records, newest first, filtered (for exports)
+        
+        Walks the creation-time order a page at a time and reads each
+        record from its log offset, so memory use does not grow with the
+        export. Filters are as in list_analyses_page.
+        """
+        position = None
+        while True:
+            with self._write_lock:
+                page = list(islice(self._order().iter_desc(position, date_from, date_to), EXPORT_PAGE_SIZE))
+            if not page:
+                return
+            position = page[-1]
+            for _, analysis_id in page:
+                entry = self.index.get(analysis_id)
+                if entry is None or (job_id and entry['job_id'] != job_id):
+                    continue
+                if min_score is not None and entry['overall_score'] < min_score:
+                    continue
+                if max_score is not None and entry['overall_score'] > max_score:
+                    continue
+                record = self.offsets.get(analysis_id)
+                if record:
+                    record['feedback_count'] = entry.get('feedback_count', 0)
+                    yield record
+    
+    def hot_bytes(self) -> int:
+        """On-disk size of the analysis log"""
+        return self.analyses_file.stat().st_size if self.analyses_file.exists() else 0
+    
+    def archive_analyses(self, analysis_ids: List[str], archive) -> int:
+        """Move analyses into a cold ArchiveStore and compact the log
+        
+        Args:
+            analysis_ids: Analyses to archive
+            archive: Destination ArchiveStore
+            
+        Returns:
+            Number of analyses archived
+        """
+        def records():
+            for analysis_id in analysis_ids:
+                entry = self.index.get(analysis_id)
+                record = self.offsets.get(analysis_id) if entry else None
+                if record:
+                    record['feedback_count'] = entry.get('feedback_count', 0)
+                    yield record
+        
+        def remove(batch: List[Dict]):
+            for record in batch:
+                self.delete_analysis(record['analysis_id'])
+        
+        archived = archive_in_batches(records(), archive, remove)
+        if archived:
+            with self._write_lock:
+                self.offsets.rewrite(lambda analysis_id: analysis_id in self.index)
+        return archived
     
     def list_analyses(self, job_id: Optional[str] = None, 
                      limit: int = 50) -> List[Dict]:
@@ -118,40 +347,135 @@ class AnalysisStorage:
         Returns:
             List of analysis records (summary only)
         """
-        analyses = []
-        try:
-            with open(self.analyses_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    analysis = json.loads(line)
-                    
-                    # Filter by job_id if provided
-                    if job_id and analysis['job_id'] != job_id:
-                        continue
-                    
-                    # Return summary without full analysis
-                    analyses.append({
-                        "analysis_id": analysis['analysis_id'],
-                        "job_id": analysis['job_id'],
-                        "resume_id": analysis['resume_id'],
-                        "candidate_name": analysis['candidate_name'],
-                        "created_at": analysis['created_at'],
-                        "overall_score": analysis['overall_score'],
-                        "hiring_recommendation": analysis['hiring_recommendation'],
-                        "feedback_count": analysis.get('feedback_count', 0)
-                    })
-        except:
-            pass
-        
-        # Return most recent first
-        analyses.sort(key=lambda x: x['created_at'], reverse=True)
-        return analyses[:limit]
+        return self.list_analyses_page(limit=limit, job_id=job_id)['items']
+    
+    def list_analyses_page(self, limit: int = 50, cursor: Optional[str] = None,
+                           job_id: Optional[str] = None,
+                           resume_id: Optional[str] = None,
+                           min_score: Optional[float] = None,
+                           max_score: Optional[float] = None,
+                           recommendation: Optional[str] = None,
+                           company: Optional[str] = None,
+                           date_from: Optional[str] = None,
+                           date_to: Optional[str] = None) -> Dict:
+        """List one page of analyses (most recent first) with optional filters
+        
+        Args:
+            limit: Page size
+            cursor: Opaque cursor from a previous page's next_cursor
+            job_id: Only analyses for this job
+            resume_id: Only analyses of this resume
+            min_score: Inclusive lower bound on overall_score
+            max_score: Inclusive upper bound on overall_score
+            recommendation: Leading verdict of the hiring recommendation,
+                e.g. "hire" or "maybe" (case-insensitive prefix)
+            company: Case-insensitive substring of the analysed company name
+            date_from: Inclusive lower bound on created_at (ISO date/datetime)
+            date_to: Inclusive upper bound on created_at (ISO date/datetime)
+            
+        Returns:
+            Dict with "items" (analysis summaries) and "next_cursor"
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        recommendation = recommendation.lower() if recommendation else None
+        company = company.lower() if company else None
+        
+        def matches(analysis: Dict) -> bool:
+            if job_id and analysis['job_id'] != job_id:
+                return False
+            if resume_id and analysis['resume_id'] != resume_id:
+                return False
+            if min_score is not None and analysis['overall_score'] < min_score:
+                return False
+            if max_score is not None and analysis['overall_score'] > max_score:
+                return False
+            if recommendation and not analysis['hiring_recommendation'].lower().startswith(recommendation):
+                return False
+            if company and company not in analysis['company_name'].lower():
+                return False
+            return True
+        
+        page = paginate(
+            self._order().iter_desc(decode_cursor(cursor), date_from, date_to),
+            self._summary,
+            matches,
+            limit
+        )
+        for analysis in page['items']:
+            del analysis['company_name']
+        return page
+    
+    def top_analyses(self, job_id: str, metric: str = "overall", k: int = 10,
+                     min_score: Optional[float] = None,
+                     max_score: Optional[float] = None) -> List[Dict]:
+        """Best analyses of a job from the per-job rankings
+        
+        Args:
+            job_id: The job ID
+            metric: Score to rank by ("overall", "skill" or "experience")
+            k: Number of analyses to return
+            min_score: Inclusive lower bound on the ranked score
+            max_score: Inclusive upper bound on the ranked score
+            
+        Returns:
+            Analysis summaries with their scores and rank, best first
+        
+        Raises:
+            ValueError: If the metric is unknown
+        """
+        ranked = []
+        for analysis_id in self._leaderboard().top(job_id, metric, k, min_score, max_score):
+            summary = self._summary(analysis_id)
+            if summary is None:
+                continue
+            del summary['company_name']
+            entry = self.index.get(analysis_id)
+            summary.update((field, entry.get(field, 0)) for field in METRICS.values())
+            summary['rank'] = len(ranked) + 1
+            ranked.append(summary)
+        return ranked
+    
+    def _summary(self, analysis_id: str) -> Optional[Dict]:
+        """Analysis summary from the in-memory index"""
+        entry = self.index.get(analysis_id)
+        if entry is None:
+            return None
+        if 'hiring_recommendation' not in entry:
+            # Entries written before these fields were indexed: backfill once
+            record = self.offsets.get(analysis_id) or {}
+            result = record.get('analysis_result', {})
+            entry['hiring_recommendation'] = record.get('hiring_recommendation', '')
+            entry['company_name'] = result.get('company_name', '')
+            self.index.update(
+                analysis_id,
+                hiring_recommendation=entry['hiring_recommendation'],
+                company_name=entry['company_name']
+            )
+        return {
+            "analysis_id": analysis_id,
+            "job_id": entry['job_id'],
+            "resume_id": entry['resume_id'],
+            "candidate_name": entry['candidate_name'],
+            "created_at": entry['created_at'],
+            "overall_score": entry['overall_score'],
+            "hiring_recommendation": entry['hiring_recommendation'],
+            "feedback_count": entry.get('feedback_count', 0),
+            "company_name": entry.get('company_name', '')
+        }
+    
+    def count_analyses(self) -> int:
+        """Total number of analyses"""
+        return len(self.index)
+    
+    def version(self) -> str:
+        """Validator that changes whenever the analyses change (same in every worker)"""
+        return self.index.signature()
     
     def increment_feedback_count(self, analysis_id: str):
         """Increment the feedback count for an analysis"""
-        index = self._load_index()
-        if analysis_id in index:
-            index[analysis_id]['feedback_count'] = index[analysis_id].get('feedback_count', 0) + 1
-            self._save_index(index)
+        self.index.increment(analysis_id, 'feedback_count')
     
     def get_analyses_by_job(self, job_id: str) -> List[Dict]:
         """Get all analyses for a specific job
@@ -173,9 +497,85 @@ class AnalysisStorage:
         Returns:
             True if deleted, False otherwise
         """
-        index = self._load_index()
-        if analysis_id in index:
-            del index[analysis_id]
-            self._save_index(index)
-            return True
-        return False
+        with self.stats.transaction(), self._write_lock:
+            entry = self.index.get(analysis_id)
+            if entry is None:
+                return False
+            summary = self._summary(analysis_id)
+            if self._sorted is not None:
+                self._sorted.remove(entry['created_at'], analysis_id)
+            if self._ranked is not None:
+                self._ranked.remove(self._ranking_entry(analysis_id, entry))
+            self.index.delete(analysis_id)
+            candidate_id = self._candidate_id(entry)
+            if (self.candidates.get(candidate_id) or {}).get('analysis_id') == analysis_id:
+                self.candidates.delete(candidate_id)
+            
+            self._count_in_stats(summary, -1)
+            if self.stats.remove_recent("analyses", "analysis_id", analysis_id):
+                self._refill_recent()
+        return True
+    
+    def get_stats(self) -> Dict:
+        """Analysis statistics from materialized state
+        
+        Returns:
+            Dict with total, average score, score and recommendation
+            histograms, per-job analysis counts and the most recent analyses
+        """
+        self.stats.refresh()
+        if not self.stats.exists:
+            self._rebuild_stats()  # left behind by an interrupted write
+        total = len(self.index)
+        histogram = self.stats.group("score_histogram")
+        recent = self.stats.recent("analyses")
+        for analysis in recent:
+            entry = self.index.get(analysis['analysis_id'])
+            if entry:
+                analysis['feedback_count'] = entry.get('feedback_count', 0)
+        return {
+            "total": total,
+            "average_score": round(self.stats.counter("score_sum") / total, 2) if total else 0.0,
+            "score_histogram": {bucket: int(histogram.get(bucket, 0)) for bucket in SCORE_BUCKETS},
+            "by_recommendation": {k: int(v) for k, v in self.stats.group("by_recommendation").items()},
+            "by_job": {k: int(v) for k, v in self.stats.group("by_job").items()},
+            "recent": recent
+        }
+    
+    def _count_in_stats(self, summary: Dict, sign: int):
+        """Add (sign=1) or remove (sign=-1) one analysis from the aggregates"""
+        score = summary.get('overall_score', 0) or 0
+        self.stats.incr("score_sum", sign * score)
+        self.stats.incr_group("score_histogram", score_bucket(score), sign)
+        self.stats.incr_group(
+            "by_recommendation", recommendation_verdict(summary.get('hiring_recommendation', '')), sign
+        )
+        self.stats.incr_group("by_job", summary.get('job_id', ''), sign)
+    
+    def _refill_recent(self):
+        for analysis in reversed(self.list_analyses(limit=self.stats.recent_size)):
+            self.stats.push_recent("analyses", analysis, "analysis_id")
+    
+    def _rebuild_stats(self):
+        """Recompute all analysis statistics from the index"""
+        with self.stats.transaction():
+            self.stats.reset()
+            for analysis_id, _ in self.index.items():
+                summary = self._summary(analysis_id)
+                if summary:
+                    self._count_in_stats(summary, 1)
+            self._refill_recent()
+    
+    @staticmethod
+    def _candidate_id(entry: Dict) -> str:
+        return entry.get('candidate_id') or default_candidate_id(entry['candidate_name'], entry['created_at'])
+    
+    def _rebuild_candidates(self):
+        """Build the candidate_id map from the index (stores created before it existed)"""
+        for analysis_id, entry in sorted(self.index.items(), key=lambda item: item[1]['created_at']):
+            self.candidates.set(self._candidate_id(entry), {
+                "analysis_id": analysis_id,
+                "resume_id": entry['resume_id'],
+                "candidate_name": entry['candidate_name']
+            })
+        self.candidates.compact()
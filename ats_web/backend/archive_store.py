@@ -0,0 +1,197 @@
+"""
+Cold Archive Store
+Compressed, append-only archive for records moved out of the hot stores
+by the retention job (old analyses, feedback of closed jobs, ...). Records
+are written as compressed JSONL segments and stay queryable on demand
+through a small summary index.
+"""
+import gzip
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+from index_log import IndexLog
+from blob_store import ZSTD_AVAILABLE, ZSTD_LEVEL
+
+if ZSTD_AVAILABLE:
+    import zstandard
+
+
+# Records per segment; a lookup decompresses at most one segment
+SEGMENT_RECORDS = 5000
+
+
+class ArchiveStore:
+    """Compressed JSONL segments of one record kind plus a summary index
+
+    Layout under root_dir:
+        <kind>_000001.jsonl.zst ...  archived records (.jsonl.gz without zstandard)
+        <kind>_index.json            record key -> segment + summary fields
+                                     (snapshot + mutation log, see IndexLog)
+    """
+
+    def __init__(self, root_dir: str, kind: str, key_field: str,
+                 summary_fields: Sequence[str] = (), sort_field: Optional[str] = None):
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.kind = kind
+        self.key_field = key_field
+        self.summary_fields = tuple(summary_fields)
+        self.sort_field = sort_field
+        self.index = IndexLog(self.root_dir / f"{kind}_index.json")
+        self._lock = threading.Lock()
+        # Most recently decompressed segment: (name, {key: record})
+        self._segment_cache = (None, {})
+
+    def _segments(self) -> List[Path]:
+        return sorted(
+            p for p in self.root_dir.glob(f"{self.kind}_*.jsonl.*")
+            if not p.name.endswith(".tmp")
+        )
+
+    def _next_segment_name(self) -> str:
+        numbers = [int(p.name[len(self.kind) + 1:].split('.')[0]) for p in self._segments()]
+        suffix = "zst" if ZSTD_AVAILABLE else "gz"
+        return f"{self.kind}_{max(numbers, default=0) + 1:06d}.jsonl.{suffix}"
+
+    @staticmethod
+    def _compress(data: bytes, name: str) -> bytes:
+        if name.endswith(".zst"):
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+        return gzip.compress(data, 6)
+
+    @staticmethod
+    def _decompress(data: bytes, name: str) -> bytes:
+        if name.endswith(".zst"):
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+        return gzip.decompress(data)
+
+    def archive(self, records: List[Dict]) -> int:
+        """Write records to new compressed segment(s) and index them
+
+        Segments are fully written before they are indexed, so callers can
+        remove the records from the hot store once this returns.
+
+        Returns:
+            Compressed bytes written
+        """
+        written = 0
+        for start in range(0, len(records), SEGMENT_RECORDS):
+            chunk = records[start:start + SEGMENT_RECORDS]
+            with self._lock:
+                name = self._next_segment_name()
+                raw = b''.join((json.dumps(r) + '\n').encode('utf-8') for r in chunk)
+                payload = self._compress(raw, name)
+                tmp_file = self.root_dir / f"{name}.tmp"
+                with open(tmp_file, 'wb') as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.root_dir / name)
+                written += len(payload)
+            for record in chunk:
+                entry = {field: record.get(field) for field in self.summary_fields}
+                entry['segment'] = name
+                self.index.set(record[self.key_field], entry)
+        return written
+
+    def _read_segment(self, name: str) -> Dict[str, Dict]:
+        with self._lock:
+            cached_name, records = self._segment_cache
+            if cached_name == name:
+                return records
+        with open(self.root_dir / name, 'rb') as f:
+            raw = self._decompress(f.read(), name)
+        records = {}
+        for line in raw.splitlines():
+            try:
+                record = json.loads(line)
+                records[record[self.key_field]] = record
+            except (ValueError, KeyError):
+                continue
+        with self._lock:
+            self._segment_cache = (name, records)
+        return records
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Full archived record (decompresses its segment)"""
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        try:
+            return self._read_segment(entry['segment']).get(key)
+        except OSError:
+            return None
+
+    def list(self, limit: int = 50, **filters) -> List[Dict]:
+        """Archived record summaries, newest first, filtered by field equality
+
+        Args:
+            limit: Maximum number of summaries
+            **filters: Summary field values to match, e.g. job_id="..."
+
+        Returns:
+            List of summaries (key field plus the indexed summary fields)
+        """
+        items = []
+        for key, entry in self.index.items():
+            if all(entry.get(field) == value for field, value in filters.items() if value is not None):
+                summary = {self.key_field: key}
+                summary.update((f, entry.get(f)) for f in self.summary_fields)
+                items.append(summary)
+        if self.sort_field:
+            items.sort(key=lambda s: s.get(self.sort_field) or '', reverse=True)
+        return items[:max(0, limit)]
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Every archived record, segment by segment"""
+        for path in self._segments():
+            for key, record in self._read_segment(path.name).items():
+                if key in self.index:
+                    yield record
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get_stats(self) -> Dict:
+        segments = self._segments()
+        return {
+            "records": len(self.index),
+            "segments": len(segments),
+            "bytes": sum(p.stat().st_size for p in segments)
+        }
+
+    def close(self):
+        self.index.close()
+
+
+def archive_in_batches(records: Iterator[Dict], archive: ArchiveStore,
+                       on_archived: Callable[[List[Dict]], None]) -> int:
+    """Archive a stream of records one segment at a time
+
+    Args:
+        records: Records to archive
+        archive: Destination archive
+        on_archived: Called with each batch once it is safely archived
+            (typically removes the batch from the hot store)
+
+    Returns:
+        Number of records archived
+    """
+    archived, batch = 0, []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= SEGMENT_RECORDS:
+            archive.archive(batch)
+            on_archived(batch)
+            archived += len(batch)
+            batch = []
+    if batch:
+        archive.archive(batch)
+        on_archived(batch)
+        archived += len(batch)
+    return archived
@@ -0,0 +1,237 @@
+"""
+Segment Blob Store
+Content-addressed storage that packs many small files (resume PDFs and
+texts) into a few large append-only segment files. Each blob is stored
+once per SHA-256 digest, zstd-compressed when that saves space, and read
+back through a memory map of its segment.
+
+Worker processes can share one store: writes and reference count changes
+hold an flock on segments.lock, and each record's offset is taken from the
+file position after its write.
+"""
+import hashlib
+import mmap
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Optional, Union
+from file_lock import FileLock
+from index_log import IndexLog
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+    print("Warning: zstandard not installed, blobs fall back to zlib. Install with: pip install zstandard")
+
+
+CODEC_RAW = 0
+CODEC_ZSTD = 1
+CODEC_ZLIB = 2
+
+# Record header: magic, sha256 digest, codec, stored length, original length
+HEADER = struct.Struct("<4s32sBII")
+MAGIC = b"BLOB"
+
+SEGMENT_SIZE = 256 * 1024 * 1024
+ZSTD_LEVEL = 3
+# Keep the original bytes unless compression saves at least this fraction
+MIN_SAVING = 0.05
+
+
+class SegmentBlobStore:
+    """Append-only, content-addressed blob store on segment files
+
+    Layout under root_dir:
+        seg_000001.dat ...   header + payload records, appended in order
+        blobs_index.json     digest -> segment, offset, lengths, codec, refs
+                             (snapshot + mutation log, see IndexLog)
+
+    Blobs are reference counted: storing the same content twice adds a
+    reference, and delete() only drops the index entry once the last
+    reference is gone. Segment space is not reclaimed.
+    """
+
+    def __init__(self, root_dir: str, segment_size: int = SEGMENT_SIZE):
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.index = IndexLog(self.root_dir / "blobs_index.json")
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(self.root_dir / "segments.lock")
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._segment = self._last_segment()
+        self._writer = open(self._segment_path(self._segment), 'ab')
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.root_dir / f"seg_{segment:06d}.dat"
+
+    def _last_segment(self) -> int:
+        numbers = [int(p.stem[4:]) for p in self.root_dir.glob("seg_*.dat")]
+        return max(numbers) if numbers else 1
+
+    def _compress(self, data: bytes):
+        if ZSTD_AVAILABLE:
+            codec, payload = CODEC_ZSTD, zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+        else:
+            codec, payload = CODEC_ZLIB, zlib.compress(data, 6)
+        if len(payload) > len(data) * (1 - MIN_SAVING):
+            return CODEC_RAW, data  # already compressed (most PDFs)
+        return codec, payload
+
+    def put(self, data: bytes) -> str:
+        """Store a blob (or add a reference to identical content)
+
+        Returns:
+            Hex SHA-256 digest addressing the blob
+        """
+        raw_digest = hashlib.sha256(data).digest()
+        digest = raw_digest.hex()
+        with self._lock, self._file_lock.exclusive():
+            if self.index.increment(digest, 'refs'):
+                return digest
+
+            codec, payload = self._compress(data)
+            # Another process may have started a newer segment
+            while self._segment_path(self._segment + 1).exists():
+                self._switch_segment(self._segment + 1)
+            end = self._segment_path(self._segment).stat().st_size
+            if end and end + HEADER.size + len(payload) > self.segment_size:
+                self._switch_segment(self._segment + 1)
+
+            # One write per record; the offset is read back after it, since
+            # O_APPEND places it at whatever the end of the file is
+            self._writer.write(HEADER.pack(MAGIC, raw_digest, codec, len(payload), len(data)) + payload)
+            self._writer.flush()
+            offset = self._writer.tell() - len(payload)
+
+            self.index.set(digest, {
+                "segment": self._segment,
+                "offset": offset,
+                "length": len(payload),
+                "size": len(data),
+                "codec": codec,
+                "refs": 1
+            })
+        return digest
+
+    def _switch_segment(self, segment: int):
+        self._writer.close()
+        self._segment = segment
+        self._writer = open(self._segment_path(segment), 'ab')
+
+    def _map(self, segment: int, end: int) -> mmap.mmap:
+        """Memory map of a segment covering at least [0, end)"""
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < end:
+            # The active segment grows; remap it (old maps close once unreferenced)
+            with open(self._segment_path(segment), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+        return mapped
+
+    def view(self, digest: str) -> Optional[Union[memoryview, bytes]]:
+        """Blob contents without copying when stored uncompressed
+
+        Returns:
+            A read-only memoryview into the segment for raw blobs, the
+            decompressed bytes otherwise, or None if the digest is unknown
+        """
+        entry = self.index.get(digest)
+        if entry is None:
+            return None
+        offset, length = entry['offset'], entry['length']
+        with self._lock:
+            mapped = self._map(entry['segment'], offset + length)
+        payload = memoryview(mapped)[offset:offset + length]
+
+        if entry['codec'] == CODEC_ZSTD:
+            return zstandard.ZstdDecompressor().decompress(payload, max_output_size=entry['size'])
+        if entry['codec'] == CODEC_ZLIB:
+            return zlib.decompress(payload)
+        return payload
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """Blob contents as bytes, or None if the digest is unknown"""
+        data = self.view(digest)
+        return bytes(data) if isinstance(data, memoryview) else data
+
+    def size(self, digest: str) -> Optional[int]:
+        """Original (uncompressed) size of a blob"""
+        entry = self.index.get(digest)
+        return entry['size'] if entry else None
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self.index
+
+    def delete(self, digest: str) -> bool:
+        """Drop one reference to a blob
+
+        Returns:
+            True if the digest was known, False otherwise
+        """
+        with self._lock, self._file_lock.exclusive():
+            entry = self.index.get(digest)
+            if entry is None:
+                return False
+            if entry.get('refs', 1) > 1:
+                self.index.increment(digest, 'refs', -1)
+            else:
+                self.index.delete(digest)
+            return True
+
+    def get_stats(self) -> Dict:
+        """Blob count, logical vs. stored bytes and on-disk segment bytes"""
+        entries = list(self.index.values())
+        return {
+            "blobs": len(entries),
+            "segments": len(list(self.root_dir.glob("seg_*.dat"))),
+            "original_bytes": sum(e['size'] for e in entries),
+            "stored_bytes": sum(e['length'] for e in entries),
+            "segment_bytes": sum(p.stat().st_size for p in self.root_dir.glob("seg_*.dat"))
+        }
+
+    def rebuild_index(self) -> int:
+        """Recreate missing index entries by scanning the segment headers
+
+        Recovers from a lost or damaged index; recovered blobs get a single
+        reference. A torn record at the end of a segment is ignored.
+
+        Returns:
+            Number of entries recovered
+        """
+        recovered = 0
+        with self._lock, self._file_lock.exclusive():
+            self._writer.flush()
+            for path in sorted(self.root_dir.glob("seg_*.dat")):
+                segment = int(path.stem[4:])
+                file_size = path.stat().st_size
+                with open(path, 'rb') as f:
+                    position = 0
+                    while position + HEADER.size <= file_size:
+                        f.seek(position)
+                        magic, raw_digest, codec, length, size = HEADER.unpack(f.read(HEADER.size))
+                        if magic != MAGIC or position + HEADER.size + length > file_size:
+                            break
+                        digest = raw_digest.hex()
+                        if digest not in self.index:
+                            self.index.set(digest, {
+                                "segment": segment,
+                                "offset": position + HEADER.size,
+                                "length": length,
+                                "size": size,
+                                "codec": codec,
+                                "refs": 1
+                            })
+                            recovered += 1
+                        position += HEADER.size + length
+        return recovered
+
+    def close(self):
+        with self._lock:
+            self._writer.close()
+            self._maps.clear()
+            self.index.close()
+            self._file_lock.close()
@@ -0,0 +1,125 @@
+"""
+Candidate Caches
+Bounded, dict-like LRU caches for per-candidate data (analysis results and
+resume texts) keyed by candidate_id. Entries are evicted by count and by
+approximate byte size, and a miss faults the entry back in from storage,
+so memory stays flat however many candidates have been analysed.
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+def approximate_size(value: Any) -> int:
+    """Rough in-memory footprint of a cached value, in bytes"""
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+class CandidateCache:
+    """LRU mapping with entry-count and byte-size bounds and read-through loading
+
+    Supports the subset of the dict API main.py uses (``in``, ``[]``,
+    ``get``, assignment, ``keys``/``values``/``items``, ``len``, ``clear``).
+    Membership tests and lookups call ``loader`` on a miss; iteration only
+    covers the entries currently resident.
+    """
+
+    def __init__(self, name: str, loader: Optional[Callable[[str], Any]] = None,
+                 max_entries: int = 200, max_bytes: int = 32 * 1024 * 1024):
+        self.name = name
+        self.loader = loader
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _store(self, key: str, value: Any):
+        size = approximate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            # Always keep the newest entry, even if it alone exceeds max_bytes
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Cached value, loading it from storage on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = self.loader(key) if self.loader else None
+        if value is None:
+            return default
+        self._store(key, value)
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        self._store(key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def values(self) -> List[Any]:
+        with self._lock:
+            return [value for value, _ in self._entries.values()]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        with self._lock:
+            return [(key, value) for key, (value, _) in self._entries.items()]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def memory_usage(self) -> Dict:
+        """Resident size and hit/miss counters"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,114 @@
+"""
+Binary Embedding Log
+Append-only sidecar holding fixed-size float32 embedding rows, so records
+in a JSONL log only carry a row number instead of hundreds of floats
+serialized as text. Each row stores the record's int64 vector ID next to
+its vector, which lets vector indexes be rebuilt from this file alone.
+
+Layout: 16-byte header (magic, dimension), then rows of
+<int64 id><float32 x dim>. Rows are appended with single O_APPEND writes
+and counted from the file size, so several worker processes can share one
+log.
+"""
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+MAGIC = b"ATSEMB01"
+HEADER = struct.Struct("<8sI4x")
+
+
+class EmbeddingLog:
+    """Fixed-width (id, vector) rows appended to a binary file"""
+
+    def __init__(self, path: Path, dim: int):
+        self.path = Path(path)
+        self.dim = dim
+        self.row_dtype = np.dtype([("id", "<i8"), ("vector", "<f4", (dim,))])
+        self._lock = threading.Lock()
+        if not self.path.exists() or self.path.stat().st_size < HEADER.size:
+            with open(self.path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, dim))
+        with open(self.path, 'rb+') as f:
+            magic, stored_dim = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or stored_dim != dim:
+                raise ValueError(f"{self.path} is not a {dim}-d embedding log")
+            # Drop a torn final row left by a crash
+            size = os.fstat(f.fileno()).st_size
+            whole = HEADER.size + (size - HEADER.size) // self.row_dtype.itemsize * self.row_dtype.itemsize
+            if whole != size:
+                f.truncate(whole)
+            self._rows = (whole - HEADER.size) // self.row_dtype.itemsize
+        self._file = open(self.path, 'ab')
+
+    def append(self, ids: Sequence[int], vectors) -> int:
+        """Append rows
+
+        Args:
+            ids: int64 vector IDs
+            vectors: Matching float32 vectors (n x dim)
+
+        Returns:
+            Row number of the first appended row
+        """
+        rows = np.zeros(len(ids), dtype=self.row_dtype)
+        rows["id"] = ids
+        rows["vector"] = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        with self._lock:
+            self._file.write(rows.tobytes())
+            self._file.flush()
+            # Position after our write: other processes may have appended before it
+            self._rows = (self._file.tell() - HEADER.size) // self.row_dtype.itemsize
+            return self._rows - len(ids)
+
+    def _refresh(self) -> int:
+        """Pick up rows appended by other processes"""
+        size = os.stat(self.path).st_size
+        self._rows = max(self._rows, (size - HEADER.size) // self.row_dtype.itemsize)
+        return self._rows
+
+    def read(self, start: int = 0, stop: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, vectors) of rows [start, stop)"""
+        rows = self._refresh()
+        stop = rows if stop is None else min(stop, rows)
+        count = max(0, stop - start)
+        if not count:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, self.dim), dtype=np.float32)
+        rows = np.fromfile(
+            self.path, dtype=self.row_dtype, count=count,
+            offset=HEADER.size + start * self.row_dtype.itemsize
+        )
+        return rows["id"].astype(np.int64), np.ascontiguousarray(rows["vector"])
+
+    def get(self, row: int) -> Optional[np.ndarray]:
+        """Vector of one row"""
+        if not 0 <= row < self._rows and not 0 <= row < self._refresh():
+            return None
+        return self.read(row, row + 1)[1][0]
+
+    def memmap(self) -> np.ndarray:
+        """Read-only structured view (fields id, vector) of all rows, paged in on demand"""
+        rows = self._refresh()
+        if not rows:
+            return np.zeros(0, dtype=self.row_dtype)
+        return np.memmap(self.path, dtype=self.row_dtype, mode='r', offset=HEADER.size, shape=(rows,))
+
+    def sync(self):
+        """fsync appended rows"""
+        with self._lock:
+            os.fsync(self._file.fileno())
+
+    def __len__(self) -> int:
+        return self._refresh()
+
+    def size_bytes(self) -> int:
+        return HEADER.size + len(self) * self.row_dtype.itemsize
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,380 @@
+"""
+Shared Embedding Matrix
+Read-only, memory-mapped snapshots of an embedding collection, optionally
+quantized to float16 or int8. Every worker process opens the same .npy
+files with numpy's mmap mode, so the vectors live once in the OS page cache
+instead of once per worker, and per-worker memory no longer grows with the
+corpus.
+
+A snapshot is a directory of .npy files published atomically through a
+CURRENT pointer:
+
+    vectors.npy       float32 / float16 / int8 rows (n x dim)
+    scales.npy        per-row dequantization scale (int8 only)
+    norms.npy         squared L2 norm of each dequantized row
+    ids.npy           int64 vector IDs
+    keys.npy          record keys (fixed-width bytes)
+    centroids.npy     coarse clusters, when the snapshot is large enough
+    list_offsets.npy  row range of each cluster (rows are grouped by cluster)
+
+Search is exact below FAISS_PROMOTE_AT rows; larger snapshots probe the
+FAISS_NPROBE nearest clusters, an IVF layout scanned straight from the map.
+"""
+import json
+import math
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from vector_index import FAISS_NPROBE, FAISS_PROMOTE_AT
+
+
+MATRIX_DTYPES = ("float32", "float16", "int8")
+EMBEDDING_MATRIX_DTYPE = os.getenv("EMBEDDING_MATRIX_DTYPE", "int8").lower()
+
+# Rows quantized / scanned per step, bounding build and search memory
+CHUNK_ROWS = 65536
+# Sample rows per cluster used to train the coarse clusters
+TRAIN_PER_LIST = 32
+KMEANS_ITERATIONS = 8
+# A build lock older than this is left over from a crashed builder
+STALE_LOCK_SECONDS = 3600
+
+
+def _quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """(codes, scales) of float32 rows; scales is None unless dtype is int8"""
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    return vectors.astype(dtype), None
+
+
+def _dequantize(codes: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+    vectors = np.asarray(codes, dtype=np.float32)
+    if scales is not None:
+        vectors *= np.asarray(scales)[:, None]
+    return vectors
+
+
+def _kmeans(sample: np.ndarray, nlist: int, iterations: int = KMEANS_ITERATIONS) -> np.ndarray:
+    """Lloyd's k-means on a float32 sample"""
+    rng = np.random.default_rng(0)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _nearest(sample, centroids)
+        for c in range(nlist):
+            members = sample[assignments == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+            else:
+                centroids[c] = sample[rng.integers(len(sample))]
+    return centroids
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest centroid of each row"""
+    distances = (centroids ** 2).sum(axis=1)[None, :] - 2 * vectors @ centroids.T
+    return distances.argmin(axis=1)
+
+
+def build_matrix(root_dir: Path, rows: np.ndarray, keys: Sequence[str],
+                 dtype: str = EMBEDDING_MATRIX_DTYPE, source_rows: Optional[int] = None,
+                 select: Optional[np.ndarray] = None) -> Dict:
+    """Write a new snapshot and make it current
+
+    Args:
+        root_dir: Directory holding the snapshots and the CURRENT pointer
+        rows: Structured array with "id" (int64) and "vector" (float32) fields,
+            e.g. EmbeddingLog.memmap(); read in chunks, never loaded whole
+        keys: Record key of each row
+        dtype: "float32", "float16" or "int8"
+        source_rows: Rows of the source log the snapshot covers (default: len(rows))
+        select: Sorted numbers of the rows to include (default: all); the
+            others are covered but left out, e.g. superseded rows
+
+    Returns:
+        The snapshot's metadata
+
+    Raises:
+        ValueError: If the dtype is unknown
+    """
+    if dtype not in MATRIX_DTYPES:
+        raise ValueError(f"Unknown matrix dtype '{dtype}', expected one of: {', '.join(MATRIX_DTYPES)}")
+    root_dir = Path(root_dir)
+    root_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    source = np.arange(len(rows)) if select is None else np.asarray(select, dtype=np.int64)
+    n = len(source)
+    dim = rows.dtype["vector"].shape[0]
+    version = f"v{time.time_ns()}"
+    out_dir = root_dir / version
+    out_dir.mkdir()
+
+    # Coarse clusters for large snapshots; rows are then written grouped by cluster
+    nlist = int(math.sqrt(n)) if n >= FAISS_PROMOTE_AT else 0
+    order = source
+    if nlist:
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(n, min(n, nlist * TRAIN_PER_LIST), replace=False))
+        centroids = _kmeans(np.asarray(rows["vector"][source[sample_rows]], dtype=np.float32), nlist)
+        assignments = np.empty(n, dtype=np.int32)
+        for lo in range(0, n, CHUNK_ROWS):
+            assignments[lo:lo + CHUNK_ROWS] = _nearest(
+                np.asarray(rows["vector"][source[lo:lo + CHUNK_ROWS]], dtype=np.float32), centroids
+            )
+        grouped = np.argsort(assignments, kind="stable")
+        order = source[grouped]
+        list_offsets = np.searchsorted(assignments[grouped], np.arange(nlist + 1)).astype(np.int64)
+        np.save(out_dir / "centroids.npy", centroids)
+        np.save(out_dir / "list_offsets.npy", list_offsets)
+        del assignments
+
+    open_memmap = np.lib.format.open_memmap
+    vectors_out = open_memmap(out_dir / "vectors.npy", mode="w+", dtype=dtype, shape=(n, dim))
+    norms_out = open_memmap(out_dir / "norms.npy", mode="w+", dtype=np.float32, shape=(n,))
+    ids_out = open_memmap(out_dir / "ids.npy", mode="w+", dtype=np.int64, shape=(n,))
+    scales_out = open_memmap(out_dir / "scales.npy", mode="w+", dtype=np.float32, shape=(n,)) \
+        if dtype == "int8" else None
+    for lo in range(0, n, CHUNK_ROWS):
+        chunk = rows[order[lo:lo + CHUNK_ROWS]]
+        codes, scales = _quantize(np.asarray(chunk["vector"], dtype=np.float32), dtype)
+        vectors_out[lo:lo + len(chunk)] = codes
+        norms_out[lo:lo + len(chunk)] = (_dequantize(codes, scales) ** 2).sum(axis=1)
+        ids_out[lo:lo + len(chunk)] = chunk["id"]
+        if scales_out is not None:
+            scales_out[lo:lo + len(chunk)] = scales
+    key_array = np.array([keys[i].encode('utf-8') for i in order], dtype=bytes) if n \
+        else np.zeros(0, dtype="S1")
+    np.save(out_dir / "keys.npy", key_array)
+    for array in (vectors_out, norms_out, ids_out, scales_out):
+        if array is not None:
+            array.flush()
+    del vectors_out, norms_out, ids_out, scales_out
+
+    meta = {
+        "version": version,
+        "dtype": dtype,
+        "dim": dim,
+        "count": n,
+        "nlist": nlist,
+        "source_rows": len(rows) if source_rows is None else source_rows,
+        "build_s": round(time.perf_counter() - start, 2)
+    }
+    with open(out_dir / "meta.json", 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    tmp_file = root_dir / "CURRENT.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, root_dir / "CURRENT")
+    _remove_old_snapshots(root_dir, keep=version)
+    return meta
+
+
+def _remove_old_snapshots(root_dir: Path, keep: str):
+    """Delete snapshots older than the current and previous one
+
+    The previous one stays for workers that have not switched yet; on
+    platforms where mapped files cannot be deleted this is retried later.
+    """
+    versions = sorted((p for p in root_dir.iterdir() if p.is_dir() and p.name.startswith("v")),
+                      key=lambda p: int(p.name[1:]))
+    for path in versions[:-2]:
+        if path.name != keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class BuildLock:
+    """Cross-process lock file so only one worker builds a snapshot at a time"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.acquired = False
+
+    def __enter__(self) -> "BuildLock":
+        try:
+            if self.path.exists() and time.time() - self.path.stat().st_mtime > STALE_LOCK_SECONDS:
+                self.path.unlink()
+            os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            self.acquired = True
+        except (FileExistsError, FileNotFoundError):
+            self.acquired = False
+        return self
+
+    def __exit__(self, *exc):
+        if self.acquired:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedEmbeddingMatrix:
+    """Read-only view of the current snapshot in a directory
+
+    Call refresh() (cheap: one stat) to switch to a snapshot published by
+    another process.
+    """
+
+    def __init__(self, root_dir: Path):
+        self.root_dir = Path(root_dir)
+        self.meta: Dict = {}
+        self._pointer_mtime = None
+        self._arrays: Dict[str, np.ndarray] = {}
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Open the current snapshot if it changed
+
+        Returns:
+            True if a new snapshot was opened
+        """
+        pointer = self.root_dir / "CURRENT"
+        try:
+            mtime = pointer.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._pointer_mtime:
+            return False
+        version = pointer.read_text(encoding='utf-8').strip()
+        snapshot = self.root_dir / version
+        with open(snapshot / "meta.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = {}
+        for name in ("vectors", "norms", "ids", "keys", "scales", "centroids", "list_offsets"):
+            path = snapshot / f"{name}.npy"
+            if path.exists():
+                # Centroids and offsets are small and read on every query
+                mmap_mode = None if name in ("centroids", "list_offsets") else 'r'
+                arrays[name] = np.load(path, mmap_mode=mmap_mode)
+        self._arrays, self.meta, self._pointer_mtime = arrays, meta, mtime
+        return True
+
+    @property
+    def count(self) -> int:
+        return self.meta.get("count", 0)
+
+    @property
+    def source_rows(self) -> int:
+        """Rows of the source log covered by the snapshot"""
+        return self.meta.get("source_rows", 0)
+
+    def _scan(self, arrays: Dict, query: np.ndarray, lo: int, hi: int,
+              k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (distances, rows) of rows [lo, hi) by squared L2 distance"""
+        best_d, best_r = np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+        query_norm = float(query @ query)
+        for start in range(lo, hi, CHUNK_ROWS):
+            stop = min(hi, start + CHUNK_ROWS)
+            scales = arrays["scales"][start:stop] if "scales" in arrays else None
+            dots = np.asarray(arrays["vectors"][start:stop], dtype=np.float32) @ query
+            if scales is not None:
+                dots *= scales
+            distances = arrays["norms"][start:stop] + query_norm - 2 * dots
+            if len(distances) > k:
+                top = np.argpartition(distances, k)[:k]
+                distances = distances[top]
+            else:
+                top = np.arange(len(distances))
+            best_d = np.concatenate([best_d, distances.astype(np.float32)])
+            best_r = np.concatenate([best_r, top + start])
+            if len(best_d) > k:
+                keep = np.argpartition(best_d, k)[:k]
+                best_d, best_r = best_d[keep], best_r[keep]
+        return best_d, best_r
+
+    def search(self, query: np.ndarray, k: int = 5,
+               nprobe: int = FAISS_NPROBE) -> List[Tuple[str, int, float]]:
+        """Nearest rows of the snapshot
+
+        Args:
+            query: float32 vector
+            k: Number of results
+            nprobe: Clusters scanned when the snapshot is clustered
+
+        Returns:
+            (key, vector id, squared L2 distance) tuples, nearest first
+        """
+        arrays = self._arrays
+        if not self.count or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        if "centroids" in arrays:
+            offsets = arrays["list_offsets"]
+            probes = _nearest(query[None, :], arrays["centroids"]) if nprobe <= 1 else \
+                np.argsort(((arrays["centroids"] - query) ** 2).sum(axis=1))[:nprobe]
+            parts = [self._scan(arrays, query, int(offsets[c]), int(offsets[c + 1]), k)
+                     for c in np.atleast_1d(probes)]
+            distances = np.concatenate([p[0] for p in parts])
+            rows = np.concatenate([p[1] for p in parts])
+        else:
+            distances, rows = self._scan(arrays, query, 0, self.count, k)
+        order = np.argsort(distances)[:k]
+        return [(arrays["keys"][rows[i]].decode('utf-8'), int(arrays["ids"][rows[i]]), float(distances[i]))
+                for i in order]
+
+    def resident_bytes(self) -> int:
+        """Bytes this process holds outside the page cache (centroids and offsets)"""
+        return sum(self._arrays[name].nbytes for name in ("centroids", "list_offsets") if name in self._arrays)
+
+    def mapped_bytes(self) -> int:
+        """Bytes of the memory-mapped files shared with other processes"""
+        return sum(array.nbytes for name, array in self._arrays.items()
+                   if name not in ("centroids", "list_offsets"))
+
+
+def search_rows(ids: np.ndarray, vectors: np.ndarray, query: np.ndarray,
+                k: int) -> List[Tuple[int, float]]:
+    """Exact (vector id, squared L2 distance) search over in-memory float32 rows"""
+    if not len(ids) or k <= 0:
+        return []
+    query = np.asarray(query, dtype=np.float32).reshape(-1)
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    order = np.argsort(distances)[:k]
+    return [(int(ids[i]), float(distances[i])) for i in order]
+
+
+def maybe_build(root_dir: Path, matrix: SharedEmbeddingMatrix, total_rows: int,
+                load: Callable[[], Tuple[np.ndarray, Sequence[str]]], min_new_rows: int,
+                dtype: str = EMBEDDING_MATRIX_DTYPE,
+                live_rows: Optional[Callable[[int], np.ndarray]] = None) -> Optional[Dict]:
+    """Build a new snapshot once enough rows are not in the current one
+
+    Rebuilds when at least min_new_rows rows are new, and up to ten times
+    that for large snapshots (10% of the snapshot), so callers searching
+    the unsnapshotted tail exactly scan a bounded number of rows. Only one
+    process builds at a time (build.lock).
+
+    Args:
+        root_dir: Snapshot directory
+        matrix: The caller's open view (refreshed first)
+        total_rows: Rows in the source log
+        load: Returns (rows, keys) to build from
+        min_new_rows: Minimum number of new rows worth a rebuild
+        dtype: Quantization of the new snapshot
+        live_rows: Given the number of rows loaded, returns the sorted
+            numbers of those worth snapshotting (default: all of them)
+
+    Returns:
+        The new snapshot's metadata, or None if nothing was built
+    """
+    matrix.refresh()
+    pending = total_rows - matrix.source_rows
+    if pending <= 0 or pending < max(min_new_rows, min(matrix.count // 10, 10 * min_new_rows)):
+        return None
+    Path(root_dir).mkdir(parents=True, exist_ok=True)
+    with BuildLock(Path(root_dir) / "build.lock") as lock:
+        if not lock.acquired:
+            return None
+        rows, keys = load()
+        select = live_rows(len(rows)) if live_rows else None
+        meta = build_matrix(root_dir, rows, keys, dtype, select=select)
+    matrix.refresh()
+    return meta
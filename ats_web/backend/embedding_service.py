@@ -0,0 +1,259 @@
+"""
+Shared Embedding Service
+One lazily loaded sentence-transformers model per process for everything
+that embeds text (feedback store, RAG retrieval, the LoRA training tools).
+
+Single-text requests from concurrent threads are queued and encoded
+together in dynamic micro-batches: a batch closes when it reaches
+EMBEDDING_BATCH_SIZE texts or EMBEDDING_BATCH_WAIT_MS after its first
+request, so one encode() call serves many callers. Embeddings are cached
+by text hash (LRU), so repeated texts skip the model entirely.
+
+EMBEDDING_BACKEND selects the runtime: "torch" (default), "onnx" (ONNX
+Runtime on CPU) or "onnx-int8" (the dynamically quantized ONNX model).
+The ONNX backends need sentence-transformers>=3.2 and
+optimum[onnxruntime]; without them the torch model is used.
+
+Run this module to compare throughput and p99 latency of per-call
+encode() against the service:
+
+    python embedding_service.py --threads 16 --requests 2000
+"""
+import argparse
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# torch, onnx or onnx-int8
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+# Quantized weights used by the onnx-int8 backend (file in the model repository)
+EMBEDDING_ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+# Micro-batching: largest batch, and how long the first request of a batch waits for company
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_BATCH_WAIT = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "2")) / 1000
+# Embeddings kept in memory, keyed by text hash
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def text_key(text: str) -> bytes:
+    """Cache key of a text (16-byte BLAKE2b digest)"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class EmbeddingService:
+    """Micro-batching, caching front end to one sentence-transformers model"""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, backend: str = EMBEDDING_BACKEND,
+                 batch_size: int = EMBEDDING_BATCH_SIZE, batch_wait: float = EMBEDDING_BATCH_WAIT,
+                 cache_size: int = EMBEDDING_CACHE_SIZE):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{backend}', expected one of: {', '.join(BACKENDS)}")
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = max(0.0, batch_wait)
+        self.cache_size = cache_size
+        self.model = None
+        self.dim: Optional[int] = None
+        self._load_lock = threading.Lock()
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self.requests = 0
+        self.cache_hits = 0
+        self.batches = 0
+        self.batched_texts = 0
+
+    def load(self):
+        """Load the model now instead of on the first encode()
+
+        Raises:
+            ImportError: If sentence-transformers is not installed
+        """
+        if self.model is not None:
+            return self.model
+        with self._load_lock:
+            if self.model is None:
+                from sentence_transformers import SentenceTransformer
+                model = None
+                if self.backend != "torch":
+                    model_kwargs = {"file_name": EMBEDDING_ONNX_INT8_FILE} if self.backend == "onnx-int8" else None
+                    try:
+                        model = SentenceTransformer(self.model_name, device="cpu", backend="onnx",
+                                                    model_kwargs=model_kwargs)
+                    except Exception as e:
+                        print(f"Warning: ONNX embedding backend unavailable, using torch: {e}")
+                        self.backend = "torch"
+                if model is None:
+                    model = SentenceTransformer(self.model_name)
+                self.dim = model.get_sentence_embedding_dimension()
+                self.model = model
+                self._worker = threading.Thread(target=self._batch_loop, name="embedding-batcher", daemon=True)
+                self._worker.start()
+                print(f"✓ Embedding model loaded: {self.model_name} ({self.backend})")
+        return self.model
+
+    def encode(self, texts: Union[str, Sequence[str]]) -> np.ndarray:
+        """float32 embeddings of one text (vector) or several (n x dim matrix)
+
+        Cached texts are answered from memory; the rest are queued for the
+        next micro-batch and this call blocks until it is encoded.
+        """
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        self.load()
+        vectors: List[Optional[np.ndarray]] = [None] * len(batch)
+        missing: Dict[bytes, List[int]] = {}
+        with self._cache_lock:
+            self.requests += 1
+            for i, text in enumerate(batch):
+                key = text_key(text)
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                    vectors[i] = vector
+                else:
+                    missing.setdefault(key, []).append(i)
+        if missing:
+            pending = [batch[positions[0]] for positions in missing.values()]
+            future: Future = Future()
+            self._queue.put((pending, future))
+            encoded = future.result()
+            with self._cache_lock:
+                for (key, positions), vector in zip(missing.items(), encoded):
+                    vector.setflags(write=False)
+                    self._cache[key] = vector
+                    for i in positions:
+                        vectors[i] = vector
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        if single:
+            return vectors[0]
+        if not vectors:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack(vectors)
+
+    def _batch_loop(self):
+        while True:
+            requests = [self._queue.get()]
+            size = len(requests[0][0])
+            deadline = time.perf_counter() + self.batch_wait
+            # Collect whatever else arrives before the batch is full or the wait is over
+            while size < self.batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                requests.append(request)
+                size += len(request[0])
+            texts = [text for pending, _ in requests for text in pending]
+            try:
+                matrix = np.asarray(self.model.encode(texts, batch_size=self.batch_size), dtype=np.float32)
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.batched_texts += len(texts)
+            start = 0
+            for pending, future in requests:
+                future.set_result(list(matrix[start:start + len(pending)]))
+                start += len(pending)
+
+    def stats(self) -> Dict:
+        """Batching and cache counters"""
+        with self._cache_lock:
+            return {
+                "model": self.model_name,
+                "backend": self.backend,
+                "loaded": self.model is not None,
+                "requests": self.requests,
+                "cache_entries": len(self._cache),
+                "cache_hits": self.cache_hits,
+                "batches": self.batches,
+                "avg_batch_size": round(self.batched_texts / self.batches, 2) if self.batches else 0.0
+            }
+
+
+_services: Dict[str, EmbeddingService] = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name: str = EMBEDDING_MODEL) -> EmbeddingService:
+    """The process-wide service for a model (created on first use, loaded on first encode)"""
+    with _services_lock:
+        service = _services.get(model_name)
+        if service is None:
+            service = _services[model_name] = EmbeddingService(model_name)
+        return service
+
+
+def benchmark(threads: int = 16, requests: int = 2000, model_name: str = EMBEDDING_MODEL) -> Dict:
+    """Throughput and latency of concurrent single-text encodes, per-call vs. micro-batched"""
+    from sentence_transformers import SentenceTransformer
+
+    def run(encode, label: str) -> Dict:
+        texts = [f"{label} request {i}: Python developer with {i % 15} years of AWS experience"
+                 for i in range(requests)]
+        latencies: List[float] = []
+        lock = threading.Lock()
+
+        def worker(chunk: List[str]):
+            for text in chunk:
+                start = time.perf_counter()
+                encode(text)
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    latencies.append(elapsed)
+
+        pool = [threading.Thread(target=worker, args=(texts[i::threads],)) for i in range(threads)]
+        start = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        result = {
+            "mode": label,
+            "texts_per_s": round(requests / elapsed, 1),
+            "p50_ms": round(latencies[len(latencies) // 2], 2),
+            "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 2),
+        }
+        print(f"{label:>12}  {result['texts_per_s']:>8.1f} texts/s  p50 {result['p50_ms']:.2f}ms  "
+              f"p99 {result['p99_ms']:.2f}ms")
+        return result
+
+    model = SentenceTransformer(model_name)
+    model.encode("warm up")
+    report = [run(model.encode, "per-call")]
+    service = EmbeddingService(model_name, cache_size=0)
+    service.encode("warm up")
+    report.append(run(service.encode, "batched"))
+    print(f"avg batch size {service.stats()['avg_batch_size']}")
+    return {"threads": threads, "requests": requests, "backend": service.backend, "results": report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-call vs micro-batched embedding throughput")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    args = parser.parse_args()
+    print(f"backend={EMBEDDING_BACKEND} batch_size={EMBEDDING_BATCH_SIZE} "
+          f"wait={EMBEDDING_BATCH_WAIT * 1000:.1f}ms")
+    benchmark(args.threads, args.requests, args.model)
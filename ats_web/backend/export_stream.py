@@ -0,0 +1,141 @@
+"""
+Streaming Exports
+Turns record iterators (feedback, analyses, job applications) into CSV or
+NDJSON byte chunks for a StreamingResponse or a file. Records are read,
+formatted and sent one chunk at a time, so an export of any size runs in
+constant memory.
+"""
+import csv
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pagination import date_upper_bound
+
+
+FORMATS = ("csv", "ndjson")
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Bytes of formatted rows gathered before a chunk is sent
+EXPORT_CHUNK_BYTES = 64 * 1024
+# Records loaded per page when walking a store for an export
+EXPORT_PAGE_SIZE = 500
+
+Column = Tuple[str, Callable[[Dict], object]]
+
+
+def _joined(points) -> str:
+    return ', '.join(points or [])
+
+
+FEEDBACK_COLUMNS: List[Column] = [
+    ('ID', lambda r: r['id']),
+    ('Timestamp', lambda r: r['timestamp']),
+    ('Rating', lambda r: r['feedback']['rating']),
+    ('Query', lambda r: r['query']),
+    ('Response', lambda r: r['response']),
+    ('Correct Points', lambda r: _joined(r['feedback'].get('correct_points'))),
+    ('Incorrect Points', lambda r: _joined(r['feedback'].get('incorrect_points'))),
+    ('Missing Points', lambda r: _joined(r['feedback'].get('missing_points'))),
+    ('Ideal Response', lambda r: r['feedback'].get('ideal_response', '')),
+    ('Analysis ID', lambda r: r.get('analysis_id') or ''),
+    ('Job ID', lambda r: r.get('job_id') or ''),
+]
+
+ANALYSIS_COLUMNS: List[Column] = [
+    ('Analysis ID', lambda r: r['analysis_id']),
+    ('Job ID', lambda r: r['job_id']),
+    ('Resume ID', lambda r: r['resume_id']),
+    ('Candidate', lambda r: r.get('candidate_name', '')),
+    ('Created At', lambda r: r['created_at']),
+    ('Overall Score', lambda r: r.get('overall_score', 0)),
+    ('Skill Match', lambda r: r.get('analysis_result', {}).get('skill_match_score', '')),
+    ('Experience Match', lambda r: r.get('analysis_result', {}).get('experience_match_score', '')),
+    ('Recommendation', lambda r: r.get('hiring_recommendation', '')),
+    ('Feedback Count', lambda r: r.get('feedback_count', 0)),
+]
+
+APPLICATION_COLUMNS: List[Column] = [
+    ('Company', lambda r: r['company']),
+    ('Job', lambda r: r['job']),
+    ('Portal', lambda r: r['portal']),
+    ('Type', lambda r: r['type']),
+    ('Date Applied', lambda r: r['date']),
+    ('Created At', lambda r: r.get('created_at', '')),
+]
+
+
+def in_date_range(timestamp: str, date_from: Optional[str], date_to: Optional[str]) -> bool:
+    """Whether an ISO timestamp falls within inclusive date bounds (prefix match on date_to)"""
+    if date_from and timestamp < date_from:
+        return False
+    if date_to and timestamp > date_upper_bound(date_to):
+        return False
+    return True
+
+
+class _RowBuffer:
+    """File-like target for csv.writer that hands back what was written"""
+
+    def __init__(self):
+        self.parts: List[str] = []
+
+    def write(self, text: str):
+        self.parts.append(text)
+
+    def take(self) -> str:
+        text = ''.join(self.parts)
+        self.parts = []
+        return text
+
+
+def _chunked(lines: Iterable[str]) -> Iterator[bytes]:
+    """Group formatted lines into chunks of about EXPORT_CHUNK_BYTES"""
+    chunk: List[str] = []
+    size = 0
+    for line in lines:
+        chunk.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield ''.join(chunk).encode('utf-8')
+            chunk, size = [], 0
+    if chunk:
+        yield ''.join(chunk).encode('utf-8')
+
+
+def csv_lines(records: Iterable[Dict], columns: List[Column]) -> Iterator[str]:
+    """Header line, then one CSV line per record"""
+    buffer = _RowBuffer()
+    writer = csv.writer(buffer)
+    writer.writerow([header for header, _ in columns])
+    yield buffer.take()
+    for record in records:
+        writer.writerow([value(record) for _, value in columns])
+        yield buffer.take()
+
+
+def ndjson_lines(records: Iterable[Dict]) -> Iterator[str]:
+    """One JSON document per line"""
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def stream_export(records: Iterable[Dict], fmt: str, columns: List[Column]) -> Iterator[bytes]:
+    """Byte chunks of an export
+
+    Args:
+        records: Records to export (consumed lazily)
+        fmt: "csv" (the given columns) or "ndjson" (whole records)
+        columns: CSV (header, value function) pairs
+
+    Raises:
+        ValueError: If the format is unknown (raised here, before streaming starts)
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of: {', '.join(FORMATS)}")
+    lines = csv_lines(records, columns) if fmt == "csv" else ndjson_lines(records)
+    return _chunked(lines)
+
+
+def export_filename(name: str, fmt: str) -> str:
+    """Download file name of an export"""
+    return f"{name}_export.{fmt}"
@@ -1,55 +1,278 @@
-"""Feedback storage using ChromaDB and FAISS"""
+"""Feedback storage using ChromaDB and FAISS
 
+interactions.jsonl is the source of truth; each record points at its
+embedding in the binary embeddings.bin log (embedding_row). One vector
+backend (FEEDBACK_VECTOR_BACKEND) is written with every submission and
+serves searches, the others are replicas a background thread catches up
+from the two logs, so they can always be rebuilt from them.
+"""
+
+import importlib.util
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 import numpy as np
+from materialized_stats import MaterializedStats
+from archive_store import archive_in_batches
+from file_lock import FileLock
+from index_log import IndexLog
+from jsonl_offset_index import JsonlOffsetIndex
+from embedding_log import EmbeddingLog
+from embedding_service import get_embedding_service
+from export_stream import EXPORT_PAGE_SIZE, in_date_range
+from embedding_matrix import SharedEmbeddingMatrix, build_matrix, maybe_build, search_rows
+from vector_index import (
+    FAISS_INDEX_TYPE, FAISS_PROMOTE_AT, build_index, faiss_id, index_contents,
+    index_type, apply_search_params, measure
+)
+
+# The vector backends and the embedding model are only loaded when the store
+# is first used (sentence-transformers pulls in torch, which takes seconds to import)
+chromadb = None
+faiss = None
 
 # ChromaDB
-try:
-    import chromadb
-    from chromadb.config import Settings
-    CHROMADB_AVAILABLE = True
-except ImportError:
-    CHROMADB_AVAILABLE = False
+CHROMADB_AVAILABLE = importlib.util.find_spec("chromadb") is not None
+if not CHROMADB_AVAILABLE:
     print("Warning: ChromaDB not installed. Install with: pip install chromadb")
 
 # FAISS
-try:
-    import faiss
-    FAISS_AVAILABLE = True
-except ImportError:
-    FAISS_AVAILABLE = False
+FAISS_AVAILABLE = importlib.util.find_spec("faiss") is not None
+if not FAISS_AVAILABLE:
     print("Warning: FAISS not installed. Install with: pip install faiss-cpu")
 
 # Sentence Transformers for embeddings
-try:
-    from sentence_transformers import SentenceTransformer
-    EMBEDDINGS_AVAILABLE = True
-except ImportError:
-    EMBEDDINGS_AVAILABLE = False
+EMBEDDINGS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+if not EMBEDDINGS_AVAILABLE:
     print("Warning: sentence-transformers not installed. Install with: pip install sentence-transformers")
 
+# FAISS persistence: every vector is journaled in embeddings.bin, and the
+# index is written to disk every FAISS_FLUSH_EVERY inserts or FAISS_FLUSH_SECONDS
+FAISS_FLUSH_EVERY = int(os.getenv("FAISS_FLUSH_EVERY", "100"))
+FAISS_FLUSH_SECONDS = float(os.getenv("FAISS_FLUSH_SECONDS", "30"))
+
+EMBEDDING_DIM = 384
+
+# Primary vector backend (written synchronously, used for search): faiss, chroma
+# or mmap (the shared embedding matrix, see embedding_matrix.py). Replicas
+# default to the other of faiss/chroma (none for mmap);
+# FEEDBACK_VECTOR_REPLICAS=none disables them.
+VECTOR_BACKENDS = ("faiss", "chroma", "mmap")
+FEEDBACK_VECTOR_BACKEND = os.getenv("FEEDBACK_VECTOR_BACKEND", "faiss").lower()
+FEEDBACK_VECTOR_REPLICAS = os.getenv("FEEDBACK_VECTOR_REPLICAS")
+REPLICATION_SECONDS = float(os.getenv("FEEDBACK_REPLICATION_SECONDS", "1"))
+REPLICATION_BATCH = 256
+# New embedding rows that trigger a rebuild of the shared matrix snapshot
+EMBEDDING_MATRIX_REBUILD_ROWS = int(os.getenv("EMBEDDING_MATRIX_REBUILD_ROWS", "1000"))
+# Asynchronous ingestion: submissions are queued durably and embedded in batches
+FEEDBACK_INGEST_BATCH = int(os.getenv("FEEDBACK_INGEST_BATCH", "64"))
+# Seconds the ingest worker waits for more submissions before encoding a batch
+FEEDBACK_INGEST_LINGER = float(os.getenv("FEEDBACK_INGEST_LINGER", "0.05"))
+# Attempts before a queued submission that keeps failing moves to ingest_dead.jsonl
+FEEDBACK_INGEST_MAX_ATTEMPTS = int(os.getenv("FEEDBACK_INGEST_MAX_ATTEMPTS", "5"))
+RATING_RANGE = (1, 5)
+
+# Query embeddings kept in memory (recruiters ask the same questions over and over)
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+
+
+def _embedding_text(query: str, response: str) -> str:
+    return f"Query: {query}\nResponse: {response}"
+
+
+def _chroma_metadata(record: Dict) -> Dict:
+    """ChromaDB metadata of an interaction record"""
+    feedback = record["feedback"]
+    metadata = {
+        "rating": feedback["rating"],
+        "query": record["query"],
+        "response": record["response"],
+        "timestamp": record["timestamp"],
+        "num_correct": len(feedback.get("correct_points", [])),
+        "num_incorrect": len(feedback.get("incorrect_points", []))
+    }
+    if record.get("analysis_id"):
+        metadata["analysis_id"] = record["analysis_id"]
+    if record.get("job_id"):
+        metadata["job_id"] = record["job_id"]
+    return metadata
+
+
+def normalize_query(query: str) -> str:
+    """Cache key of a query: lowercased with whitespace collapsed
+
+    all-MiniLM-L6-v2 lowercases its input, so this does not change the embedding.
+    """
+    return " ".join(query.lower().split())
+
+
+def _replica_names(primary: str) -> List[str]:
+    if FEEDBACK_VECTOR_REPLICAS is None:
+        # The matrix is meant to keep vectors out of worker memory: no in-memory replicas
+        return [] if primary == "mmap" else [name for name in ("faiss", "chroma") if name != primary]
+    names = [name.strip().lower() for name in FEEDBACK_VECTOR_REPLICAS.split(',')]
+    return [name for name in VECTOR_BACKENDS if name in names and name != primary]
+
+
+def _import_backends():
+    """Import whichever vector backends are installed"""
+    global chromadb, faiss, CHROMADB_AVAILABLE, FAISS_AVAILABLE, EMBEDDINGS_AVAILABLE
+    if CHROMADB_AVAILABLE and chromadb is None:
+        try:
+            import chromadb
+        except ImportError as e:
+            CHROMADB_AVAILABLE = False
+            print(f"Warning: ChromaDB import failed: {e}")
+    if FAISS_AVAILABLE and faiss is None:
+        try:
+            import faiss
+        except ImportError as e:
+            FAISS_AVAILABLE = False
+            print(f"Warning: FAISS import failed: {e}")
+    if EMBEDDINGS_AVAILABLE:
+        try:
+            get_embedding_service().load()
+        except ImportError as e:
+            EMBEDDINGS_AVAILABLE = False
+            print(f"Warning: sentence-transformers import failed: {e}")
+
 
 class FeedbackStore:
     def __init__(self, db_path: str = "feedback_db"):
         self.db_path = Path(db_path)
         self.db_path.mkdir(exist_ok=True)
         
+        self.embedding_model = None
+        self.embedding_dim = None
+        self.chroma_client = None
+        self.chroma_collection = None
+        self.faiss_index = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        
+        # Interaction log with an ID -> line index, and the binary embedding
+        # rows its records point to (opened with the embedding model)
+        self.jsonl_file = self.db_path / "interactions.jsonl"
+        self._jsonl_lock = threading.Lock()
+        self.records = JsonlOffsetIndex(
+            self.jsonl_file, "id", self.db_path / "interactions_offsets.json"
+        )
+        self.embeddings_file = self.db_path / "embeddings.bin"
+        self.embeddings: Optional[EmbeddingLog] = None
+        # Memory-mapped snapshot of embeddings.bin shared by all workers, plus
+        # this worker's copy of the rows appended since it was built
+        self.matrix_dir = self.db_path / "embedding_matrix"
+        self.matrix: Optional[SharedEmbeddingMatrix] = None
+        self._matrix_tail = (0, np.zeros(0, dtype=np.int64), np.zeros((0, EMBEDDING_DIM), dtype=np.float32))
+        self._matrix_lock = threading.Lock()
+
+        # Vector backends: the primary is written in _store_batch, replicas
+        # are caught up by a background thread (lock order: _jsonl_lock,
+        # _replication_lock, _faiss_lock)
+        self.primary = FEEDBACK_VECTOR_BACKEND if FEEDBACK_VECTOR_BACKEND in VECTOR_BACKENDS else "faiss"
+        self.replicas = _replica_names(self.primary)
+        # ChromaDB replica -> bytes of interactions.jsonl applied (FAISS tracks embedding rows)
+        self.replica_state_file = self.db_path / "replicas.json"
+        self._chroma_position = 0
+        self._replication_lock = threading.Lock()
+        self._replication_event = threading.Event()
+
+        # FAISS is mutated under _faiss_lock and flushed in batches by a background thread
+        self.faiss_index_file = self.db_path / "faiss_index.bin"
+        self.faiss_state_file = self.db_path / "faiss_state.json"
+        # Written by versions that kept a parallel list of IDs; migrated on load
+        self.legacy_faiss_map_file = self.db_path / "faiss_id_map.json"
+        # int64 FAISS ID -> interaction ID
+        self.faiss_ids = IndexLog(self.db_path / "faiss_ids.json")
+        self._faiss_lock = threading.Lock()
+        self._faiss_flush_lock = threading.Lock()
+        self._faiss_rebuild_lock = threading.Lock()
+        # Inserts made while a rebuild trains a new index: (vectors, ids)
+        self._faiss_rebuild_buffer: Optional[List] = None
+        self._faiss_flush_event = threading.Event()
+        self._faiss_pending = 0
+        # Rows of embeddings.bin that are in the in-memory index
+        self._faiss_rows = 0
+        self._closed = False
+
+        # Writes made by this process (see write_version) and the query embedding LRU
+        self._writes = 0
+        self._query_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_lock = threading.Lock()
+        self.query_cache_hits = 0
+        self.query_cache_misses = 0
+
+        # Ingest queue: validated submissions waiting to be embedded and stored.
+        # ingest_state.json holds the byte position up to which they are stored
+        # and the failed attempts of the record at that position. Worker
+        # processes share the queue: appends and truncation hold
+        # ingest_queue.lock, and one process at a time ingests (ingest.lock).
+        self.queue_file = self.db_path / "ingest_queue.jsonl"
+        self.queue_state_file = self.db_path / "ingest_state.json"
+        self.dead_letter_file = self.db_path / "ingest_dead.jsonl"
+        self._queue_lock = threading.Lock()
+        self._queue_file_lock = FileLock(self.db_path / "ingest_queue.lock")
+        self._ingest_lock = threading.Lock()
+        self._ingest_file_lock = FileLock(self.db_path / "ingest.lock")
+        self._ingest_event = threading.Event()
+        self._ingest_thread: Optional[threading.Thread] = None
+        self._queue_position = 0
+        self._queue_failures = 0
+        self.ingested = 0
+        self.dead_lettered = 0
+        self.last_batch = {"size": 0, "ms": 0.0}
+
+        # Running totals so get_statistics never rescans interactions.jsonl
+        self.stats = MaterializedStats(self.db_path / "feedback_stats.json")
+        self._sync_stats()
+    
+    def _ensure_loaded(self):
+        """Load the embedding model, ChromaDB and FAISS on first use"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load_backends()
+                self._loaded = True
+    
+    def warm_up(self):
+        """Load the vector backends now instead of on the first request"""
+        self._ensure_loaded()
+        # Store anything queued before the last shutdown
+        self._start_ingest_worker()
+    
+    def _load_backends(self):
+        _import_backends()
+        
         # Initialize embedding model
         if EMBEDDINGS_AVAILABLE:
-            self.embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-            self.embedding_dim = 384
+            # Shared with the rest of the process; single-text encodes are micro-batched
+            self.embedding_model = get_embedding_service()
+            self.embedding_dim = EMBEDDING_DIM
+            self.embeddings = EmbeddingLog(self.embeddings_file, EMBEDDING_DIM)
+            self._migrate_inline_embeddings()
         else:
             self.embedding_model = None
             self.embedding_dim = None
         
+        # Only the configured backends are loaded
+        backends = {self.primary, *self.replicas}
+
+        if self.embeddings is not None and "mmap" in backends:
+            self.matrix = SharedEmbeddingMatrix(self.matrix_dir)
+            # Snapshot existing embeddings now so searches never hold them in memory
+            maybe_build(self.matrix_dir, self.matrix, len(self.embeddings),
+                        self._matrix_source, EMBEDDING_MATRIX_REBUILD_ROWS)
+            print(f"✓ Embedding matrix opened ({self.matrix.count} rows, {self.matrix.meta.get('dtype', 'empty')})")
+
         # Initialize ChromaDB
-        self.chroma_client = None
-        self.chroma_collection = None
-        if CHROMADB_AVAILABLE and EMBEDDINGS_AVAILABLE:
+        if CHROMADB_AVAILABLE and EMBEDDINGS_AVAILABLE and "chroma" in backends:
             try:
                 self.chroma_client = chromadb.PersistentClient(
                     path=str(self.db_path / "chroma")
@@ -63,45 +286,589 @@ class FeedbackStore:
                 print(f"Warning: ChromaDB initialization failed: {e}")
         
         # Initialize FAISS
-        self.faiss_index = None
-        self.faiss_id_map = []
-        if FAISS_AVAILABLE and EMBEDDINGS_AVAILABLE:
+        if FAISS_AVAILABLE and EMBEDDINGS_AVAILABLE and "faiss" in backends:
             try:
                 self._init_faiss()
                 print("✓ FAISS initialized")
             except Exception as e:
                 print(f"Warning: FAISS initialization failed: {e}")
-        
-        # JSONL backup
-        self.jsonl_file = self.db_path / "interactions.jsonl"
+
+        if self.embeddings is not None and (self.replicas or self.matrix is not None):
+            self._load_replica_state()
+            threading.Thread(target=self._replication_loop, name="feedback-replication", daemon=True).start()
+            print(f"✓ Feedback vectors: {self.primary} primary, replicas: {', '.join(self.replicas)}")
+
+    def _backend_ready(self, name: str) -> bool:
+        if name == "faiss":
+            return self.faiss_index is not None
+        if name == "mmap":
+            return self.matrix is not None
+        return self.chroma_collection is not None
     
+    def _count_feedback(self, feedback_data: Dict):
+        """Fold one interaction into the materialized statistics"""
+        rating = feedback_data["feedback"]["rating"]
+        self.stats.incr("total")
+        self.stats.incr("rating_sum", rating)
+        self.stats.incr_group("rating_histogram", str(rating))
+        self.stats.push_recent("recent", {
+            "id": feedback_data["id"],
+            "timestamp": feedback_data["timestamp"],
+            "rating": rating,
+            "analysis_id": feedback_data.get("analysis_id"),
+            "job_id": feedback_data.get("job_id")
+        }, key_field="id")
+
+    def _sync_stats(self):
+        """Catch the statistics up with lines appended since they were saved
+
+        Only the unseen tail of interactions.jsonl is read; if the file
+        shrank (rewritten or truncated), or the statistics were left
+        behind by an interrupted update, they are rebuilt.
+        """
+        size = self.jsonl_file.stat().st_size if self.jsonl_file.exists() else 0
+        if self.stats.exists and self.stats.get_meta("source_size", 0) == size:
+            return
+        with self.stats.transaction():
+            size = self.jsonl_file.stat().st_size if self.jsonl_file.exists() else 0
+            offset = self.stats.get_meta("source_size", 0)
+            if offset > size or not self.stats.exists:
+                # Log bookkeeping is not derived from the lines: keep it
+                meta = {key: self.stats.get_meta(key) for key in ("embedding_sidecar", "log_epoch")
+                        if self.stats.get_meta(key) is not None}
+                self.stats.reset()
+                for key, value in meta.items():
+                    self.stats.set_meta(key, value)
+                offset = 0
+
+            if offset < size:
+                with open(self.jsonl_file, 'rb') as f:
+                    f.seek(offset)
+                    for raw in f:
+                        if not raw.endswith(b'\n'):
+                            break  # partially written line, picked up next time
+                        offset += len(raw)
+                        try:
+                            self._count_feedback(json.loads(raw))
+                        except (ValueError, KeyError):
+                            continue
+            self.stats.set_meta("source_size", offset)
+
+    def archive_interactions(self, select: Callable[[Dict], bool], archive) -> int:
+        """Move matching interactions out of interactions.jsonl into a cold ArchiveStore
+
+        Only the JSONL file shrinks: embeddings.bin, ChromaDB and FAISS keep
+        the embeddings, and the statistics keep counting archived feedback.
+
+        Args:
+            select: Returns True for interactions to archive
+            archive: Destination ArchiveStore
+
+        Returns:
+            Number of interactions archived
+        """
+        if not self.jsonl_file.exists():
+            return 0
+        tmp_file = self.jsonl_file.with_suffix(".jsonl.tmp")
+        # Ingestion and appends by every worker wait until the file is
+        # replaced, so nothing appended during the copy is lost
+        with self._ingest_lock, self._ingest_file_lock.exclusive(), \
+                self._jsonl_lock, self._replication_lock, \
+                self.stats.transaction(), self.records.exclusive():
+            self._sync_stats()
+            # The ChromaDB replica reads the log by position: apply it before the rewrite
+            self._replicate_locked()
+            with open(self.jsonl_file, 'rb') as src, open(tmp_file, 'wb') as out:
+                def selected():
+                    for raw in src:
+                        try:
+                            record = json.loads(raw)
+                        except ValueError:
+                            record = None
+                        if record is not None and select(record):
+                            yield record
+                        else:
+                            out.write(raw)
+
+                archived = archive_in_batches(selected(), archive, lambda batch: None)
+                out.flush()
+                os.fsync(out.fileno())
+            if not archived:
+                tmp_file.unlink()
+                return 0
+            os.replace(tmp_file, self.jsonl_file)
+            size = self.jsonl_file.stat().st_size
+            self.stats.set_meta("source_size", size)
+            self.stats.set_meta("log_epoch", self.stats.get_meta("log_epoch", 0) + 1)
+            self.records.rebuild()
+            self._writes += 1
+            if "chroma" in self.replicas:
+                self._chroma_position = size
+                self._save_replica_state()
+        return archived
+
+    def _migrate_inline_embeddings(self):
+        """Move embeddings stored inline in interactions.jsonl to embeddings.bin (runs once)"""
+        if self.stats.get_meta("embedding_sidecar", 0):
+            return
+        moved = 0
+        with self._jsonl_lock, self.stats.transaction():
+            if self.stats.get_meta("embedding_sidecar", 0):
+                return  # migrated by another process meanwhile
+            if self.jsonl_file.exists():
+                before = self.jsonl_file.stat().st_size
+                tmp_file = self.jsonl_file.with_suffix(".jsonl.tmp")
+                with open(self.jsonl_file, 'rb') as src, open(tmp_file, 'wb') as out:
+                    for raw in src:
+                        try:
+                            record = json.loads(raw)
+                        except ValueError:
+                            out.write(raw)
+                            continue
+                        embedding = record.pop("embedding", None)
+                        if embedding is not None and len(embedding) == EMBEDDING_DIM:
+                            fid = faiss_id(record["id"])
+                            self.faiss_ids.set(str(fid), {"id": record["id"]})
+                            record["embedding_row"] = self.embeddings.append([fid], [embedding])
+                            moved += 1
+                        out.write((json.dumps(record) + '\n').encode('utf-8'))
+                    out.flush()
+                    os.fsync(out.fileno())
+                self.embeddings.sync()
+                os.replace(tmp_file, self.jsonl_file)
+                self.records.rebuild()
+                size = self.jsonl_file.stat().st_size
+                self.stats.set_meta("source_size", size)
+                if moved:
+                    print(f"✓ Moved {moved} embeddings to {self.embeddings_file.name} "
+                          f"({self.jsonl_file.name}: {before} -> {size} bytes)")
+            self.stats.set_meta("embedding_sidecar", 1)
+            self.stats.set_meta("log_epoch", self.stats.get_meta("log_epoch", 0) + 1)
+
     def _init_faiss(self):
-        """Initialize or load FAISS index"""
-        faiss_index_file = self.db_path / "faiss_index.bin"
-        faiss_map_file = self.db_path / "faiss_id_map.json"
-        
-        if faiss_index_file.exists() and faiss_map_file.exists():
-            # Load existing index
-            self.faiss_index = faiss.read_index(str(faiss_index_file))
-            with open(faiss_map_file, 'r') as f:
-                self.faiss_id_map = json.load(f)
-        else:
-            # Create new index
-            self.faiss_index = faiss.IndexFlatL2(self.embedding_dim)
-            self.faiss_id_map = []
-    
-    def _save_faiss(self):
-        """Save FAISS index to disk"""
-        if self.faiss_index is not None:
-            faiss_index_file = self.db_path / "faiss_index.bin"
-            faiss_map_file = self.db_path / "faiss_id_map.json"
-            
-            faiss.write_index(self.faiss_index, str(faiss_index_file))
-            with open(faiss_map_file, 'w') as f:
-                json.dump(self.faiss_id_map, f)
+        """Load the FAISS index and replay embedding rows appended since its last flush"""
+        faiss_index, rows = None, 0
+        if self.faiss_index_file.exists():
+            try:
+                faiss_index = faiss.read_index(str(self.faiss_index_file))
+                if not isinstance(faiss_index, faiss.IndexIDMap):
+                    faiss_index = self._migrate_legacy_faiss(faiss_index)
+                elif self.faiss_state_file.exists():
+                    with open(self.faiss_state_file, 'r') as f:
+                        rows = json.load(f).get('embedding_rows', 0)
+                apply_search_params(faiss_index)
+            except Exception as e:
+                print(f"Warning: FAISS index unreadable, rebuilding from {self.embeddings_file.name}: {e}")
+                faiss_index, rows = None, 0
+        if faiss_index is None:
+            faiss_index = build_index("flat", self.embedding_dim)
+
+        # Rows already in the index (written before the state file) are skipped by ID
+        with self._jsonl_lock, self._faiss_lock:
+            self.faiss_index = faiss_index
+            self._faiss_rows = rows
+            recovered = self._catch_up_faiss(dedupe=True)
+        if recovered:
+            print(f"✓ FAISS recovered {recovered} embeddings from {self.embeddings_file.name}")
+            self.flush_faiss()
+
+        threading.Thread(target=self._faiss_flush_loop, name="faiss-flush", daemon=True).start()
+
+    def _migrate_legacy_faiss(self, legacy_index):
+        """Move a plain index + faiss_id_map.json list into an ID-mapped index"""
+        with open(self.legacy_faiss_map_file, 'r') as f:
+            id_map = json.load(f)
+        if legacy_index.ntotal != len(id_map):
+            raise ValueError(f"{legacy_index.ntotal} vectors but {len(id_map)} IDs")
+        vectors = legacy_index.reconstruct_n(0, legacy_index.ntotal)
+        for interaction_id in id_map:
+            self.faiss_ids.set(str(faiss_id(interaction_id)), {"id": interaction_id})
+        ids = np.array([faiss_id(interaction_id) for interaction_id in id_map], dtype=np.int64)
+        self._faiss_pending += 1
+        print(f"✓ FAISS migrated {len(id_map)} vectors to an ID-mapped index")
+        return build_index("flat", legacy_index.d, vectors, ids)
+
+    def _catch_up_faiss(self, dedupe: bool = False, limit: Optional[int] = None) -> int:
+        """Add embedding rows after _faiss_rows to the live index (caller holds _faiss_lock)
+
+        Args:
+            dedupe: Skip vectors whose ID is already in the index
+            limit: Maximum number of rows to apply
+
+        Returns:
+            Number of rows applied
+        """
+        total = len(self.embeddings) if self.embeddings is not None else 0
+        stop = total if limit is None else min(total, self._faiss_rows + limit)
+        if stop <= self._faiss_rows:
+            return 0
+        ids, vectors = self.embeddings.read(self._faiss_rows, stop)
+        applied = stop - self._faiss_rows
+        if dedupe:
+            known = set(faiss.vector_to_array(self.faiss_index.id_map).tolist())
+            keep = np.array([fid not in known for fid in ids.tolist()], dtype=bool)
+            ids, vectors = ids[keep], vectors[keep]
+        if len(ids):
+            self.faiss_index.add_with_ids(vectors, ids)
+            if self._faiss_rebuild_buffer is not None:
+                self._faiss_rebuild_buffer.append((vectors, ids))
+        self._faiss_rows = stop
+        self._faiss_pending += applied
+        return applied
+
+    def _faiss_flush_loop(self):
+        while not self._closed:
+            self._faiss_flush_event.wait(FAISS_FLUSH_SECONDS)
+            self._faiss_flush_event.clear()
+            try:
+                self.flush_faiss()
+                self._maybe_promote_faiss()
+            except Exception as e:
+                print(f"FAISS flush error: {e}")
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        tmp_file = path.with_name(path.name + ".tmp")
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+
+    def flush_faiss(self) -> bool:
+        """Write the FAISS index, ID map and journal position if anything changed
+
+        The index is serialized under the lock; the disk writes happen
+        outside it, so inserts are not blocked while the files are written.
+
+        Returns:
+            True if the files were written
+        """
+        with self._faiss_flush_lock:
+            with self._faiss_lock:
+                if self.faiss_index is None or not self._faiss_pending:
+                    return False
+                data = faiss.serialize_index(self.faiss_index).tobytes()
+                state = {
+                    "count": self.faiss_index.ntotal,
+                    "type": index_type(self.faiss_index),
+                    "embedding_rows": self._faiss_rows
+                }
+                pending = self._faiss_pending
+                self._faiss_pending = 0
+            try:
+                # The state file goes last: until it is written, the older
+                # position makes recovery replay (and skip by ID) a bit more
+                self._write_atomic(self.faiss_index_file, data)
+                self._write_atomic(self.faiss_state_file, json.dumps(state).encode('utf-8'))
+            except Exception:
+                with self._faiss_lock:
+                    self._faiss_pending += pending
+                raise
+            if self.legacy_faiss_map_file.exists():
+                self.legacy_faiss_map_file.unlink()
+        return True
+
+    def _maybe_promote_faiss(self):
+        """Retrain the flat index into FAISS_INDEX_TYPE once it reaches FAISS_PROMOTE_AT"""
+        with self._faiss_lock:
+            if (self.faiss_index is None or FAISS_INDEX_TYPE == "flat"
+                    or index_type(self.faiss_index) != "flat"
+                    or self.faiss_index.ntotal < FAISS_PROMOTE_AT):
+                return
+        print(f"FAISS: {self.faiss_index.ntotal} vectors, promoting flat index to {FAISS_INDEX_TYPE}")
+        self.rebuild_faiss(FAISS_INDEX_TYPE)
+
+    def rebuild_faiss(self, kind: Optional[str] = None) -> Dict:
+        """Retrain the FAISS index as another type without blocking inserts
+
+        The vectors are copied under the lock and the new index is trained
+        outside it; inserts made meanwhile are replayed into it before the
+        swap.
+
+        Args:
+            kind: "flat", "ivf" or "hnsw" (default: FAISS_INDEX_TYPE)
+
+        Returns:
+            Dict with the new type, vector count and build time
+
+        Raises:
+            ValueError: If the type is unknown
+        """
+        self._ensure_loaded()
+        kind = kind or FAISS_INDEX_TYPE
+        if self.faiss_index is None:
+            return {"error": "FAISS not available"}
+        with self._faiss_rebuild_lock:
+            start = time.perf_counter()
+            with self._faiss_lock:
+                vectors, ids = index_contents(self.faiss_index)
+                self._faiss_rebuild_buffer = []
+            try:
+                index = build_index(kind, self.embedding_dim, vectors, ids)
+            except Exception:
+                with self._faiss_lock:
+                    self._faiss_rebuild_buffer = None
+                raise
+            with self._faiss_lock:
+                for buffered_vectors, buffered_ids in self._faiss_rebuild_buffer:
+                    index.add_with_ids(buffered_vectors, buffered_ids)
+                self._faiss_rebuild_buffer = None
+                self.faiss_index = index
+                self._faiss_pending += 1
+                count = index.ntotal
+        self._faiss_flush_event.set()
+        build_s = round(time.perf_counter() - start, 2)
+        print(f"✓ FAISS rebuilt as {kind} ({count} vectors, {build_s}s)")
+        self._writes += 1
+        return {"type": kind, "count": count, "build_s": build_s}
+
+    def faiss_report(self, queries: int = 100, k: int = 10) -> Dict:
+        """Recall@k and latency of the live index against exact search
+
+        Queries are stored vectors with a little noise added.
+        """
+        self._ensure_loaded()
+        if self.faiss_index is None:
+            return {"error": "FAISS not available"}
+        with self._faiss_lock:
+            vectors, ids = index_contents(self.faiss_index)
+            kind = index_type(self.faiss_index)
+        if not len(ids):
+            return {"type": kind, "count": 0}
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(len(ids), min(queries, len(ids)), replace=False)]
+        sample = (sample + rng.normal(0, 0.01, sample.shape)).astype(np.float32)
+        exact = build_index("flat", self.embedding_dim, vectors, ids)
+        with self._faiss_lock:
+            result = measure(self.faiss_index, exact, sample, min(k, len(ids)))
+        return {"type": kind, "count": len(ids), "k": min(k, len(ids)), **result}
+
+    def close(self):
+        """Catch the replicas up, flush pending FAISS changes and stop the background threads"""
+        self._closed = True
+        self._faiss_flush_event.set()
+        self._replication_event.set()
+        self._ingest_event.set()
+        with self._ingest_lock:
+            pass  # let an in-flight ingest batch finish; the rest stays queued for the next start
+        try:
+            self.replicate()
+        except Exception as e:
+            print(f"Feedback replication error: {e}")
+        try:
+            self.flush_faiss()
+        except Exception as e:
+            print(f"FAISS flush error: {e}")
+        if self.embeddings is not None:
+            self.embeddings.sync()
+        self.records.save()
+
+    def _load_replica_state(self):
+        if self.replica_state_file.exists():
+            with open(self.replica_state_file, 'r') as f:
+                self._chroma_position = json.load(f).get("chroma", 0)
+            return
+        # First start with replicas: ChromaDB was written with every submission until now
+        if self.chroma_collection is not None and self.chroma_collection.count():
+            self._chroma_position = self.jsonl_file.stat().st_size if self.jsonl_file.exists() else 0
+        self._save_replica_state()
+
+    def _save_replica_state(self):
+        self._write_atomic(self.replica_state_file, json.dumps({"chroma": self._chroma_position}).encode('utf-8'))
+
+    def _replication_loop(self):
+        while not self._closed:
+            self._replication_event.wait(REPLICATION_SECONDS)
+            self._replication_event.clear()
+            try:
+                self.replicate()
+                if self.matrix is not None:
+                    maybe_build(self.matrix_dir, self.matrix, len(self.embeddings),
+                                self._matrix_source, EMBEDDING_MATRIX_REBUILD_ROWS)
+            except Exception as e:
+                print(f"Feedback replication error: {e}")
+
+    def replicate(self) -> Dict[str, int]:
+        """Apply everything logged so far to the replicas
+
+        Returns:
+            Rows (FAISS) or records (ChromaDB) applied per replica
+        """
+        with self._replication_lock:
+            return self._replicate_locked()
+
+    def _replicate_locked(self) -> Dict[str, int]:
+        applied = {}
+        for name in self.replicas:
+            # The matrix is rebuilt as a whole by the replication loop
+            if name == "mmap" or not self._backend_ready(name) or self.embeddings is None:
+                continue
+            applied[name] = 0
+            while True:
+                if name == "faiss":
+                    with self._faiss_lock:
+                        count = self._catch_up_faiss(limit=REPLICATION_BATCH)
+                else:
+                    count = self._replicate_chroma()
+                if not count:
+                    break
+                applied[name] += count
+            if name == "faiss" and applied[name]:
+                self._faiss_flush_event.set()
+        return applied
+
+    def _replicate_chroma(self) -> int:
+        """Upsert the next batch of logged interactions into ChromaDB
+
+        Returns:
+            Number of log lines consumed (0 when caught up)
+        """
+        size = self.jsonl_file.stat().st_size if self.jsonl_file.exists() else 0
+        if self._chroma_position >= size:
+            return 0
+        position, lines, records = self._chroma_position, 0, []
+        with open(self.jsonl_file, 'rb') as f:
+            f.seek(position)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break  # partially written line, picked up next time
+                position += len(raw)
+                lines += 1
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue
+                if record.get("embedding_row") is not None:
+                    records.append(record)
+                if lines >= REPLICATION_BATCH:
+                    break
+        if records:
+            self.chroma_collection.upsert(
+                ids=[record["id"] for record in records],
+                embeddings=[self.embeddings.get(record["embedding_row"]).tolist() for record in records],
+                documents=[_embedding_text(record["query"], record["response"]) for record in records],
+                metadatas=[_chroma_metadata(record) for record in records]
+            )
+        self._chroma_position = position
+        self._save_replica_state()
+        return lines
+
+    def rebuild_replica(self, name: str) -> Dict:
+        """Rebuild one vector backend from interactions.jsonl and embeddings.bin
+
+        FAISS restarts from an empty flat index (promoted again once large
+        enough); ChromaDB re-upserts every logged interaction; mmap writes a
+        new matrix snapshot.
+
+        Args:
+            name: "faiss", "chroma" or "mmap"
+
+        Returns:
+            Dict with the backend, rows/records applied and the time taken
+
+        Raises:
+            ValueError: If the backend is unknown
+        """
+        self._ensure_loaded()
+        if name not in VECTOR_BACKENDS:
+            raise ValueError(f"Unknown vector backend '{name}', expected one of: {', '.join(VECTOR_BACKENDS)}")
+        if not self._backend_ready(name) or self.embeddings is None:
+            return {"error": f"{name} not available"}
+        start = time.perf_counter()
+        if name == "faiss":
+            with self._faiss_rebuild_lock, self._jsonl_lock, self._replication_lock, self._faiss_lock:
+                self.faiss_index = build_index("flat", self.embedding_dim)
+                self._faiss_rows = 0
+                applied = self._catch_up_faiss()
+            self._faiss_flush_event.set()
+        elif name == "chroma":
+            with self._replication_lock:
+                self._chroma_position = 0
+                applied = 0
+                while True:
+                    count = self._replicate_chroma()
+                    if not count:
+                        break
+                    applied += count
+        elif name == "mmap":
+            meta = build_matrix(self.matrix_dir, *self._matrix_source())
+            self.matrix.refresh()
+            applied = meta["count"]
+        seconds = round(time.perf_counter() - start, 2)
+        self._writes += 1
+        print(f"✓ Rebuilt {name} from the feedback logs ({applied} applied, {seconds}s)")
+        return {"backend": name, "applied": applied, "seconds": seconds}
+
+    def replication_lag(self) -> Dict:
+        """How far each replica is behind the logs"""
+        lag = {}
+        for name in self.replicas:
+            if name == "faiss":
+                total = len(self.embeddings) if self.embeddings is not None else 0
+                lag[name] = {"pending_rows": max(0, total - self._faiss_rows)}
+            elif name == "mmap":
+                total = len(self.embeddings) if self.embeddings is not None else 0
+                lag[name] = {"pending_rows": max(0, total - (self.matrix.source_rows if self.matrix else 0))}
+            else:
+                size = self.jsonl_file.stat().st_size if self.jsonl_file.exists() else 0
+                lag[name] = {"pending_bytes": max(0, size - self._chroma_position)}
+        return lag
+
+    def _matrix_source(self):
+        """(rows, keys) of embeddings.bin to build a matrix snapshot from"""
+        rows = self.embeddings.memmap()
+        keys = []
+        for fid in rows["id"].tolist():
+            entry = self.faiss_ids.get(str(fid))
+            keys.append(entry["id"] if entry else "")
+        if "" in keys and self.jsonl_file.exists():
+            # Rows written by another worker: their records carry the row number
+            with open(self.jsonl_file, 'rb') as f:
+                for raw in f:
+                    try:
+                        record = json.loads(raw)
+                    except ValueError:
+                        continue
+                    row = record.get("embedding_row")
+                    if row is not None and row < len(keys) and not keys[row]:
+                        keys[row] = record["id"]
+        return rows, keys
+
+    def search_similar_mmap(self, query: str, k: int = 5) -> List[Dict]:
+        """Search for similar feedback in the shared embedding matrix
+
+        Rows appended since the snapshot was built are searched exactly
+        from this worker's copy of the tail of embeddings.bin.
+        """
+        self._ensure_loaded()
+        if self.matrix is None or not self.embedding_model:
+            return []
+        query_embedding = self.encode_query(query)
+        self.matrix.refresh()
+        hits = {key: distance for key, _, distance in self.matrix.search(query_embedding, k) if key}
+
+        with self._matrix_lock:
+            start, tail_ids, tail_vectors = self._matrix_tail
+            covered = self.matrix.source_rows
+            if start != covered:
+                # A new snapshot covers part of the tail: keep the rows after it
+                drop = min(covered - start, len(tail_ids)) if covered > start else len(tail_ids)
+                start, tail_ids, tail_vectors = covered, tail_ids[drop:], tail_vectors[drop:]
+            new_ids, new_vectors = self.embeddings.read(start + len(tail_ids))
+            if len(new_ids):
+                tail_ids = np.concatenate([tail_ids, new_ids])
+                tail_vectors = np.concatenate([tail_vectors, new_vectors])
+            self._matrix_tail = (start, tail_ids, tail_vectors)
+        for fid, distance in search_rows(tail_ids, tail_vectors, query_embedding, k):
+            entry = self.faiss_ids.get(str(fid))
+            if entry and distance < hits.get(entry["id"], float("inf")):
+                hits[entry["id"]] = distance
+        return [{"id": key, "distance": distance}
+                for key, distance in sorted(hits.items(), key=lambda hit: hit[1])[:k]]
     
-    def add_feedback(
-        self,
+    @staticmethod
+    def _feedback_record(
         interaction_id: str,
         query: str,
         context: List[str],
@@ -114,9 +881,16 @@ class FeedbackStore:
         analysis_id: Optional[str] = None,
         job_id: Optional[str] = None
     ) -> Dict:
-        """Add feedback to all storage systems"""
-        
-        feedback_data = {
+        """Validated interaction record
+
+        Raises:
+            ValueError: If the interaction ID is empty or the rating is out of range
+        """
+        if not interaction_id or not interaction_id.strip():
+            raise ValueError("interaction_id is required")
+        if not RATING_RANGE[0] <= rating <= RATING_RANGE[1]:
+            raise ValueError(f"rating must be between {RATING_RANGE[0]} and {RATING_RANGE[1]}")
+        return {
             "id": interaction_id,
             "timestamp": datetime.now().isoformat(),
             "query": query,
@@ -132,54 +906,427 @@ class FeedbackStore:
                 "ideal_response": ideal_response
             }
         }
+
+    def submit_feedback(self, *args, **kwargs) -> Dict:
+        """Validate feedback and queue it durably; it is stored in the background
+
+        Takes the same arguments as add_feedback. The record is appended
+        and fsynced to ingest_queue.jsonl before returning, so an accepted
+        submission survives a crash; the ingest worker embeds queued
+        submissions in batches and writes them to the logs and indexes.
+
+        Returns:
+            The queued record (without embedding_row)
+
+        Raises:
+            ValueError: If the feedback is invalid
+        """
+        feedback_data = self._feedback_record(*args, **kwargs)
+        line = (json.dumps(feedback_data) + '\n').encode('utf-8')
+        with self._queue_lock, self._queue_file_lock.exclusive():
+            with open(self.queue_file, 'ab') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+        self._start_ingest_worker()
+        self._ingest_event.set()
+        return feedback_data
+
+    def add_feedback(self, *args, **kwargs) -> Dict:
+        """Add feedback to all storage systems synchronously
+
+        Takes the arguments of _feedback_record (interaction_id, query,
+        context, response, rating, correct_points, incorrect_points,
+        missing_points, ideal_response, analysis_id, job_id).
+        """
+        self._ensure_loaded()
+        feedback_data = self._feedback_record(*args, **kwargs)
+        self._store_batch([feedback_data])
+        return feedback_data
+
+    def _store_batch(self, records: List[Dict]):
+        """Embed records with one encode call and write them to the logs and the primary index"""
+        if not records:
+            return
+        # Generate embeddings; the vectors go to embeddings.bin, the records keep their rows
+        texts = [_embedding_text(record["query"], record["response"]) for record in records]
+        embeddings = np.asarray(self.embedding_model.encode(texts), dtype=np.float32) \
+            if self.embedding_model else None
         
-        # Generate embeddings
-        if self.embedding_model:
-            text_for_embedding = f"Query: {query}\nResponse: {response}"
-            embedding = self.embedding_model.encode(text_for_embedding)
-            feedback_data["embedding"] = embedding.tolist()
-        else:
-            embedding = None
-        
-        # Save to JSONL (always works)
-        with open(self.jsonl_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(feedback_data) + '\n')
+        # Save to JSONL (always works); with embeddings.bin it is the log every backend recovers from
+        with self._jsonl_lock:
+            if embeddings is not None:
+                fids = [faiss_id(record["id"]) for record in records]
+                for fid, record in zip(fids, records):
+                    self.faiss_ids.set(str(fid), {"id": record["id"]})
+                first_row = self.embeddings.append(fids, embeddings)
+                for i, record in enumerate(records):
+                    record["embedding_row"] = first_row + i
+            for record in records:
+                self.records.append(record)
+            self._sync_stats()
+            
+            # Add to a primary FAISS index in log order (written to disk in batches)
+            if self.primary == "faiss" and self.faiss_index is not None and embeddings is not None:
+                try:
+                    with self._faiss_lock:
+                        self._catch_up_faiss()
+                        flush_due = self._faiss_pending >= FAISS_FLUSH_EVERY
+                    if flush_due:
+                        self._faiss_flush_event.set()
+                except Exception as e:
+                    print(f"FAISS save error: {e}")
         
-        # Save to ChromaDB
-        if self.chroma_collection and embedding is not None:
+        # Save to a primary ChromaDB
+        if self.primary == "chroma" and self.chroma_collection and embeddings is not None:
             try:
-                metadata = {
-                    "rating": rating,
-                    "query": query,
-                    "response": response,
-                    "timestamp": feedback_data["timestamp"],
-                    "num_correct": len(correct_points),
-                    "num_incorrect": len(incorrect_points)
-                }
-                if analysis_id:
-                    metadata["analysis_id"] = analysis_id
-                if job_id:
-                    metadata["job_id"] = job_id
-                
                 self.chroma_collection.add(
-                    ids=[interaction_id],
-                    embeddings=[embedding.tolist()],
-                    documents=[text_for_embedding],
-                    metadatas=[metadata]
+                    ids=[record["id"] for record in records],
+                    embeddings=embeddings.tolist(),
+                    documents=texts,
+                    metadatas=[_chroma_metadata(record) for record in records]
                 )
             except Exception as e:
                 print(f"ChromaDB save error: {e}")
-        
-        # Save to FAISS
-        if self.faiss_index is not None and embedding is not None:
+        self._writes += 1
+        self._replication_event.set()
+
+    # Ingest queue
+
+    def _start_ingest_worker(self):
+        with self._queue_lock:
+            if self._ingest_thread is None and not self._closed:
+                self._ingest_thread = threading.Thread(target=self._ingest_loop, name="feedback-ingest", daemon=True)
+                self._ingest_thread.start()
+
+    def _ingest_loop(self):
+        self._ensure_loaded()
+        while not self._closed:
+            self._ingest_event.wait(1.0)
+            self._ingest_event.clear()
+            try:
+                while not self._closed and self._ingest_batch():
+                    pass
+            except Exception as e:
+                print(f"Feedback ingest error: {e}")
+                time.sleep(1.0)
+
+    def _read_queue_state(self) -> Dict:
+        try:
+            with open(self.queue_state_file, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_queue_state(self):
+        self._write_atomic(self.queue_state_file, json.dumps({
+            "position": self._queue_position, "failures": self._queue_failures
+        }).encode('utf-8'))
+
+    def _read_queue(self, limit: int) -> List[Tuple[Dict, int]]:
+        """Up to limit complete queued records after the queue position, each with the position after it"""
+        size = self.queue_file.stat().st_size if self.queue_file.exists() else 0
+        if self._queue_position > size:
+            self._queue_position, self._queue_failures = 0, 0  # queue truncated after a crash
+        position, entries = self._queue_position, []
+        if position < size:
+            with open(self.queue_file, 'rb') as f:
+                f.seek(position)
+                for raw in f:
+                    if not raw.endswith(b'\n') or len(entries) >= limit:
+                        break
+                    position += len(raw)
+                    try:
+                        entries.append((json.loads(raw), position))
+                    except ValueError:
+                        continue
+        return entries
+
+    def _is_stored(self, record: Dict) -> bool:
+        """Whether a queued record was stored already (replayed after a crash)"""
+        stored = self.records.get(record["id"])
+        return stored is not None and stored.get("timestamp") == record["timestamp"]
+
+    def _dead_letter(self, record: Dict, error: Exception):
+        """Set aside a submission that keeps failing so the records behind it get stored"""
+        line = json.dumps({
+            "record": record,
+            "error": str(error),
+            "attempts": self._queue_failures,
+            "failed_at": datetime.now().isoformat()
+        }) + '\n'
+        with open(self.dead_letter_file, 'ab') as f:
+            f.write(line.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        self.dead_lettered += 1
+        print(f"Warning: Feedback {record.get('id')} failed {self._queue_failures} times, "
+              f"moved to {self.dead_letter_file.name}: {error}")
+
+    def _store_queued(self, entries: List[Tuple[Dict, int]]) -> Tuple[int, bool]:
+        """Store queued records, advancing the queue position past each one stored
+
+        The batch is stored with one encode call; if that fails, records are
+        retried one at a time up to the first one that fails. That record
+        counts a failed attempt and, after FEEDBACK_INGEST_MAX_ATTEMPTS, is
+        moved to the dead-letter file.
+
+        Returns:
+            (records consumed, whether a record failed)
+        """
+        try:
+            fresh = [record for record, _ in entries if not self._is_stored(record)]
+            self._store_batch(fresh)
+            self._queue_position, self._queue_failures = entries[-1][1], 0
+            self.ingested += len(fresh)
+            return len(entries), False
+        except Exception as e:
+            print(f"Feedback ingest error, storing the batch one record at a time: {e}")
+        consumed = 0
+        for record, position in entries:
             try:
-                self.faiss_index.add(np.array([embedding], dtype=np.float32))
-                self.faiss_id_map.append(interaction_id)
-                self._save_faiss()
+                if not self._is_stored(record):
+                    self._store_batch([record])
+                    self.ingested += 1
             except Exception as e:
-                print(f"FAISS save error: {e}")
+                self._queue_failures += 1
+                if self._queue_failures < FEEDBACK_INGEST_MAX_ATTEMPTS:
+                    return consumed, True
+                self._dead_letter(record, e)
+            self._queue_position, self._queue_failures = position, 0
+            consumed += 1
+        return consumed, False
+
+    def _ingest_batch(self) -> int:
+        """Embed and store the next batch of queued submissions
+
+        Returns:
+            Number of queued records consumed (0 when the queue is empty or
+            a record failed, so the caller backs off)
+        """
+        with self._ingest_lock, self._ingest_file_lock.exclusive():
+            # Another worker process may have ingested since our last batch
+            state = self._read_queue_state()
+            self._queue_position = state.get("position", 0)
+            self._queue_failures = state.get("failures", 0)
+            entries = self._read_queue(FEEDBACK_INGEST_BATCH)
+            if len(entries) < FEEDBACK_INGEST_BATCH and FEEDBACK_INGEST_LINGER > 0 and entries:
+                # A burst is probably still arriving: wait briefly to embed it in one batch
+                time.sleep(FEEDBACK_INGEST_LINGER)
+                entries = self._read_queue(FEEDBACK_INGEST_BATCH)
+            if not entries:
+                self._truncate_queue()
+                return 0
+            start = time.perf_counter()
+            consumed, failed = self._store_queued(entries)
+            self._save_queue_state()
+            self.last_batch = {"size": consumed, "ms": round((time.perf_counter() - start) * 1000, 2)}
+            self._truncate_queue()
+            return 0 if failed else consumed
+
+    def _truncate_queue(self):
+        """Empty the queue file once everything in it is stored (ingest lock held)"""
+        with self._queue_lock, self._queue_file_lock.exclusive():
+            if not self.queue_file.exists() or self.queue_file.stat().st_size != self._queue_position \
+                    or not self._queue_position:
+                return
+            with open(self.queue_file, 'wb'):
+                pass
+            self._queue_position, self._queue_failures = 0, 0
+            self._save_queue_state()
+
+    def drain_queue(self) -> int:
+        """Store everything queued so far now (used by tests and scripts)
+
+        Stops early at a record that fails (see _store_queued).
+
+        Returns:
+            Number of queued records consumed
+        """
+        self._ensure_loaded()
+        consumed = 0
+        while True:
+            count = self._ingest_batch()
+            if not count:
+                return consumed
+            consumed += count
+
+    def _queue_lag(self) -> Dict:
+        """Bytes still queued and the age of the oldest queued submission
+
+        Reads one line of the queue at most.
+        """
+        state = self._read_queue_state()
+        size = self.queue_file.stat().st_size if self.queue_file.exists() else 0
+        position = min(state.get("position", 0), size)
+        lag_seconds = 0.0
+        if position < size:
+            with open(self.queue_file, 'rb') as f:
+                f.seek(position)
+                raw = f.readline()
+            try:
+                oldest = json.loads(raw).get("timestamp") if raw.endswith(b'\n') else None
+            except ValueError:
+                oldest = None
+            if oldest:
+                lag_seconds = max(0.0, (datetime.now() - datetime.fromisoformat(oldest)).total_seconds())
+        return {
+            "position": position,
+            "pending_bytes": size - position,
+            "lag_seconds": round(lag_seconds, 3),
+            "failed_attempts": state.get("failures", 0)
+        }
+
+    def queue_status(self) -> Dict:
+        """Ingest queue lag: submissions accepted but not yet embedded and stored"""
+        lag = self._queue_lag()
+        position = lag.pop("position")
+        pending = 0
+        if lag["pending_bytes"]:
+            with open(self.queue_file, 'rb') as f:
+                f.seek(position)
+                pending = sum(1 for raw in f if raw.endswith(b'\n'))
+        return {
+            "pending": pending,
+            **lag,
+            "ingested": self.ingested,
+            "dead_lettered": self.dead_lettered,
+            "last_batch": self.last_batch,
+            "worker_running": self._ingest_thread is not None and self._ingest_thread.is_alive()
+        }
+    
+    def read_since(self, position: Optional[Tuple[int, int]] = None,
+                   limit: int = 5000) -> Tuple[List[Dict], Tuple[int, int], bool]:
+        """Read interactions appended after a position
         
-        return feedback_data
+        Args:
+            position: (log epoch, byte offset) from a previous call, or None
+            limit: Maximum number of records to return
+            
+        Returns:
+            Tuple of (records in write order, new position, rewritten). When
+            interactions.jsonl was rewritten since the position (archive,
+            migration), reading restarts at the beginning and rewritten is
+            True: the caller should drop what it built from older reads.
+        """
+        with self._jsonl_lock:
+            epoch = self.stats.get_meta("log_epoch", 0)
+            size = self.jsonl_file.stat().st_size if self.jsonl_file.exists() else 0
+            rewritten = position is None or position[0] != epoch or position[1] > size
+            offset = 0 if rewritten else position[1]
+            records = []
+            if offset < size:
+                with open(self.jsonl_file, 'rb') as f:
+                    f.seek(offset)
+                    for raw in f:
+                        if not raw.endswith(b'\n') or len(records) >= limit:
+                            break
+                        offset += len(raw)
+                        try:
+                            records.append(json.loads(raw))
+                        except ValueError:
+                            continue
+        return records, (epoch, offset), rewritten and position is not None
+
+    def iter_feedback(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                      min_rating: Optional[int] = None, max_rating: Optional[int] = None,
+                      job_id: Optional[str] = None):
+        """Yield stored interactions in write order, filtered (for exports)
+
+        Reads interactions.jsonl a page at a time, so memory use does not
+        grow with the log. Stops early if the log is rewritten (archived)
+        while it is being read.
+
+        Args:
+            date_from: Inclusive lower bound on the timestamp (ISO date/datetime)
+            date_to: Inclusive upper bound on the timestamp (ISO date/datetime)
+            min_rating: Minimum feedback rating
+            max_rating: Maximum feedback rating
+            job_id: Only feedback linked to this job
+        """
+        position = None
+        while True:
+            records, position, rewritten = self.read_since(position, EXPORT_PAGE_SIZE)
+            if rewritten or not records:
+                return
+            for record in records:
+                rating = record["feedback"]["rating"]
+                if min_rating is not None and rating < min_rating:
+                    continue
+                if max_rating is not None and rating > max_rating:
+                    continue
+                if job_id and record.get("job_id") != job_id:
+                    continue
+                if not in_date_range(record["timestamp"], date_from, date_to):
+                    continue
+                record.pop("embedding_row", None)
+                yield record
+
+    def write_version(self) -> str:
+        """Changes whenever feedback is written, archived or reindexed
+
+        Combines this process's write counter with the size and mtime of
+        interactions.jsonl, so writes by other workers are noticed too.
+        """
+        try:
+            stat = self.jsonl_file.stat()
+            return f"{self._writes}:{stat.st_size}:{stat.st_mtime_ns}"
+        except FileNotFoundError:
+            return f"{self._writes}:0:0"
+
+    def encode_query(self, query: str) -> np.ndarray:
+        """float32 embedding of a search query, from the LRU cache when possible"""
+        key = normalize_query(query)
+        with self._query_lock:
+            embedding = self._query_embeddings.get(key)
+            if embedding is not None:
+                self._query_embeddings.move_to_end(key)
+                self.query_cache_hits += 1
+                return embedding
+        embedding = np.asarray(self.embedding_model.encode(key), dtype=np.float32)
+        embedding.setflags(write=False)
+        with self._query_lock:
+            self.query_cache_misses += 1
+            self._query_embeddings[key] = embedding
+            while len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+                self._query_embeddings.popitem(last=False)
+        return embedding
+
+    def search_similar(
+        self,
+        query: str,
+        n_results: int = 5,
+        min_rating: Optional[int] = None
+    ) -> Dict:
+        """Search for similar feedback in the primary vector backend
+
+        Falls back to the other backend if the primary is unavailable.
+        Results have ChromaDB's shape (ids, documents, metadatas and
+        distances, one list per query).
+        """
+        self._ensure_loaded()
+        backend = self.primary if self._backend_ready(self.primary) else \
+            next((name for name in VECTOR_BACKENDS if self._backend_ready(name)), None)
+        if backend == "chroma":
+            return self.search_similar_chromadb(query, n_results, min_rating)
+        if backend is None or not self.embedding_model:
+            return {"error": "No vector backend available"}
+        
+        # FAISS and the matrix have no metadata: over-fetch when filtering by rating, then filter
+        k = n_results * 4 if min_rating is not None else n_results
+        search = self.search_similar_mmap if backend == "mmap" else self.search_similar_faiss
+        results = {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+        for hit in search(query, k):
+            record = self.records.get(hit["id"])
+            if record is None or (min_rating is not None and record["feedback"]["rating"] < min_rating):
+                continue
+            results["ids"][0].append(record["id"])
+            results["documents"][0].append(_embedding_text(record["query"], record["response"]))
+            results["metadatas"][0].append(_chroma_metadata(record))
+            results["distances"][0].append(hit["distance"])
+            if len(results["ids"][0]) >= n_results:
+                break
+        return results
     
     def search_similar_chromadb(
         self,
@@ -188,11 +1335,12 @@ class FeedbackStore:
         min_rating: Optional[int] = None
     ) -> Dict:
         """Search for similar feedback using ChromaDB"""
+        self._ensure_loaded()
         if not self.chroma_collection or not self.embedding_model:
             return {"error": "ChromaDB not available"}
         
         try:
-            query_embedding = self.embedding_model.encode(query).tolist()
+            query_embedding = self.encode_query(query).tolist()
             
             where_filter = None
             if min_rating is not None:
@@ -214,20 +1362,22 @@ class FeedbackStore:
         k: int = 5
     ) -> List[Dict]:
         """Search for similar feedback using FAISS"""
+        self._ensure_loaded()
         if not self.faiss_index or not self.embedding_model:
             return []
         
         try:
-            query_embedding = self.embedding_model.encode(query)
-            query_embedding = np.array([query_embedding], dtype=np.float32)
-            
-            distances, indices = self.faiss_index.search(query_embedding, k)
+            query_embedding = self.encode_query(query)[None, :]
             
+            with self._faiss_lock:
+                distances, indices = self.faiss_index.search(query_embedding, k)
+                
             results = []
-            for dist, idx in zip(distances[0], indices[0]):
-                if idx < len(self.faiss_id_map):
+            for dist, fid in zip(distances[0], indices[0]):
+                entry = self.faiss_ids.get(str(fid)) if fid >= 0 else None
+                if entry:
                     results.append({
-                        "id": self.faiss_id_map[idx],
+                        "id": entry['id'],
                         "distance": float(dist)
                     })
             
@@ -236,25 +1386,54 @@ class FeedbackStore:
             print(f"FAISS search error: {e}")
             return []
     
-    def get_statistics(self) -> Dict:
-        """Get feedback statistics"""
+    def get_statistics(self, include_backends: bool = False) -> Dict:
+        """Get feedback statistics
+
+        Reads the materialized counters, caught up with the tail of
+        interactions.jsonl, and the head of the ingest queue. Vector
+        backend figures are included once the backends are loaded.
+
+        Args:
+            include_backends: Load the vector backends first if needed
+                (for offline tools; the API never forces the load)
+        """
+        if include_backends:
+            self._ensure_loaded()
+        self._sync_stats()  # picks up other workers' interactions
+        lag = self._queue_lag()
+        total = int(self.stats.counter("total"))
         stats = {
-            "total_feedback": 0,
-            "average_rating": 0.0,
+            "total_feedback": total,
+            "average_rating": self.stats.counter("rating_sum") / total if total else 0.0,
+            "rating_histogram": {
+                rating: int(count)
+                for rating, count in sorted(self.stats.group("rating_histogram").items())
+            },
+            "recent": self.stats.recent("recent"),
             "chromadb_count": 0,
-            "faiss_count": 0
+            "faiss_count": 0,
+            "vector_backend": self.primary,
+            "backends_loaded": self._loaded,
+            "ingest_queue": {"pending_bytes": lag["pending_bytes"], "lag_seconds": lag["lag_seconds"]},
+            "query_embedding_cache": {
+                "entries": len(self._query_embeddings),
+                "hits": self.query_cache_hits,
+                "misses": self.query_cache_misses
+            }
         }
+        if not self._loaded:
+            return stats
         
-        # Count from JSONL
-        if self.jsonl_file.exists():
-            ratings = []
-            with open(self.jsonl_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    data = json.loads(line)
-                    ratings.append(data["feedback"]["rating"])
-            
-            stats["total_feedback"] = len(ratings)
-            stats["average_rating"] = sum(ratings) / len(ratings) if ratings else 0.0
+        stats["replicas"] = self.replication_lag()
+        stats["embedding_bytes"] = self.embeddings.size_bytes() if self.embeddings is not None else 0
+        if self.matrix is not None:
+            stats["embedding_matrix"] = {
+                "dtype": self.matrix.meta.get("dtype"),
+                "count": self.matrix.count,
+                "clusters": self.matrix.meta.get("nlist", 0),
+                "mapped_bytes": self.matrix.mapped_bytes(),
+                "resident_bytes": self.matrix.resident_bytes() + self._matrix_tail[2].nbytes
+            }
         
         # ChromaDB count
         if self.chroma_collection:
@@ -266,6 +1445,7 @@ class FeedbackStore:
         # FAISS count
         if self.faiss_index:
             stats["faiss_count"] = self.faiss_index.ntotal
+            stats["faiss_index_type"] = index_type(self.faiss_index)
         
         return stats
     
@@ -274,20 +1454,17 @@ class FeedbackStore:
         min_rating: int = 4,
         limit: int = 100
     ) -> List[Dict]:
-        """Get high-quality feedback samples for training"""
-        if not self.chroma_collection:
-            return []
-        
-        try:
-            results = self.chroma_collection.get(
-                where={"rating": {"$gte": min_rating}},
-                limit=limit
-            )
-            return results
-        except Exception as e:
-            print(f"Error getting high-quality samples: {e}")
-            return []
+        """Get high-quality feedback samples for training
+
+        Read from interactions.jsonl, so the samples do not depend on which
+        vector backends are configured or how far their replicas have got.
+
+        Returns:
+            Up to limit interaction records rated min_rating or higher, in
+            write order
+        """
+        return list(islice(self.iter_feedback(min_rating=min_rating), max(0, int(limit))))
 
 
-# Global instance
+# Global instance (cheap to create; vector backends load on first use or warm_up)
 feedback_store = FeedbackStore()
@@ -0,0 +1,122 @@
+"""
+Cross-Process File Locks
+Advisory locks on a sidecar lock file, so the worker processes of one
+deployment (gunicorn main:app -w 4) can share append-only files safely.
+Uses flock() on POSIX; on Windows, msvcrt byte-range locks, where shared
+locks are taken as exclusive.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Shared/exclusive lock on a lock file, also exclusive between threads
+
+    Nested holds by the same thread reuse the outer lock (and its mode).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._fd: Optional[int] = None
+        self._pid = 0
+        self._depth = 0
+
+    def _open(self) -> int:
+        # A descriptor inherited through fork() shares its lock with the parent
+        if self._fd is None or self._pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+    def _acquire(self, shared: bool):
+        fd = self._open()
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            return
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue  # LK_LOCK gives up after about 10 seconds
+
+    def _try_acquire(self) -> bool:
+        fd = self._open()
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def _release(self):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+    @contextmanager
+    def _hold(self, shared: bool) -> Iterator["FileLock"]:
+        with self._lock:
+            if self._depth == 0:
+                self._acquire(shared)
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._release()
+
+    def exclusive(self):
+        """Context manager holding the lock exclusively"""
+        return self._hold(shared=False)
+
+    def shared(self):
+        """Context manager holding the lock shared with other readers"""
+        return self._hold(shared=True)
+
+    @contextmanager
+    def try_exclusive(self) -> Iterator[bool]:
+        """Context manager taking the lock exclusively only if it is free now
+
+        Yields True while holding it, or False (without waiting) if another
+        thread or process holds it.
+        """
+        if not self._lock.acquire(blocking=False):
+            yield False
+            return
+        try:
+            if self._depth == 0 and not self._try_acquire():
+                yield False
+                return
+            self._depth += 1
+            try:
+                yield True
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._release()
+        finally:
+            self._lock.release()
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None and self._pid == os.getpid():
+                os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,270 @@
+"""
+HTTP Caching and Compression
+Validators (ETag / Last-Modified) derived from store versions, conditional
+GETs answered with 304 before any payload is built, gzip/brotli encoding of
+JSON bodies, and byte-range responses for immutable content such as the
+content-addressed resume PDFs.
+"""
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+    print("Warning: brotli not installed, JSON responses use gzip only. Install with: pip install brotli")
+
+
+# Bodies smaller than this are sent as-is
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+IMMUTABLE = "private, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred supported content coding from an Accept-Encoding header"""
+    accepted = {}
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+    if BROTLI_AVAILABLE and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', accepted.get('*', 0)) > 0:
+        return 'gzip'
+    return None
+
+
+def encode_body(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, GZIP_LEVEL)
+    return body
+
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if header.strip() == '*':
+        return True
+    bare = etag[2:] if etag.startswith('W/') else etag
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    """Whether a conditional GET can be answered with 304
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted
+    when the client sent no entity tags.
+    """
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def iso_timestamp(value: str) -> float:
+    """POSIX timestamp of an ISO datetime string (0 if unparseable)"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class JsonResponseCache:
+    """Conditional, compressed JSON responses keyed by URL and store version
+
+    The caller passes the version of the data a response is built from
+    (e.g. ``analysis_storage.version()``). A client that still holds that
+    version gets a 304 without the payload being built; otherwise the
+    serialized and encoded body is reused until the version changes.
+    Versions are derived from on-disk state, so every worker issues the
+    same ETag for the same data.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> {"version", "etag", "last_modified", "bodies": {encoding: bytes}}
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self.not_modified = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def request_key(request: Request) -> str:
+        return f"{request.url.path}?{request.url.query}"
+
+    def _entry(self, key: str, version: Any) -> Dict:
+        version = str(version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['version'] != version:
+                now = time.time()
+                # Strictly increasing seconds, so If-Modified-Since never hides a change
+                previous = entry['last_modified'] if entry else 0
+                digest = hashlib.sha1(f"{key}:{version}".encode('utf-8')).hexdigest()[:20]
+                entry = {
+                    "version": version,
+                    "etag": f'W/"{digest}"',
+                    "last_modified": float(max(int(now), int(previous) + 1)),
+                    "bodies": {}
+                }
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry
+
+    def respond(self, request: Request, version: Any, build: Callable[[], Any],
+                key: Optional[str] = None) -> Response:
+        """JSON response for a GET, honouring validators and Accept-Encoding
+
+        Args:
+            request: The incoming request
+            version: Version of the data the payload depends on
+            build: Returns the JSON-serializable payload (only called on a miss)
+            key: Cache key (defaults to path and query string)
+
+        Returns:
+            A 304 response or the (possibly compressed) JSON body
+        """
+        entry = self._entry(key or self.request_key(request), version)
+        headers = {
+            "ETag": entry['etag'],
+            "Last-Modified": http_date(entry['last_modified']),
+            "Cache-Control": REVALIDATE,
+            "Vary": "Accept-Encoding"
+        }
+        if not_modified(request, entry['etag'], entry['last_modified']):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        encoding = choose_encoding(request.headers.get('accept-encoding', ''))
+        bodies = entry['bodies']
+        if None not in bodies:
+            self.misses += 1
+            bodies[None] = json.dumps(build(), default=str).encode('utf-8')
+        else:
+            self.hits += 1
+        if len(bodies[None]) < MIN_COMPRESS_BYTES:
+            encoding = None
+        if encoding not in bodies:
+            bodies[encoding] = encode_body(bodies[None], encoding)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=bodies[encoding], media_type="application/json", headers=headers)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            entries = len(self._entries)
+        return {
+            "entries": entries,
+            "not_modified": self.not_modified,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """First byte range of a Range header as inclusive (start, end)
+
+    Returns:
+        The range clipped to the content, None if the header is not a
+        single byte range (serve the full body)
+
+    Raises:
+        ValueError: If the range cannot be satisfied
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, _, last = spec.strip().partition('-')
+    try:
+        if first == '':
+            length = int(last)
+            if length <= 0:
+                raise ValueError("Empty suffix range")
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    if start >= size or end < start:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    return start, min(end, size - 1)
+
+
+def immutable_response(request: Request, etag: str, last_modified: float,
+                       load: Callable[[], Optional[bytes]], media_type: str,
+                       headers: Optional[Dict[str, str]] = None) -> Optional[Response]:
+    """Response for content that never changes under its ETag (e.g. a blob digest)
+
+    Supports If-None-Match / If-Modified-Since (304), Range / If-Range (206,
+    416) and long-lived client caching.
+
+    Returns:
+        The response, or None if load() found no content
+    """
+    headers = {
+        **(headers or {}),
+        "ETag": f'"{etag}"',
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": IMMUTABLE,
+        "Accept-Ranges": "bytes"
+    }
+    if not_modified(request, headers['ETag'], last_modified):
+        return Response(status_code=304, headers=headers)
+
+    data = load()
+    if data is None:
+        return None
+
+    range_header = request.headers.get('range')
+    if_range = request.headers.get('if-range')
+    if range_header and (if_range is None or if_range.strip() == headers['ETag']):
+        try:
+            byte_range = parse_range(range_header, len(data))
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(data)}"})
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+            return Response(content=data[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+    return Response(content=data, media_type=media_type, headers=headers)
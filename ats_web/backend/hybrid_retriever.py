@@ -0,0 +1,279 @@
+"""
+Hybrid Retrieval for RAG Examples
+Finds feedback examples for a recruiter question with two retrievers:
+BM25 over the stored feedback questions (SQLite FTS5, kept in sync by
+tailing interactions.jsonl) and the feedback store's dense vector search.
+Their rankings are merged with reciprocal rank fusion, optionally
+reranked by a cross-encoder on CPU, and cut to the examples that score
+close to the best one, so prompts carry fewer, more relevant examples.
+
+Per-stage latencies (lexical, dense, fusion, rerank) are kept for the
+most recent retrievals and reported by stage_stats().
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+# Candidates taken from each retriever before fusion
+RAG_CANDIDATES = int(os.getenv("RAG_CANDIDATES", "20"))
+# Reciprocal rank fusion constant: score = sum of 1 / (RRF_K + rank)
+RRF_K = 60
+# Keep examples whose fused (or reranked) score is at least this fraction of the best
+RAG_MIN_SCORE_RATIO = float(os.getenv("RAG_MIN_SCORE_RATIO", "0.5"))
+# Optional reranking stage: "none" or "cross-encoder"
+RAG_RERANKER = os.getenv("RAG_RERANKER", "none").lower()
+RAG_RERANK_MODEL = os.getenv("RAG_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# Retrievals whose stage timings are kept
+LATENCY_WINDOW = 500
+
+STAGES = ("sync", "lexical", "dense", "fusion", "rerank", "total")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback_docs (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    rating INTEGER NOT NULL
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS feedback_fts USING fts5(
+    query,
+    tokenize = 'porter unicode61'
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def fts_query(text: str) -> Optional[str]:
+    """FTS5 query matching any word of free text (None if it has no words)"""
+    terms = re.findall(r"\w+", text.lower())
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Merge ranked ID lists, best first, by the sum of 1 / (k + rank)"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class FeedbackLexicalIndex:
+    """BM25 index over the questions of stored feedback (SQLite FTS5)"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def _position(self) -> Optional[Tuple[int, int]]:
+        rows = dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+        if "epoch" not in rows:
+            return None
+        return rows["epoch"], rows["offset"]
+
+    def sync(self, feedback_store) -> int:
+        """Index interactions written since the last sync
+
+        Returns:
+            Number of interactions indexed
+        """
+        indexed = 0
+        with self.lock:
+            position = self._position()
+            while True:
+                records, new_position, rewritten = feedback_store.read_since(position)
+                if not records and new_position == position:
+                    break
+                with self.conn:
+                    if rewritten:
+                        # interactions.jsonl was rewritten (e.g. archived): start over
+                        self.conn.execute("DELETE FROM feedback_docs")
+                        self.conn.execute("DELETE FROM feedback_fts")
+                    for record in records:
+                        self._index(record)
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                        (("epoch", new_position[0]), ("offset", new_position[1]))
+                    )
+                indexed += len(records)
+                position = new_position
+                if not records:
+                    break
+        return indexed
+
+    def _index(self, record: Dict):
+        try:
+            interaction_id, rating = record["id"], int(record["feedback"]["rating"])
+        except (KeyError, TypeError, ValueError):
+            return
+        row = self.conn.execute("SELECT rowid FROM feedback_docs WHERE id = ?", (interaction_id,)).fetchone()
+        if row is not None:
+            self.conn.execute("DELETE FROM feedback_fts WHERE rowid = ?", (row[0],))
+            self.conn.execute("DELETE FROM feedback_docs WHERE rowid = ?", (row[0],))
+        rowid = self.conn.execute(
+            "INSERT INTO feedback_docs (id, rating) VALUES (?, ?)", (interaction_id, rating)
+        ).lastrowid
+        self.conn.execute("INSERT INTO feedback_fts (rowid, query) VALUES (?, ?)",
+                          (rowid, record.get("query", "")))
+
+    def search(self, query: str, limit: int = RAG_CANDIDATES,
+               min_rating: Optional[int] = None) -> List[Tuple[str, float]]:
+        """(interaction ID, BM25 score) pairs, best first (higher is better)"""
+        match = fts_query(query)
+        if match is None:
+            return []
+        sql = """
+            SELECT d.id, bm25(feedback_fts) AS rank
+            FROM feedback_fts JOIN feedback_docs d ON d.rowid = feedback_fts.rowid
+            WHERE feedback_fts MATCH ? AND d.rating >= ?
+            ORDER BY rank
+            LIMIT ?
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                sql, (match, min_rating if min_rating is not None else -1, max(1, int(limit)))
+            ).fetchall()
+        return [(row[0], -row[1]) for row in rows]  # bm25() is lower-is-better
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM feedback_docs").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class HybridRetriever:
+    """Lexical + dense retrieval of feedback examples with fusion and reranking"""
+
+    def __init__(self, feedback_store, index_path: Optional[Path] = None):
+        self.feedback_store = feedback_store
+        self.index_path = Path(index_path) if index_path else feedback_store.db_path / "feedback_fts.db"
+        self._index: Optional[FeedbackLexicalIndex] = None
+        self._reranker = None
+        self._load_lock = threading.Lock()
+        self._latencies: Dict[str, deque] = {stage: deque(maxlen=LATENCY_WINDOW) for stage in STAGES}
+
+    @property
+    def index(self) -> FeedbackLexicalIndex:
+        if self._index is None:
+            with self._load_lock:
+                if self._index is None:
+                    self._index = FeedbackLexicalIndex(self.index_path)
+        return self._index
+
+    def _load_reranker(self):
+        """Cross-encoder for the rerank stage (None when disabled or unavailable)"""
+        if RAG_RERANKER != "cross-encoder":
+            return None
+        if self._reranker is None:
+            with self._load_lock:
+                if self._reranker is None:
+                    try:
+                        from sentence_transformers import CrossEncoder
+                        self._reranker = CrossEncoder(RAG_RERANK_MODEL, device="cpu")
+                        print(f"✓ RAG reranker loaded: {RAG_RERANK_MODEL}")
+                    except Exception as e:
+                        print(f"Warning: RAG reranker unavailable, using fused ranking: {e}")
+                        self._reranker = False
+        return self._reranker or None
+
+    def retrieve(self, query: str, n_results: int = 3,
+                 min_rating: Optional[int] = None) -> Tuple[List[Dict], Dict[str, float]]:
+        """Best feedback examples for a question
+
+        Args:
+            query: The recruiter's question
+            n_results: Maximum number of examples
+            min_rating: Minimum feedback rating
+
+        Returns:
+            Tuple of (examples with query, response, rating and score, best
+            first; stage timings in milliseconds)
+        """
+        timings = {}
+        start = time.perf_counter()
+
+        def lap(stage: str, since: float) -> float:
+            now = time.perf_counter()
+            timings[stage] = round((now - since) * 1000, 3)
+            return now
+
+        t = start
+        self.index.sync(self.feedback_store)
+        t = lap("sync", t)
+        lexical = self.index.search(query, RAG_CANDIDATES, min_rating)
+        t = lap("lexical", t)
+        dense = self.feedback_store.search_similar(query, RAG_CANDIDATES, min_rating)
+        dense_ids = [] if 'error' in dense else (dense.get('ids') or [[]])[0]
+        t = lap("dense", t)
+
+        fused = reciprocal_rank_fusion([[key for key, _ in lexical], dense_ids])
+        candidates = []
+        for key, score in fused[:RAG_CANDIDATES]:
+            record = self.feedback_store.records.get(key)
+            if record is None:
+                continue  # archived
+            candidates.append({
+                "id": key,
+                "query": record["query"],
+                "response": record["response"],
+                "rating": record["feedback"]["rating"],
+                "score": score
+            })
+        t = lap("fusion", t)
+
+        reranker = self._load_reranker() if candidates else None
+        if reranker is not None:
+            scores = reranker.predict([(query, c["query"]) for c in candidates])
+            for candidate, score in zip(candidates, scores):
+                candidate["score"] = float(score)
+            candidates.sort(key=lambda c: c["score"], reverse=True)
+        t = lap("rerank", t)
+        timings["total"] = round((t - start) * 1000, 3)
+        for stage, ms in timings.items():
+            self._latencies[stage].append(ms)
+
+        if not candidates:
+            return [], timings
+        best = candidates[0]["score"]
+        if reranker is not None:
+            # Cross-encoder scores are logits: keep positives within range of the best
+            keep = [c for c in candidates if c["score"] > 0 and c["score"] >= best * RAG_MIN_SCORE_RATIO]
+        else:
+            keep = [c for c in candidates if c["score"] >= best * RAG_MIN_SCORE_RATIO]
+        return keep[:n_results], timings
+
+    def stage_stats(self) -> Dict:
+        """p50 / p95 latency per stage over the recent retrievals"""
+        stats = {}
+        for stage, samples in self._latencies.items():
+            ordered = sorted(samples)
+            stats[stage] = {
+                "p50_ms": ordered[len(ordered) // 2] if ordered else 0.0,
+                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0,
+            }
+        return {
+            "retrievals": len(self._latencies["total"]),
+            "reranker": RAG_RERANKER,
+            "indexed": self.index.count(),
+            "stages": stats
+        }
@@ -0,0 +1,371 @@
+"""
+Append-only index log with background compaction
+Keeps a JSON index (e.g. jobs_index.json) in memory and records every
+mutation as one line in a sidecar log instead of rewriting the whole file.
+The log is replayed on load and folded back into the snapshot in a
+background thread once it grows past a threshold.
+
+Several worker processes can share one index: appends, log rotation and
+the end of a compaction hold an exclusive lock on a sidecar .lock file,
+and every read first replays whatever other processes appended since
+(one stat() when nothing changed).
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from file_lock import FileLock
+
+
+class IndexLog:
+    """Dictionary index persisted as snapshot + append-only mutation log
+
+    Every logged operation is idempotent ("set", "update" with absolute
+    values, "del"), so replaying a log on top of a snapshot that already
+    contains some of its effects is harmless. A torn final line left by a
+    crash is ignored on replay and cut off before the next append.
+
+    Each process follows the log by inode and byte offset. When another
+    process rotates the log for compaction, the rest of the old log is read
+    from the .log.compacting file; if that is already gone, the index is
+    reloaded from the new snapshot.
+    """
+
+    def __init__(self, snapshot_file: Path, compact_threshold: int = 1000,
+                 durable: bool = False):
+        self.snapshot_file = Path(snapshot_file)
+        self.log_file = self.snapshot_file.with_suffix(".log")
+        self.compacting_file = self.snapshot_file.with_suffix(".log.compacting")
+        self.compact_threshold = compact_threshold
+        self.durable = durable
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(self.snapshot_file.with_suffix(".lock"))
+        self._compaction: Optional[threading.Thread] = None
+        self._data: Dict[str, Dict] = {}
+        self._log_entries = 0
+        # Inode of the log this process follows and the bytes of it applied
+        self._log_inode: Optional[int] = None
+        self._log_offset = 0
+        # Changes applied in this process (cheap change detector)
+        self.version = 0
+        # Bumped when changes made by other processes are applied, so callers
+        # can rebuild structures derived from the index
+        self.generation = 0
+        # Bumped when the index is reloaded as a whole (listeners miss those changes)
+        self.reloads = 0
+        self._listeners: List[Callable[[str, Optional[Dict], Optional[Dict]], None]] = []
+        self._notify = False
+        self._log = None
+        with self._lock, self._file_lock.exclusive():
+            self._load()
+
+    def _load(self):
+        """Load the snapshot, replay pending logs and finish an interrupted compaction"""
+        self._reload()
+        self._open_log()
+        if self.compacting_file.exists():
+            # Left by a process that died mid-compaction (or one still
+            # writing its snapshot: both snapshots are consistent with the log)
+            self._write_snapshot(self._data)
+            self.compacting_file.unlink(missing_ok=True)
+
+    def _reload(self):
+        """Rebuild the in-memory index from snapshot + logs (file lock held)"""
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                self._data = json.load(f)
+        except FileNotFoundError:
+            self._data = {}
+        except ValueError:
+            print(f"Warning: Corrupt index snapshot {self.snapshot_file}, rebuilding from log")
+            self._data = {}
+        self._replay(self.compacting_file, 0)
+        self._log_inode = self._inode(self.log_file)
+        self._log_entries, self._log_offset = self._replay(self.log_file, 0)
+        self.version += 1
+        self.reloads += 1
+
+    @staticmethod
+    def _inode(path: Path) -> Optional[int]:
+        try:
+            return os.stat(path).st_ino
+        except FileNotFoundError:
+            return None
+
+    def _replay(self, log_file: Path, start: int) -> Tuple[int, int]:
+        """Apply complete lines from byte offset start
+
+        Returns:
+            (entries applied, offset after the last complete line)
+        """
+        applied, offset = 0, start
+        try:
+            f = open(log_file, 'rb')
+        except FileNotFoundError:
+            return 0, start
+        with f:
+            f.seek(start)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break  # torn write from a crash
+                offset += len(raw)
+                try:
+                    self._apply(json.loads(raw))
+                    applied += 1
+                except (ValueError, KeyError):
+                    continue
+        return applied, offset
+
+    def _catch_up(self):
+        """Apply entries other processes appended since we last looked (file lock held)"""
+        self._notify = bool(self._listeners)
+        try:
+            self._catch_up_logs()
+        finally:
+            self._notify = False
+
+    def _catch_up_logs(self):
+        inode = self._inode(self.log_file)
+        if inode is not None and inode == self._log_inode:
+            applied, self._log_offset = self._replay(self.log_file, self._log_offset)
+            self._log_entries += applied
+        elif self._log_inode is not None and self._inode(self.compacting_file) == self._log_inode:
+            # Rotated by another process: finish the old log, then follow the new one
+            applied, _ = self._replay(self.compacting_file, self._log_offset)
+            self._log_inode = inode
+            self._log_entries, self._log_offset = self._replay(self.log_file, 0)
+            applied += self._log_entries
+        else:
+            self._notify = False
+            self._reload()
+            applied = 1
+        if applied:
+            self.version += applied
+            self.generation += 1
+        if self._log is not None and self._log_inode is not None \
+                and os.fstat(self._log.fileno()).st_ino != self._log_inode:
+            # Keep the followed log open so its inode cannot be reused while tracked
+            self._log.close()
+            self._log = open(self.log_file, 'ab')
+
+    def refresh(self):
+        """Pick up changes made by other processes (one stat() if there are none)"""
+        try:
+            st = os.stat(self.log_file)
+            if st.st_ino == self._log_inode and st.st_size == self._log_offset:
+                return
+        except FileNotFoundError:
+            pass
+        with self._lock, self._file_lock.shared():
+            self._catch_up()
+
+    def _open_log(self):
+        if self._log is not None:
+            self._log.close()
+        self._log = open(self.log_file, 'ab')
+        inode = os.fstat(self._log.fileno()).st_ino
+        if inode != self._log_inode:
+            self._log_inode, self._log_offset, self._log_entries = inode, 0, 0
+
+    def add_listener(self, listener: Callable[[str, Optional[Dict], Optional[Dict]], None]):
+        """Call listener(key, old, new) for each change made by another process
+
+        Called as the change is applied (index locks held), with None for a
+        missing entry. Changes made through this instance are not reported,
+        nor those of a reload as a whole (see reloads).
+        """
+        self._listeners.append(listener)
+
+    def _apply(self, entry: Dict):
+        op, key = entry['op'], entry['key']
+        old = self._data.get(key)
+        self._apply_op(op, key, entry)
+        if self._notify:
+            new = self._data.get(key)
+            if new is not old:
+                for listener in self._listeners:
+                    listener(key, old, new)
+
+    def _apply_op(self, op: str, key: str, entry: Dict):
+        if op == 'set':
+            self._data[key] = dict(entry['value'])
+        elif op == 'update':
+            if key in self._data:
+                # Copy-on-write so snapshots taken for compaction stay stable
+                self._data[key] = {**self._data[key], **entry['fields']}
+        elif op == 'del':
+            self._data.pop(key, None)
+
+    def _append(self, entry: Dict):
+        with self._lock, self._file_lock.exclusive():
+            self._catch_up()
+            if os.fstat(self._log.fileno()).st_ino != self._log_inode:
+                self._open_log()  # another process rotated the log
+            if os.fstat(self._log.fileno()).st_size > self._log_offset:
+                os.truncate(self.log_file, self._log_offset)  # torn line left by a crash
+            line = (json.dumps(entry) + '\n').encode('utf-8')
+            self._apply(entry)
+            self._log.write(line)
+            self._log.flush()
+            if self.durable:
+                os.fsync(self._log.fileno())
+            self._log_offset += len(line)
+            self._log_entries += 1
+            self.version += 1
+            if self._log_entries >= self.compact_threshold:
+                self._start_compaction()
+
+    def _write_tmp_snapshot(self, data: Dict) -> Path:
+        tmp_file = self.snapshot_file.with_suffix(f".json.{os.getpid()}.{id(self):x}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        return tmp_file
+
+    def _write_snapshot(self, data: Dict):
+        os.replace(self._write_tmp_snapshot(data), self.snapshot_file)
+
+    def _rotate(self) -> Optional[Tuple[Dict, BinaryIO]]:
+        """Swap in a fresh log
+
+        Returns:
+            A snapshot of the current state and the rotated log, held open
+            so its inode identifies it until the compaction ends
+        """
+        with self._lock, self._file_lock.exclusive():
+            self._catch_up()
+            if self.compacting_file.exists():
+                return None  # a compaction (maybe another process's) is still finishing
+            self._log.close()
+            os.replace(self.log_file, self.compacting_file)
+            rotated = open(self.compacting_file, 'rb')
+            self._log = None
+            self._open_log()
+            return dict(self._data), rotated
+
+    def _compact_snapshot(self, snapshot: Dict, rotated: BinaryIO):
+        try:
+            # Written without the lock: the snapshot only holds entries that
+            # are also in the compacting log, which readers still replay
+            tmp_file = self._write_tmp_snapshot(snapshot)
+            with self._file_lock.exclusive():
+                if self._inode(self.compacting_file) == os.fstat(rotated.fileno()).st_ino:
+                    os.replace(tmp_file, self.snapshot_file)
+                    self.compacting_file.unlink()
+                else:
+                    # A process starting up finished this compaction already, and
+                    # later ones may have replaced its snapshot with a newer one
+                    tmp_file.unlink()
+        except Exception as e:
+            print(f"Warning: Index compaction failed for {self.snapshot_file}: {e}")
+        finally:
+            rotated.close()
+
+    def _start_compaction(self):
+        if self._compaction and self._compaction.is_alive():
+            return
+        rotation = self._rotate()
+        if rotation is None:
+            return
+        self._compaction = threading.Thread(
+            target=self._compact_snapshot, args=rotation, daemon=True
+        )
+        self._compaction.start()
+
+    def compact(self):
+        """Fold the log into the snapshot synchronously"""
+        if self._compaction:
+            self._compaction.join()
+        rotation = self._rotate()
+        if rotation is not None:
+            self._compact_snapshot(*rotation)
+
+    def close(self):
+        """Wait for compaction and close the log"""
+        if self._compaction:
+            self._compaction.join()
+        with self._lock:
+            self._log.close()
+            self._file_lock.close()
+
+    def set(self, key: str, value: Dict):
+        """Insert or replace an entry"""
+        self._append({"op": "set", "key": key, "value": value})
+
+    def update(self, key: str, **fields):
+        """Overwrite fields of an existing entry"""
+        self._append({"op": "update", "key": key, "fields": fields})
+
+    def increment(self, key: str, field: str, by: int = 1) -> bool:
+        """Increment a numeric field of an entry
+
+        Returns:
+            True if the entry exists, False otherwise
+        """
+        with self._lock, self._file_lock.exclusive():
+            self._catch_up()
+            entry = self._data.get(key)
+            if entry is None:
+                return False
+            # Logged as an absolute value so replays stay idempotent
+            self.update(key, **{field: entry.get(field, 0) + by})
+            return True
+
+    def delete(self, key: str) -> bool:
+        """Remove an entry
+
+        Returns:
+            True if the entry existed, False otherwise
+        """
+        with self._lock, self._file_lock.exclusive():
+            self._catch_up()
+            if key not in self._data:
+                return False
+            self._append({"op": "del", "key": key})
+            return True
+
+    def get(self, key: str) -> Optional[Dict]:
+        self.refresh()
+        entry = self._data.get(key)
+        return dict(entry) if entry is not None else None
+
+    def __contains__(self, key: str) -> bool:
+        self.refresh()
+        return key in self._data
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._data)
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        self.refresh()
+        with self._lock:
+            return iter(list(self._data.items()))
+
+    def values(self) -> Iterator[Dict]:
+        self.refresh()
+        with self._lock:
+            return iter(list(self._data.values()))
+
+    def as_dict(self) -> Dict[str, Dict]:
+        """Shallow copy of the whole index"""
+        self.refresh()
+        with self._lock:
+            return dict(self._data)
+
+    def signature(self) -> str:
+        """Validator of the on-disk state, equal in every process that has read it
+
+        Log inode and offset identify the applied changes; the snapshot
+        mtime tells a reused log inode apart after compaction.
+        """
+        self.refresh()
+        try:
+            snapshot_mtime = os.stat(self.snapshot_file).st_mtime_ns
+        except FileNotFoundError:
+            snapshot_mtime = 0
+        with self._lock:
+            return f"{snapshot_mtime}:{self._log_inode}:{self._log_offset}"
@@ -2,43 +2,57 @@
 Job Description Storage System
 Manages job descriptions with unique IDs and persistent storage
 """
-import json
 import uuid
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
+from index_log import IndexLog
+from jsonl_offset_index import JsonlOffsetIndex
+from materialized_stats import MaterializedStats
+from pagination import SortedKeyIndex, decode_cursor, paginate
 
 
 class JobStorage:
     """Store and manage job descriptions with unique IDs"""
     
-    def __init__(self, storage_dir: str = "data/jobs"):
+    def __init__(self, storage_dir: str = "data/jobs", search_index=None):
         self.storage_dir = Path(storage_dir)
+        self.search_index = search_index
         self.storage_dir.mkdir(parents=True, exist_ok=True)
         self.jobs_file = self.storage_dir / "jobs.jsonl"
         self.index_file = self.storage_dir / "jobs_index.json"
         self._ensure_files_exist()
+        self.index = IndexLog(self.index_file)
+        self.offsets = JsonlOffsetIndex(
+            self.jobs_file, "job_id", self.storage_dir / "jobs_offsets.json"
+        )
+        self._sorted: Optional[SortedKeyIndex] = None
+        # Index generation the derived orderings were built at
+        self._derived_generation = self.index.generation
+        self.stats = MaterializedStats(self.storage_dir / "jobs_stats.json")
+        if not self.stats.exists:
+            self._rebuild_stats()
     
     def _ensure_files_exist(self):
         """Create storage files if they don't exist"""
         if not self.jobs_file.exists():
             self.jobs_file.touch()
-        
-        if not self.index_file.exists():
-            self._save_index({})
     
-    def _load_index(self) -> Dict:
-        """Load the jobs index"""
-        try:
-            with open(self.index_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
+    def _drop_stale_derived(self):
+        """Forget orderings built before other workers changed the index"""
+        self.index.refresh()
+        if self._derived_generation != self.index.generation:
+            self._derived_generation = self.index.generation
+            self._sorted = None
     
-    def _save_index(self, index: Dict):
-        """Save the jobs index"""
-        with open(self.index_file, 'w', encoding='utf-8') as f:
-            json.dump(index, f, indent=2)
+    def _order(self) -> SortedKeyIndex:
+        """Job IDs ordered by creation time (built on first use)"""
+        self._drop_stale_derived()
+        if self._sorted is None:
+            self._sorted = SortedKeyIndex(
+                (entry['created_at'], job_id) for job_id, entry in self.index.items()
+            )
+        return self._sorted
     
     def add_job(self, job_description: str, company_name: str = "", 
                 role_name: str = "", metadata: Optional[Dict] = None) -> Dict:
@@ -68,19 +82,28 @@ class JobStorage:
             "analysis_count": 0
         }
         
-        # Append to JSONL file
-        with open(self.jobs_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(job_record) + '\n')
+        # Log, index and materialized stats change together (see MaterializedStats)
+        with self.stats.transaction():
+            # Append to JSONL file and record its byte offset
+            self.offsets.append(job_record)
+            
+            # Update index
+            self.index.set(job_id, {
+                "company_name": company_name,
+                "role_name": role_name,
+                "created_at": timestamp,
+                "analysis_count": 0
+            })
+            if self._sorted is not None:
+                self._sorted.add(timestamp, job_id)
+            
+            # Update materialized stats
+            summary = self._summary(job_id)
+            summary['description_preview'] = job_description[:200] + "..."
+            self.stats.push_recent("jobs", summary, "job_id")
         
-        # Update index
-        index = self._load_index()
-        index[job_id] = {
-            "company_name": company_name,
-            "role_name": role_name,
-            "created_at": timestamp,
-            "analysis_count": 0
-        }
-        self._save_index(index)
+        if self.search_index:
+            self.search_index.index_job(job_record)
         
         return job_record
     
@@ -93,15 +116,11 @@ class JobStorage:
         Returns:
             Job record or None if not found
         """
-        try:
-            with open(self.jobs_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    job = json.loads(line)
-                    if job['job_id'] == job_id:
-                        return job
-        except:
-            pass
-        return None
+        return self.offsets.get(job_id)
+    
+    def has_job(self, job_id: str) -> bool:
+        """Whether a job exists (and has not been deleted)"""
+        return job_id in self.index
     
     def list_jobs(self, limit: int = 50) -> List[Dict]:
         """List all jobs (most recent first)
@@ -112,36 +131,80 @@ class JobStorage:
         Returns:
             List of job records (without full description)
         """
-        jobs = []
-        try:
-            with open(self.jobs_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    job = json.loads(line)
-                    # Return summary without full description
-                    jobs.append({
-                        "job_id": job['job_id'],
-                        "company_name": job['company_name'],
-                        "role_name": job['role_name'],
-                        "created_at": job['created_at'],
-                        "analysis_count": job.get('analysis_count', 0),
-                        "description_preview": job['job_description'][:200] + "..."
-                    })
-        except:
-            pass
-        
-        # Return most recent first
-        return list(reversed(jobs))[:limit]
+        return self.list_jobs_page(limit=limit)['items']
+    
+    def list_jobs_page(self, limit: int = 50, cursor: Optional[str] = None,
+                       company: Optional[str] = None, role: Optional[str] = None,
+                       date_from: Optional[str] = None,
+                       date_to: Optional[str] = None) -> Dict:
+        """List one page of jobs (most recent first) with optional filters
+        
+        Args:
+            limit: Page size
+            cursor: Opaque cursor from a previous page's next_cursor
+            company: Case-insensitive substring of the company name
+            role: Case-insensitive substring of the role name
+            date_from: Inclusive lower bound on created_at (ISO date/datetime)
+            date_to: Inclusive upper bound on created_at (ISO date/datetime)
+            
+        Returns:
+            Dict with "items" (job summaries) and "next_cursor"
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        company = company.lower() if company else None
+        role = role.lower() if role else None
+        
+        def matches(job: Dict) -> bool:
+            if company and company not in job['company_name'].lower():
+                return False
+            if role and role not in job['role_name'].lower():
+                return False
+            return True
+        
+        page = paginate(
+            self._order().iter_desc(decode_cursor(cursor), date_from, date_to),
+            self._summary,
+            matches if company or role else None,
+            limit
+        )
+        for job in page['items']:
+            record = self.offsets.get(job['job_id']) or {}
+            job['description_preview'] = record.get('job_description', '')[:200] + "..."
+        return page
+    
+    def _summary(self, job_id: str) -> Optional[Dict]:
+        """Job summary from the in-memory index (description added per page)"""
+        entry = self.index.get(job_id)
+        if entry is None:
+            return None
+        return {
+            "job_id": job_id,
+            "company_name": entry.get('company_name', ''),
+            "role_name": entry.get('role_name', ''),
+            "created_at": entry['created_at'],
+            "analysis_count": entry.get('analysis_count', 0)
+        }
+    
+    def count_jobs(self) -> int:
+        """Total number of jobs"""
+        return len(self.index)
+    
+    def version(self) -> str:
+        """Validator that changes whenever the jobs change (same in every worker)"""
+        return self.index.signature()
     
     def increment_analysis_count(self, job_id: str):
         """Increment the analysis count for a job"""
-        index = self._load_index()
-        if job_id in index:
-            index[job_id]['analysis_count'] = index[job_id].get('analysis_count', 0) + 1
-            self._save_index(index)
+        self.index.increment(job_id, 'analysis_count')
     
     def search_jobs(self, query: str) -> List[Dict]:
         """Search jobs by company or role name
         
+        Matches against the in-memory index; only the matching records are
+        read from jobs.jsonl. Use SearchIndex for full-text search.
+        
         Args:
             query: Search query
             
@@ -151,23 +214,21 @@ class JobStorage:
         query_lower = query.lower()
         matching_jobs = []
         
-        try:
-            with open(self.jobs_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    job = json.loads(line)
-                    if (query_lower in job['company_name'].lower() or 
-                        query_lower in job['role_name'].lower()):
-                        matching_jobs.append({
-                            "job_id": job['job_id'],
-                            "company_name": job['company_name'],
-                            "role_name": job['role_name'],
-                            "created_at": job['created_at'],
-                            "description_preview": job['job_description'][:200] + "..."
-                        })
-        except:
-            pass
-        
-        return list(reversed(matching_jobs))
+        for _, job_id in self._order().iter_desc():
+            entry = self.index.get(job_id)
+            if not entry or not (query_lower in entry.get('company_name', '').lower() or
+                                 query_lower in entry.get('role_name', '').lower()):
+                continue
+            record = self.offsets.get(job_id) or {}
+            matching_jobs.append({
+                "job_id": job_id,
+                "company_name": entry.get('company_name', ''),
+                "role_name": entry.get('role_name', ''),
+                "created_at": entry['created_at'],
+                "description_preview": record.get('job_description', '')[:200] + "..."
+            })
+        
+        return matching_jobs
     
     def delete_job(self, job_id: str) -> bool:
         """Delete a job (soft delete by marking)
@@ -179,9 +240,38 @@ class JobStorage:
             True if deleted, False otherwise
         """
         # For now, just remove from index
-        index = self._load_index()
-        if job_id in index:
-            del index[job_id]
-            self._save_index(index)
-            return True
-        return False
+        with self.stats.transaction():
+            entry = self.index.get(job_id)
+            if entry is None:
+                return False
+            if self._sorted is not None:
+                self._sorted.remove(entry['created_at'], job_id)
+            self.index.delete(job_id)
+            if self.stats.remove_recent("jobs", "job_id", job_id):
+                self._rebuild_stats()
+        if self.search_index:
+            self.search_index.remove_job(job_id)
+        return True
+    
+    def get_stats(self) -> Dict:
+        """Job statistics from materialized state
+        
+        Returns:
+            Dict with total and the most recent jobs
+        """
+        self.stats.refresh()
+        if not self.stats.exists:
+            self._rebuild_stats()  # left behind by an interrupted write
+        recent = self.stats.recent("jobs")
+        for job in recent:
+            entry = self.index.get(job['job_id'])
+            if entry:
+                job['analysis_count'] = entry.get('analysis_count', 0)
+        return {"total": len(self.index), "recent": recent}
+    
+    def _rebuild_stats(self):
+        """Recompute the recent-jobs ring buffer from the index"""
+        with self.stats.transaction():
+            self.stats.reset()
+            for job in reversed(self.list_jobs(limit=self.stats.recent_size)):
+                self.stats.push_recent("jobs", job, "job_id")
@@ -1,67 +1,200 @@
 """
 Job Application Tracker for Web ATS
-Manages job applications and updates Excel tracking sheet
+Keeps job applications in an indexed store (snapshot + append-only log)
+with a normalized (company, job title) lookup and maintained counters.
+The Excel tracking sheet is an export, regenerated in the background
+with openpyxl's write-only mode whenever applications change.
 """
 import os
+import tempfile
+import threading
+import time
+import uuid
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, Dict, List
-import openpyxl
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Optional, Dict, List, Tuple
 from openpyxl import Workbook, load_workbook
+from index_log import IndexLog
+from materialized_stats import MaterializedStats
+from pagination import SortedKeyIndex
+from export_stream import EXPORT_PAGE_SIZE
+
+
+HEADERS = ["Company", "Job", "Portal", "Full Time", "Date Applied"]
+
+# Seconds to wait for more changes before rewriting the Excel export
+EXPORT_DELAY = 2.0
+
+
+def normalize_key(company: str, job_title: str) -> Tuple[str, str]:
+    """Case- and whitespace-insensitive (company, job title) lookup key"""
+    return (company or "").lower().strip(), (job_title or "").lower().strip()
 
 
 class JobTracker:
-    """Track job applications in Excel"""
-    
+    """Track job applications (indexed store + Excel export)"""
+
     def __init__(self, excel_path: str = "data/jobs_applied/job_applicaiton.xlsx"):
         self.excel_path = Path(excel_path)
-        self._ensure_excel_exists()
-    
-    def _ensure_excel_exists(self):
-        """Create Excel file if it doesn't exist"""
+        self.excel_path.parent.mkdir(parents=True, exist_ok=True)
+        index_file = self.excel_path.parent / "applications_index.json"
+        is_new_store = not index_file.exists() and not index_file.with_suffix(".log").exists()
+        self.index = IndexLog(index_file)
+        self.stats = MaterializedStats(self.excel_path.parent / "applications_stats.json")
+
+        if is_new_store and self.excel_path.exists():
+            self._import_excel()
+        if not self.stats.exists:
+            self._rebuild_stats()
+
+        self._lock = threading.RLock()
+        self._keys: Dict[Tuple[str, str], int] = {}
+        self._order = SortedKeyIndex()
+        self._generation = self.index.generation
+        for application_id, application in self.index.items():
+            self._track(application_id, application)
+
+        # Background Excel export
+        self._export_pending = False
+        self._export_thread: Optional[threading.Thread] = None
         if not self.excel_path.exists():
-            # Create directory if needed
-            self.excel_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Create new workbook with headers
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Jobs Applied"
-            
-            # Set headers
-            headers = ["Company", "Job", "Portal", "Full Time", "Date Applied"]
-            ws.append(headers)
-            
-            # Save
-            wb.save(self.excel_path)
+            self.export_excel()
             print(f"✓ Created new job tracking Excel: {self.excel_path}")
-    
-    def add_job_application(self, company: str, job_title: str, 
-                           portal: str = "LinkedIn", 
+
+    def _track(self, application_id: str, application: Dict):
+        key = normalize_key(application['company'], application['job'])
+        self._keys[key] = self._keys.get(key, 0) + 1
+        self._order.add(application['created_at'], application_id)
+
+    def _sync_derived(self):
+        """Rebuild the duplicate keys and date order after other workers' writes"""
+        self.index.refresh()
+        with self._lock:
+            if self._generation == self.index.generation:
+                return
+            self._generation = self.index.generation
+            self._keys, self._order = {}, SortedKeyIndex()
+            for application_id, application in self.index.items():
+                self._track(application_id, application)
+
+    def _count_in_stats(self, application: Dict):
+        self.stats.incr("total")
+        self.stats.incr_group("by_portal", application.get('portal') or 'Unknown')
+        self.stats.incr_group("by_type", application.get('type') or 'Unknown')
+        self.stats.incr_group("by_date", str(application.get('date', '')))
+
+    def _rebuild_stats(self):
+        """Recompute all counters from the store"""
+        with self.stats.transaction():
+            self.stats.reset()
+            for _, application in self.index.items():
+                self._count_in_stats(application)
+
+    def _import_excel(self):
+        """One-time import of rows from an existing tracking sheet"""
+        try:
+            wb = load_workbook(self.excel_path, read_only=True)
+            ws = wb.active
+            imported = 0
+            for row_number, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 2):
+                if not row or not row[0]:
+                    continue
+                row = list(row) + [None] * (len(HEADERS) - len(row))
+                date = row[4].strftime("%Y-%m-%d") if isinstance(row[4], datetime) else str(row[4] or '')
+                self.index.set(f"xlsx_{row_number:06d}", {
+                    "company": str(row[0]),
+                    "job": str(row[1] or ''),
+                    "portal": row[2],
+                    "type": row[3],
+                    "date": date,
+                    # Keeps sheet order among rows of the same day
+                    "created_at": f"{date}T00:00:00.{row_number:06d}"
+                })
+                imported += 1
+            wb.close()
+            if imported:
+                print(f"✓ Imported {imported} job applications from {self.excel_path}")
+        except Exception as e:
+            print(f"Warning: Could not import {self.excel_path}: {e}")
+
+    def _schedule_export(self):
+        """Rewrite the Excel export in the background (changes are coalesced)"""
+        with self._lock:
+            self._export_pending = True
+            if self._export_thread is None:
+                self._export_thread = threading.Thread(
+                    target=self._export_worker, name="job-tracker-export", daemon=True
+                )
+                self._export_thread.start()
+
+    def _export_worker(self):
+        while True:
+            time.sleep(EXPORT_DELAY)  # let a burst of changes settle
+            with self._lock:
+                if not self._export_pending:
+                    self._export_thread = None
+                    return
+                self._export_pending = False
+            try:
+                self.export_excel()
+            except Exception as e:
+                print(f"Error exporting job applications: {str(e)}")
+
+    def export_excel(self):
+        """Write the whole tracking sheet now (write-only mode, atomic replace)"""
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Jobs Applied")
+        ws.append(HEADERS)
+        for application in reversed(self.get_all_applications()):
+            ws.append([application['company'], application['job'], application['portal'],
+                       application['type'], application['date']])
+        # Unique temp name: other threads and workers may be exporting at the same time
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f"{self.excel_path.stem}.", suffix=".tmp.xlsx", dir=self.excel_path.parent
+        )
+        os.close(fd)
+        try:
+            wb.save(tmp_name)
+            os.replace(tmp_name, self.excel_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def add_job_application(self, company: str, job_title: str,
+                           portal: str = "LinkedIn",
                            employment_type: str = "Full Time") -> Dict:
-        """Add a new job application to the Excel sheet
-        
+        """Add a new job application
+
         Args:
             company: Company name
             job_title: Job title/position
             portal: Job portal (default: LinkedIn)
             employment_type: Employment type (default: Full Time)
-            
+
         Returns:
             Dict with success status and details
         """
         try:
-            # Load workbook
-            wb = load_workbook(self.excel_path)
-            ws = wb.active
-            
-            # Add new row
-            date_applied = datetime.now().strftime("%Y-%m-%d")
-            ws.append([company, job_title, portal, employment_type, date_applied])
-            
-            # Save
-            wb.save(self.excel_path)
-            
+            now = datetime.now()
+            date_applied = now.strftime("%Y-%m-%d")
+            application_id = str(uuid.uuid4())[:12]
+            application = {
+                "company": company,
+                "job": job_title,
+                "portal": portal,
+                "type": employment_type,
+                "date": date_applied,
+                "created_at": now.isoformat()
+            }
+
+            # Index and counters change together (see MaterializedStats)
+            with self._lock, self.stats.transaction():
+                self.index.set(application_id, application)
+                self._track(application_id, application)
+                self._count_in_stats(application)
+            self._schedule_export()
+
             return {
                 "success": True,
                 "company": company,
@@ -71,167 +204,106 @@ class JobTracker:
                 "date_applied": date_applied,
                 "total_applications": self.get_application_count()
             }
-            
+
         except Exception as e:
             print(f"Error logging job application: {str(e)}")
             return {
                 "success": False,
                 "error": str(e)
             }
-    
+
     def get_application_count(self) -> int:
         """Get total number of applications"""
-        try:
-            wb = load_workbook(self.excel_path)
-            ws = wb.active
-            # Subtract 1 for header row
-            return ws.max_row - 1
-        except:
-            return 0
-    
+        return int(self.stats.counter("total"))
+
     def check_if_applied(self, company: str, job_title: str) -> bool:
         """Check if already applied to this job
-        
+
         Args:
             company: Company name
             job_title: Job title
-            
+
         Returns:
             True if already applied, False otherwise
         """
-        try:
-            wb = load_workbook(self.excel_path)
-            ws = wb.active
-            
-            # Check each row (skip header)
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if row[0] and row[1]:  # Company and Job columns
-                    if (row[0].lower().strip() == company.lower().strip() and 
-                        row[1].lower().strip() == job_title.lower().strip()):
-                        return True
-            
-            return False
-            
-        except Exception as e:
-            print(f"Error checking applications: {str(e)}")
-            return False
-    
+        self._sync_derived()
+        return normalize_key(company, job_title) in self._keys
+
+    @staticmethod
+    def _to_dict(application: Dict) -> Dict:
+        return {
+            'company': application['company'],
+            'job': application['job'],
+            'portal': application['portal'],
+            'type': application['type'],
+            'date': application['date']
+        }
+
     def get_recent_applications(self, limit: int = 10) -> List[Dict]:
         """Get recent job applications
-        
+
         Args:
             limit: Number of recent applications to return
-            
+
         Returns:
             List of recent applications
         """
-        try:
-            wb = load_workbook(self.excel_path)
-            ws = wb.active
-            
-            applications = []
-            rows = list(ws.iter_rows(min_row=2, values_only=True))
-            
-            # Get last N rows
-            for row in rows[-limit:]:
-                if row[0]:  # Has company name
-                    applications.append({
-                        'company': row[0],
-                        'job': row[1],
-                        'portal': row[2],
-                        'type': row[3],
-                        'date': row[4]
-                    })
-            
-            return list(reversed(applications))  # Most recent first
-            
-        except Exception as e:
-            print(f"Error getting recent applications: {str(e)}")
-            return []
-    
+        applications = []
+        self._sync_derived()
+        with self._lock:
+            for _, application_id in self._order.iter_desc():
+                if len(applications) >= limit:
+                    break
+                application = self.index.get(application_id)
+                if application:
+                    applications.append(self._to_dict(application))
+        return applications  # Most recent first
+
+    def iter_applications(self, date_from: Optional[str] = None,
+                          date_to: Optional[str] = None):
+        """Yield applications newest first, with their IDs and creation times (for exports)
+
+        Args:
+            date_from: Inclusive lower bound on created_at (ISO date/datetime)
+            date_to: Inclusive upper bound on created_at (ISO date/datetime)
+        """
+        position = None
+        while True:
+            self._sync_derived()
+            with self._lock:
+                page = list(islice(self._order.iter_desc(position, date_from, date_to), EXPORT_PAGE_SIZE))
+            if not page:
+                return
+            position = page[-1]
+            for created_at, application_id in page:
+                application = self.index.get(application_id)
+                if application:
+                    yield {"application_id": application_id, **self._to_dict(application),
+                           "created_at": created_at}
+
     def get_all_applications(self) -> List[Dict]:
         """Get all job applications
-        
+
         Returns:
             List of all applications
         """
-        try:
-            wb = load_workbook(self.excel_path)
-            ws = wb.active
-            
-            applications = []
-            
-            # Get all rows (skip header)
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if row[0]:  # Has company name
-                    applications.append({
-                        'company': row[0],
-                        'job': row[1],
-                        'portal': row[2],
-                        'type': row[3],
-                        'date': row[4]
-                    })
-            
-            return list(reversed(applications))  # Most recent first
-            
-        except Exception as e:
-            print(f"Error getting all applications: {str(e)}")
-            return []
-    
+        return self.get_recent_applications(limit=len(self.index))  # Most recent first
+
     def get_statistics(self) -> Dict:
         """Get application statistics
-        
+
         Returns:
             Dict with statistics
         """
-        try:
-            applications = self.get_all_applications()
-            
-            if not applications:
-                return {
-                    "total": 0,
-                    "by_portal": {},
-                    "by_type": {},
-                    "recent_7_days": 0
-                }
-            
-            # Count by portal
-            by_portal = {}
-            for app in applications:
-                portal = app.get('portal', 'Unknown')
-                by_portal[portal] = by_portal.get(portal, 0) + 1
-            
-            # Count by type
-            by_type = {}
-            for app in applications:
-                emp_type = app.get('type', 'Unknown')
-                by_type[emp_type] = by_type.get(emp_type, 0) + 1
-            
-            # Count recent (last 7 days)
-            from datetime import datetime, timedelta
-            seven_days_ago = datetime.now() - timedelta(days=7)
-            recent_count = 0
-            
-            for app in applications:
-                try:
-                    app_date = datetime.strptime(str(app.get('date', '')), "%Y-%m-%d")
-                    if app_date >= seven_days_ago:
-                        recent_count += 1
-                except:
-                    pass
-            
-            return {
-                "total": len(applications),
-                "by_portal": by_portal,
-                "by_type": by_type,
-                "recent_7_days": recent_count
-            }
-            
-        except Exception as e:
-            print(f"Error getting statistics: {str(e)}")
-            return {
-                "total": 0,
-                "by_portal": {},
-                "by_type": {},
-                "recent_7_days": 0
-            }
+        self.stats.refresh()
+        if not self.stats.exists:
+            self._rebuild_stats()  # left behind by an interrupted write
+        seven_days_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+        return {
+            "total": self.get_application_count(),
+            "by_portal": {k: int(v) for k, v in self.stats.group("by_portal").items()},
+            "by_type": {k: int(v) for k, v in self.stats.group("by_type").items()},
+            "recent_7_days": int(sum(
+                count for date, count in self.stats.group("by_date").items() if date >= seven_days_ago
+            ))
+        }
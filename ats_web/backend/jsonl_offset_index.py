@@ -0,0 +1,271 @@
+"""
+Byte-offset index for append-only JSONL files
+Maps a record ID to the (offset, length) of its line so a single record
+can be fetched with one positioned read and one json.loads, regardless of
+how large the file has grown.
+
+Worker processes can share one file: appends and rewrites hold an flock on
+a sidecar .lock file, offsets are taken from the file position after each
+write, and a process reloads its map when another one rewrote the file.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Tuple
+
+from file_lock import FileLock
+
+
+class JsonlOffsetIndex:
+    """Lazily loaded ID -> (offset, length) map backed by a sidecar file
+
+    The sidecar records how many bytes of the JSONL file it covers and the
+    file's epoch. On load, any lines appended after that point are scanned
+    and added, so the sidecar only needs to be persisted periodically to
+    stay correct.
+    """
+
+    def __init__(self, jsonl_file: Path, key_field: str,
+                 sidecar_file: Optional[Path] = None, persist_every: int = 100):
+        self.jsonl_file = Path(jsonl_file)
+        self.key_field = key_field
+        self.sidecar_file = Path(sidecar_file) if sidecar_file else \
+            self.jsonl_file.with_name(self.jsonl_file.stem + "_offsets.json")
+        self.persist_every = persist_every
+        # Number of rewrites so far (see epoch)
+        self.epoch_file = self.jsonl_file.with_suffix(".epoch")
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(self.jsonl_file.with_suffix(".lock"))
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._covered = 0
+        self._loaded = False
+        self._dirty = 0
+        # Inode of the file the offsets point into
+        self._inode: Optional[int] = None
+
+    def _file_inode(self) -> Optional[int]:
+        try:
+            return os.stat(self.jsonl_file).st_ino
+        except FileNotFoundError:
+            return None
+
+    def _ensure_loaded(self):
+        """Load the map, or reload it if another process rewrote the file (one stat)"""
+        if self._loaded and self._file_inode() == self._inode:
+            return
+        with self._lock, self._file_lock.exclusive():
+            inode = self._file_inode()
+            if self._loaded and inode == self._inode:
+                return
+            file_size = self.jsonl_file.stat().st_size if inode is not None else 0
+            epoch = self.epoch()
+            try:
+                with open(self.sidecar_file, 'r', encoding='utf-8') as f:
+                    sidecar = json.load(f)
+                covered = int(sidecar.get('size', 0))
+                offsets = {k: tuple(v) for k, v in sidecar.get('offsets', {}).items()}
+            except:
+                sidecar, covered, offsets = {}, 0, {}
+
+            # Written for an earlier version of the file: the sidecar is stale
+            if sidecar.get('epoch') != epoch or covered > file_size:
+                covered, offsets = 0, {}
+
+            self._offsets = offsets
+            self._covered = covered
+            self._inode = inode
+            caught_up = self._scan_from(covered)
+            self._loaded = True
+            if caught_up:
+                self.save()
+
+    def _scan_from(self, start: int) -> int:
+        """Index every complete line from byte offset start; returns lines added"""
+        if not self.jsonl_file.exists():
+            return 0
+        added = 0
+        with open(self.jsonl_file, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break  # partial line still being written
+                if raw.strip():
+                    try:
+                        record = json.loads(raw)
+                        self._offsets[record[self.key_field]] = (offset, len(raw))
+                        added += 1
+                    except (ValueError, KeyError, TypeError):
+                        pass
+                offset += len(raw)
+            self._covered = offset
+        return added
+
+    def _read_at(self, offset: int, length: int) -> bytes:
+        with open(self.jsonl_file, 'rb') as f:
+            if hasattr(os, 'pread'):
+                return os.pread(f.fileno(), length, offset)
+            f.seek(offset)
+            return f.read(length)
+
+    def append(self, record: Dict) -> Tuple[int, int]:
+        """Append a record to the JSONL file and index it
+
+        Args:
+            record: Record containing the key field
+
+        Returns:
+            (offset, length) of the written line
+        """
+        line = (json.dumps(record) + '\n').encode('utf-8')
+        with self._lock, self._file_lock.exclusive():
+            self._ensure_loaded()
+            with open(self.jsonl_file, 'ab') as f:
+                f.write(line)
+                f.flush()
+                # Taken after the write: O_APPEND put the line at the end of the file
+                offset = f.tell() - len(line)
+            self._inode = self._inode or self._file_inode()
+            # Pick up anything another writer appended before us
+            if offset > self._covered:
+                self._scan_from(self._covered)
+            self._offsets[record[self.key_field]] = (offset, len(line))
+            self._covered = max(self._covered, offset + len(line))
+            self._dirty += 1
+            if self._dirty >= self.persist_every:
+                self.save()
+        return offset, len(line)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Fetch one record by ID with a single positioned read
+
+        Args:
+            key: Record ID
+
+        Returns:
+            Parsed record or None if not found
+        """
+        self._ensure_loaded()
+        location = self._offsets.get(key)
+        if location is None:
+            # Another process may have appended since we last looked
+            with self._lock, self._file_lock.shared():
+                if self._file_inode() == self._inode:
+                    self._scan_from(self._covered)
+                location = self._offsets.get(key)
+            if location is None:
+                return None
+        try:
+            record = json.loads(self._read_at(*location))
+        except (OSError, ValueError):
+            return None
+        # Guards against offsets into a file replaced since the stat above
+        return record if record.get(self.key_field) == key else None
+
+    def __contains__(self, key: str) -> bool:
+        self._ensure_loaded()
+        return key in self._offsets
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._offsets)
+
+    def keys(self) -> Iterator[str]:
+        """Iterate record IDs in file order"""
+        self._ensure_loaded()
+        return iter(sorted(self._offsets, key=lambda k: self._offsets[k][0]))
+
+    def save(self):
+        """Persist the offset map to the sidecar file (atomic replace)"""
+        with self._lock:
+            tmp_file = self.sidecar_file.with_suffix(f"{self.sidecar_file.suffix}.{os.getpid()}.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "epoch": self.epoch(),
+                    "size": self._covered,
+                    "offsets": {k: list(v) for k, v in self._offsets.items()}
+                }, f)
+            os.replace(tmp_file, self.sidecar_file)
+            self._dirty = 0
+
+    @contextmanager
+    def exclusive(self) -> Iterator["JsonlOffsetIndex"]:
+        """Hold off appends and rewrites by every thread and process
+
+        For callers that rewrite the file themselves (then rebuild()).
+        """
+        with self._lock, self._file_lock.exclusive():
+            yield self
+
+    def rewrite(self, keep: Callable[[str], bool]) -> int:
+        """Rewrite the JSONL file with only the records whose ID passes keep
+
+        Appends (from any process) wait for the rewrite; the file is
+        replaced atomically.
+
+        Returns:
+            Bytes reclaimed
+        """
+        with self._lock, self._file_lock.exclusive():
+            self._ensure_loaded()
+            self._scan_from(self._covered)
+            before = self.jsonl_file.stat().st_size if self.jsonl_file.exists() else 0
+            tmp_file = self.jsonl_file.with_suffix(f"{self.jsonl_file.suffix}.{os.getpid()}.tmp")
+            offsets, offset = {}, 0
+            with open(self.jsonl_file, 'rb') as src, open(tmp_file, 'wb') as out:
+                for key in sorted(self._offsets, key=lambda k: self._offsets[k][0]):
+                    if not keep(key):
+                        continue
+                    start, length = self._offsets[key]
+                    src.seek(start)
+                    out.write(src.read(length))
+                    offsets[key] = (offset, length)
+                    offset += length
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_file, self.jsonl_file)
+            self._bump_epoch()
+            self._offsets = offsets
+            self._covered = offset
+            self._inode = self._file_inode()
+            self.save()
+            return before - offset
+
+    def _bump_epoch(self):
+        tmp_file = self.epoch_file.with_suffix(".epoch.tmp")
+        tmp_file.write_text(str(self._rewrites() + 1))
+        os.replace(tmp_file, self.epoch_file)
+
+    def _rewrites(self) -> int:
+        try:
+            return int(self.epoch_file.read_text())
+        except (OSError, ValueError):
+            return 0
+
+    def epoch(self, f: Optional[BinaryIO] = None) -> str:
+        """Identifier that changes whenever the file is rewritten
+
+        Combines the rewrite count with the file's inode, so it is the same
+        in every process and a reused inode is not mistaken for the old file.
+
+        Args:
+            f: Open handle on the JSONL file, to identify the file actually read
+        """
+        rewrites = self._rewrites()
+        try:
+            inode = os.fstat(f.fileno()).st_ino if f else os.stat(self.jsonl_file).st_ino
+        except FileNotFoundError:
+            inode = 0
+        return f"{rewrites}.{inode}"
+
+    def rebuild(self):
+        """Discard the sidecar and re-index the whole file"""
+        with self._lock, self._file_lock.exclusive():
+            self._offsets = {}
+            self._covered = 0
+            self._inode = self._file_inode()
+            self._scan_from(0)
+            self._loaded = True
+            self.save()
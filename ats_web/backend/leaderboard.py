@@ -0,0 +1,122 @@
+"""
+Per-Job Candidate Rankings
+Keeps, for every job, its analyses sorted best first by overall, skill
+and experience score, so "top candidates for this job" is a bisect plus
+a K-element walk instead of a scan and sort of every analysis.
+
+Ties on the ranked score are broken by the other two scores (in the order
+overall, skill, experience), then by the earlier analysis, then by ID.
+"""
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Ranking metric -> score field of the analysis result
+METRICS = {
+    "overall": "overall_score",
+    "skill": "skill_match_score",
+    "experience": "experience_match_score",
+}
+
+MAX_TOP_K = 500
+
+
+def score_fields(analysis_result: Dict) -> Dict[str, float]:
+    """The ranked score fields of an analysis result (missing scores count as 0)"""
+    return {field: float(analysis_result.get(field) or 0) for field in METRICS.values()}
+
+
+def _rank_key(metric: str, entry: Dict) -> Tuple:
+    """Sort key, best first: descending scores, then created_at, then ID"""
+    primary = METRICS[metric]
+    scores = [-float(entry.get(primary) or 0)]
+    scores += [-float(entry.get(field) or 0) for field in METRICS.values() if field != primary]
+    return (*scores, entry.get('created_at', ''), entry['analysis_id'])
+
+
+def validate_metric(metric: str) -> str:
+    """Raises ValueError for an unknown ranking metric"""
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of: {', '.join(METRICS)}")
+    return metric
+
+
+class JobLeaderboard:
+    """In-memory sorted rankings of analyses per (job_id, metric)
+
+    Entries are dicts with analysis_id, job_id, created_at and the score
+    fields in METRICS; the caller keeps the rankings in step with the
+    store by calling add/remove on every save and delete.
+    """
+
+    def __init__(self, entries: Iterable[Dict] = ()):
+        self._lock = threading.Lock()
+        self._rankings: Dict[Tuple[str, str], List[Tuple]] = {}
+        grouped: Dict[Tuple[str, str], List[Tuple]] = {}
+        for entry in entries:
+            for metric in METRICS:
+                grouped.setdefault((entry['job_id'], metric), []).append(_rank_key(metric, entry))
+        for ranking_key, keys in grouped.items():
+            keys.sort()
+            self._rankings[ranking_key] = keys
+
+    def add(self, entry: Dict):
+        """Rank an analysis (no-op if it is already ranked with these scores)"""
+        with self._lock:
+            for metric in METRICS:
+                ranking = self._rankings.setdefault((entry['job_id'], metric), [])
+                key = _rank_key(metric, entry)
+                i = bisect.bisect_left(ranking, key)
+                if i == len(ranking) or ranking[i] != key:
+                    ranking.insert(i, key)
+
+    def remove(self, entry: Dict):
+        with self._lock:
+            for metric in METRICS:
+                ranking = self._rankings.get((entry['job_id'], metric))
+                if not ranking:
+                    continue
+                key = _rank_key(metric, entry)
+                i = bisect.bisect_left(ranking, key)
+                if i < len(ranking) and ranking[i] == key:
+                    del ranking[i]
+                if not ranking:
+                    del self._rankings[(entry['job_id'], metric)]
+
+    def count(self, job_id: str) -> int:
+        """Number of ranked analyses for a job"""
+        return len(self._rankings.get((job_id, "overall"), ()))
+
+    def top(self, job_id: str, metric: str = "overall", k: int = 10,
+            min_score: Optional[float] = None,
+            max_score: Optional[float] = None) -> List[str]:
+        """Best analyses of a job by one score
+
+        Args:
+            job_id: The job ID
+            metric: "overall", "skill" or "experience"
+            k: Number of analyses to return
+            min_score: Inclusive lower bound on the ranked score
+            max_score: Inclusive upper bound on the ranked score
+
+        Returns:
+            Analysis IDs, best first
+
+        Raises:
+            ValueError: If the metric is unknown
+        """
+        validate_metric(metric)
+        k = max(0, min(int(k), MAX_TOP_K))
+        with self._lock:
+            ranking = self._rankings.get((job_id, metric), [])
+            start = 0
+            if max_score is not None:
+                # Keys start with -score, so scores <= max_score begin at (-max_score,)
+                start = bisect.bisect_left(ranking, (-float(max_score),))
+            result = []
+            for key in ranking[start:start + k]:
+                if min_score is not None and -key[0] < min_score:
+                    break
+                result.append(key[-1])
+            return result
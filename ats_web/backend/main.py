@@ -1,24 +1,52 @@
 """
 FastAPI Backend for ATS Web Application
 """
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from startup_timer import startup_timer
+from contextlib import asynccontextmanager
+import threading
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 import os
+import time
 from ats_service import ATSService, ATSResult
 from job_tracker import JobTracker
 from feedback_store import feedback_store
 from rag_service import rag_service
+from embedding_service import get_embedding_service
+from match_index import MatchIndex
 from tts_service import get_tts_service
-from job_storage import JobStorage
-from resume_storage import ResumeStorage
-from analysis_storage import AnalysisStorage
+from file_lock import FileLock
+from storage_factory import create_storages, create_search_index
+from pagination import clamp_limit
+from result_cache import ResultCache
+from candidate_cache import CandidateCache
+from http_cache import JsonResponseCache, immutable_response, iso_timestamp
+from retention import RetentionPolicy, open_archives, run_retention
+from export_stream import (
+    ANALYSIS_COLUMNS, APPLICATION_COLUMNS, FEEDBACK_COLUMNS, MEDIA_TYPES, export_filename, stream_export
+)
 from dataclasses import asdict
 from fastapi.responses import FileResponse, StreamingResponse
 from pathlib import Path
 
-app = FastAPI(title="ATS Web API")
+startup_timer.mark("imports")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Serve immediately; warm caches in the background; snapshot and flush them on shutdown"""
+    startup_timer.mark_ready()
+    startup_timer.print_report()
+    if os.getenv("STARTUP_WARMUP", "1") != "0":
+        threading.Thread(target=warm_up, name="startup-warmup", daemon=True).start()
+    yield
+    save_state_snapshot()
+    feedback_store.close()
+
+
+app = FastAPI(title="ATS Web API", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -32,57 +60,172 @@ app.add_middleware(
 # Initialize ATS Service and Job Tracker
 ats_service = ATSService()
 job_tracker = JobTracker()
+startup_timer.mark("services")
+
+# Initialize storage systems (backend selected by STORAGE_BACKEND)
+search_index = create_search_index()
+job_storage, resume_storage, analysis_storage = create_storages(search_index=search_index)
+# Cold archive for analyses and feedback moved out by the retention job
+analysis_archive, feedback_archive = open_archives(os.getenv("ARCHIVE_DIR", "data/archive"))
+# Resume/job embeddings for semantic matching (filled at upload, backfilled in warm_up)
+match_index = MatchIndex(os.getenv("MATCH_INDEX_DIR", "data/match"))
+# Held (non-blocking) by the worker running retention; the others skip it
+retention_lock = FileLock(analysis_archive.root_dir / "retention.lock")
+startup_timer.mark("storage")
 
-# Initialize storage systems
-job_storage = JobStorage()
-resume_storage = ResumeStorage()
-analysis_storage = AnalysisStorage()
-
-# In-memory storage (for backward compatibility)
-analysis_results: Dict[str, Dict] = {}
-resume_texts: Dict[str, str] = {}
 job_description: str = ""
 company_name: str = ""
 role_name: str = ""
 current_job_id: str = ""  # Track current job ID
 
+# Most recent analyses for /api/results, fed incrementally from storage
+result_cache = ResultCache(analysis_storage, max_entries=int(os.getenv("RESULT_CACHE_SIZE", "100")))
+STATE_SNAPSHOT_FILE = Path(os.getenv("STATE_SNAPSHOT_PATH", "data/state_snapshot.json"))
+
+# Validators and encoded bodies for the read-heavy GET endpoints
+response_cache = JsonResponseCache(max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "128")))
+
+
+def _candidate_ref(candidate_id: str) -> Optional[Dict[str, str]]:
+    """analysis_id/resume_id for a candidate_id (persistent index in the analysis store)"""
+    entry = result_cache.get(candidate_id)
+    if entry:
+        return {"analysis_id": entry['analysis_id'], "resume_id": entry['resume_id']}
+    return analysis_storage.find_candidate(candidate_id)
+
+
+def _load_analysis_result(candidate_id: str) -> Optional[Dict]:
+    ref = _candidate_ref(candidate_id)
+    record = analysis_storage.get_analysis(ref['analysis_id']) if ref else None
+    return record['analysis_result'] if record else None
+
+
+def _load_resume_text(candidate_id: str) -> Optional[str]:
+    ref = _candidate_ref(candidate_id)
+    return resume_storage.get_resume_text(ref['resume_id']) if ref else None
+
+
+# In-memory storage (for backward compatibility): bounded LRU caches
+CANDIDATE_CACHE_ENTRIES = int(os.getenv("CANDIDATE_CACHE_ENTRIES", "200"))
+CANDIDATE_CACHE_BYTES = int(float(os.getenv("CANDIDATE_CACHE_MB", "32")) * 1024 * 1024)
+analysis_results = CandidateCache(
+    "analysis_results", _load_analysis_result, CANDIDATE_CACHE_ENTRIES, CANDIDATE_CACHE_BYTES
+)
+resume_texts = CandidateCache(
+    "resume_texts", _load_resume_text, CANDIDATE_CACHE_ENTRIES, CANDIDATE_CACHE_BYTES
+)
+
 
 def load_recent_analyses():
-    """Load recent analyses into memory for backward compatibility"""
-    global analysis_results, resume_texts
+    """Pull analyses written since the last call into memory
     
+    The first call loads the most recent RESULT_CACHE_SIZE analyses; later
+    calls only read what was appended in between. Full results and resume
+    texts are faulted into the candidate caches when first requested.
+    """
     try:
-        # Load recent analyses
-        analyses = analysis_storage.list_analyses(limit=100)
-        
-        for analysis_summary in analyses:
-            # Get full analysis
-            full_analysis = analysis_storage.get_analysis(analysis_summary['analysis_id'])
-            if full_analysis:
-                # Create candidate_id in old format
-                candidate_id = f"{full_analysis['candidate_name']}_{full_analysis['created_at']}"
-                
-                # Store in memory
-                analysis_results[candidate_id] = full_analysis['analysis_result']
-                
-                # Load resume text
-                resume_text = resume_storage.get_resume_text(full_analysis['resume_id'])
-                if resume_text:
-                    resume_texts[candidate_id] = resume_text
-                    print(f"[STARTUP] Loaded resume for: {candidate_id}")
+        new_analyses = result_cache.refresh()
         
-        print(f"[STARTUP] Loaded {len(analysis_results)} analyses into memory")
-        print(f"[STARTUP] Loaded {len(resume_texts)} resumes into memory")
-        if resume_texts:
-            print(f"[STARTUP] Sample candidate IDs: {list(resume_texts.keys())[:3]}")
+        if new_analyses:
+            print(f"[RESULTS] Loaded {len(new_analyses)} new analyses into memory "
+                  f"({len(result_cache)} cached)")
     except Exception as e:
         print(f"[STARTUP ERROR] Could not load analyses: {e}")
         import traceback
         traceback.print_exc()
 
 
-# Load analyses on startup
-load_recent_analyses()
+def restore_state_snapshot():
+    """Restore the results cache from the last snapshot (no storage scan)"""
+    if result_cache.load_snapshot(STATE_SNAPSHOT_FILE):
+        print(f"[STARTUP] Restored {len(result_cache)} analyses from {STATE_SNAPSHOT_FILE}")
+
+
+def save_state_snapshot():
+    """Write the results cache snapshot used by the next startup"""
+    try:
+        result_cache.save_snapshot(STATE_SNAPSHOT_FILE)
+    except Exception as e:
+        print(f"Warning: Could not save state snapshot: {e}")
+
+
+def apply_retention(policy: RetentionPolicy, dry_run: bool = False) -> Optional[Dict]:
+    """Run the retention job and drop in-memory state that pointed at archived records
+
+    Only one worker process (and thread) runs it at a time: the others do not
+    wait for the lock file in the archive dir but return None at once.
+
+    Returns:
+        The retention report, or None if another worker is already running it
+    """
+    with retention_lock.try_exclusive() as acquired:
+        if not acquired:
+            return None
+        report = run_retention(
+            analysis_storage, job_storage, feedback_store,
+            analysis_archive, feedback_archive, policy, dry_run
+        )
+    if report['analyses'].get('archived'):
+        # The analysis log was compacted: read positions and cached entries are stale
+        result_cache.clear()
+        analysis_results.clear()
+        resume_texts.clear()
+    if not dry_run:
+        print(f"✓ Retention: archived {report['analyses']['archived']} analyses, "
+              f"{report['feedback']['archived']} feedback records; reclaimed "
+              f"{report['analyses']['bytes_reclaimed'] + report['feedback']['bytes_reclaimed']} bytes")
+    return report
+
+
+def export_response(records, fmt: str, columns, name: str) -> StreamingResponse:
+    """Stream records as a CSV or NDJSON download
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    body = stream_export(records, fmt, columns)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={export_filename(name, fmt)}"}
+    )
+
+
+def warm_up():
+    """Startup work that runs after the server is already accepting requests"""
+    retention_policy = RetentionPolicy.from_env()
+    if retention_policy.enabled:
+        with startup_timer.phase("warmup.retention"):
+            try:
+                if apply_retention(retention_policy) is None:
+                    print("[STARTUP] Retention already running in another worker, skipped")
+            except Exception as e:
+                print(f"Warning: Retention job failed: {e}")
+    with startup_timer.phase("warmup.results"):
+        load_recent_analyses()
+    with startup_timer.phase("warmup.search_index"):
+        try:
+            search_index.sync(job_storage, resume_storage)
+        except Exception as e:
+            print(f"Warning: Search index sync failed: {e}")
+    with startup_timer.phase("warmup.match_index"):
+        try:
+            match_index.sync(job_storage, resume_storage)
+        except Exception as e:
+            print(f"Warning: Match index sync failed: {e}")
+    with startup_timer.phase("warmup.feedback_store"):
+        try:
+            feedback_store.warm_up()
+        except Exception as e:
+            print(f"Warning: Feedback store warm-up failed: {e}")
+    save_state_snapshot()
+    startup_timer.mark_warmup_done()
+    startup_timer.print_report("Warm-up")
+
+
+# Restore hot state now; catching up with storage happens in warm_up()
+restore_state_snapshot()
+startup_timer.mark("snapshot")
 
 
 class JobDescriptionRequest(BaseModel):
@@ -137,6 +280,7 @@ async def set_job_description(request: JobDescriptionRequest):
         role_name=role_name
     )
     current_job_id = job_record['job_id']
+    match_index.submit("job", current_job_id, job_description)
     
     print(f"\n[DEBUG] ===== JOB DESCRIPTION SAVED =====")
     print(f"[DEBUG] Job ID: {current_job_id}")
@@ -192,6 +336,7 @@ async def upload_resume_only(file: UploadFile = File(...)):
             filename=file.filename,
             candidate_name=candidate_name
         )
+        match_index.submit("resume", resume_record['resume_id'], resume_text)
         
         print(f"[DEBUG] Resume uploaded: {resume_record['resume_id']} - {candidate_name}")
         
@@ -243,11 +388,13 @@ async def analyze_resume(resume_id: str):
         
         # Store analysis results
         result_dict = asdict(result)
+        candidate_id = f"{result.candidate_name}_{result.timestamp}"
         analysis_record = analysis_storage.save_analysis(
             job_id=current_job_id,
             resume_id=resume_id,
             analysis_result=result_dict,
-            candidate_name=result.candidate_name
+            candidate_name=result.candidate_name,
+            candidate_id=candidate_id
         )
         analysis_id = analysis_record['analysis_id']
         
@@ -255,7 +402,6 @@ async def analyze_resume(resume_id: str):
         job_storage.increment_analysis_count(current_job_id)
         
         # Store in memory for backward compatibility
-        candidate_id = f"{result.candidate_name}_{result.timestamp}"
         analysis_results[candidate_id] = result_dict
         resume_texts[candidate_id] = resume_text
         
@@ -319,14 +465,17 @@ async def upload_resume(file: UploadFile = File(...)):
             candidate_name=result.candidate_name
         )
         resume_id = resume_record['resume_id']
+        match_index.submit("resume", resume_id, resume_text)
         
         # Store analysis results
         result_dict = asdict(result)
+        candidate_id = f"{result.candidate_name}_{result.timestamp}"
         analysis_record = analysis_storage.save_analysis(
             job_id=current_job_id,
             resume_id=resume_id,
             analysis_result=result_dict,
-            candidate_name=result.candidate_name
+            candidate_name=result.candidate_name,
+            candidate_id=candidate_id
         )
         analysis_id = analysis_record['analysis_id']
         
@@ -334,7 +483,6 @@ async def upload_resume(file: UploadFile = File(...)):
         job_storage.increment_analysis_count(current_job_id)
         
         # Store in memory for backward compatibility
-        candidate_id = f"{result.candidate_name}_{result.timestamp}"
         analysis_results[candidate_id] = result_dict
         resume_texts[candidate_id] = resume_text
         
@@ -363,15 +511,13 @@ async def upload_resume(file: UploadFile = File(...)):
 
 
 @app.get("/api/results")
-async def get_all_results():
+async def get_all_results(request: Request):
     """Get all analysis results sorted by timestamp (most recent first)"""
-    # Reload from persistent storage to get latest
+    # Pick up analyses written since the last request
     load_recent_analyses()
     
-    results = list(analysis_results.values())
-    # Sort by timestamp (most recent first), then by score
-    results.sort(key=lambda x: (x.get('timestamp', ''), x.get('overall_score', 0)), reverse=True)
-    return {"results": results}
+    version = f"{analysis_storage.version()}:{result_cache.version()}"
+    return response_cache.respond(request, version, lambda: {"results": result_cache.results()})
 
 
 @app.get("/api/result/{candidate_id}")
@@ -408,6 +554,31 @@ async def ask_question(request: QuestionRequest):
     return {"answer": answer}
 
 
+@app.get("/api/debug/startup")
+async def debug_startup():
+    """Startup and warm-up phase timings"""
+    return startup_timer.report()
+
+
+@app.get("/api/debug/memory")
+async def debug_memory():
+    """Memory used by the in-process candidate, RAG and embedding caches"""
+    return {
+        "caches": [analysis_results.memory_usage(), resume_texts.memory_usage()],
+        "result_cache_entries": len(result_cache),
+        "response_cache": response_cache.get_stats(),
+        "rag_cache": rag_service.cache_stats(),
+        "embedding_service": get_embedding_service().stats(),
+        "match_index": match_index.stats()
+    }
+
+
+@app.get("/api/debug/rag")
+def debug_rag():
+    """Hybrid RAG retrieval: p50/p95 latency per stage and cache hits"""
+    return rag_service.retrieval_stats()
+
+
 @app.get("/api/debug/storage")
 async def debug_storage():
     """Debug endpoint to see what's stored"""
@@ -425,9 +596,9 @@ async def debug_storage():
 @app.delete("/api/results")
 async def clear_results():
     """Clear all results"""
-    global analysis_results, resume_texts
-    analysis_results = {}
-    resume_texts = {}
+    analysis_results.clear()
+    resume_texts.clear()
+    result_cache.clear()
     return {"message": "All results cleared"}
 
 
@@ -458,6 +629,19 @@ async def get_job_applications():
         raise HTTPException(status_code=500, detail=f"Error getting applications: {str(e)}")
 
 
+@app.get("/api/job-applications/export")
+async def export_job_applications(format: str = "csv", date_from: Optional[str] = None,
+                                  date_to: Optional[str] = None):
+    """Stream job applications, newest first, as CSV or NDJSON (filter by date range)"""
+    try:
+        records = job_tracker.iter_applications(date_from, date_to)
+        return export_response(records, format, APPLICATION_COLUMNS, "job_applications")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting applications: {str(e)}")
+
+
 @app.get("/api/job-applications/recent")
 async def get_recent_applications(limit: int = 10):
     """Get recent job applications"""
@@ -492,9 +676,13 @@ async def check_if_applied(company: str, job_title: str):
 
 @app.post("/api/feedback/submit")
 async def submit_feedback(request: FeedbackRequest):
-    """Submit feedback for model training with analysis and job linking"""
+    """Submit feedback for model training with analysis and job linking
+
+    The feedback is validated and queued durably; embedding and indexing
+    happen in the background (see /api/feedback/queue for the lag).
+    """
     try:
-        feedback_data = feedback_store.add_feedback(
+        feedback_data = feedback_store.submit_feedback(
             interaction_id=request.interaction_id,
             query=request.query,
             context=request.context,
@@ -517,12 +705,24 @@ async def submit_feedback(request: FeedbackRequest):
             "message": "Feedback saved successfully",
             "feedback_id": feedback_data["id"],
             "analysis_id": request.analysis_id,
-            "job_id": request.job_id
+            "job_id": request.job_id,
+            "queued": True
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving feedback: {str(e)}")
 
 
+@app.get("/api/feedback/queue")
+async def get_feedback_queue():
+    """Feedback ingest queue lag: submissions accepted but not yet embedded and indexed"""
+    try:
+        return feedback_store.queue_status()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting queue status: {str(e)}")
+
+
 @app.get("/api/feedback/statistics")
 async def get_feedback_statistics():
     """Get feedback statistics"""
@@ -535,9 +735,9 @@ async def get_feedback_statistics():
 
 @app.get("/api/feedback/search")
 async def search_feedback(query: str, n_results: int = 5, min_rating: Optional[int] = None):
-    """Search for similar feedback using ChromaDB"""
+    """Search for similar feedback in the primary vector backend"""
     try:
-        results = feedback_store.search_similar_chromadb(query, n_results, min_rating)
+        results = feedback_store.search_similar(query, n_results, min_rating)
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching feedback: {str(e)}")
@@ -553,54 +753,57 @@ async def get_high_quality_feedback(min_rating: int = 4, limit: int = 100):
         raise HTTPException(status_code=500, detail=f"Error getting samples: {str(e)}")
 
 
-@app.get("/api/feedback/export-csv")
-async def export_feedback_csv():
-    """Export feedback to CSV"""
-    import csv
-    import io
-    from fastapi.responses import StreamingResponse
-    
+@app.get("/api/feedback/index-report")
+def feedback_index_report(queries: int = 100, k: int = 10):
+    """Recall@k and latency of the FAISS feedback index against exact search"""
     try:
-        jsonl_file = "feedback_db/interactions.jsonl"
-        
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow([
-            'ID', 'Timestamp', 'Rating', 'Query', 'Response',
-            'Correct Points', 'Incorrect Points', 'Missing Points', 'Ideal Response'
-        ])
-        
-        # Read JSONL and write to CSV
-        import json
-        from pathlib import Path
-        
-        jsonl_path = Path(jsonl_file)
-        if jsonl_path.exists():
-            with open(jsonl_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    data = json.loads(line)
-                    writer.writerow([
-                        data['id'],
-                        data['timestamp'],
-                        data['feedback']['rating'],
-                        data['query'],
-                        data['response'],
-                        ', '.join(data['feedback']['correct_points']),
-                        ', '.join(data['feedback']['incorrect_points']),
-                        ', '.join(data['feedback'].get('missing_points', [])),
-                        data['feedback']['ideal_response']
-                    ])
-        
-        # Return as downloadable file
-        output.seek(0)
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=feedback_export.csv"}
-        )
+        return feedback_store.faiss_report(queries=max(1, min(queries, 1000)), k=k)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error exporting CSV: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error measuring index: {str(e)}")
+
+
+@app.post("/api/admin/feedback-index/rebuild")
+def rebuild_feedback_index(index_type: Optional[str] = None):
+    """Retrain the FAISS feedback index as flat, ivf or hnsw (default: FAISS_INDEX_TYPE)"""
+    try:
+        return feedback_store.rebuild_faiss(index_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rebuilding index: {str(e)}")
+
+
+@app.post("/api/admin/feedback-replicas/{backend}/rebuild")
+def rebuild_feedback_replica(backend: str):
+    """Rebuild the faiss or chroma feedback backend from the interaction and embedding logs"""
+    try:
+        return feedback_store.rebuild_replica(backend)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rebuilding {backend}: {str(e)}")
+
+
+@app.get("/api/feedback/export")
+async def export_feedback(format: str = "csv", date_from: Optional[str] = None,
+                          date_to: Optional[str] = None, min_rating: Optional[int] = None,
+                          max_rating: Optional[int] = None, job_id: Optional[str] = None):
+    """Stream feedback as CSV or NDJSON (filter by date range, rating and job)"""
+    try:
+        records = feedback_store.iter_feedback(date_from, date_to, min_rating, max_rating, job_id)
+        return export_response(records, format, FEEDBACK_COLUMNS, "feedback")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting feedback: {str(e)}")
+
+
+@app.get("/api/feedback/export-csv")
+async def export_feedback_csv(date_from: Optional[str] = None, date_to: Optional[str] = None,
+                              min_rating: Optional[int] = None, max_rating: Optional[int] = None,
+                              job_id: Optional[str] = None):
+    """Export feedback to CSV"""
+    return await export_feedback("csv", date_from, date_to, min_rating, max_rating, job_id)
 
 
 # TTS Endpoints
@@ -832,58 +1035,46 @@ async def debug_resumes():
 
 
 @app.get("/api/resume/pdf/{candidate_id:path}")
-async def get_resume_pdf(candidate_id: str):
+async def get_resume_pdf(candidate_id: str, request: Request):
     """Get PDF file for viewing"""
-    from urllib.parse import unquote
-    import os
+    from urllib.parse import quote, unquote
     
     decoded_id = unquote(candidate_id)
     
     print(f"[RESUME PDF] Requested candidate_id: {decoded_id}")
-    print(f"[RESUME PDF] Available analyses: {list(analysis_results.keys())[:3]}")
-    
-    # Get the analysis to find the resume_id
-    if decoded_id not in analysis_results:
-        print(f"[RESUME PDF] Analysis not found in memory for: {decoded_id}")
+    # candidate_id -> resume_id via the candidate index
+    ref = _candidate_ref(decoded_id)
+    if ref is None:
+        print(f"[RESUME PDF] Analysis not found for: {decoded_id}")
         raise HTTPException(status_code=404, detail=f"Analysis not found for: {decoded_id}")
     
-    analysis = analysis_results[decoded_id]
+    resume_id = ref['resume_id']
+    analysis = analysis_results.get(decoded_id, {})
     
-    # Get resume info from storage
     try:
-        # Try to get resume_id from analysis
-        # First check if it's stored in the analysis
-        resume_id = None
-        
-        # Search through all resumes to find matching candidate
-        resumes = resume_storage.list_resumes()
-        for resume in resumes:
-            if resume['candidate_name'] == analysis.get('candidate_name'):
-                resume_id = resume['resume_id']
-                break
-        
-        if not resume_id:
-            raise HTTPException(status_code=404, detail="Resume PDF not found")
-        
-        # Get resume metadata to find PDF path
-        resume_info = resume_storage.get_resume(resume_id)
-        
-        if not resume_info or 'pdf_path' not in resume_info:
-            raise HTTPException(status_code=404, detail="PDF path not found")
-        
-        pdf_path = resume_info['pdf_path']
-        
-        if not os.path.exists(pdf_path):
-            raise HTTPException(status_code=404, detail=f"PDF file not found: {pdf_path}")
-        
-        print(f"[RESUME PDF] Serving PDF: {pdf_path}")
+        resume = resume_storage.get_resume(resume_id)
+        if not resume:
+            raise HTTPException(status_code=404, detail=f"PDF file not found for {resume_id}")
         
-        return FileResponse(
-            pdf_path,
+        # PDF bytes from the blob store (or the legacy per-file layout); the
+        # content hash is a strong validator, so revalidations skip the read
+        filename = f"{analysis.get('candidate_name', 'resume')}.pdf"
+        response = immutable_response(
+            request,
+            etag=resume.get('pdf_blob') or resume_id,
+            last_modified=iso_timestamp(resume.get('uploaded_at')),
+            load=lambda: resume_storage.get_resume_pdf(resume_id),
             media_type="application/pdf",
-            filename=f"{analysis.get('candidate_name', 'resume')}.pdf"
+            headers={"Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}"}
         )
+        if response is None:
+            raise HTTPException(status_code=404, detail=f"PDF file not found for {resume_id}")
         
+        print(f"[RESUME PDF] Serving PDF: {resume_id} ({response.status_code})")
+        return response
+        
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[RESUME PDF ERROR] {str(e)}")
         import traceback
@@ -901,39 +1092,14 @@ async def get_resume_text(candidate_id: str):
     
     print(f"[RESUME TEXT] Requested candidate_id (raw): {candidate_id}")
     print(f"[RESUME TEXT] Requested candidate_id (decoded): {decoded_id}")
-    print(f"[RESUME TEXT] Available candidates: {list(resume_texts.keys())[:5]}")
-    
-    # Try exact match first
-    if decoded_id in resume_texts:
-        print(f"[RESUME TEXT] Exact match found!")
-        return {
-            "status": "success",
-            "candidate_id": decoded_id,
-            "text": resume_texts[decoded_id],
-            "has_analysis": decoded_id in analysis_results
-        }
-    
-    # Try to find similar keys
-    similar_keys = [k for k in resume_texts.keys() if decoded_id in k or k in decoded_id]
-    print(f"[RESUME TEXT] Similar keys found: {similar_keys}")
-    
-    if similar_keys:
-        # Use the first similar key
-        actual_key = similar_keys[0]
-        print(f"[RESUME TEXT] Using similar key: {actual_key}")
-        return {
-            "status": "success",
-            "candidate_id": actual_key,
-            "text": resume_texts[actual_key],
-            "has_analysis": actual_key in analysis_results
-        }
-    
-    raise HTTPException(status_code=404, detail=f"Resume not found for: {decoded_id}. Available: {list(resume_texts.keys())[:3]}")
+    resume_text = resume_texts.get(decoded_id)
+    if resume_text is None:
+        raise HTTPException(status_code=404, detail=f"Resume not found for: {decoded_id}")
     
     return {
         "status": "success",
         "candidate_id": decoded_id,
-        "text": resume_texts[decoded_id],
+        "text": resume_text,
         "has_analysis": decoded_id in analysis_results
     }
 
@@ -941,11 +1107,22 @@ async def get_resume_text(candidate_id: str):
 # New Storage Management Endpoints
 
 @app.get("/api/jobs")
-async def list_jobs(limit: int = 50):
-    """List all saved job descriptions"""
+async def list_jobs(request: Request, limit: int = 50, cursor: Optional[str] = None,
+                    company: Optional[str] = None, role: Optional[str] = None,
+                    date_from: Optional[str] = None, date_to: Optional[str] = None):
+    """List saved job descriptions, one page at a time"""
+    def build():
+        page = job_storage.list_jobs_page(
+            limit=clamp_limit(limit), cursor=cursor, company=company, role=role,
+            date_from=date_from, date_to=date_to
+        )
+        jobs = page['items']
+        return {"jobs": jobs, "total": len(jobs), "next_cursor": page['next_cursor']}
+    
     try:
-        jobs = job_storage.list_jobs(limit=limit)
-        return {"jobs": jobs, "total": len(jobs)}
+        return response_cache.respond(request, job_storage.version(), build)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing jobs: {str(e)}")
 
@@ -964,6 +1141,110 @@ async def get_job(job_id: str):
         raise HTTPException(status_code=500, detail=f"Error getting job: {str(e)}")
 
 
+@app.get("/api/jobs/{job_id}/top")
+async def top_candidates(request: Request, job_id: str, metric: str = "overall", k: int = 10,
+                         min_score: Optional[float] = None, max_score: Optional[float] = None):
+    """Best candidates for a job by overall, skill or experience score"""
+    def build():
+        analyses = analysis_storage.top_analyses(
+            job_id, metric=metric, k=k, min_score=min_score, max_score=max_score
+        )
+        return {"job_id": job_id, "metric": metric, "analyses": analyses, "total": len(analyses)}
+    
+    try:
+        return response_cache.respond(request, analysis_storage.version(), build)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error ranking candidates: {str(e)}")
+
+
+@app.get("/api/jobs/{job_id}/matches")
+def job_matches(job_id: str, limit: int = 20):
+    """Stored resumes that best fit a job by semantic similarity (no LLM call)"""
+    try:
+        job = job_storage.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        start = time.perf_counter()
+        matches = match_index.top_resumes(job_id, clamp_limit(limit), job['job_description']) or []
+        analyzed = {a['resume_id'] for a in analysis_storage.get_analyses_by_job(job_id)}
+        for match in matches:
+            resume = resume_storage.get_resume(match['resume_id']) or {}
+            match['candidate_name'] = resume.get('candidate_name', '')
+            match['filename'] = resume.get('original_filename', '')
+            match['analyzed'] = match['resume_id'] in analyzed
+        return {
+            "job_id": job_id,
+            "matches": matches,
+            "total": len(matches),
+            "took_ms": round((time.perf_counter() - start) * 1000, 3)
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error matching resumes: {str(e)}")
+
+
+@app.post("/api/jobs/{job_id}/matches/analyze")
+def analyze_job_matches(job_id: str, top: int = 5, min_score: Optional[float] = None):
+    """Run the LLM analysis on the best-matching resumes not yet analyzed for a job"""
+    try:
+        job = job_storage.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        analyzed = {a['resume_id'] for a in analysis_storage.get_analyses_by_job(job_id)}
+        candidates = [
+            match for match in match_index.top_resumes(job_id, clamp_limit(top) + len(analyzed),
+                                                       job['job_description']) or []
+            if match['resume_id'] not in analyzed and (min_score is None or match['score'] >= min_score)
+        ][:clamp_limit(top)]
+        
+        results = []
+        for match in candidates:
+            resume_id = match['resume_id']
+            resume_text = resume_storage.get_resume_text(resume_id)
+            resume_record = resume_storage.get_resume(resume_id)
+            if not resume_text or not resume_record:
+                continue
+            result = ats_service.analyze_resume(
+                resume_text,
+                job['job_description'],
+                resume_record['original_filename'],
+                job['company_name'],
+                job['role_name']
+            )
+            result_dict = asdict(result)
+            candidate_id = f"{result.candidate_name}_{result.timestamp}"
+            analysis_record = analysis_storage.save_analysis(
+                job_id=job_id,
+                resume_id=resume_id,
+                analysis_result=result_dict,
+                candidate_name=result.candidate_name,
+                candidate_id=candidate_id
+            )
+            job_storage.increment_analysis_count(job_id)
+            analysis_results[candidate_id] = result_dict
+            resume_texts[candidate_id] = resume_text
+            results.append({
+                "candidate_id": candidate_id,
+                "analysis_id": analysis_record['analysis_id'],
+                "resume_id": resume_id,
+                "match_score": match['score'],
+                "overall_score": result_dict.get('overall_score')
+            })
+        
+        return {"job_id": job_id, "analyzed": results, "total": len(results)}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing matches: {str(e)}")
+
+
 @app.post("/api/jobs/{job_id}/select")
 async def select_job(job_id: str):
     """Select a job as the current active job"""
@@ -1002,12 +1283,44 @@ async def search_jobs(query: str):
         raise HTTPException(status_code=500, detail=f"Error searching jobs: {str(e)}")
 
 
+@app.get("/api/search/jobs")
+async def fulltext_search_jobs(q: str, limit: int = 20):
+    """Ranked full-text search over job descriptions (FTS5 syntax, e.g. "kubernetes AND go")"""
+    try:
+        results = search_index.search_jobs(q, clamp_limit(limit))
+        return {"results": results, "total": len(results)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching jobs: {str(e)}")
+
+
+@app.get("/api/search/resumes")
+async def fulltext_search_resumes(q: str, limit: int = 20):
+    """Ranked full-text search over resume texts (FTS5 syntax, e.g. "kubernetes AND go")"""
+    try:
+        results = search_index.search_resumes(q, clamp_limit(limit))
+        return {"results": results, "total": len(results)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching resumes: {str(e)}")
+
+
 @app.get("/api/resumes")
-async def list_resumes(limit: int = 50):
-    """List all uploaded resumes"""
+async def list_resumes(limit: int = 50, cursor: Optional[str] = None,
+                       candidate: Optional[str] = None,
+                       date_from: Optional[str] = None, date_to: Optional[str] = None):
+    """List uploaded resumes, one page at a time"""
     try:
-        resumes = resume_storage.list_resumes(limit=limit)
-        return {"resumes": resumes, "total": len(resumes)}
+        page = resume_storage.list_resumes_page(
+            limit=clamp_limit(limit), cursor=cursor, candidate=candidate,
+            date_from=date_from, date_to=date_to
+        )
+        resumes = page['items']
+        return {"resumes": resumes, "total": len(resumes), "next_cursor": page['next_cursor']}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing resumes: {str(e)}")
 
@@ -1026,14 +1339,48 @@ async def get_resume(resume_id: str):
         raise HTTPException(status_code=500, detail=f"Error getting resume: {str(e)}")
 
 
+@app.get("/api/resumes/{resume_id}/matches")
+def resume_matches(resume_id: str, limit: int = 20):
+    """Stored jobs that best fit a resume by semantic similarity (no LLM call)"""
+    try:
+        if not resume_storage.get_resume(resume_id):
+            raise HTTPException(status_code=404, detail="Resume not found")
+        start = time.perf_counter()
+        matches = match_index.top_jobs(resume_id, clamp_limit(limit),
+                                       resume_storage.get_resume_text(resume_id) or '') or []
+        for match in matches:
+            job = job_storage.get_job(match['job_id']) or {}
+            match['company_name'] = job.get('company_name', '')
+            match['role_name'] = job.get('role_name', '')
+        return {
+            "resume_id": resume_id,
+            "matches": matches,
+            "total": len(matches),
+            "took_ms": round((time.perf_counter() - start) * 1000, 3)
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error matching jobs: {str(e)}")
+
+
 @app.get("/api/resumes/{resume_id}/text")
-async def get_resume_text(resume_id: str):
+async def get_resume_text(resume_id: str, request: Request):
     """Get resume text content"""
-    try:
+    def build():
         text = resume_storage.get_resume_text(resume_id)
         if not text:
             raise HTTPException(status_code=404, detail="Resume not found")
         return {"resume_id": resume_id, "text": text}
+    
+    try:
+        resume = resume_storage.get_resume(resume_id)
+        if not resume:
+            raise HTTPException(status_code=404, detail="Resume not found")
+        # Texts are content-addressed: the blob digest only changes with the content
+        return response_cache.respond(request, resume.get('text_blob') or resume_id, build)
     except HTTPException:
         raise
     except Exception as e:
@@ -1041,23 +1388,54 @@ async def get_resume_text(resume_id: str):
 
 
 @app.get("/api/analyses")
-async def list_analyses(job_id: Optional[str] = None, limit: int = 50):
-    """List all analyses (optionally filtered by job_id)"""
+async def list_analyses(request: Request, job_id: Optional[str] = None, limit: int = 50,
+                        cursor: Optional[str] = None, resume_id: Optional[str] = None,
+                        min_score: Optional[float] = None, max_score: Optional[float] = None,
+                        recommendation: Optional[str] = None, company: Optional[str] = None,
+                        date_from: Optional[str] = None, date_to: Optional[str] = None):
+    """List analyses one page at a time (filter by job, score, recommendation, company, date)"""
+    def build():
+        page = analysis_storage.list_analyses_page(
+            limit=clamp_limit(limit), cursor=cursor, job_id=job_id, resume_id=resume_id,
+            min_score=min_score, max_score=max_score, recommendation=recommendation,
+            company=company, date_from=date_from, date_to=date_to
+        )
+        analyses = page['items']
+        return {"analyses": analyses, "total": len(analyses), "next_cursor": page['next_cursor']}
+    
     try:
-        analyses = analysis_storage.list_analyses(job_id=job_id, limit=limit)
-        return {"analyses": analyses, "total": len(analyses)}
+        return response_cache.respond(request, analysis_storage.version(), build)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing analyses: {str(e)}")
 
 
+@app.get("/api/analyses/export")
+async def export_analyses(format: str = "csv", job_id: Optional[str] = None,
+                          date_from: Optional[str] = None, date_to: Optional[str] = None,
+                          min_score: Optional[float] = None, max_score: Optional[float] = None):
+    """Stream analyses, newest first, as CSV or NDJSON (filter by job, date range and score)"""
+    try:
+        records = analysis_storage.iter_export(job_id, date_from, date_to, min_score, max_score)
+        return export_response(records, format, ANALYSIS_COLUMNS, f"analyses_{job_id}" if job_id else "analyses")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting analyses: {str(e)}")
+
+
 @app.get("/api/analyses/{analysis_id}")
 async def get_analysis(analysis_id: str):
     """Get a specific analysis"""
     try:
         analysis = analysis_storage.get_analysis(analysis_id)
+        if analysis:
+            return {"analysis": analysis}
+        analysis = analysis_archive.get(analysis_id)
         if not analysis:
             raise HTTPException(status_code=404, detail="Analysis not found")
-        return {"analysis": analysis}
+        return {"analysis": analysis, "archived": True}
     except HTTPException:
         raise
     except Exception as e:
@@ -1068,31 +1446,74 @@ async def get_analysis(analysis_id: str):
 async def get_storage_stats():
     """Get storage statistics"""
     try:
-        jobs = job_storage.list_jobs(limit=10000)
-        resumes = resume_storage.list_resumes(limit=10000)
-        analyses = analysis_storage.list_analyses(limit=10000)
         feedback_stats = feedback_store.get_statistics()
         
         return {
-            "jobs": {
-                "total": len(jobs),
-                "recent": jobs[:5] if jobs else []
-            },
-            "resumes": {
-                "total": len(resumes),
-                "recent": resumes[:5] if resumes else []
-            },
-            "analyses": {
-                "total": len(analyses),
-                "recent": analyses[:5] if analyses else []
-            },
+            "jobs": job_storage.get_stats(),
+            "resumes": resume_storage.get_stats(),
+            "analyses": analysis_storage.get_stats(),
             "feedback": feedback_stats,
+            "archive": {
+                "analyses": analysis_archive.get_stats(),
+                "feedback": feedback_archive.get_stats()
+            },
             "current_job_id": current_job_id
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting stats: {str(e)}")
 
 
+# Retention and archive endpoints
+
+@app.post("/api/admin/retention")
+def run_retention_job(days: Optional[int] = None, closed_jobs: Optional[bool] = None,
+                      dry_run: bool = False):
+    """Archive analyses/feedback older than `days` or of closed (deleted) jobs
+    
+    Unset parameters fall back to RETENTION_DAYS / RETENTION_CLOSED_JOBS.
+    A plain function so FastAPI runs it in a worker thread.
+    """
+    policy = RetentionPolicy.from_env()
+    if days is not None:
+        policy.max_age_days = days
+    if closed_jobs is not None:
+        policy.archive_closed_jobs = closed_jobs
+    if not policy.enabled:
+        raise HTTPException(status_code=400, detail="Nothing to do: set days > 0 or closed_jobs=true")
+    try:
+        report = apply_retention(policy, dry_run)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running retention: {str(e)}")
+    if report is None:
+        raise HTTPException(status_code=409, detail="Retention is already running")
+    return report
+
+
+@app.get("/api/archive/analyses")
+async def list_archived_analyses(job_id: Optional[str] = None, resume_id: Optional[str] = None,
+                                 limit: int = 50):
+    """List archived analyses (newest first)"""
+    analyses = analysis_archive.list(clamp_limit(limit), job_id=job_id, resume_id=resume_id)
+    return {"analyses": analyses, "total": len(analyses)}
+
+
+@app.get("/api/archive/analyses/{analysis_id}")
+async def get_archived_analysis(analysis_id: str):
+    """Get a full archived analysis"""
+    analysis = analysis_archive.get(analysis_id)
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Archived analysis not found")
+    return {"analysis": analysis}
+
+
+@app.get("/api/archive/feedback")
+async def list_archived_feedback(job_id: Optional[str] = None, analysis_id: Optional[str] = None,
+                                 limit: int = 50):
+    """List archived feedback interactions (newest first)"""
+    feedback = feedback_archive.list(clamp_limit(limit), job_id=job_id, analysis_id=analysis_id)
+    return {"feedback": feedback, "total": len(feedback)}
+
+
 if __name__ == "__main__":
     import uvicorn
     from pathlib import Path
@@ -0,0 +1,455 @@
+"""
+Semantic Resume-Job Matching Index
+Embeds every resume and job description when it is stored, by whole text
+and by section (experience, skills, requirements, ...), so "which stored
+resumes fit this job?" and "which jobs fit this resume?" are answered in
+milliseconds without running the LLM. The ranked list tells the analysis
+stage which resumes are worth an LLM analysis.
+
+Documents are split into ~MATCH_CHUNK_CHARS chunks (the embedding model
+only reads the first 256 tokens of a text); a section's vector is the
+normalized mean of its chunks and the whole-text vector the mean of all
+of them. Vectors go to a binary embedding log per kind; searches run over
+a memory-mapped snapshot of it (embedding_matrix.py) plus an exact scan of
+rows added since, then the best candidates are rescored section by section:
+
+    score = MATCH_WHOLE_WEIGHT * cos(whole, whole)
+            + (1 - MATCH_WHOLE_WEIGHT) * mean over paired sections of the best cos
+
+Layout (data/match/):
+    resume/vectors.bin, resume/documents.json, resume/matrix/
+    job/vectors.bin, job/documents.json, job/matrix/
+"""
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from embedding_log import EmbeddingLog
+from embedding_matrix import SharedEmbeddingMatrix, maybe_build, search_rows
+from embedding_service import get_embedding_service
+from file_lock import FileLock
+from index_log import IndexLog
+from vector_index import faiss_id
+
+
+# Characters per embedded chunk (about the model's 256-token window)
+MATCH_CHUNK_CHARS = int(os.getenv("MATCH_CHUNK_CHARS", "1000"))
+# Chunks embedded per document; the rest of a very long document is ignored
+MATCH_MAX_CHUNKS = int(os.getenv("MATCH_MAX_CHUNKS", "24"))
+# Documents pulled from the ANN search and rescored by section
+MATCH_CANDIDATES = int(os.getenv("MATCH_CANDIDATES", "200"))
+MATCH_WHOLE_WEIGHT = float(os.getenv("MATCH_WHOLE_WEIGHT", "0.5"))
+# New vectors that trigger a snapshot rebuild
+MATCH_REBUILD_ROWS = int(os.getenv("MATCH_REBUILD_ROWS", "500"))
+# Matches whose latency is kept for stats()
+LATENCY_WINDOW = 500
+
+KINDS = ("resume", "job")
+
+# Canonical section -> heading lines that start it (case-insensitive, optional colon)
+SECTION_HEADINGS = {
+    "resume": {
+        "summary": ("summary", "profile", "professional summary", "objective", "about me"),
+        "experience": ("experience", "work experience", "professional experience",
+                       "employment history", "work history", "employment"),
+        "skills": ("skills", "technical skills", "core competencies", "technologies", "key skills"),
+        "education": ("education", "academic background", "education and training"),
+        "projects": ("projects", "personal projects", "key projects", "selected projects"),
+        "certifications": ("certifications", "certificates", "licenses and certifications"),
+    },
+    "job": {
+        "responsibilities": ("responsibilities", "key responsibilities", "what you'll do",
+                             "what you will do", "duties", "the role", "your role"),
+        "requirements": ("requirements", "qualifications", "minimum qualifications",
+                         "basic qualifications", "what you'll bring", "what we're looking for",
+                         "must have", "must-have"),
+        "preferred": ("preferred qualifications", "nice to have", "nice-to-have", "bonus points",
+                      "preferred"),
+        "skills": ("skills", "technical skills", "tech stack", "required skills"),
+    },
+}
+
+# Job section -> resume sections it is compared with
+JOB_TO_RESUME = {
+    "responsibilities": ("experience", "projects", "summary"),
+    "requirements": ("skills", "experience", "education", "certifications"),
+    "preferred": ("skills", "experience", "projects", "certifications"),
+    "skills": ("skills", "experience", "projects"),
+}
+RESUME_TO_JOB: Dict[str, Tuple[str, ...]] = {}
+for _job_section, _resume_sections in JOB_TO_RESUME.items():
+    for _resume_section in _resume_sections:
+        RESUME_TO_JOB[_resume_section] = RESUME_TO_JOB.get(_resume_section, ()) + (_job_section,)
+
+HEADING_PATTERN = re.compile(r"^[\s#*•\-]*([A-Za-z][A-Za-z '&/\-]{1,40}?)\s*:?\s*$")
+
+
+def split_sections(text: str, kind: str) -> List[Tuple[str, str]]:
+    """(section, text) parts of a document in order; text before the first heading is "other" """
+    aliases = {alias: section for section, names in SECTION_HEADINGS[kind].items() for alias in names}
+    parts: List[Tuple[str, List[str]]] = [("other", [])]
+    for line in text.splitlines():
+        match = HEADING_PATTERN.match(line)
+        section = aliases.get(match.group(1).lower().strip()) if match else None
+        if section:
+            parts.append((section, []))
+        elif line.strip():
+            parts[-1][1].append(line.strip())
+    return [(section, "\n".join(lines)) for section, lines in parts if lines]
+
+
+def chunk_text(text: str, size: int = MATCH_CHUNK_CHARS) -> List[str]:
+    """Line-aligned chunks of at most about size characters"""
+    chunks, current = [], ""
+    for line in text.splitlines():
+        while len(line) > size:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:size])
+            line = line[size:]
+        if current and len(current) + len(line) + 1 > size:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vectors, dtype=np.float32).mean(axis=0)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class DocumentVectors:
+    """Whole-text and section vectors of one kind of document, searchable by snapshot + tail"""
+
+    def __init__(self, root_dir: Path, dim: int):
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.log = EmbeddingLog(self.root_dir / "vectors.bin", dim)
+        # document ID -> {"row": first row in vectors.bin, "sections": [...], "indexed_at"}
+        self.documents = IndexLog(self.root_dir / "documents.json")
+        self.matrix_dir = self.root_dir / "matrix"
+        self.matrix = SharedEmbeddingMatrix(self.matrix_dir)
+        self.lock = threading.RLock()
+        # Held exclusively from a vector append to its documents.json entry,
+        # so a snapshot builder never takes a pending row for a dead one
+        self._write_lock = FileLock(self.root_dir / "vectors.lock")
+        # Row of vectors.bin -> document ID, for current rows only (rows of
+        # replaced documents drop out); snapshot keys are row numbers too
+        self._owners: Dict[int, str] = {}
+        self._owners_generation = self.documents.generation
+        for doc_id, entry in self.documents.items():
+            self._track(doc_id, entry)
+        self._tail = (0, np.zeros(0, dtype=np.int64), np.zeros((0, dim), dtype=np.float32))
+
+    @staticmethod
+    def _vector_ids(doc_id: str, sections: List[str]) -> List[int]:
+        return [faiss_id(f"{doc_id}#{section}") for section in sections]
+
+    def _track(self, doc_id: str, entry: Dict):
+        for row in range(entry["row"], entry["row"] + len(entry["sections"])):
+            self._owners[row] = doc_id
+
+    def _untrack(self, doc_id: str):
+        entry = self.documents.get(doc_id)
+        if entry:
+            for row in range(entry["row"], entry["row"] + len(entry["sections"])):
+                self._owners.pop(row, None)
+
+    def _sync_owners(self):
+        """Rebuild the row owners after other workers added or replaced documents"""
+        self.documents.refresh()
+        with self.lock:
+            if self._owners_generation == self.documents.generation:
+                return
+            self._owners_generation = self.documents.generation
+            self._owners = {}
+            for doc_id, entry in self.documents.items():
+                self._track(doc_id, entry)
+
+    def add(self, doc_id: str, vectors: Dict[str, np.ndarray]):
+        """Store (or replace) a document's vectors; "whole" must be among them"""
+        sections = list(vectors)
+        with self.lock, self._write_lock.exclusive():
+            self._untrack(doc_id)
+            first_row = self.log.append(self._vector_ids(doc_id, sections), np.stack(list(vectors.values())))
+            entry = {"row": first_row, "sections": sections, "indexed_at": time.time()}
+            self.documents.set(doc_id, entry)
+            self._track(doc_id, entry)
+
+    def remove(self, doc_id: str) -> bool:
+        with self.lock, self._write_lock.exclusive():
+            self._untrack(doc_id)
+            return self.documents.delete(doc_id)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.documents
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def vectors(self, doc_ids: List[str]) -> Dict[str, Dict[str, np.ndarray]]:
+        """section -> unit vector of each stored document"""
+        rows = self.log.memmap()
+        found = {}
+        for doc_id in doc_ids:
+            entry = self.documents.get(doc_id)
+            if entry:
+                block = np.asarray(rows["vector"][entry["row"]:entry["row"] + len(entry["sections"])])
+                found[doc_id] = dict(zip(entry["sections"], block))
+        return found
+
+    def candidates(self, queries: List[np.ndarray], k: int) -> Dict[str, float]:
+        """Documents with a row near any query, with their best cosine similarity"""
+        self.matrix.refresh()
+        self._sync_owners()
+        with self.lock:
+            start, tail_ids, tail_vectors = self._tail
+            covered = self.matrix.source_rows
+            if start != covered:
+                # A new snapshot covers part of the tail: keep the rows after it
+                drop = min(covered - start, len(tail_ids)) if covered > start else len(tail_ids)
+                start, tail_ids, tail_vectors = covered, tail_ids[drop:], tail_vectors[drop:]
+            new_ids, new_vectors = self.log.read(start + len(tail_ids))
+            if len(new_ids):
+                tail_ids = np.concatenate([tail_ids, new_ids])
+                tail_vectors = np.concatenate([tail_vectors, new_vectors])
+            self._tail = (start, tail_ids, tail_vectors)
+            # Rows of replaced documents would take the places of current ones
+            tail_rows = np.arange(start, start + len(tail_ids), dtype=np.int64)
+            live = np.fromiter((row in self._owners for row in tail_rows.tolist()), dtype=bool,
+                               count=len(tail_rows))
+            tail_rows, tail_vectors = tail_rows[live], tail_vectors[live]
+        best: Dict[str, float] = {}
+        for query in queries:
+            hits = [(int(key), distance) for key, _, distance in self.matrix.search(query, k) if key.isdigit()]
+            hits += search_rows(tail_rows, tail_vectors, query, k)
+            for row, distance in hits:
+                doc_id = self._owners.get(row)
+                if doc_id is not None:
+                    # Unit vectors: squared L2 distance = 2 - 2 cos
+                    best[doc_id] = max(best.get(doc_id, -1.0), 1.0 - distance / 2)
+        return best
+
+    def _matrix_source(self):
+        # Keyed by row number: rows replaced after the build are skipped at search time
+        rows = self.log.memmap()
+        return rows, [str(row) for row in range(len(rows))]
+
+    def _live_rows(self, count: int) -> np.ndarray:
+        """Current rows among the first count rows of vectors.bin"""
+        with self.lock, self._write_lock.shared():
+            self._sync_owners()
+            return np.array(sorted(row for row in self._owners if row < count), dtype=np.int64)
+
+    def maybe_rebuild(self) -> Optional[Dict]:
+        """Snapshot the log once MATCH_REBUILD_ROWS vectors are not in the current snapshot
+
+        Rows of replaced or removed documents are left out of the snapshot,
+        so they stop taking search slots (vectors.bin itself keeps them).
+        """
+        return maybe_build(self.matrix_dir, self.matrix, len(self.log), self._matrix_source,
+                           MATCH_REBUILD_ROWS, live_rows=self._live_rows)
+
+
+def section_score(query: Dict[str, np.ndarray], candidate: Dict[str, np.ndarray],
+                  pairs: Dict[str, Tuple[str, ...]]) -> Tuple[float, Dict]:
+    """(score, per-section best matches) of a candidate for a query document"""
+    whole = float(query["whole"] @ candidate["whole"])
+    sections = {}
+    for section, targets in pairs.items():
+        if section not in query:
+            continue
+        scored = [(float(query[section] @ candidate[target]), target) for target in targets if target in candidate]
+        if scored:
+            similarity, target = max(scored)
+            sections[section] = {"matched": target, "similarity": round(similarity, 4)}
+    if not sections:
+        return whole, sections
+    section_mean = sum(s["similarity"] for s in sections.values()) / len(sections)
+    return MATCH_WHOLE_WEIGHT * whole + (1 - MATCH_WHOLE_WEIGHT) * section_mean, sections
+
+
+class MatchIndex:
+    """Resume and job embeddings with top-N matching in both directions"""
+
+    def __init__(self, root_dir: str = "data/match", embedder=None):
+        self.root_dir = Path(root_dir)
+        self.embedder = embedder or get_embedding_service()
+        self._stores: Dict[str, DocumentVectors] = {}
+        self._load_lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[str, str, str]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+
+    def _store(self, kind: str) -> DocumentVectors:
+        if kind not in KINDS:
+            raise ValueError(f"Unknown document kind '{kind}', expected one of: {', '.join(KINDS)}")
+        if kind not in self._stores:
+            self.embedder.load()
+            with self._load_lock:
+                if kind not in self._stores:
+                    self._stores[kind] = DocumentVectors(self.root_dir / kind, self.embedder.dim)
+        return self._stores[kind]
+
+    def embed(self, text: str, kind: str) -> Dict[str, np.ndarray]:
+        """Unit "whole" and per-section vectors of a document (empty if it has no text)"""
+        parts = [(section, chunk) for section, body in split_sections(text or "", kind)
+                 for chunk in chunk_text(body)][:MATCH_MAX_CHUNKS]
+        if not parts:
+            return {}
+        embeddings = np.asarray(self.embedder.encode([chunk for _, chunk in parts]), dtype=np.float32)
+        vectors = {"whole": _normalized(embeddings)}
+        for section in dict.fromkeys(section for section, _ in parts):
+            if section != "other":
+                vectors[section] = _normalized(
+                    embeddings[[i for i, (name, _) in enumerate(parts) if name == section]]
+                )
+        return vectors
+
+    def index(self, kind: str, doc_id: str, text: str) -> bool:
+        """Embed and store a document now
+
+        Returns:
+            False if the document has no text (any stored version is removed)
+        """
+        store = self._store(kind)
+        vectors = self.embed(text, kind)
+        if not vectors:
+            store.remove(doc_id)
+            return False
+        store.add(doc_id, vectors)
+        return True
+
+    def index_resume(self, resume_id: str, resume_text: str) -> bool:
+        return self.index("resume", resume_id, resume_text)
+
+    def index_job(self, job_id: str, job_description: str) -> bool:
+        return self.index("job", job_id, job_description)
+
+    def remove(self, kind: str, doc_id: str) -> bool:
+        return self._store(kind).remove(doc_id)
+
+    def is_indexed(self, kind: str, doc_id: str) -> bool:
+        return doc_id in self._store(kind)
+
+    def submit(self, kind: str, doc_id: str, text: str):
+        """Index a document in the background (uploads return without waiting for the model)"""
+        with self._load_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._index_loop, name="match-index", daemon=True)
+                self._worker.start()
+        self._queue.put((kind, doc_id, text))
+
+    def _index_loop(self):
+        while True:
+            kind, doc_id, text = self._queue.get()
+            try:
+                self.index(kind, doc_id, text)
+                if self._queue.empty():
+                    self._store(kind).maybe_rebuild()
+            except Exception as e:
+                print(f"Match index error ({kind} {doc_id}): {e}")
+
+    def top_matches(self, kind: str, doc_id: str, n: int = 10,
+                    text: Optional[str] = None) -> Optional[List[Dict]]:
+        """Best documents of the other kind for a stored resume or job
+
+        Args:
+            kind: "resume" or "job" (the kind of doc_id)
+            doc_id: The resume or job ID
+            n: Number of matches
+            text: The document's text, to index it first if it is not indexed yet
+
+        Returns:
+            Matches (id, score, whole_similarity, sections), best first, or
+            None if the document is not indexed and no text was given
+        """
+        start = time.perf_counter()
+        source = self._store(kind)
+        if doc_id not in source:
+            if text is None or not self.index(kind, doc_id, text):
+                return None
+        query = source.vectors([doc_id]).get(doc_id)
+        if query is None:
+            return None
+        target_kind = "job" if kind == "resume" else "resume"
+        target = self._store(target_kind)
+        pairs = JOB_TO_RESUME if kind == "job" else RESUME_TO_JOB
+
+        # ANN over whole and section vectors, then exact section-aware rescoring
+        k = max(int(n) * 4, MATCH_CANDIDATES // len(query))
+        pool = target.candidates(list(query.values()), k)
+        scored = []
+        for candidate_id, candidate in target.vectors(list(pool)).items():
+            score, sections = section_score(query, candidate, pairs)
+            scored.append({
+                f"{target_kind}_id": candidate_id,
+                "score": round(score, 4),
+                "whole_similarity": round(float(query["whole"] @ candidate["whole"]), 4),
+                "sections": sections
+            })
+        scored.sort(key=lambda match: match["score"], reverse=True)
+        self._latencies.append((time.perf_counter() - start) * 1000)
+        return scored[:max(0, int(n))]
+
+    def top_resumes(self, job_id: str, n: int = 10, job_description: Optional[str] = None):
+        """Best stored resumes for a job (see top_matches)"""
+        return self.top_matches("job", job_id, n, job_description)
+
+    def top_jobs(self, resume_id: str, n: int = 10, resume_text: Optional[str] = None):
+        """Best stored jobs for a resume (see top_matches)"""
+        return self.top_matches("resume", resume_id, n, resume_text)
+
+    def sync(self, job_storage, resume_storage):
+        """Embed jobs/resumes missing from the index and drop deleted ones
+
+        Used at startup so documents stored before the index existed (or
+        while the server was down) become matchable.
+        """
+        jobs = {job['job_id'] for job in job_storage.list_jobs(limit=job_storage.count_jobs() or 1)}
+        resumes = {r['resume_id'] for r in resume_storage.list_resumes(limit=resume_storage.count_resumes() or 1)}
+        added = 0
+        for kind, keys, load in (
+            ("job", jobs, lambda key: (job_storage.get_job(key) or {}).get('job_description', '')),
+            ("resume", resumes, resume_storage.get_resume_text),
+        ):
+            store = self._store(kind)
+            for doc_id in keys:
+                if doc_id not in store:
+                    added += self.index(kind, doc_id, load(doc_id) or '')
+            for doc_id in [doc_id for doc_id, _ in store.documents.items() if doc_id not in keys]:
+                store.remove(doc_id)
+            store.maybe_rebuild()
+        if added:
+            print(f"✓ Match index: embedded {added} new documents")
+        return added
+
+    def stats(self) -> Dict:
+        """Indexed documents, snapshot sizes and match latency"""
+        latencies = sorted(self._latencies)
+        stats = {
+            "matches": len(latencies),
+            "p50_ms": round(latencies[len(latencies) // 2], 3) if latencies else 0.0,
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else 0.0,
+            "pending": self._queue.qsize(),
+        }
+        for kind, store in self._stores.items():
+            stats[kind] = {
+                "documents": len(store),
+                "vectors": len(store.log),
+                "snapshot_rows": store.matrix.count,
+                "snapshot_dtype": store.matrix.meta.get("dtype")
+            }
+        return stats
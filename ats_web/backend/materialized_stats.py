@@ -0,0 +1,222 @@
+"""
+Materialized Statistics
+Counters, sums, histograms and recent-N ring buffers that are updated on
+every write and persisted next to the store they describe, so statistics
+endpoints never have to rescan the underlying data.
+
+Worker processes share one stats file: updates are read-modify-write
+transactions under an flock on a sidecar .lock file, and reads reload the
+file when another process has saved it (one stat() when nothing changed).
+"""
+import json
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from file_lock import FileLock
+
+
+SCORE_BUCKETS = ["0-9", "10-19", "20-29", "30-39", "40-49",
+                 "50-59", "60-69", "70-79", "80-89", "90-100"]
+
+
+def score_bucket(score: float) -> str:
+    """Histogram bucket label for a 0-100 score"""
+    try:
+        return SCORE_BUCKETS[min(max(int(float(score) // 10), 0), 9)]
+    except (TypeError, ValueError):
+        return SCORE_BUCKETS[0]
+
+
+def recommendation_verdict(recommendation: str) -> str:
+    """Leading verdict of a hiring recommendation ("MAYBE - needs ..." -> "MAYBE")"""
+    verdict = (recommendation or "").split(" - ")[0].strip().upper()
+    return verdict or "UNKNOWN"
+
+
+class MaterializedStats:
+    """Small JSON-persisted aggregate state for one store
+
+    Writers wrap the store write and the matching aggregate updates in
+    transaction(). A .pending marker file exists for the duration, so a
+    process that dies in between leaves it behind; whoever opens the stats
+    next sees exists == False and rebuilds them from the store.
+    """
+
+    def __init__(self, stats_file: Path, recent_size: int = 5):
+        self.stats_file = Path(stats_file)
+        self.pending_file = self.stats_file.with_suffix(".pending")
+        self.recent_size = recent_size
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(self.stats_file.with_suffix(".lock"))
+        # (inode, mtime, size) of the stats file as last loaded or saved
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._depth = 0
+        # An interrupted transaction's marker was found and not yet rebuilt over
+        self._stale = False
+        self.exists = False
+        self.reset()
+        with self._lock, self._file_lock.shared():
+            self._load()
+
+    def reset(self):
+        """Clear all aggregates (callers rebuild them from their source)"""
+        with self._lock:
+            self._counters: Dict[str, float] = {}
+            self._groups: Dict[str, Dict[str, float]] = {}
+            self._recent: Dict[str, deque] = {}
+            self._meta: Dict[str, Any] = {}
+            self._stale = False
+
+    def _file_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.stats_file)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _load(self):
+        """Replace the in-memory state with the stats file (file lock held)
+
+        No other process can be inside a transaction while the lock is
+        held, so a marker file seen here was left by one that died.
+        """
+        self._stamp = self._file_stamp()
+        self._stale = self.pending_file.exists()
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        self._counters = data.get('counters', {})
+        self._groups = data.get('groups', {})
+        self._recent = {
+            name: deque(items, maxlen=self.recent_size)
+            for name, items in data.get('recent', {}).items()
+        }
+        self._meta = data.get('meta', {})
+        self.exists = not self._stale
+
+    def refresh(self):
+        """Pick up what other processes saved (one stat() if nothing changed)"""
+        if self._depth or self._file_stamp() == self._stamp:
+            return
+        with self._lock, self._file_lock.shared():
+            if self._depth == 0 and self._file_stamp() != self._stamp:
+                self._load()
+
+    @contextmanager
+    def transaction(self) -> Iterator["MaterializedStats"]:
+        """Read-modify-write of the aggregates, exclusive across processes
+
+        Reloads what other processes saved, runs the caller's updates (and
+        the store write they describe) and saves. All updates go through
+        here: changes made outside a transaction are lost on the next
+        reload. If the body raises, the in-memory changes are dropped and
+        the marker stays, so the stats are rebuilt by the next process to
+        open them.
+        """
+        with self._lock, self._file_lock.exclusive():
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self
+                finally:
+                    self._depth -= 1
+                return
+            if self._file_stamp() != self._stamp:
+                self._load()
+            if self.pending_file.exists():
+                self._stale = True  # left by a process that died in a transaction
+            else:
+                self.pending_file.touch()
+            self._depth = 1
+            try:
+                yield self
+            except BaseException:
+                self.reset()
+                self._load()
+                raise
+            else:
+                self._write()
+                if not self._stale:
+                    self.pending_file.unlink()
+            finally:
+                self._depth = 0
+
+    def _write(self):
+        """Persist atomically (temp file + rename; file lock held)"""
+        data = {
+            "counters": self._counters,
+            "groups": self._groups,
+            "recent": {name: list(items) for name, items in self._recent.items()},
+            "meta": self._meta
+        }
+        tmp_file = self.stats_file.with_suffix(f".json.{os.getpid()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, self.stats_file)
+        self._stamp = self._file_stamp()
+        self.exists = not self._stale
+
+    def incr(self, counter: str, by: float = 1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + by
+
+    def incr_group(self, group: str, key: str, by: float = 1):
+        """Increment one bucket of a histogram / keyed counter"""
+        with self._lock:
+            buckets = self._groups.setdefault(group, {})
+            buckets[key] = buckets.get(key, 0) + by
+            if buckets[key] <= 0:
+                del buckets[key]
+
+    def push_recent(self, name: str, item: Dict, key_field: Optional[str] = None):
+        """Add an item to the front of a ring buffer (replacing any same-key item)"""
+        with self._lock:
+            items = self._recent.setdefault(name, deque(maxlen=self.recent_size))
+            if key_field:
+                self._drop(items, key_field, item.get(key_field))
+            items.appendleft(item)
+
+    def remove_recent(self, name: str, key_field: str, key: str) -> bool:
+        """Remove an item from a ring buffer; True if it was present"""
+        with self._lock:
+            items = self._recent.get(name)
+            return bool(items) and self._drop(items, key_field, key)
+
+    def _drop(self, items: deque, key_field: str, key) -> bool:
+        for existing in list(items):
+            if existing.get(key_field) == key:
+                items.remove(existing)
+                return True
+        return False
+
+    def counter(self, name: str) -> float:
+        self.refresh()
+        return self._counters.get(name, 0)
+
+    def group(self, name: str) -> Dict[str, float]:
+        self.refresh()
+        with self._lock:
+            return dict(self._groups.get(name, {}))
+
+    def recent(self, name: str) -> List[Dict]:
+        self.refresh()
+        with self._lock:
+            return list(self._recent.get(name, ()))
+
+    def recent_len(self, name: str) -> int:
+        self.refresh()
+        return len(self._recent.get(name, ()))
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        self.refresh()
+        return self._meta.get(key, default)
+
+    def set_meta(self, key: str, value: Any):
+        with self._lock:
+            self._meta[key] = value
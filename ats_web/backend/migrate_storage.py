@@ -0,0 +1,195 @@
+"""
+One-shot migration between the JSONL stores and the SQLite backend
+
+Usage:
+    python migrate_storage.py to-sqlite            # data/*.jsonl -> data/ats.db
+    python migrate_storage.py to-jsonl --out export  # data/ats.db -> export/{jobs,analyses,resumes}
+    python migrate_storage.py pack-resumes [--backend sqlite] [--delete-files]
+                                           # resumes/pdfs + texts -> resumes/blobs segments
+    python migrate_storage.py archive --days 180 [--closed-jobs] [--dry-run]
+                                           # old analyses/feedback -> data/archive segments
+"""
+import argparse
+import json
+from pathlib import Path
+from index_log import IndexLog
+from sqlite_storage import (
+    SQLiteDatabase, SQLiteJobStorage, SQLiteResumeStorage, SQLiteAnalysisStorage
+)
+
+
+def _read_jsonl(path: Path):
+    """Yield records from a JSONL file, skipping malformed lines"""
+    if not path.exists():
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"  ! Skipping malformed line {line_no} in {path}")
+
+
+def _read_index(path: Path) -> dict:
+    """Load an index snapshot with its pending mutation log applied"""
+    index = IndexLog(path)
+    data = index.as_dict()
+    index.close()
+    return data
+
+
+def migrate_to_sqlite(data_dir: str, db_path: str):
+    """Import jobs, resumes and analyses from the JSONL stores into SQLite"""
+    data = Path(data_dir)
+    db = SQLiteDatabase(db_path)
+    jobs = SQLiteJobStorage(db)
+    resumes = SQLiteResumeStorage(db, str(data / "resumes"))
+    analyses = SQLiteAnalysisStorage(db)
+
+    # The JSONL records are never rewritten: the live counters are in the index,
+    # and a deleted record only loses its index entry
+    job_index = _read_index(data / "jobs" / "jobs_index.json")
+    job_count = skipped = 0
+    for job in _read_jsonl(data / "jobs" / "jobs.jsonl"):
+        if job['job_id'] not in job_index:
+            skipped += 1
+            continue
+        job['analysis_count'] = job_index[job['job_id']].get('analysis_count', 0)
+        jobs.import_job(job)
+        job_count += 1
+    print(f"✓ Migrated {job_count} jobs (skipped {skipped} deleted)")
+
+    resume_count = 0
+    for resume in _read_index(data / "resumes" / "resumes_index.json").values():
+        resumes.import_resume(resume)
+        resume_count += 1
+    print(f"✓ Migrated {resume_count} resumes")
+
+    analysis_index = _read_index(data / "analyses" / "analyses_index.json")
+    analysis_count = skipped = 0
+    for analysis in _read_jsonl(data / "analyses" / "analyses.jsonl"):
+        if analysis['analysis_id'] not in analysis_index:
+            skipped += 1
+            continue
+        analysis['feedback_count'] = analysis_index[analysis['analysis_id']].get('feedback_count', 0)
+        analyses.import_analysis(analysis)
+        analysis_count += 1
+    print(f"✓ Migrated {analysis_count} analyses (skipped {skipped} deleted)")
+
+    db.close()
+    print(f"✓ SQLite database ready: {db_path}")
+
+
+def export_to_jsonl(db_path: str, out_dir: str, data_dir: str = "data"):
+    """Export the SQLite database back to the JSONL file layout"""
+    out = Path(out_dir)
+    db = SQLiteDatabase(db_path)
+
+    jobs_dir = out / "jobs"
+    jobs_dir.mkdir(parents=True, exist_ok=True)
+    job_index = {}
+    with open(jobs_dir / "jobs.jsonl", 'w', encoding='utf-8') as f:
+        for job in SQLiteJobStorage(db).iter_jobs():
+            f.write(json.dumps(job) + '\n')
+            job_index[job['job_id']] = {
+                "company_name": job['company_name'],
+                "role_name": job['role_name'],
+                "created_at": job['created_at'],
+                "analysis_count": job['analysis_count']
+            }
+    with open(jobs_dir / "jobs_index.json", 'w', encoding='utf-8') as f:
+        json.dump(job_index, f, indent=2)
+    print(f"✓ Exported {len(job_index)} jobs")
+
+    analyses_dir = out / "analyses"
+    analyses_dir.mkdir(parents=True, exist_ok=True)
+    analysis_index = {}
+    with open(analyses_dir / "analyses.jsonl", 'w', encoding='utf-8') as f:
+        for analysis in SQLiteAnalysisStorage(db).iter_analyses():
+            f.write(json.dumps(analysis) + '\n')
+            analysis_index[analysis['analysis_id']] = {
+                "candidate_id": analysis['candidate_id'],
+                "job_id": analysis['job_id'],
+                "resume_id": analysis['resume_id'],
+                "candidate_name": analysis['candidate_name'],
+                "created_at": analysis['created_at'],
+                "overall_score": analysis['overall_score'],
+                "feedback_count": analysis['feedback_count']
+            }
+    with open(analyses_dir / "analyses_index.json", 'w', encoding='utf-8') as f:
+        json.dump(analysis_index, f, indent=2)
+    print(f"✓ Exported {len(analysis_index)} analyses")
+
+    resumes_dir = out / "resumes"
+    resumes_dir.mkdir(parents=True, exist_ok=True)
+    resume_index = {
+        resume['resume_id']: resume
+        for resume in SQLiteResumeStorage(db, str(Path(data_dir) / "resumes")).iter_resumes()
+    }
+    with open(resumes_dir / "resumes_index.json", 'w', encoding='utf-8') as f:
+        json.dump(resume_index, f, indent=2)
+    print(f"✓ Exported {len(resume_index)} resume records (PDF/text files stay in place)")
+
+    db.close()
+
+
+def pack_resumes(backend: str, data_dir: str, delete_files: bool):
+    """Move per-file resume PDFs and texts into the segment blob store"""
+    from storage_factory import create_storages
+    _, resumes, _ = create_storages(backend, data_dir)
+    migrated = resumes.pack_legacy_files(delete_files=delete_files)
+    stats = resumes.blobs.get_stats()
+    print(f"✓ Packed {migrated} resumes into {stats['segments']} segment(s): "
+          f"{stats['original_bytes']} bytes stored as {stats['stored_bytes']}")
+    if not delete_files:
+        print("  Original files kept; rerun with --delete-files to remove them")
+
+
+def archive_cold_records(backend: str, data_dir: str, days: int, closed_jobs: bool, dry_run: bool):
+    """Run the retention job offline (stop the server first)"""
+    from storage_factory import create_storages
+    from feedback_store import FeedbackStore
+    from retention import RetentionPolicy, open_archives, run_retention
+    jobs, _, analyses = create_storages(backend, data_dir)
+    analysis_archive, feedback_archive = open_archives(str(Path(data_dir) / "archive"))
+    report = run_retention(
+        analyses, jobs, FeedbackStore(), analysis_archive, feedback_archive,
+        RetentionPolicy(days, closed_jobs), dry_run
+    )
+    print(json.dumps(report, indent=2))
+    # The analysis log was rewritten, so the server's results snapshot is stale
+    snapshot_file = Path(data_dir) / "state_snapshot.json"
+    if not dry_run and report['analyses']['archived'] and snapshot_file.exists():
+        snapshot_file.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate ATS storage between JSONL and SQLite")
+    parser.add_argument("direction", choices=["to-sqlite", "to-jsonl", "pack-resumes", "archive"])
+    parser.add_argument("--data-dir", default="data", help="JSONL data directory")
+    parser.add_argument("--db", default="data/ats.db", help="SQLite database path")
+    parser.add_argument("--out", default="data/export", help="Output directory for to-jsonl")
+    parser.add_argument("--backend", default=None, help="Backend for pack-resumes (default STORAGE_BACKEND)")
+    parser.add_argument("--delete-files", action="store_true",
+                        help="pack-resumes: remove pdfs/ and texts/ files once packed")
+    parser.add_argument("--days", type=int, default=0, help="archive: records older than this many days")
+    parser.add_argument("--closed-jobs", action="store_true",
+                        help="archive: records of jobs deleted from the job store")
+    parser.add_argument("--dry-run", action="store_true", help="archive: only report what would move")
+    args = parser.parse_args()
+
+    if args.direction == "to-sqlite":
+        migrate_to_sqlite(args.data_dir, args.db)
+    elif args.direction == "pack-resumes":
+        pack_resumes(args.backend, args.data_dir, args.delete_files)
+    elif args.direction == "archive":
+        archive_cold_records(args.backend, args.data_dir, args.days, args.closed_jobs, args.dry_run)
+    else:
+        export_to_jsonl(args.db, args.out, args.data_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Cursor-based pagination helpers shared by the storage backends
+Records are ordered newest first by (timestamp, id). A cursor is the
+opaque, URL-safe encoding of the last (timestamp, id) a client has seen.
+"""
+import base64
+import bisect
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(sort_value: str, key: str) -> str:
+    """Encode a (sort_value, key) position as an opaque cursor"""
+    raw = json.dumps([sort_value, key], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return str(sort_value), str(key)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def clamp_limit(limit: int) -> int:
+    """Keep page sizes within [1, MAX_PAGE_SIZE]"""
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def date_upper_bound(date_to: str) -> str:
+    """Make an ISO date/datetime upper bound inclusive of its whole prefix
+
+    "2025-11-15" matches every timestamp on that day.
+    """
+    return date_to + "\uffff"
+
+
+class SortedKeyIndex:
+    """In-memory list of (sort_value, key) kept sorted for keyset pagination"""
+
+    def __init__(self, entries: Iterable[Tuple[str, str]] = ()):
+        self._entries: List[Tuple[str, str]] = sorted(entries)
+
+    def add(self, sort_value: str, key: str):
+        """Insert an entry (no-op if it is already present)"""
+        i = bisect.bisect_left(self._entries, (sort_value, key))
+        if i == len(self._entries) or self._entries[i] != (sort_value, key):
+            self._entries.insert(i, (sort_value, key))
+
+    def remove(self, sort_value: str, key: str):
+        i = bisect.bisect_left(self._entries, (sort_value, key))
+        if i < len(self._entries) and self._entries[i] == (sort_value, key):
+            del self._entries[i]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def iter_desc(self, before: Optional[Tuple[str, str]] = None,
+                  date_from: Optional[str] = None,
+                  date_to: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+        """Iterate newest first, strictly after the cursor position
+
+        Args:
+            before: Cursor position; only older entries are returned
+            date_from: Inclusive lower bound on sort_value
+            date_to: Inclusive upper bound on sort_value (prefix match)
+        """
+        end = len(self._entries)
+        if before is not None:
+            end = bisect.bisect_left(self._entries, before)
+        if date_to:
+            end = min(end, bisect.bisect_right(self._entries, (date_upper_bound(date_to),)))
+        for i in range(end - 1, -1, -1):
+            entry = self._entries[i]
+            if date_from and entry[0] < date_from:
+                return
+            yield entry
+
+
+def paginate(positions: Iterator[Tuple[str, str]],
+             load: Callable[[str], Optional[Dict]],
+             predicate: Optional[Callable[[Dict], bool]],
+             limit: int) -> Dict:
+    """Collect one page from a newest-first position iterator
+
+    Args:
+        positions: (sort_value, key) pairs, newest first
+        load: Builds the summary dict for a key (None to skip)
+        predicate: Optional filter applied to each summary
+        limit: Page size
+
+    Returns:
+        Dict with "items" and "next_cursor" (None on the last page)
+    """
+    limit = max(1, int(limit))
+    items: List[Dict] = []
+    last: Optional[Tuple[str, str]] = None
+    for position in positions:
+        item = load(position[1])
+        if item is None or (predicate and not predicate(item)):
+            continue
+        if len(items) == limit:
+            return {"items": items, "next_cursor": encode_cursor(*last)}
+        items.append(item)
+        last = position
+    return {"items": items, "next_cursor": None}
@@ -1,32 +1,64 @@
 """RAG service using feedback database + Ollama"""
 
-from feedback_store import feedback_store
+import os
+import threading
+from collections import OrderedDict
+from feedback_store import feedback_store, normalize_query
+from hybrid_retriever import HybridRetriever
 from typing import List, Dict
 
+# Retrievals kept per (query, min_rating, n_results), dropped when feedback changes
+RAG_CACHE_SIZE = int(os.getenv("RAG_CACHE_SIZE", "256"))
+
+
 class RAGService:
     def __init__(self):
         self.feedback_store = feedback_store
+        self.retriever = HybridRetriever(feedback_store)
+        # (normalized query, min_rating, n_results) -> (feedback write version, examples)
+        self._retrievals: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
     
     def get_relevant_examples(self, query: str, min_rating: int = 4, n_results: int = 3) -> List[Dict]:
-        """Get relevant high-quality examples from feedback"""
-        results = self.feedback_store.search_similar_chromadb(
-            query=query,
-            n_results=n_results,
-            min_rating=min_rating
-        )
+        """Get relevant high-quality examples from feedback
         
-        if 'error' in results or not results.get('documents'):
-            return []
+        Uses hybrid (BM25 + dense) retrieval; only examples scoring close to
+        the best one are returned, so there may be fewer than n_results.
+        Results are cached until the feedback store's write version changes.
+        """
+        key = (normalize_query(query), min_rating, n_results)
+        version = self.feedback_store.write_version()
+        with self._cache_lock:
+            cached = self._retrievals.get(key)
+            if cached is not None and cached[0] == version:
+                self._retrievals.move_to_end(key)
+                self.cache_hits += 1
+                return [dict(example) for example in cached[1]]
+            self.cache_misses += 1
         
-        examples = []
-        for doc, metadata in zip(results['documents'][0], results['metadatas'][0]):
-            examples.append({
-                'query': metadata['query'],
-                'response': metadata['response'],
-                'rating': metadata['rating']
-            })
+        try:
+            examples, _ = self.retriever.retrieve(query, n_results=n_results, min_rating=min_rating)
+        except Exception as e:
+            print(f"RAG retrieval error: {e}")
+            return []
         
-        return examples
+        with self._cache_lock:
+            self._retrievals[key] = (version, examples)
+            self._retrievals.move_to_end(key)
+            while len(self._retrievals) > RAG_CACHE_SIZE:
+                self._retrievals.popitem(last=False)
+        return [dict(example) for example in examples]
+    
+    def cache_stats(self) -> Dict:
+        """Retrieval cache size and hit counts"""
+        with self._cache_lock:
+            return {"entries": len(self._retrievals), "hits": self.cache_hits, "misses": self.cache_misses}
+    
+    def retrieval_stats(self) -> Dict:
+        """Per-stage retrieval latency and cache hit counts"""
+        return {**self.retriever.stage_stats(), "cache": self.cache_stats()}
     
     def build_rag_prompt(self, query: str, context: Dict, examples: List[Dict]) -> str:
         """Build enhanced prompt with examples from feedback"""
@@ -0,0 +1,155 @@
+"""
+Incremental Result Cache
+Keeps the most recent analysis results in memory for /api/results. It
+remembers how far into the analysis store it has read and, on each
+refresh, only ingests analyses written since then, so serving the list
+costs the same no matter how much history has accumulated.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from analysis_storage import default_candidate_id
+
+
+class ResultCache:
+    """Bounded (LRU) cache of analysis results fed by tailing the analysis store"""
+
+    def __init__(self, analysis_storage, max_entries: int = 500):
+        self.analysis_storage = analysis_storage
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        # candidate_id -> {"analysis_id", "resume_id", "result"}, least recently used first
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        # (rewrite epoch, offset) from the store's tail_position()/read_since():
+        # a byte offset for the JSONL store, a rowid for SQLite
+        self._position: Optional[Tuple[Union[str, int], int]] = None
+
+    @staticmethod
+    def candidate_id(record: Dict) -> str:
+        """Candidate key used by the UI (legacy records: "<name>_<created_at>")"""
+        return record.get('candidate_id') or default_candidate_id(record['candidate_name'], record['created_at'])
+
+    def _ingest(self, record: Dict) -> str:
+        candidate_id = self.candidate_id(record)
+        self._entries[candidate_id] = {
+            "analysis_id": record['analysis_id'],
+            "resume_id": record['resume_id'],
+            "result": record['analysis_result']
+        }
+        self._entries.move_to_end(candidate_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return candidate_id
+
+    def _seed(self) -> List[Dict]:
+        """Load the newest max_entries analyses with point lookups"""
+        # Take the position first: anything written meanwhile is read twice, harmlessly
+        self._position = self.analysis_storage.tail_position()
+        records = []
+        for summary in reversed(self.analysis_storage.list_analyses(limit=self.max_entries)):
+            record = self.analysis_storage.get_analysis(summary['analysis_id'])
+            if record:
+                self._ingest(record)
+                records.append(record)
+        return records
+
+    def refresh(self) -> List[Dict]:
+        """Ingest analyses written since the last refresh
+
+        Returns:
+            The newly ingested full analysis records (oldest first)
+        """
+        with self._lock:
+            if self._position is None:
+                return self._seed()
+            records, self._position, rewritten = self.analysis_storage.read_since(self._position)
+            if rewritten:
+                # Archived analyses are gone from the store: start over
+                self._entries.clear()
+                return self._seed()
+            for record in records:
+                self._ingest(record)
+            return records
+
+    def results(self) -> List[Dict]:
+        """Cached results, most recent first (then by score)"""
+        with self._lock:
+            results = [entry['result'] for entry in self._entries.values()]
+        results.sort(key=lambda x: (x.get('timestamp', ''), x.get('overall_score', 0)), reverse=True)
+        return results
+
+    def version(self) -> str:
+        """Digest of the cached analysis IDs
+
+        Workers that have read the same analyses get the same value, however
+        their caches were filled or cleared.
+        """
+        with self._lock:
+            analysis_ids = sorted(entry['analysis_id'] for entry in self._entries.values())
+        return hashlib.sha1("\n".join(analysis_ids).encode('utf-8')).hexdigest()[:16]
+
+    def get(self, candidate_id: str) -> Optional[Dict]:
+        """Cached entry for a candidate (marks it recently used)"""
+        with self._lock:
+            entry = self._entries.get(candidate_id)
+            if entry is not None:
+                self._entries.move_to_end(candidate_id)
+            return entry
+
+    def clear(self):
+        """Drop everything; the next refresh reloads the most recent analyses"""
+        with self._lock:
+            self._entries.clear()
+            self._position = None
+
+    def save_snapshot(self, snapshot_file: Path):
+        """Persist the cached entries and read position (atomic replace)"""
+        with self._lock:
+            if self._position is None:
+                return
+            data = {
+                "backend": type(self.analysis_storage).__name__,
+                "position": self._position,
+                "entries": list(self._entries.items())
+            }
+        snapshot_file = Path(snapshot_file)
+        tmp_file = snapshot_file.with_suffix(".json.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, snapshot_file)
+
+    def load_snapshot(self, snapshot_file: Path) -> bool:
+        """Restore a snapshot saved by save_snapshot
+
+        The next refresh then only reads what was written after the snapshot.
+
+        Returns:
+            True if restored, False if missing or no longer valid for the store
+        """
+        try:
+            with open(snapshot_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('backend') != type(self.analysis_storage).__name__:
+            return False
+        position = data.get('position')
+        epoch, end = self.analysis_storage.tail_position()
+        if not isinstance(position, list) or position[0] != epoch or position[1] > end:
+            return False  # store was rewritten since
+        with self._lock:
+            self._entries = OrderedDict(data.get('entries', [])[-self.max_entries:])
+            self._position = tuple(position)
+        return True
+
+    def entries(self) -> List[tuple]:
+        """(candidate_id, entry) pairs, least recently used first"""
+        with self._lock:
+            return list(self._entries.items())
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,44 +1,55 @@
 """
 Resume Storage System
 Manages uploaded resumes with persistent storage
+PDFs and texts are packed into a content-addressed segment blob store;
+records written before that still point at per-file pdf_path/text_path.
 """
-import json
 import hashlib
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
+from blob_store import SegmentBlobStore
+from index_log import IndexLog
+from materialized_stats import MaterializedStats
+from pagination import SortedKeyIndex, decode_cursor, paginate
 
 
 class ResumeStorage:
     """Store and manage uploaded resumes"""
     
-    def __init__(self, storage_dir: str = "data/resumes"):
+    def __init__(self, storage_dir: str = "data/resumes", search_index=None):
         self.storage_dir = Path(storage_dir)
+        self.search_index = search_index
         self.storage_dir.mkdir(parents=True, exist_ok=True)
         self.pdfs_dir = self.storage_dir / "pdfs"
         self.pdfs_dir.mkdir(exist_ok=True)
         self.texts_dir = self.storage_dir / "texts"
         self.texts_dir.mkdir(exist_ok=True)
+        self.blobs = SegmentBlobStore(self.storage_dir / "blobs")
         self.index_file = self.storage_dir / "resumes_index.json"
-        self._ensure_files_exist()
+        self.index = IndexLog(self.index_file)
+        self._sorted: Optional[SortedKeyIndex] = None
+        # Index generation the derived orderings were built at
+        self._derived_generation = self.index.generation
+        self.stats = MaterializedStats(self.storage_dir / "resumes_stats.json")
+        if not self.stats.exists:
+            self._rebuild_stats()
     
-    def _ensure_files_exist(self):
-        """Create storage files if they don't exist"""
-        if not self.index_file.exists():
-            self._save_index({})
+    def _drop_stale_derived(self):
+        """Forget orderings built before other workers changed the index"""
+        self.index.refresh()
+        if self._derived_generation != self.index.generation:
+            self._derived_generation = self.index.generation
+            self._sorted = None
     
-    def _load_index(self) -> Dict:
-        """Load the resumes index"""
-        try:
-            with open(self.index_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
-    
-    def _save_index(self, index: Dict):
-        """Save the resumes index"""
-        with open(self.index_file, 'w', encoding='utf-8') as f:
-            json.dump(index, f, indent=2)
+    def _order(self) -> SortedKeyIndex:
+        """Resume IDs ordered by upload time (built on first use)"""
+        self._drop_stale_derived()
+        if self._sorted is None:
+            self._sorted = SortedKeyIndex(
+                (entry['uploaded_at'], resume_id) for resume_id, entry in self.index.items()
+            )
+        return self._sorted
     
     def _compute_hash(self, content: bytes) -> str:
         """Compute SHA256 hash of content"""
@@ -62,32 +73,42 @@ class ResumeStorage:
         resume_id = f"resume_{content_hash}"
         timestamp = datetime.now().isoformat()
         
-        # Save PDF
-        pdf_path = self.pdfs_dir / f"{resume_id}.pdf"
-        with open(pdf_path, 'wb') as f:
-            f.write(pdf_bytes)
-        
-        # Save text
-        text_path = self.texts_dir / f"{resume_id}.txt"
-        with open(text_path, 'w', encoding='utf-8') as f:
-            f.write(resume_text)
+        # Save PDF and text to the blob store
+        pdf_blob = self.blobs.put(pdf_bytes)
+        text_blob = self.blobs.put(resume_text.encode('utf-8'))
         
         # Create resume record
         resume_record = {
             "resume_id": resume_id,
             "candidate_name": candidate_name,
             "original_filename": filename,
-            "pdf_path": str(pdf_path),
-            "text_path": str(text_path),
+            "pdf_blob": pdf_blob,
+            "text_blob": text_blob,
             "uploaded_at": timestamp,
             "file_size": len(pdf_bytes),
             "text_length": len(resume_text)
         }
         
-        # Update index
-        index = self._load_index()
-        index[resume_id] = resume_record
-        self._save_index(index)
+        # Index and materialized stats change together (see MaterializedStats)
+        with self.stats.transaction():
+            # Update index (a re-upload moves the resume to the top)
+            previous = self.index.get(resume_id)
+            self.index.set(resume_id, resume_record)
+            if previous:
+                self._release_files(previous)
+            if self._sorted is not None:
+                if previous:
+                    self._sorted.remove(previous['uploaded_at'], resume_id)
+                self._sorted.add(timestamp, resume_id)
+            
+            # Update materialized stats
+            if previous:
+                self.stats.incr("total_file_size", -previous.get('file_size', 0))
+            self.stats.incr("total_file_size", len(pdf_bytes))
+            self.stats.push_recent("resumes", resume_record, "resume_id")
+        
+        if self.search_index:
+            self.search_index.index_resume(resume_record, resume_text)
         
         return resume_record
     
@@ -100,8 +121,7 @@ class ResumeStorage:
         Returns:
             Resume record or None if not found
         """
-        index = self._load_index()
-        return index.get(resume_id)
+        return self.index.get(resume_id)
     
     def get_resume_text(self, resume_id: str) -> Optional[str]:
         """Get resume text by ID
@@ -116,12 +136,8 @@ class ResumeStorage:
         if not resume:
             return None
         
-        try:
-            text_path = Path(resume['text_path'])
-            with open(text_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except:
-            return None
+        data = self._read_file(resume, 'text', self.texts_dir, '.txt')
+        return data.decode('utf-8') if data is not None else None
     
     def get_resume_pdf(self, resume_id: str) -> Optional[bytes]:
         """Get resume PDF bytes by ID
@@ -136,13 +152,63 @@ class ResumeStorage:
         if not resume:
             return None
         
+        return self._read_file(resume, 'pdf', self.pdfs_dir, '.pdf')
+    
+    def _legacy_path(self, resume: Dict, kind: str, directory: Path, ext: str) -> Path:
+        """Location of a pre-blob-store file (paths may have been written on Windows)"""
+        path = Path(resume.get(f'{kind}_path', '').replace('\\', '/'))
+        if path.name and path.exists():
+            return path
+        return directory / f"{resume['resume_id']}{ext}"
+    
+    def _read_file(self, resume: Dict, kind: str, directory: Path, ext: str) -> Optional[bytes]:
+        """Read a resume's PDF or text from the blob store or its legacy file"""
+        if resume.get(f'{kind}_blob'):
+            return self.blobs.get(resume[f'{kind}_blob'])
         try:
-            pdf_path = Path(resume['pdf_path'])
-            with open(pdf_path, 'rb') as f:
+            with open(self._legacy_path(resume, kind, directory, ext), 'rb') as f:
                 return f.read()
         except:
             return None
     
+    def _release_files(self, resume: Dict):
+        """Drop a record's blob references, or delete its legacy files"""
+        for kind, directory, ext in (('pdf', self.pdfs_dir, '.pdf'), ('text', self.texts_dir, '.txt')):
+            if resume.get(f'{kind}_blob'):
+                self.blobs.delete(resume[f'{kind}_blob'])
+            else:
+                path = self._legacy_path(resume, kind, directory, ext)
+                if path.exists():
+                    path.unlink()
+    
+    def pack_legacy_files(self, delete_files: bool = False) -> int:
+        """Move resumes still stored as pdfs/*.pdf and texts/*.txt into the blob store
+        
+        Args:
+            delete_files: Remove the original files once packed
+            
+        Returns:
+            Number of resumes migrated
+        """
+        migrated = 0
+        for resume_id, resume in self.index.items():
+            if resume.get('pdf_blob'):
+                continue
+            pdf_bytes = self._read_file(resume, 'pdf', self.pdfs_dir, '.pdf')
+            text_bytes = self._read_file(resume, 'text', self.texts_dir, '.txt')
+            if pdf_bytes is None:
+                print(f"  ! Skipping {resume_id}: PDF file not found")
+                continue
+            
+            record = {k: v for k, v in resume.items() if k not in ('pdf_path', 'text_path')}
+            record['pdf_blob'] = self.blobs.put(pdf_bytes)
+            record['text_blob'] = self.blobs.put(text_bytes or b'')
+            self.index.set(resume_id, record)
+            if delete_files:
+                self._release_files(resume)
+            migrated += 1
+        return migrated
+    
     def list_resumes(self, limit: int = 50) -> List[Dict]:
         """List all resumes (most recent first)
         
@@ -152,13 +218,42 @@ class ResumeStorage:
         Returns:
             List of resume records
         """
-        index = self._load_index()
-        resumes = list(index.values())
+        return self.list_resumes_page(limit=limit)['items']
+    
+    def list_resumes_page(self, limit: int = 50, cursor: Optional[str] = None,
+                          candidate: Optional[str] = None,
+                          date_from: Optional[str] = None,
+                          date_to: Optional[str] = None) -> Dict:
+        """List one page of resumes (most recent first) with optional filters
         
-        # Sort by upload date (most recent first)
-        resumes.sort(key=lambda x: x['uploaded_at'], reverse=True)
+        Args:
+            limit: Page size
+            cursor: Opaque cursor from a previous page's next_cursor
+            candidate: Case-insensitive substring of the candidate name
+            date_from: Inclusive lower bound on uploaded_at (ISO date/datetime)
+            date_to: Inclusive upper bound on uploaded_at (ISO date/datetime)
+            
+        Returns:
+            Dict with "items" (resume records) and "next_cursor"
         
-        return resumes[:limit]
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        candidate = candidate.lower() if candidate else None
+        return paginate(
+            self._order().iter_desc(decode_cursor(cursor), date_from, date_to),
+            self.index.get,
+            (lambda r: candidate in r.get('candidate_name', '').lower()) if candidate else None,
+            limit
+        )
+    
+    def count_resumes(self) -> int:
+        """Total number of resumes"""
+        return len(self.index)
+    
+    def version(self) -> str:
+        """Validator that changes whenever the resumes change (same in every worker)"""
+        return self.index.signature()
     
     def delete_resume(self, resume_id: str) -> bool:
         """Delete a resume
@@ -169,25 +264,50 @@ class ResumeStorage:
         Returns:
             True if deleted, False otherwise
         """
-        resume = self.get_resume(resume_id)
-        if not resume:
-            return False
-        
         try:
-            # Delete files
-            pdf_path = Path(resume['pdf_path'])
-            text_path = Path(resume['text_path'])
-            
-            if pdf_path.exists():
-                pdf_path.unlink()
-            if text_path.exists():
-                text_path.unlink()
+            with self.stats.transaction():
+                resume = self.get_resume(resume_id)
+                if not resume:
+                    return False
+                
+                # Delete files / blob references
+                self._release_files(resume)
+                
+                # Remove from index
+                if self._sorted is not None:
+                    self._sorted.remove(resume['uploaded_at'], resume_id)
+                self.index.delete(resume_id)
+                
+                self.stats.incr("total_file_size", -resume.get('file_size', 0))
+                if self.stats.remove_recent("resumes", "resume_id", resume_id):
+                    self._rebuild_stats()
             
-            # Remove from index
-            index = self._load_index()
-            del index[resume_id]
-            self._save_index(index)
+            if self.search_index:
+                self.search_index.remove_resume(resume_id)
             
             return True
         except:
             return False
+    
+    def get_stats(self) -> Dict:
+        """Resume statistics from materialized state
+        
+        Returns:
+            Dict with total, total PDF bytes and the most recent resumes
+        """
+        self.stats.refresh()
+        if not self.stats.exists:
+            self._rebuild_stats()  # left behind by an interrupted write
+        return {
+            "total": len(self.index),
+            "total_file_size": int(self.stats.counter("total_file_size")),
+            "recent": self.stats.recent("resumes")
+        }
+    
+    def _rebuild_stats(self):
+        """Recompute resume statistics from the index"""
+        with self.stats.transaction():
+            self.stats.reset()
+            self.stats.incr("total_file_size", sum(r.get('file_size', 0) for r in self.index.values()))
+            for resume in reversed(self.list_resumes(limit=self.stats.recent_size)):
+                self.stats.push_recent("resumes", resume, "resume_id")
@@ -0,0 +1,185 @@
+"""
+Retention Policy
+Moves analyses and feedback that are older than a cutoff, or that belong
+to closed jobs, out of the hot stores into compressed archive segments
+(data/archive), keeping analyses.jsonl and interactions.jsonl small.
+Archived records stay queryable through ArchiveStore.
+
+A job counts as closed once it has been deleted from the job store.
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from archive_store import ArchiveStore
+
+
+ANALYSIS_SUMMARY_FIELDS = (
+    "job_id", "resume_id", "candidate_name", "created_at",
+    "overall_score", "hiring_recommendation"
+)
+FEEDBACK_SUMMARY_FIELDS = ("timestamp", "analysis_id", "job_id")
+
+
+class RetentionPolicy:
+    """What to archive: records older than max_age_days and/or of closed jobs"""
+
+    def __init__(self, max_age_days: int = 0, archive_closed_jobs: bool = False):
+        self.max_age_days = max_age_days
+        self.archive_closed_jobs = archive_closed_jobs
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        """RETENTION_DAYS (0 = no age limit) and RETENTION_CLOSED_JOBS (0/1)"""
+        return cls(
+            max_age_days=int(os.getenv("RETENTION_DAYS", "0")),
+            archive_closed_jobs=os.getenv("RETENTION_CLOSED_JOBS", "0") == "1"
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_age_days > 0 or self.archive_closed_jobs
+
+    def cutoff(self) -> Optional[str]:
+        """ISO timestamp before which records are archived, or None"""
+        if self.max_age_days <= 0:
+            return None
+        return (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+
+
+def open_archives(archive_dir: str = "data/archive"):
+    """Open the analysis and feedback archives
+
+    Returns:
+        Tuple of (analysis_archive, feedback_archive)
+    """
+    return (
+        ArchiveStore(archive_dir, "analyses", "analysis_id", ANALYSIS_SUMMARY_FIELDS, "created_at"),
+        ArchiveStore(archive_dir, "feedback", "id", FEEDBACK_SUMMARY_FIELDS, "timestamp"),
+    )
+
+
+def _timed_scan(records) -> float:
+    """Milliseconds to read and parse every record of an iterator"""
+    start = time.perf_counter()
+    for _ in records:
+        pass
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def _scan_jsonl(path: Path):
+    if not path.exists():
+        return
+    with open(path, 'rb') as f:
+        for raw in f:
+            try:
+                yield json.loads(raw)
+            except ValueError:
+                continue
+
+
+def _file_bytes(path: Path) -> int:
+    return path.stat().st_size if path.exists() else 0
+
+
+def _closed_jobs(analysis_storage, job_storage) -> Set[str]:
+    """Jobs that still have analyses but no longer exist in the job store"""
+    job_ids = analysis_storage.get_stats()['by_job'].keys()
+    return {job_id for job_id in job_ids if job_id and not job_storage.has_job(job_id)}
+
+
+def _analyses_to_archive(analysis_storage, cutoff: Optional[str], closed_jobs: Set[str]) -> List[str]:
+    """IDs of analyses created before the cutoff or belonging to closed jobs"""
+    selected = set()
+
+    def collect(**filters):
+        cursor = None
+        while True:
+            page = analysis_storage.list_analyses_page(limit=500, cursor=cursor, **filters)
+            selected.update(analysis['analysis_id'] for analysis in page['items'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+
+    if cutoff:
+        collect(date_to=cutoff)
+    for job_id in closed_jobs:
+        collect(job_id=job_id)
+    return sorted(selected)
+
+
+def run_retention(analysis_storage, job_storage, feedback_store,
+                  analysis_archive: ArchiveStore, feedback_archive: ArchiveStore,
+                  policy: RetentionPolicy, dry_run: bool = False) -> Dict:
+    """Archive old / closed-job analyses and feedback
+
+    Args:
+        analysis_storage: JSONL or SQLite analysis store
+        job_storage: Job store (used to detect closed jobs)
+        feedback_store: FeedbackStore whose interactions.jsonl is trimmed
+        analysis_archive: Archive for analyses (see open_archives)
+        feedback_archive: Archive for feedback interactions
+        policy: What to archive
+        dry_run: Only count what would be archived
+
+    Returns:
+        Report with records archived, bytes reclaimed and full-scan times
+        of the hot stores before and after
+    """
+    cutoff = policy.cutoff()
+    closed_jobs = _closed_jobs(analysis_storage, job_storage) if policy.archive_closed_jobs else set()
+    analysis_ids = _analyses_to_archive(analysis_storage, cutoff, closed_jobs)
+
+    def feedback_selected(record: Dict) -> bool:
+        if cutoff and record.get('timestamp', '') < cutoff:
+            return True
+        if policy.archive_closed_jobs and record.get('job_id'):
+            if record['job_id'] in closed_jobs:
+                return True
+            if not job_storage.has_job(record['job_id']):
+                closed_jobs.add(record['job_id'])
+                return True
+        return False
+
+    report = {
+        "cutoff": cutoff,
+        "closed_jobs": len(closed_jobs),
+        "dry_run": dry_run,
+        "analyses": {
+            "selected": len(analysis_ids),
+            "bytes_before": analysis_storage.hot_bytes(),
+            "scan_ms_before": _timed_scan(analysis_storage.iter_analyses())
+        },
+        "feedback": {
+            "bytes_before": _file_bytes(feedback_store.jsonl_file),
+            "scan_ms_before": _timed_scan(_scan_jsonl(feedback_store.jsonl_file))
+        }
+    }
+
+    if dry_run:
+        report["feedback"]["selected"] = sum(
+            1 for record in _scan_jsonl(feedback_store.jsonl_file) if feedback_selected(record)
+        )
+        report["closed_jobs"] = len(closed_jobs)
+        return report
+
+    analyses = report["analyses"]
+    analyses["archived"] = analysis_storage.archive_analyses(analysis_ids, analysis_archive)
+    analyses["bytes_after"] = analysis_storage.hot_bytes()
+    analyses["scan_ms_after"] = _timed_scan(analysis_storage.iter_analyses())
+
+    feedback = report["feedback"]
+    feedback["archived"] = feedback_store.archive_interactions(feedback_selected, feedback_archive)
+    feedback["bytes_after"] = _file_bytes(feedback_store.jsonl_file)
+    feedback["scan_ms_after"] = _timed_scan(_scan_jsonl(feedback_store.jsonl_file))
+
+    for section in (analyses, feedback):
+        section["bytes_reclaimed"] = section["bytes_before"] - section["bytes_after"]
+    report["closed_jobs"] = len(closed_jobs)
+    report["archive"] = {
+        "analyses": analysis_archive.get_stats(),
+        "feedback": feedback_archive.get_stats()
+    }
+    return report
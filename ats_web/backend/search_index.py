@@ -0,0 +1,184 @@
+"""
+Full-Text Search Index
+Inverted index over job descriptions and resume texts using SQLite FTS5
+(BM25 ranking, boolean queries, snippets). Kept in its own database
+(data/search.db) so it works with either storage backend, and updated
+incrementally whenever a job or resume is stored or deleted.
+"""
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+
+SCHEMA = """
+-- Stable FTS rowid per (kind, key) so re-indexing a document is a rowid delete
+CREATE TABLE IF NOT EXISTS documents (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    company_name, role_name, job_description,
+    tokenize = 'porter unicode61'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS resumes_fts USING fts5(
+    candidate_name, original_filename, content,
+    tokenize = 'porter unicode61'
+);
+"""
+
+# kind -> (fts table, columns, BM25 column weights)
+TABLES = {
+    "job": ("jobs_fts", ("company_name", "role_name", "job_description"), (5.0, 5.0, 1.0)),
+    "resume": ("resumes_fts", ("candidate_name", "original_filename", "content"), (5.0, 1.0, 1.0)),
+}
+
+SNIPPET_TOKENS = 16
+
+
+class SearchIndex:
+    """Ranked full-text search over jobs and resumes"""
+
+    def __init__(self, db_path: str = "data/search.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _upsert(self, kind: str, key: str, values: Tuple):
+        table, columns, _ = TABLES[kind]
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO documents (kind, key) VALUES (?, ?)", (kind, key)
+                )
+                rowid = self.conn.execute(
+                    "SELECT rowid FROM documents WHERE kind = ? AND key = ?", (kind, key)
+                ).fetchone()[0]
+                self.conn.execute(f"DELETE FROM {table} WHERE rowid = ?", (rowid,))
+                self.conn.execute(
+                    f"INSERT INTO {table} (rowid, {', '.join(columns)}) VALUES (?, ?, ?, ?)",
+                    (rowid, *values)
+                )
+
+    def _remove(self, kind: str, key: str):
+        table = TABLES[kind][0]
+        with self.lock:
+            with self.conn:
+                row = self.conn.execute(
+                    "SELECT rowid FROM documents WHERE kind = ? AND key = ?", (kind, key)
+                ).fetchone()
+                if row is None:
+                    return
+                self.conn.execute(f"DELETE FROM {table} WHERE rowid = ?", (row[0],))
+                self.conn.execute("DELETE FROM documents WHERE rowid = ?", (row[0],))
+
+    def index_job(self, job: Dict):
+        """Add or re-index a job record"""
+        self._upsert("job", job['job_id'], (
+            job.get('company_name', ''), job.get('role_name', ''), job.get('job_description', '')
+        ))
+
+    def remove_job(self, job_id: str):
+        self._remove("job", job_id)
+
+    def index_resume(self, resume: Dict, resume_text: str):
+        """Add or re-index a resume record with its extracted text"""
+        self._upsert("resume", resume['resume_id'], (
+            resume.get('candidate_name', ''), resume.get('original_filename', ''), resume_text or ''
+        ))
+
+    def remove_resume(self, resume_id: str):
+        self._remove("resume", resume_id)
+
+    def keys(self, kind: str) -> Set[str]:
+        """All indexed keys of one kind"""
+        with self.lock:
+            rows = self.conn.execute("SELECT key FROM documents WHERE kind = ?", (kind,)).fetchall()
+        return {row[0] for row in rows}
+
+    def search(self, kind: str, query: str, limit: int = 20) -> List[Dict]:
+        """Ranked search
+
+        Args:
+            kind: "job" or "resume"
+            query: FTS5 query, e.g. 'kubernetes AND go', '"machine learning"', 'pyth*'
+            limit: Maximum number of results
+
+        Returns:
+            List of dicts with the document key, its indexed short fields,
+            a BM25 score (higher is better) and a highlighted snippet
+
+        Raises:
+            ValueError: If the query is not valid FTS5 syntax
+        """
+        table, columns, weights = TABLES[kind]
+        key_field = f"{kind}_id"
+        sql = f"""
+            SELECT d.key, {columns[0]}, {columns[1]},
+                   bm25({table}, {', '.join(str(w) for w in weights)}) AS rank,
+                   snippet({table}, 2, '<mark>', '</mark>', '...', {SNIPPET_TOKENS}) AS snippet
+            FROM {table} JOIN documents d ON d.rowid = {table}.rowid
+            WHERE {table} MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """
+        try:
+            with self.lock:
+                rows = self.conn.execute(sql, (query, max(1, int(limit)))).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query: {e}")
+        return [
+            {
+                key_field: row['key'],
+                columns[0]: row[columns[0]],
+                columns[1]: row[columns[1]],
+                "score": round(-row['rank'], 6),  # bm25() is lower-is-better
+                "snippet": row['snippet']
+            }
+            for row in rows
+        ]
+
+    def search_jobs(self, query: str, limit: int = 20) -> List[Dict]:
+        return self.search("job", query, limit)
+
+    def search_resumes(self, query: str, limit: int = 20) -> List[Dict]:
+        return self.search("resume", query, limit)
+
+    def sync(self, job_storage, resume_storage):
+        """Index any jobs/resumes missing from the index and drop stale ones
+
+        Cheap when nothing changed (compares key sets); used at startup so
+        records written before the index existed, or by another backend,
+        become searchable.
+        """
+        jobs = {job['job_id'] for job in job_storage.list_jobs(limit=job_storage.count_jobs() or 1)}
+        resumes = {r['resume_id']: r for r in resume_storage.list_resumes(limit=resume_storage.count_resumes() or 1)}
+
+        indexed_jobs, indexed_resumes = self.keys("job"), self.keys("resume")
+        for job_id in jobs - indexed_jobs:
+            job = job_storage.get_job(job_id)
+            if job:
+                self.index_job(job)
+        for job_id in indexed_jobs - jobs:
+            self.remove_job(job_id)
+        for resume_id in resumes.keys() - indexed_resumes:
+            self.index_resume(resumes[resume_id], resume_storage.get_resume_text(resume_id) or '')
+        for resume_id in indexed_resumes - resumes.keys():
+            self.remove_resume(resume_id)
+
+        added = len(jobs - indexed_jobs) + len(resumes.keys() - indexed_resumes)
+        if added:
+            print(f"✓ Search index: indexed {added} new documents")
@@ -0,0 +1,1083 @@
+"""
+SQLite Storage Backend
+Stores jobs, resumes and analyses in a single SQLite database (WAL mode)
+with primary keys and secondary indexes, so lookups are O(log n)
+instead of a full JSONL scan. The classes mirror the public API of
+JobStorage, ResumeStorage and AnalysisStorage and can be used in their place.
+"""
+import json
+import sqlite3
+import threading
+import uuid
+import hashlib
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from pagination import date_upper_bound, decode_cursor, encode_cursor
+from blob_store import SegmentBlobStore
+from materialized_stats import SCORE_BUCKETS
+from analysis_storage import default_candidate_id
+from archive_store import archive_in_batches
+from export_stream import EXPORT_PAGE_SIZE
+from leaderboard import METRICS, score_fields, validate_metric, MAX_TOP_K
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    company_name TEXT NOT NULL DEFAULT '',
+    role_name TEXT NOT NULL DEFAULT '',
+    job_description TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    analysis_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at, job_id);
+
+CREATE TABLE IF NOT EXISTS resumes (
+    resume_id TEXT PRIMARY KEY,
+    candidate_name TEXT NOT NULL DEFAULT '',
+    original_filename TEXT NOT NULL DEFAULT '',
+    pdf_path TEXT NOT NULL DEFAULT '',
+    text_path TEXT NOT NULL DEFAULT '',
+    uploaded_at TEXT NOT NULL,
+    file_size INTEGER NOT NULL DEFAULT 0,
+    text_length INTEGER NOT NULL DEFAULT 0,
+    pdf_blob TEXT,
+    text_blob TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_resumes_uploaded_at ON resumes (uploaded_at, resume_id);
+
+CREATE TABLE IF NOT EXISTS analyses (
+    analysis_id TEXT PRIMARY KEY,
+    candidate_id TEXT,
+    job_id TEXT NOT NULL,
+    resume_id TEXT NOT NULL,
+    candidate_name TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    overall_score REAL NOT NULL DEFAULT 0,
+    hiring_recommendation TEXT NOT NULL DEFAULT '',
+    analysis_result TEXT NOT NULL,
+    feedback_count INTEGER NOT NULL DEFAULT 0,
+    skill_match_score REAL NOT NULL DEFAULT 0,
+    experience_match_score REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_job_id ON analyses (job_id, created_at, analysis_id);
+CREATE INDEX IF NOT EXISTS idx_analyses_resume_id ON analyses (resume_id);
+CREATE INDEX IF NOT EXISTS idx_analyses_created_at ON analyses (created_at, analysis_id);
+CREATE INDEX IF NOT EXISTS idx_analyses_overall_score ON analyses (overall_score);
+
+-- Materialized statistics, maintained by triggers in the writing transaction
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_jobs_insert AFTER INSERT ON jobs BEGIN
+    INSERT INTO counters (name, value) VALUES ('jobs.total', 1)
+        ON CONFLICT(name) DO UPDATE SET value = value + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_jobs_delete AFTER DELETE ON jobs BEGIN
+    UPDATE counters SET value = value - 1 WHERE name = 'jobs.total';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_resumes_insert AFTER INSERT ON resumes BEGIN
+    INSERT INTO counters (name, value) VALUES ('resumes.total', 1)
+        ON CONFLICT(name) DO UPDATE SET value = value + 1;
+    INSERT INTO counters (name, value) VALUES ('resumes.total_file_size', NEW.file_size)
+        ON CONFLICT(name) DO UPDATE SET value = value + NEW.file_size;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_resumes_delete AFTER DELETE ON resumes BEGIN
+    UPDATE counters SET value = value - 1 WHERE name = 'resumes.total';
+    UPDATE counters SET value = value - OLD.file_size WHERE name = 'resumes.total_file_size';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_analyses_insert AFTER INSERT ON analyses BEGIN
+    INSERT INTO counters (name, value) VALUES
+        ('analyses.total', 1),
+        ('analyses.score_sum', NEW.overall_score),
+        ('score_histogram:' || MIN(MAX(CAST(NEW.overall_score / 10 AS INTEGER), 0), 9), 1),
+        ('by_recommendation:' || COALESCE(NULLIF(UPPER(TRIM(
+            CASE WHEN INSTR(NEW.hiring_recommendation, ' - ') > 0
+                 THEN SUBSTR(NEW.hiring_recommendation, 1, INSTR(NEW.hiring_recommendation, ' - ') - 1)
+                 ELSE NEW.hiring_recommendation END)), ''), 'UNKNOWN'), 1),
+        ('by_job:' || NEW.job_id, 1)
+        ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_analyses_delete AFTER DELETE ON analyses BEGIN
+    UPDATE counters SET value = value - 1 WHERE name IN (
+        'analyses.total',
+        'score_histogram:' || MIN(MAX(CAST(OLD.overall_score / 10 AS INTEGER), 0), 9),
+        'by_recommendation:' || COALESCE(NULLIF(UPPER(TRIM(
+            CASE WHEN INSTR(OLD.hiring_recommendation, ' - ') > 0
+                 THEN SUBSTR(OLD.hiring_recommendation, 1, INSTR(OLD.hiring_recommendation, ' - ') - 1)
+                 ELSE OLD.hiring_recommendation END)), ''), 'UNKNOWN'),
+        'by_job:' || OLD.job_id
+    );
+    UPDATE counters SET value = value - OLD.overall_score WHERE name = 'analyses.score_sum';
+END;
+"""
+
+
+def rank_order(metric: str) -> str:
+    """ORDER BY clause of a per-job ranking (same tie-breaking as JobLeaderboard)"""
+    primary = METRICS[metric]
+    scores = [primary] + [field for field in METRICS.values() if field != primary]
+    return ", ".join(f"{field} DESC" for field in scores) + ", created_at, analysis_id"
+
+
+def like_escape(text: str) -> str:
+    """Escape LIKE wildcards in user input, for use with ESCAPE '\\'"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class SQLiteDatabase:
+    """Shared SQLite connection used by all SQLite-backed stores"""
+
+    def __init__(self, db_path: str = "data/ats.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # INSERT OR REPLACE must fire the delete triggers to keep counters exact
+        self.conn.execute("PRAGMA recursive_triggers=ON")
+        self.conn.executescript(SCHEMA)
+        self._add_missing_columns("resumes", {"pdf_blob": "TEXT", "text_blob": "TEXT"})
+        if self._add_missing_columns("analyses", {"candidate_id": "TEXT"}):
+            self.conn.execute(
+                "UPDATE analyses SET candidate_id = candidate_name || '_' || created_at"
+            )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analyses_candidate_id ON analyses (candidate_id)"
+        )
+        if self._add_missing_columns("analyses", {
+            "skill_match_score": "REAL NOT NULL DEFAULT 0",
+            "experience_match_score": "REAL NOT NULL DEFAULT 0"
+        }):
+            self.conn.execute(
+                """UPDATE analyses SET
+                   skill_match_score = COALESCE(json_extract(analysis_result, '$.skill_match_score'), 0),
+                   experience_match_score = COALESCE(json_extract(analysis_result, '$.experience_match_score'), 0)"""
+            )
+        # Per-job rankings: top-K by any score is an index range scan of K rows
+        for metric in METRICS:
+            self.conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_analyses_rank_{metric} ON analyses "
+                f"(job_id, {rank_order(metric)})"
+            )
+        self.conn.commit()
+        if self.fetch_one("SELECT 1 FROM counters WHERE name = 'schema.counters'") is None:
+            self.rebuild_counters()
+
+    def _add_missing_columns(self, table: str, columns: Dict[str, str]) -> bool:
+        """Bring tables created by an older schema up to date
+
+        Returns:
+            True if any column was added
+        """
+        existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        added = False
+        for name, col_type in columns.items():
+            if name not in existing:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+                added = True
+        return added
+
+    def execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        """Execute a write statement in its own transaction"""
+        with self.lock:
+            with self.conn:
+                return self.conn.execute(sql, params)
+
+    def fetch_one(self, sql: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        """Run a query and return the first row"""
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def fetch_all(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """Run a query and return all rows"""
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def close(self):
+        """Close the underlying connection"""
+        with self.lock:
+            self.conn.close()
+
+    def fetch_page(self, table: str, columns: str, sort_col: str, key_col: str,
+                   where: List[str], params: List, cursor: Optional[str],
+                   date_from: Optional[str], date_to: Optional[str],
+                   limit: int) -> tuple:
+        """Keyset-paginate a table newest first
+
+        Returns:
+            (rows, next_cursor)
+        """
+        where, params = list(where), list(params)
+        position = decode_cursor(cursor)
+        if position:
+            where.append(f"({sort_col}, {key_col}) < (?, ?)")
+            params.extend(position)
+        if date_from:
+            where.append(f"{sort_col} >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append(f"{sort_col} <= ?")
+            params.append(date_upper_bound(date_to))
+        limit = max(1, int(limit))
+        sql = f"SELECT {columns} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {sort_col} DESC, {key_col} DESC LIMIT ?"
+        rows = self.fetch_all(sql, tuple(params) + (limit + 1,))
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, encode_cursor(rows[-1][sort_col], rows[-1][key_col])
+        return rows, None
+
+    def file_bytes(self) -> int:
+        """Size of the database file plus its write-ahead log"""
+        wal_file = self.db_path.with_name(self.db_path.name + "-wal")
+        return sum(p.stat().st_size for p in (self.db_path, wal_file) if p.exists())
+
+    def vacuum(self):
+        """Checkpoint the WAL and rebuild the file to release free pages"""
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.execute("VACUUM")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def version(self) -> str:
+        """Size and mtime of the database file and its write-ahead log
+
+        Every commit grows or rewrites one of them, and unlike the
+        connection's change counter they look the same from every worker.
+        """
+        wal_file = self.db_path.with_name(self.db_path.name + "-wal")
+        parts = []
+        for path in (self.db_path, wal_file):
+            try:
+                st = path.stat()
+                parts.append(f"{st.st_size}:{st.st_mtime_ns}")
+            except FileNotFoundError:
+                parts.append("-")
+        return "/".join(parts)
+
+    def count(self, table: str) -> int:
+        """Number of rows in a table (from the materialized counters)"""
+        return int(self.counter(f"{table}.total"))
+
+    def counter(self, name: str) -> float:
+        """Value of one materialized counter"""
+        row = self.fetch_one("SELECT value FROM counters WHERE name = ?", (name,))
+        return row[0] if row else 0
+
+    def counter_group(self, prefix: str) -> Dict[str, float]:
+        """All non-zero counters named "<prefix>:<key>", keyed by <key>"""
+        rows = self.fetch_all(
+            "SELECT name, value FROM counters WHERE name >= ? AND name < ? AND value != 0",
+            (f"{prefix}:", f"{prefix};")
+        )
+        return {row['name'][len(prefix) + 1:]: row['value'] for row in rows}
+
+    def rebuild_counters(self):
+        """Recompute every counter from the tables (one-off for existing databases)"""
+        with self.lock:
+            self.conn.executescript("""
+                BEGIN;
+                DELETE FROM counters WHERE name != 'analyses.epoch';
+                INSERT INTO counters (name, value)
+                    SELECT 'jobs.total', COUNT(*) FROM jobs;
+                INSERT INTO counters (name, value)
+                    SELECT 'resumes.total', COUNT(*) FROM resumes;
+                INSERT INTO counters (name, value)
+                    SELECT 'resumes.total_file_size', COALESCE(SUM(file_size), 0) FROM resumes;
+                INSERT INTO counters (name, value)
+                    SELECT 'analyses.total', COUNT(*) FROM analyses;
+                INSERT INTO counters (name, value)
+                    SELECT 'analyses.score_sum', COALESCE(SUM(overall_score), 0) FROM analyses;
+                INSERT INTO counters (name, value)
+                    SELECT 'score_histogram:' || MIN(MAX(CAST(overall_score / 10 AS INTEGER), 0), 9), COUNT(*)
+                    FROM analyses GROUP BY 1;
+                INSERT INTO counters (name, value)
+                    SELECT 'by_recommendation:' || COALESCE(NULLIF(UPPER(TRIM(
+                        CASE WHEN INSTR(hiring_recommendation, ' - ') > 0
+                             THEN SUBSTR(hiring_recommendation, 1, INSTR(hiring_recommendation, ' - ') - 1)
+                             ELSE hiring_recommendation END)), ''), 'UNKNOWN'), COUNT(*)
+                    FROM analyses GROUP BY 1;
+                INSERT INTO counters (name, value)
+                    SELECT 'by_job:' || job_id, COUNT(*) FROM analyses GROUP BY job_id;
+                INSERT INTO counters (name, value) VALUES ('schema.counters', 1);
+                COMMIT;
+            """)
+
+
+class SQLiteJobStorage:
+    """Store and manage job descriptions in SQLite"""
+
+    def __init__(self, db: SQLiteDatabase, search_index=None):
+        self.db = db
+        self.search_index = search_index
+
+    def _row_to_job(self, row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job['metadata'] = json.loads(job['metadata'] or '{}')
+        return job
+
+    def _row_to_summary(self, row: sqlite3.Row) -> Dict:
+        return {
+            "job_id": row['job_id'],
+            "company_name": row['company_name'],
+            "role_name": row['role_name'],
+            "created_at": row['created_at'],
+            "analysis_count": row['analysis_count'],
+            "description_preview": row['job_description'][:200] + "..."
+        }
+
+    def add_job(self, job_description: str, company_name: str = "",
+                role_name: str = "", metadata: Optional[Dict] = None) -> Dict:
+        """Add a new job description
+
+        Args:
+            job_description: The job description text
+            company_name: Company name
+            role_name: Role/position name
+            metadata: Additional metadata
+
+        Returns:
+            Dict with job_id and job details
+        """
+        job_record = {
+            "job_id": str(uuid.uuid4())[:8],
+            "company_name": company_name,
+            "role_name": role_name,
+            "job_description": job_description,
+            "created_at": datetime.now().isoformat(),
+            "metadata": metadata or {},
+            "analysis_count": 0
+        }
+        self.import_job(job_record)
+        if self.search_index:
+            self.search_index.index_job(job_record)
+        return job_record
+
+    def import_job(self, job_record: Dict):
+        """Insert (or replace) a complete job record, used by migrations"""
+        self.db.execute(
+            """INSERT OR REPLACE INTO jobs
+               (job_id, company_name, role_name, job_description, created_at, metadata, analysis_count)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (job_record['job_id'], job_record.get('company_name', ''),
+             job_record.get('role_name', ''), job_record.get('job_description', ''),
+             job_record['created_at'], json.dumps(job_record.get('metadata') or {}),
+             job_record.get('analysis_count', 0))
+        )
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Get a job by ID
+
+        Args:
+            job_id: The job ID
+
+        Returns:
+            Job record or None if not found
+        """
+        row = self.db.fetch_one("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+        return self._row_to_job(row) if row else None
+
+    def has_job(self, job_id: str) -> bool:
+        """Whether a job exists"""
+        return self.db.fetch_one("SELECT 1 FROM jobs WHERE job_id = ?", (job_id,)) is not None
+
+    def list_jobs(self, limit: int = 50) -> List[Dict]:
+        """List all jobs (most recent first)
+
+        Args:
+            limit: Maximum number of jobs to return
+
+        Returns:
+            List of job records (without full description)
+        """
+        return self.list_jobs_page(limit=limit)['items']
+
+    def list_jobs_page(self, limit: int = 50, cursor: Optional[str] = None,
+                       company: Optional[str] = None, role: Optional[str] = None,
+                       date_from: Optional[str] = None,
+                       date_to: Optional[str] = None) -> Dict:
+        """List one page of jobs (most recent first) with optional filters
+
+        See JobStorage.list_jobs_page for the filter semantics.
+        """
+        where, params = [], []
+        if company:
+            where.append("company_name LIKE ? ESCAPE '\\'")
+            params.append(f"%{like_escape(company)}%")
+        if role:
+            where.append("role_name LIKE ? ESCAPE '\\'")
+            params.append(f"%{like_escape(role)}%")
+        rows, next_cursor = self.db.fetch_page(
+            "jobs", "*", "created_at", "job_id", where, params,
+            cursor, date_from, date_to, limit
+        )
+        return {"items": [self._row_to_summary(row) for row in rows], "next_cursor": next_cursor}
+
+    def count_jobs(self) -> int:
+        """Total number of jobs"""
+        return self.db.count("jobs")
+
+    def version(self) -> str:
+        """Validator that changes whenever the database changes (same in every worker)"""
+        return self.db.version()
+
+    def get_stats(self) -> Dict:
+        """Job statistics from the materialized counters
+
+        Returns:
+            Dict with total and the most recent jobs
+        """
+        return {"total": self.count_jobs(), "recent": self.list_jobs(limit=5)}
+
+    def increment_analysis_count(self, job_id: str):
+        """Increment the analysis count for a job"""
+        self.db.execute(
+            "UPDATE jobs SET analysis_count = analysis_count + 1 WHERE job_id = ?",
+            (job_id,)
+        )
+
+    def search_jobs(self, query: str) -> List[Dict]:
+        """Search jobs by company or role name
+
+        Args:
+            query: Search query
+
+        Returns:
+            List of matching jobs
+        """
+        pattern = f"%{like_escape(query)}%"
+        rows = self.db.fetch_all(
+            """SELECT * FROM jobs
+               WHERE company_name LIKE ? ESCAPE '\\' OR role_name LIKE ? ESCAPE '\\'
+               ORDER BY created_at DESC""",
+            (pattern, pattern)
+        )
+        results = []
+        for row in rows:
+            summary = self._row_to_summary(row)
+            del summary['analysis_count']
+            results.append(summary)
+        return results
+
+    def delete_job(self, job_id: str) -> bool:
+        """Delete a job
+
+        Args:
+            job_id: The job ID
+
+        Returns:
+            True if deleted, False otherwise
+        """
+        cursor = self.db.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        if cursor.rowcount > 0 and self.search_index:
+            self.search_index.remove_job(job_id)
+        return cursor.rowcount > 0
+
+    def iter_jobs(self):
+        """Yield full job records in insertion order (for JSONL export)"""
+        for row in self.db.fetch_all("SELECT * FROM jobs ORDER BY created_at"):
+            yield self._row_to_job(row)
+
+
+class SQLiteResumeStorage:
+    """Store and manage uploaded resumes; metadata in SQLite, files on disk"""
+
+    def __init__(self, db: SQLiteDatabase, storage_dir: str = "data/resumes",
+                 search_index=None):
+        self.db = db
+        self.search_index = search_index
+        self.storage_dir = Path(storage_dir)
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.pdfs_dir = self.storage_dir / "pdfs"
+        self.pdfs_dir.mkdir(exist_ok=True)
+        self.texts_dir = self.storage_dir / "texts"
+        self.texts_dir.mkdir(exist_ok=True)
+        self.blobs = SegmentBlobStore(self.storage_dir / "blobs")
+
+    def _compute_hash(self, content: bytes) -> str:
+        """Compute SHA256 hash of content"""
+        return hashlib.sha256(content).hexdigest()[:16]
+
+    def save_resume(self, pdf_bytes: bytes, resume_text: str,
+                   filename: str, candidate_name: str = "") -> Dict:
+        """Save a resume (PDF and extracted text)
+
+        Args:
+            pdf_bytes: PDF file bytes
+            resume_text: Extracted text from PDF
+            filename: Original filename
+            candidate_name: Candidate name (optional)
+
+        Returns:
+            Dict with resume_id and details
+        """
+        resume_id = f"resume_{self._compute_hash(pdf_bytes)}"
+        previous = self.get_resume(resume_id)
+
+        resume_record = {
+            "resume_id": resume_id,
+            "candidate_name": candidate_name,
+            "original_filename": filename,
+            "pdf_blob": self.blobs.put(pdf_bytes),
+            "text_blob": self.blobs.put(resume_text.encode('utf-8')),
+            "uploaded_at": datetime.now().isoformat(),
+            "file_size": len(pdf_bytes),
+            "text_length": len(resume_text)
+        }
+        self.import_resume(resume_record)
+        if previous:
+            self._release_files(previous)
+        if self.search_index:
+            self.search_index.index_resume(resume_record, resume_text)
+        return resume_record
+
+    def import_resume(self, resume_record: Dict):
+        """Insert (or replace) a resume metadata record, used by migrations"""
+        self.db.execute(
+            """INSERT OR REPLACE INTO resumes
+               (resume_id, candidate_name, original_filename, pdf_path, text_path,
+                uploaded_at, file_size, text_length, pdf_blob, text_blob)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (resume_record['resume_id'], resume_record.get('candidate_name', ''),
+             resume_record.get('original_filename', ''), resume_record.get('pdf_path', ''),
+             resume_record.get('text_path', ''), resume_record['uploaded_at'],
+             resume_record.get('file_size', 0), resume_record.get('text_length', 0),
+             resume_record.get('pdf_blob'), resume_record.get('text_blob'))
+        )
+
+    def get_resume(self, resume_id: str) -> Optional[Dict]:
+        """Get resume metadata by ID
+
+        Args:
+            resume_id: The resume ID
+
+        Returns:
+            Resume record or None if not found
+        """
+        row = self.db.fetch_one("SELECT * FROM resumes WHERE resume_id = ?", (resume_id,))
+        return dict(row) if row else None
+
+    def get_resume_text(self, resume_id: str) -> Optional[str]:
+        """Get resume text by ID
+
+        Args:
+            resume_id: The resume ID
+
+        Returns:
+            Resume text or None if not found
+        """
+        resume = self.get_resume(resume_id)
+        if not resume:
+            return None
+
+        data = self._read_file(resume, 'text', self.texts_dir, '.txt')
+        return data.decode('utf-8') if data is not None else None
+
+    def get_resume_pdf(self, resume_id: str) -> Optional[bytes]:
+        """Get resume PDF bytes by ID
+
+        Args:
+            resume_id: The resume ID
+
+        Returns:
+            PDF bytes or None if not found
+        """
+        resume = self.get_resume(resume_id)
+        if not resume:
+            return None
+
+        return self._read_file(resume, 'pdf', self.pdfs_dir, '.pdf')
+
+    def _legacy_path(self, resume: Dict, kind: str, directory: Path, ext: str) -> Path:
+        """Location of a pre-blob-store file (paths may have been written on Windows)"""
+        path = Path((resume.get(f'{kind}_path') or '').replace('\\', '/'))
+        if path.name and path.exists():
+            return path
+        return directory / f"{resume['resume_id']}{ext}"
+
+    def _read_file(self, resume: Dict, kind: str, directory: Path, ext: str) -> Optional[bytes]:
+        """Read a resume's PDF or text from the blob store or its legacy file"""
+        if resume.get(f'{kind}_blob'):
+            return self.blobs.get(resume[f'{kind}_blob'])
+        try:
+            with open(self._legacy_path(resume, kind, directory, ext), 'rb') as f:
+                return f.read()
+        except:
+            return None
+
+    def _release_files(self, resume: Dict):
+        """Drop a record's blob references, or delete its legacy files"""
+        for kind, directory, ext in (('pdf', self.pdfs_dir, '.pdf'), ('text', self.texts_dir, '.txt')):
+            if resume.get(f'{kind}_blob'):
+                self.blobs.delete(resume[f'{kind}_blob'])
+            else:
+                path = self._legacy_path(resume, kind, directory, ext)
+                if path.exists():
+                    path.unlink()
+
+    def pack_legacy_files(self, delete_files: bool = False) -> int:
+        """Move resumes still stored as pdfs/*.pdf and texts/*.txt into the blob store
+
+        Args:
+            delete_files: Remove the original files once packed
+
+        Returns:
+            Number of resumes migrated
+        """
+        migrated = 0
+        for row in self.db.fetch_all("SELECT * FROM resumes WHERE pdf_blob IS NULL"):
+            resume = dict(row)
+            pdf_bytes = self._read_file(resume, 'pdf', self.pdfs_dir, '.pdf')
+            text_bytes = self._read_file(resume, 'text', self.texts_dir, '.txt')
+            if pdf_bytes is None:
+                print(f"  ! Skipping {resume['resume_id']}: PDF file not found")
+                continue
+
+            self.db.execute(
+                """UPDATE resumes SET pdf_blob = ?, text_blob = ?, pdf_path = '', text_path = ''
+                   WHERE resume_id = ?""",
+                (self.blobs.put(pdf_bytes), self.blobs.put(text_bytes or b''), resume['resume_id'])
+            )
+            if delete_files:
+                self._release_files(resume)
+            migrated += 1
+        return migrated
+
+    def list_resumes(self, limit: int = 50) -> List[Dict]:
+        """List all resumes (most recent first)
+
+        Args:
+            limit: Maximum number of resumes to return
+
+        Returns:
+            List of resume records
+        """
+        return self.list_resumes_page(limit=limit)['items']
+
+    def list_resumes_page(self, limit: int = 50, cursor: Optional[str] = None,
+                          candidate: Optional[str] = None,
+                          date_from: Optional[str] = None,
+                          date_to: Optional[str] = None) -> Dict:
+        """List one page of resumes (most recent first) with optional filters
+
+        See ResumeStorage.list_resumes_page for the filter semantics.
+        """
+        where, params = [], []
+        if candidate:
+            where.append("candidate_name LIKE ? ESCAPE '\\'")
+            params.append(f"%{like_escape(candidate)}%")
+        rows, next_cursor = self.db.fetch_page(
+            "resumes", "*", "uploaded_at", "resume_id", where, params,
+            cursor, date_from, date_to, limit
+        )
+        return {"items": [dict(row) for row in rows], "next_cursor": next_cursor}
+
+    def count_resumes(self) -> int:
+        """Total number of resumes"""
+        return self.db.count("resumes")
+
+    def version(self) -> str:
+        """Validator that changes whenever the database changes (same in every worker)"""
+        return self.db.version()
+
+    def get_stats(self) -> Dict:
+        """Resume statistics from the materialized counters
+
+        Returns:
+            Dict with total, total PDF bytes and the most recent resumes
+        """
+        return {
+            "total": self.count_resumes(),
+            "total_file_size": int(self.db.counter("resumes.total_file_size")),
+            "recent": self.list_resumes(limit=5)
+        }
+
+    def delete_resume(self, resume_id: str) -> bool:
+        """Delete a resume
+
+        Args:
+            resume_id: The resume ID
+
+        Returns:
+            True if deleted, False otherwise
+        """
+        resume = self.get_resume(resume_id)
+        if not resume:
+            return False
+
+        try:
+            self._release_files(resume)
+
+            self.db.execute("DELETE FROM resumes WHERE resume_id = ?", (resume_id,))
+            if self.search_index:
+                self.search_index.remove_resume(resume_id)
+            return True
+        except:
+            return False
+
+    def iter_resumes(self):
+        """Yield resume metadata records in upload order (for JSON export)"""
+        for row in self.db.fetch_all("SELECT * FROM resumes ORDER BY uploaded_at"):
+            yield dict(row)
+
+
+class SQLiteAnalysisStorage:
+    """Store and manage analysis results in SQLite"""
+
+    SUMMARY_COLUMNS = (
+        "analysis_id, job_id, resume_id, candidate_name, created_at, "
+        "overall_score, hiring_recommendation, feedback_count"
+    )
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def _row_to_analysis(self, row: sqlite3.Row) -> Dict:
+        analysis = dict(row)
+        analysis['analysis_result'] = json.loads(analysis['analysis_result'])
+        return analysis
+
+    def save_analysis(self, job_id: str, resume_id: str,
+                     analysis_result: Dict, candidate_name: str = "",
+                     candidate_id: str = "") -> Dict:
+        """Save an analysis result
+
+        Args:
+            job_id: The job ID this analysis is for
+            resume_id: The resume ID being analyzed
+            analysis_result: The analysis result from ATS service
+            candidate_name: Candidate name
+            candidate_id: Key the UI uses for this candidate (defaults to
+                "<candidate_name>_<created_at>")
+
+        Returns:
+            Dict with analysis_id and details
+        """
+        timestamp = datetime.now().isoformat()
+        analysis_record = {
+            "analysis_id": str(uuid.uuid4())[:12],
+            "candidate_id": candidate_id or default_candidate_id(candidate_name, timestamp),
+            "job_id": job_id,
+            "resume_id": resume_id,
+            "candidate_name": candidate_name,
+            "created_at": timestamp,
+            "overall_score": analysis_result.get('overall_score', 0),
+            "hiring_recommendation": analysis_result.get('hiring_recommendation', ''),
+            "analysis_result": analysis_result,
+            "feedback_count": 0
+        }
+        self.import_analysis(analysis_record)
+        return analysis_record
+
+    def import_analysis(self, analysis_record: Dict):
+        """Insert (or replace) a complete analysis record, used by migrations"""
+        scores = score_fields(analysis_record.get('analysis_result', {}))
+        self.db.execute(
+            """INSERT OR REPLACE INTO analyses
+               (analysis_id, candidate_id, job_id, resume_id, candidate_name, created_at,
+                overall_score, hiring_recommendation, analysis_result, feedback_count,
+                skill_match_score, experience_match_score)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (analysis_record['analysis_id'],
+             analysis_record.get('candidate_id') or default_candidate_id(
+                 analysis_record.get('candidate_name', ''), analysis_record['created_at']),
+             analysis_record.get('job_id', ''),
+             analysis_record.get('resume_id', ''), analysis_record.get('candidate_name', ''),
+             analysis_record['created_at'], analysis_record.get('overall_score', 0),
+             analysis_record.get('hiring_recommendation', ''),
+             json.dumps(analysis_record.get('analysis_result', {})),
+             analysis_record.get('feedback_count', 0),
+             scores['skill_match_score'], scores['experience_match_score'])
+        )
+
+    def get_analysis(self, analysis_id: str) -> Optional[Dict]:
+        """Get an analysis by ID
+
+        Args:
+            analysis_id: The analysis ID
+
+        Returns:
+            Analysis record or None if not found
+        """
+        row = self.db.fetch_one(
+            "SELECT * FROM analyses WHERE analysis_id = ?", (analysis_id,)
+        )
+        return self._row_to_analysis(row) if row else None
+
+    def find_candidate(self, candidate_id: str) -> Optional[Dict]:
+        """Resolve a UI candidate_id to its analysis and resume
+
+        Args:
+            candidate_id: The candidate key used by the UI
+
+        Returns:
+            Dict with analysis_id, resume_id and candidate_name, or None
+        """
+        row = self.db.fetch_one(
+            """SELECT analysis_id, resume_id, candidate_name FROM analyses
+               WHERE candidate_id = ? ORDER BY rowid DESC LIMIT 1""",
+            (candidate_id,)
+        )
+        return dict(row) if row else None
+
+    def tail_position(self) -> Tuple[int, int]:
+        """Highest rowid written so far, as a starting point for read_since"""
+        epoch = int(self.db.counter("analyses.epoch"))
+        return epoch, self.db.fetch_one("SELECT COALESCE(MAX(rowid), 0) FROM analyses")[0]
+
+    def read_since(self, position: Tuple[int, int]) -> Tuple[List[Dict], Tuple[int, int], bool]:
+        """Read analyses written after a position
+
+        Args:
+            position: (rewrite epoch, rowid) from tail_position() or a previous
+                read_since()
+
+        Returns:
+            Tuple of (new full analysis records in write order, new position,
+            rewritten). VACUUM renumbers rowids, so after an archive nothing
+            is read, the position moves to the current end and rewritten is
+            True: the caller should reload what it keeps.
+        """
+        epoch_then, rowid = position
+        if int(self.db.counter("analyses.epoch")) != epoch_then:
+            return [], self.tail_position(), True
+        rows = self.db.fetch_all(
+            "SELECT rowid AS _rowid, * FROM analyses WHERE rowid > ? ORDER BY rowid", (rowid,)
+        )
+        records = []
+        for row in rows:
+            rowid = row['_rowid']
+            record = self._row_to_analysis(row)
+            del record['_rowid']
+            records.append(record)
+        return records, (epoch_then, rowid), False
+
+    def list_analyses(self, job_id: Optional[str] = None,
+                     limit: int = 50) -> List[Dict]:
+        """List analyses (optionally filtered by job_id)
+
+        Args:
+            job_id: Optional job ID to filter by
+            limit: Maximum number of analyses to return
+
+        Returns:
+            List of analysis records (summary only)
+        """
+        return self.list_analyses_page(limit=limit, job_id=job_id)['items']
+
+    def list_analyses_page(self, limit: int = 50, cursor: Optional[str] = None,
+                           job_id: Optional[str] = None,
+                           resume_id: Optional[str] = None,
+                           min_score: Optional[float] = None,
+                           max_score: Optional[float] = None,
+                           recommendation: Optional[str] = None,
+                           company: Optional[str] = None,
+                           date_from: Optional[str] = None,
+                           date_to: Optional[str] = None) -> Dict:
+        """List one page of analyses (most recent first) with optional filters
+
+        See AnalysisStorage.list_analyses_page for the filter semantics.
+        """
+        where, params = [], []
+        if job_id:
+            where.append("job_id = ?")
+            params.append(job_id)
+        if resume_id:
+            where.append("resume_id = ?")
+            params.append(resume_id)
+        if min_score is not None:
+            where.append("overall_score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            where.append("overall_score <= ?")
+            params.append(max_score)
+        if recommendation:
+            where.append("hiring_recommendation LIKE ? ESCAPE '\\'")
+            params.append(f"{like_escape(recommendation)}%")
+        if company:
+            where.append("json_extract(analysis_result, '$.company_name') LIKE ? ESCAPE '\\'")
+            params.append(f"%{like_escape(company)}%")
+        rows, next_cursor = self.db.fetch_page(
+            "analyses", self.SUMMARY_COLUMNS, "created_at", "analysis_id", where, params,
+            cursor, date_from, date_to, limit
+        )
+        return {"items": [dict(row) for row in rows], "next_cursor": next_cursor}
+
+    def top_analyses(self, job_id: str, metric: str = "overall", k: int = 10,
+                     min_score: Optional[float] = None,
+                     max_score: Optional[float] = None) -> List[Dict]:
+        """Best analyses of a job, read from the ranking index
+
+        See AnalysisStorage.top_analyses.
+        """
+        column = METRICS[validate_metric(metric)]
+        where, params = ["job_id = ?"], [job_id]
+        if min_score is not None:
+            where.append(f"{column} >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            where.append(f"{column} <= ?")
+            params.append(max_score)
+        params.append(max(0, min(int(k), MAX_TOP_K)))
+        rows = self.db.fetch_all(
+            f"""SELECT {self.SUMMARY_COLUMNS}, skill_match_score, experience_match_score
+                FROM analyses INDEXED BY idx_analyses_rank_{metric}
+                WHERE {' AND '.join(where)}
+                ORDER BY {rank_order(metric)} LIMIT ?""",
+            tuple(params)
+        )
+        ranked = []
+        for row in rows:
+            analysis = dict(row)
+            analysis['rank'] = len(ranked) + 1
+            ranked.append(analysis)
+        return ranked
+
+    def count_analyses(self) -> int:
+        """Total number of analyses"""
+        return self.db.count("analyses")
+
+    def version(self) -> str:
+        """Validator that changes whenever the database changes (same in every worker)"""
+        return self.db.version()
+
+    def get_stats(self) -> Dict:
+        """Analysis statistics from the materialized counters
+
+        Returns:
+            Dict with total, average score, score and recommendation
+            histograms, per-job analysis counts and the most recent analyses
+        """
+        total = self.count_analyses()
+        histogram = self.db.counter_group("score_histogram")
+        return {
+            "total": total,
+            "average_score": round(self.db.counter("analyses.score_sum") / total, 2) if total else 0.0,
+            "score_histogram": {
+                bucket: int(histogram.get(str(i), 0)) for i, bucket in enumerate(SCORE_BUCKETS)
+            },
+            "by_recommendation": {k: int(v) for k, v in self.db.counter_group("by_recommendation").items()},
+            "by_job": {k: int(v) for k, v in self.db.counter_group("by_job").items()},
+            "recent": self.list_analyses(limit=5)
+        }
+
+    def increment_feedback_count(self, analysis_id: str):
+        """Increment the feedback count for an analysis"""
+        self.db.execute(
+            "UPDATE analyses SET feedback_count = feedback_count + 1 WHERE analysis_id = ?",
+            (analysis_id,)
+        )
+
+    def get_analyses_by_job(self, job_id: str) -> List[Dict]:
+        """Get all analyses for a specific job
+
+        Args:
+            job_id: The job ID
+
+        Returns:
+            List of analysis records
+        """
+        return self.list_analyses(job_id=job_id, limit=1000)
+
+    def delete_analysis(self, analysis_id: str) -> bool:
+        """Delete an analysis
+
+        Args:
+            analysis_id: The analysis ID
+
+        Returns:
+            True if deleted, False otherwise
+        """
+        cursor = self.db.execute(
+            "DELETE FROM analyses WHERE analysis_id = ?", (analysis_id,)
+        )
+        return cursor.rowcount > 0
+
+    def iter_analyses(self):
+        """Yield full analysis records in insertion order (for JSONL export)"""
+        for row in self.db.fetch_all("SELECT * FROM analyses ORDER BY created_at"):
+            yield self._row_to_analysis(row)
+
+    def iter_export(self, job_id: Optional[str] = None,
+                    date_from: Optional[str] = None, date_to: Optional[str] = None,
+                    min_score: Optional[float] = None, max_score: Optional[float] = None):
+        """Yield full analysis records, newest first, filtered (for exports)
+
+        Reads one keyset page at a time, so memory use does not grow with
+        the export and the connection is not held while rows are sent.
+        """
+        where, params = [], []
+        if job_id:
+            where.append("job_id = ?")
+            params.append(job_id)
+        if min_score is not None:
+            where.append("overall_score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            where.append("overall_score <= ?")
+            params.append(max_score)
+        cursor = None
+        while True:
+            rows, cursor = self.db.fetch_page(
+                "analyses", "*", "created_at", "analysis_id", where, params,
+                cursor, date_from, date_to, EXPORT_PAGE_SIZE
+            )
+            for row in rows:
+                yield self._row_to_analysis(row)
+            if cursor is None:
+                return
+
+    def hot_bytes(self) -> int:
+        """On-disk size of the database (shared with jobs and resumes)"""
+        return self.db.file_bytes()
+
+    def archive_analyses(self, analysis_ids: List[str], archive) -> int:
+        """Move analyses into a cold ArchiveStore and vacuum the database
+
+        Args:
+            analysis_ids: Analyses to archive
+            archive: Destination ArchiveStore
+
+        Returns:
+            Number of analyses archived
+        """
+        def records():
+            for analysis_id in analysis_ids:
+                record = self.get_analysis(analysis_id)
+                if record:
+                    yield record
+
+        def remove(batch: List[Dict]):
+            with self.db.lock:
+                with self.db.conn:
+                    self.db.conn.executemany(
+                        "DELETE FROM analyses WHERE analysis_id = ?",
+                        [(record['analysis_id'],) for record in batch]
+                    )
+
+        def bump_epoch():
+            with self.db.lock:
+                with self.db.conn:
+                    self.db.conn.execute(
+                        """INSERT INTO counters (name, value) VALUES ('analyses.epoch', 1)
+                           ON CONFLICT(name) DO UPDATE SET value = value + 1"""
+                    )
+
+        archived = archive_in_batches(records(), archive, remove)
+        if archived:
+            # Before and after, so a reader positioned during the vacuum starts over too
+            bump_epoch()
+            self.db.vacuum()
+            bump_epoch()
+        return archived
@@ -0,0 +1,77 @@
+"""
+Startup Timing
+Records how long each phase of server startup takes, both the blocking
+phases before uvicorn starts serving and the background warm-up that runs
+afterwards, and reports them at startup and via /api/debug/startup.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class StartupTimer:
+    """Wall-clock timings of named startup phases"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last_mark = self.started
+        self._lock = threading.Lock()
+        self.phases: List[Dict] = []
+        self.ready_after: Optional[float] = None
+        self.warmup_done_after: Optional[float] = None
+
+    def _record(self, name: str, seconds: float, background: bool):
+        with self._lock:
+            self.phases.append({
+                "phase": name,
+                "ms": round(seconds * 1000, 1),
+                "background": background
+            })
+
+    def mark(self, name: str):
+        """Close a blocking phase: time since the previous mark"""
+        now = time.perf_counter()
+        self._record(name, now - self._last_mark, False)
+        self._last_mark = now
+
+    @contextmanager
+    def phase(self, name: str, background: bool = True):
+        """Time a block (used by the background warm-up)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - start, background)
+
+    def mark_ready(self):
+        """The server is about to accept requests"""
+        self.ready_after = time.perf_counter() - self.started
+
+    def mark_warmup_done(self):
+        self.warmup_done_after = time.perf_counter() - self.started
+
+    def report(self) -> Dict:
+        with self._lock:
+            phases = list(self.phases)
+        return {
+            "ready_ms": round(self.ready_after * 1000, 1) if self.ready_after is not None else None,
+            "warmup_done_ms": round(self.warmup_done_after * 1000, 1)
+            if self.warmup_done_after is not None else None,
+            "phases": phases
+        }
+
+    def print_report(self, title: str = "Startup"):
+        report = self.report()
+        print(f"[STARTUP] {title} timings:")
+        for phase in report['phases']:
+            suffix = " (background)" if phase['background'] else ""
+            print(f"[STARTUP]   {phase['phase']:<24} {phase['ms']:>9.1f} ms{suffix}")
+        if report['ready_ms'] is not None:
+            print(f"[STARTUP]   {'ready to serve':<24} {report['ready_ms']:>9.1f} ms")
+        if report['warmup_done_ms'] is not None:
+            print(f"[STARTUP]   {'warm-up complete':<24} {report['warmup_done_ms']:>9.1f} ms")
+
+
+# Global instance, created as early as possible in main.py
+startup_timer = StartupTimer()
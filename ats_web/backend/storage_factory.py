@@ -0,0 +1,67 @@
+"""
+Storage Backend Factory
+Selects the storage engine for jobs, resumes and analyses.
+
+Set STORAGE_BACKEND=sqlite to use the indexed SQLite database
+(data/ats.db). The default, "jsonl", keeps the original file-based stores.
+Both can share a full-text SearchIndex (data/search.db).
+"""
+import os
+from typing import Tuple
+from job_storage import JobStorage
+from resume_storage import ResumeStorage
+from analysis_storage import AnalysisStorage
+
+
+STORAGE_BACKENDS = ("jsonl", "sqlite")
+
+
+def get_storage_backend() -> str:
+    """Return the configured storage backend name"""
+    backend = os.getenv("STORAGE_BACKEND", "jsonl").strip().lower()
+    if backend not in STORAGE_BACKENDS:
+        print(f"Warning: Unknown STORAGE_BACKEND '{backend}', falling back to jsonl")
+        return "jsonl"
+    return backend
+
+
+def create_search_index(data_dir: str = "data"):
+    """Open the full-text search index (SEARCH_DB_PATH, default data/search.db)"""
+    from search_index import SearchIndex
+    return SearchIndex(os.getenv("SEARCH_DB_PATH", f"{data_dir}/search.db"))
+
+
+def create_storages(backend: str = None, data_dir: str = "data",
+                    search_index=None) -> Tuple:
+    """Create the job, resume and analysis stores for a backend
+
+    Args:
+        backend: "jsonl" or "sqlite" (defaults to STORAGE_BACKEND)
+        data_dir: Root data directory
+        search_index: Optional SearchIndex kept up to date on job/resume writes
+            (call search_index.sync() to index records written without it)
+
+    Returns:
+        Tuple of (job_storage, resume_storage, analysis_storage)
+    """
+    backend = backend or get_storage_backend()
+
+    if backend == "sqlite":
+        from sqlite_storage import (
+            SQLiteDatabase, SQLiteJobStorage, SQLiteResumeStorage, SQLiteAnalysisStorage
+        )
+        db = SQLiteDatabase(os.getenv("SQLITE_DB_PATH", f"{data_dir}/ats.db"))
+        print(f"✓ Using SQLite storage backend: {db.db_path}")
+        stores = (
+            SQLiteJobStorage(db, search_index),
+            SQLiteResumeStorage(db, f"{data_dir}/resumes", search_index),
+            SQLiteAnalysisStorage(db),
+        )
+    else:
+        stores = (
+            JobStorage(f"{data_dir}/jobs", search_index),
+            ResumeStorage(f"{data_dir}/resumes", search_index),
+            AnalysisStorage(f"{data_dir}/analyses"),
+        )
+
+    return stores
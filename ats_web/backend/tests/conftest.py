@@ -0,0 +1,9 @@
+"""
+Shared fixtures for the backend unit tests
+Backend modules import each other by plain module name, so the backend
+directory goes on sys.path.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
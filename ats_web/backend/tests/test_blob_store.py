@@ -0,0 +1,60 @@
+"""Tests for the segment blob store"""
+import os
+
+from blob_store import SegmentBlobStore
+
+
+def test_round_trip_and_dedup(tmp_path):
+    store = SegmentBlobStore(tmp_path)
+    text = ("Senior Python developer. " * 200).encode()
+    pdf = os.urandom(5000)
+    text_digest = store.put(text)
+    pdf_digest = store.put(pdf)
+    assert store.put(text) == text_digest
+    assert store.get(text_digest) == text
+    assert store.get(pdf_digest) == pdf
+    assert store.size(text_digest) == len(text)
+    assert store.get_stats()["blobs"] == 2
+
+    assert store.delete(text_digest)
+    assert store.get(text_digest) == text  # one reference left
+    assert store.delete(text_digest)
+    assert store.get(text_digest) is None
+    assert not store.delete(text_digest)
+    store.close()
+
+
+def test_segments_roll_over_and_reopen(tmp_path):
+    store = SegmentBlobStore(tmp_path, segment_size=4096)
+    blobs = [os.urandom(1500) for _ in range(10)]
+    digests = [store.put(blob) for blob in blobs]
+    store.close()
+    assert len(list(tmp_path.glob("seg_*.dat"))) > 1
+
+    reopened = SegmentBlobStore(tmp_path, segment_size=4096)
+    assert [reopened.get(d) for d in digests] == blobs
+
+
+def test_rebuild_index_recovers_entries(tmp_path):
+    store = SegmentBlobStore(tmp_path)
+    digest = store.put(b"resume text " * 100)
+    store.index.delete(digest)
+    assert store.rebuild_index() == 1
+    assert store.get(digest) == b"resume text " * 100
+
+
+def test_two_instances_on_one_directory(tmp_path):
+    first = SegmentBlobStore(tmp_path, segment_size=64 * 1024)
+    second = SegmentBlobStore(tmp_path, segment_size=64 * 1024)
+    written = {}
+    for i in range(40):
+        for store in (first, second):
+            data = os.urandom(3000) if i % 2 else (f"text {i} {id(store)} " * 300).encode()
+            written[store.put(data)] = data
+    shared = first.put(b"same content")
+    assert second.put(b"same content") == shared
+    assert first.index.get(shared)["refs"] == 2
+
+    for store in (first, second):
+        for digest, data in written.items():
+            assert store.get(digest) == data
@@ -0,0 +1,72 @@
+"""Tests for the shared, quantized embedding matrix against exact search"""
+import numpy as np
+import pytest
+
+import embedding_matrix
+from embedding_matrix import SharedEmbeddingMatrix, build_matrix, maybe_build, search_rows
+
+DIM = 32
+
+
+def make_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = np.zeros(n, dtype=[("id", np.int64), ("vector", np.float32, (DIM,))])
+    rows["id"] = np.arange(n) + 1000
+    rows["vector"] = rng.normal(size=(n, DIM))
+    return rows
+
+
+def queries_near(rows, count=50, seed=1):
+    rng = np.random.default_rng(seed)
+    picked = rows["vector"][rng.choice(len(rows), count, replace=False)]
+    return (picked + rng.normal(0, 0.3, picked.shape)).astype(np.float32)
+
+
+def recall(matrix, rows, queries, k=10, **kwargs):
+    found = 0
+    for query in queries:
+        exact = {vector_id for vector_id, _ in search_rows(rows["id"], rows["vector"], query, k)}
+        found += len(exact & {vector_id for _, vector_id, _ in matrix.search(query, k, **kwargs)})
+    return found / (k * len(queries))
+
+
+@pytest.mark.parametrize("dtype, min_recall", [("float32", 1.0), ("float16", 0.99), ("int8", 0.95)])
+def test_quantized_search_matches_exact_search(tmp_path, dtype, min_recall):
+    rows = make_rows(500)
+    keys = [f"fb-{n}" for n in range(500)]
+    meta = build_matrix(tmp_path, rows, keys, dtype)
+    assert meta["count"] == 500 and meta["dtype"] == dtype and meta["nlist"] == 0
+
+    matrix = SharedEmbeddingMatrix(tmp_path)
+    queries = queries_near(rows)
+    assert recall(matrix, rows, queries) >= min_recall
+
+    # Keys, IDs and distances line up with the exact result
+    (key, vector_id, distance), = matrix.search(queries[0], k=1)
+    (exact_id, exact_distance), = search_rows(rows["id"], rows["vector"], queries[0], 1)
+    assert vector_id == exact_id and key == f"fb-{exact_id - 1000}"
+    assert distance == pytest.approx(exact_distance, rel=0.05)
+
+
+def test_clustered_int8_snapshot_matches_exact_search(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_matrix, "FAISS_PROMOTE_AT", 400)
+    rows = make_rows(900)
+    meta = build_matrix(tmp_path, rows, [str(n) for n in range(900)], "int8")
+    assert meta["nlist"] == 30
+
+    matrix = SharedEmbeddingMatrix(tmp_path)
+    queries = queries_near(rows)
+    assert recall(matrix, rows, queries, nprobe=meta["nlist"]) >= 0.95  # every cluster: exact scan
+    assert recall(matrix, rows, queries, k=1, nprobe=8) >= 0.9
+
+
+def test_new_snapshot_is_picked_up_by_refresh(tmp_path):
+    rows = make_rows(300)
+    build_matrix(tmp_path, rows[:100], [str(n) for n in range(100)], "int8")
+    matrix = SharedEmbeddingMatrix(tmp_path)
+    assert matrix.count == 100 and not matrix.refresh()
+
+    load = lambda: (rows, [str(n) for n in range(300)])
+    assert maybe_build(tmp_path, matrix, 105, load, min_new_rows=50) is None  # too few new rows
+    assert maybe_build(tmp_path, matrix, 300, load, min_new_rows=50)["count"] == 300
+    assert matrix.count == 300 and matrix.search(rows["vector"][250], k=1)[0][0] == "250"
@@ -0,0 +1,116 @@
+"""Tests for streamed CSV/NDJSON exports and their filters"""
+import csv
+import importlib
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+import analysis_storage as analysis_storage_module
+import export_stream
+from analysis_storage import AnalysisStorage
+from export_stream import FEEDBACK_COLUMNS, in_date_range, stream_export
+
+
+def _interaction(n, timestamp, rating, job_id=None):
+    return {"id": f"fb-{n}", "timestamp": timestamp, "query": f"Question {n}, \"quoted\"",
+            "response": "Réponse\nsur deux lignes", "job_id": job_id,
+            "feedback": {"rating": rating, "correct_points": ["a", "b"]}}
+
+
+def test_csv_export_is_sent_in_bounded_line_aligned_chunks(monkeypatch):
+    monkeypatch.setattr(export_stream, "EXPORT_CHUNK_BYTES", 256)
+    records = [_interaction(n, "2026-01-01T00:00:00", 4) for n in range(40)]
+    chunks = list(stream_export(iter(records), "csv", FEEDBACK_COLUMNS))
+
+    assert len(chunks) > 5
+    assert all(len(chunk) >= 256 for chunk in chunks[:-1])
+    assert all(chunk.endswith(b"\r\n") for chunk in chunks)  # no record is split
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert rows[0] == [header for header, _ in FEEDBACK_COLUMNS]
+    assert len(rows) == 41
+    assert rows[1][:4] == ["fb-0", "2026-01-01T00:00:00", "4", 'Question 0, "quoted"']
+    assert rows[1][4] == "Réponse\nsur deux lignes" and rows[1][5] == "a, b"
+
+
+def test_records_are_consumed_lazily(monkeypatch):
+    monkeypatch.setattr(export_stream, "EXPORT_CHUNK_BYTES", 100)
+    consumed = []
+
+    def records():
+        for n in range(1000):
+            consumed.append(n)
+            yield _interaction(n, "2026-01-01T00:00:00", 5)
+
+    chunks = stream_export(records(), "ndjson", FEEDBACK_COLUMNS)
+    assert not consumed  # nothing is read before streaming starts
+    first = next(chunks)
+    assert len(consumed) < 5
+    assert json.loads(first.splitlines()[0])["response"] == "Réponse\nsur deux lignes"
+
+
+def test_unknown_format_fails_before_streaming():
+    with pytest.raises(ValueError):
+        stream_export(iter(()), "xlsx", FEEDBACK_COLUMNS)
+
+
+def test_empty_csv_export_is_just_the_header():
+    assert list(stream_export(iter(()), "csv", FEEDBACK_COLUMNS)) == [
+        (",".join(header for header, _ in FEEDBACK_COLUMNS) + "\r\n").encode("utf-8")
+    ]
+
+
+def test_date_bounds_are_inclusive_of_the_whole_day():
+    assert in_date_range("2026-01-02T23:59:59", "2026-01-02", "2026-01-02")
+    assert not in_date_range("2026-01-01T23:59:59", "2026-01-02", None)
+    assert not in_date_range("2026-01-03T00:00:00", None, "2026-01-02")
+    assert in_date_range("2026-01-03T00:00:00", None, None)
+
+
+def test_feedback_export_filters_across_pages(tmp_path, monkeypatch):
+    # The module opens its default store in the working directory on import
+    monkeypatch.chdir(tmp_path)
+    feedback_module = importlib.import_module("feedback_store")
+    monkeypatch.setattr(feedback_module, "EXPORT_PAGE_SIZE", 3)
+    store = feedback_module.FeedbackStore(str(tmp_path / "db"))
+    store.embedding_model = None  # logs only
+    store.primary = "none"
+    store._loaded = True
+    store._store_batch([
+        _interaction(n, f"2026-01-{n + 1:02d}T12:00:00", rating=n % 5 + 1, job_id="j1" if n % 2 else "j2")
+        for n in range(10)
+    ])
+
+    def ids(**filters):
+        return [record["id"] for record in store.iter_feedback(**filters)]
+
+    assert ids() == [f"fb-{n}" for n in range(10)]
+    assert ids(date_from="2026-01-03", date_to="2026-01-05") == ["fb-2", "fb-3", "fb-4"]
+    assert ids(min_rating=4) == ["fb-3", "fb-4", "fb-8", "fb-9"]
+    assert ids(min_rating=2, max_rating=3, job_id="j1") == ["fb-1", "fb-7"]
+    assert ids(max_rating=1, date_from="2026-01-02") == ["fb-5"]
+    assert all("embedding_row" not in record for record in store.iter_feedback())
+
+
+def test_analysis_export_filters_by_date_and_score(tmp_path, monkeypatch):
+    monkeypatch.setattr(analysis_storage_module, "EXPORT_PAGE_SIZE", 2)
+    storage = AnalysisStorage(str(tmp_path / "analyses"))
+    for n, score in enumerate((30, 60, 90, 45, 75)):
+        created_at = f"2026-02-{n + 1:02d}T09:00:00"
+
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.fromisoformat(created_at)
+
+        monkeypatch.setattr(analysis_storage_module, "datetime", FrozenDatetime)
+        storage.save_analysis("j1" if n < 3 else "j2", f"r{n}", {"overall_score": score}, f"C{n}")
+
+    def names(**filters):
+        return [record["candidate_name"] for record in storage.iter_export(**filters)]
+
+    assert names() == ["C4", "C3", "C2", "C1", "C0"]  # newest first
+    assert names(date_from="2026-02-02", date_to="2026-02-04") == ["C3", "C2", "C1"]
+    assert names(min_score=45, max_score=75) == ["C4", "C3", "C1"]
+    assert names(job_id="j1", min_score=50) == ["C2", "C1"]
@@ -0,0 +1,147 @@
+"""Tests for the feedback FAISS index: journal replay after a crash, promotion"""
+import importlib
+import re
+import zlib
+
+import numpy as np
+import pytest
+
+from embedding_log import EmbeddingLog
+from vector_index import faiss_id, index_contents, index_type
+
+faiss = pytest.importorskip("faiss")
+
+DIM = 16
+
+
+class KeyEncoder:
+    """Same unit vector for every text that mentions the same fb-<n> key"""
+
+    def encode(self, texts):
+        single = isinstance(texts, str)
+        vectors = np.stack([self._vector(text) for text in ([texts] if single else texts)])
+        return vectors[0] if single else vectors
+
+    @staticmethod
+    def _vector(text):
+        key = re.search(r"fb-\d+", text.lower()).group()
+        vector = np.random.default_rng(zlib.crc32(key.encode())).normal(size=DIM)
+        return (vector / np.linalg.norm(vector)).astype(np.float32)
+
+
+@pytest.fixture
+def feedback_module(tmp_path, monkeypatch):
+    # The module opens its default store in the working directory on import
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module("feedback_store")
+    monkeypatch.setattr(module, "faiss", faiss)
+    monkeypatch.setattr(module, "FAISS_FLUSH_SECONDS", 3600)  # flushed explicitly below
+    return module
+
+
+def open_store(module, path):
+    store = module.FeedbackStore(str(path))
+    store.embedding_model = KeyEncoder()
+    store.embedding_dim = DIM
+    store.embeddings = EmbeddingLog(store.embeddings_file, DIM)
+    store.primary = "faiss"
+    store.replicas = []
+    store._loaded = True
+    store._init_faiss()
+    return store
+
+
+def store_records(store, numbers):
+    store._store_batch([
+        {"id": f"fb-{n}", "timestamp": "2026-01-01T00:00:00", "query": f"Question fb-{n}",
+         "response": "Answer", "feedback": {"rating": 4}}
+        for n in numbers
+    ])
+
+
+def faiss_ids_of(store):
+    return sorted(index_contents(store.faiss_index)[1].tolist())
+
+
+def expected_ids(numbers):
+    return sorted(faiss_id(f"fb-{n}") for n in numbers)
+
+
+def test_unflushed_inserts_are_replayed_from_the_journal(feedback_module, tmp_path):
+    store = open_store(feedback_module, tmp_path / "db")
+    store_records(store, range(3))
+    assert store.flush_faiss()
+    store_records(store, range(3, 5))  # the process dies before the next flush
+    assert store._faiss_pending == 2
+
+    recovered = open_store(feedback_module, tmp_path / "db")
+    assert faiss_ids_of(recovered) == expected_ids(range(5))
+    assert recovered.search_similar_faiss("fb-4", k=1)[0]["id"] == "fb-4"
+    assert not recovered._faiss_pending  # the recovered index was written back
+
+    # A third start finds everything in the index file and replays nothing
+    assert faiss_ids_of(open_store(feedback_module, tmp_path / "db")) == expected_ids(range(5))
+
+
+def test_index_written_without_its_state_is_not_duplicated(feedback_module, tmp_path):
+    store = open_store(feedback_module, tmp_path / "db")
+    store_records(store, range(3))
+    store.flush_faiss()
+    old_state = store.faiss_state_file.read_bytes()
+    store_records(store, range(3, 6))
+    store.flush_faiss()
+    # Crash between writing faiss_index.bin and faiss_state.json
+    store.faiss_state_file.write_bytes(old_state)
+
+    recovered = open_store(feedback_module, tmp_path / "db")
+    assert recovered.faiss_index.ntotal == 6
+    assert faiss_ids_of(recovered) == expected_ids(range(6))
+
+
+def test_unreadable_index_is_rebuilt_from_the_journal(feedback_module, tmp_path):
+    store = open_store(feedback_module, tmp_path / "db")
+    store_records(store, range(4))
+    store.flush_faiss()
+    store.faiss_index_file.write_bytes(b"torn write")
+
+    recovered = open_store(feedback_module, tmp_path / "db")
+    assert faiss_ids_of(recovered) == expected_ids(range(4))
+    assert recovered.search_similar_faiss("fb-2", k=1)[0]["id"] == "fb-2"
+
+
+def test_flat_index_is_promoted_past_the_threshold(feedback_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(feedback_module, "FAISS_PROMOTE_AT", 20)
+    monkeypatch.setattr(feedback_module, "FAISS_INDEX_TYPE", "hnsw")
+    store = open_store(feedback_module, tmp_path / "db")
+    store_records(store, range(19))
+    store._maybe_promote_faiss()
+    assert index_type(store.faiss_index) == "flat"
+
+    store_records(store, range(19, 21))
+    store._maybe_promote_faiss()
+    assert index_type(store.faiss_index) == "hnsw"
+    assert faiss_ids_of(store) == expected_ids(range(21))
+    assert store.search_similar_faiss("fb-20", k=1)[0]["id"] == "fb-20"
+
+    store.flush_faiss()
+    reopened = open_store(feedback_module, tmp_path / "db")
+    assert index_type(reopened.faiss_index) == "hnsw" and reopened.faiss_index.ntotal == 21
+    reopened._maybe_promote_faiss()  # already promoted: kept as is
+    assert index_type(reopened.faiss_index) == "hnsw"
+
+
+def test_inserts_during_promotion_are_kept(feedback_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(feedback_module, "FAISS_PROMOTE_AT", 30)
+    monkeypatch.setattr(feedback_module, "FAISS_INDEX_TYPE", "ivf")
+    store = open_store(feedback_module, tmp_path / "db")
+    store_records(store, range(30))
+    build_index = feedback_module.build_index
+
+    def build_while_inserting(*args):
+        store_records(store, [99])  # lands in the old index while the new one trains
+        return build_index(*args)
+
+    monkeypatch.setattr(feedback_module, "build_index", build_while_inserting)
+    store._maybe_promote_faiss()
+    assert index_type(store.faiss_index) == "ivf"
+    assert faiss_ids_of(store) == expected_ids([*range(30), 99])
@@ -0,0 +1,201 @@
+"""Tests for the feedback ingest queue (submit -> background batch -> logs)"""
+import importlib
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from archive_store import ArchiveStore
+from embedding_log import EmbeddingLog
+
+
+class FakeEncoder:
+    """Deterministic stand-in for the embedding service"""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def encode(self, texts):
+        self.calls += 1
+        if self.fail_on and any(self.fail_on in text for text in texts):
+            raise RuntimeError("cannot embed")
+        vectors = np.zeros((len(texts), 384), dtype=np.float32)
+        for i, text in enumerate(texts):
+            vectors[i, hash(text) % 384] = 1.0
+        return vectors
+
+
+@pytest.fixture
+def feedback_module(tmp_path, monkeypatch):
+    # The module opens its default store in the working directory on import
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module("feedback_store")
+    monkeypatch.setattr(module, "FEEDBACK_INGEST_LINGER", 0)
+    return module
+
+
+def open_store(module, path, encoder=None):
+    store = module.FeedbackStore(str(path))
+    store.embedding_model = encoder or FakeEncoder()
+    store.embedding_dim = 384
+    store.embeddings = EmbeddingLog(store.embeddings_file, 384)
+    store.primary = "none"  # logs only: no vector index to load
+    store._loaded = True
+    return store
+
+
+def submit(store, n, query="How many years of Python?"):
+    return store.submit_feedback(f"fb-{n}", f"{query} #{n}", [], "Five years", 4, [], [], [], "Five years")
+
+
+def test_submit_then_drain_stores_records(feedback_module, tmp_path):
+    store = open_store(feedback_module, tmp_path / "db")
+    store._start_ingest_worker = lambda: None  # drained explicitly below
+    for n in range(10):
+        submit(store, n)
+    assert store.queue_status()["pending"] == 10
+
+    assert store.drain_queue() == 10
+    assert all(store.records.get(f"fb-{n}") for n in range(10))
+    assert store.queue_file.stat().st_size == 0
+    assert store.queue_status()["pending"] == 0
+
+
+def test_replayed_records_are_not_stored_twice(feedback_module, tmp_path):
+    store = open_store(feedback_module, tmp_path / "db")
+    store._start_ingest_worker = lambda: None
+    record = submit(store, 1)
+    store.drain_queue()
+    # Crash between storing a batch and recording the queue position
+    with open(store.queue_file, 'ab') as f:
+        f.write((feedback_module.json.dumps(record) + '\n').encode())
+    store.drain_queue()
+    assert len(store.records) == 1
+
+
+def test_failing_record_moves_to_dead_letter(feedback_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(feedback_module, "FEEDBACK_INGEST_MAX_ATTEMPTS", 3)
+    store = open_store(feedback_module, tmp_path / "db", FakeEncoder(fail_on="poison"))
+    store._start_ingest_worker = lambda: None
+    submit(store, 1)
+    submit(store, 2, query="poison")
+    submit(store, 3)
+
+    for _ in range(3):
+        store._ingest_batch()
+    assert store.records.get("fb-1") and store.records.get("fb-3")
+    assert store.records.get("fb-2") is None
+    dead = [feedback_module.json.loads(line) for line in open(store.dead_letter_file)]
+    assert [entry["record"]["id"] for entry in dead] == ["fb-2"]
+    assert store.queue_status()["pending"] == 0
+
+
+def test_two_instances_share_one_queue(feedback_module, tmp_path):
+    first = open_store(feedback_module, tmp_path / "db")
+    second = open_store(feedback_module, tmp_path / "db")
+    for store in (first, second):
+        store._start_ingest_worker = lambda: None
+
+    submit(first, 1)
+    second.drain_queue()  # stores fb-1 and empties the queue
+    submit(first, 2)
+    first.drain_queue()
+    assert first.records.get("fb-1") and first.records.get("fb-2")
+
+    def submit_many(store, start):
+        for n in range(start, start + 50):
+            submit(store, n)
+
+    threads = [threading.Thread(target=submit_many, args=(store, start))
+               for store, start in ((first, 100), (second, 200))]
+    threads += [threading.Thread(target=store.drain_queue) for store in (first, second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    first.drain_queue()
+    second.drain_queue()
+
+    ids = [f"fb-{n}" for n in [*range(100, 150), *range(200, 250)]]
+    assert all(second.records.get(key) for key in ids)
+    assert sum(1 for _ in open(first.jsonl_file)) == 102
+
+
+def test_statistics_do_not_load_backends(feedback_module, tmp_path):
+    store = feedback_module.FeedbackStore(str(tmp_path / "db"))
+    store._ensure_loaded = lambda: pytest.fail("statistics loaded the backends")
+    stats = store.get_statistics()
+    assert stats["total_feedback"] == 0
+    assert stats["backends_loaded"] is False
+    assert stats["ingest_queue"] == {"pending_bytes": 0, "lag_seconds": 0.0}
+
+
+def test_statistics_catch_up_with_other_workers(feedback_module, tmp_path):
+    first = open_store(feedback_module, tmp_path / "db")
+    second = open_store(feedback_module, tmp_path / "db")
+    first._start_ingest_worker = lambda: None
+    assert second.get_statistics()["total_feedback"] == 0
+
+    submit(first, 1)
+    submit(first, 2)
+    stats = second.get_statistics()
+    assert stats["ingest_queue"]["pending_bytes"] > 0
+    assert stats["ingest_queue"]["lag_seconds"] >= 0
+
+    first.drain_queue()
+    stats = second.get_statistics()
+    assert stats["total_feedback"] == 2 and stats["average_rating"] == 4.0
+    assert [r["id"] for r in stats["recent"]] == ["fb-2", "fb-1"]
+    assert stats["ingest_queue"]["pending_bytes"] == 0
+
+
+def test_high_quality_samples_come_from_the_log(feedback_module, tmp_path):
+    store = open_store(feedback_module, tmp_path / "db")
+    records = [_interaction(f"fb-{n}", "2026-01-01T00:00:00") for n in range(6)]
+    for record, rating in zip(records, (5, 2, 4, 3, 5, 4)):
+        record["feedback"]["rating"] = rating
+    store._store_batch(records)
+
+    # No vector backend is loaded: the samples are read from interactions.jsonl
+    samples = store.get_high_quality_samples(min_rating=4, limit=3)
+    assert [s["id"] for s in samples] == ["fb-0", "fb-2", "fb-4"]
+    assert samples[0]["query"] == "Question fb-0" and "embedding_row" not in samples[0]
+    assert len(store.get_high_quality_samples(min_rating=5)) == 2
+    assert store.get_high_quality_samples(limit=0) == []
+
+
+def _interaction(interaction_id, timestamp):
+    return {"id": interaction_id, "timestamp": timestamp, "query": f"Question {interaction_id}",
+            "response": "Answer", "feedback": {"rating": 4}}
+
+
+def test_append_from_another_instance_during_archiving_is_kept(feedback_module, tmp_path):
+    first = open_store(feedback_module, tmp_path / "db")
+    second = open_store(feedback_module, tmp_path / "db")
+    first._store_batch([_interaction(f"old-{n}", "2020-01-01T00:00:00") for n in range(3)])
+    first._store_batch([_interaction("kept", "2026-01-01T00:00:00")])
+
+    appender = threading.Thread(
+        target=second._store_batch, args=([_interaction("late", "2026-01-02T00:00:00")],)
+    )
+    blocked = []
+
+    def select(record):
+        if not appender.is_alive() and not blocked:
+            appender.start()
+            appender.join(timeout=0.3)
+            blocked.append(appender.is_alive())
+        return record["id"].startswith("old-")
+
+    archive = ArchiveStore(str(tmp_path / "archive"), "feedback", "id", [], "timestamp")
+    assert first.archive_interactions(select, archive) == 3
+    appender.join()
+
+    assert blocked == [True]  # the append waited for the rewrite
+    ids = [json.loads(line)["id"] for line in open(first.jsonl_file)]
+    assert ids == ["kept", "late"]
+    assert second.records.get("late") and first.records.get("late")
+    assert first.records.get("old-0") is None and archive.get("old-0")
+    assert second.get_statistics()["total_feedback"] == 5  # archived feedback stays counted
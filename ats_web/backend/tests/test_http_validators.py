@@ -0,0 +1,14 @@
+"""Tests that store versions used as ETag validators agree between workers"""
+from sqlite_storage import SQLiteDatabase, SQLiteJobStorage
+
+
+def test_sqlite_version_is_shared_between_connections(tmp_path):
+    first = SQLiteJobStorage(SQLiteDatabase(str(tmp_path / "ats.db")))
+    second = SQLiteJobStorage(SQLiteDatabase(str(tmp_path / "ats.db")))
+    first.add_job("Build data pipelines", "Acme", "Data Engineer")
+    assert first.version() == second.version()
+
+    before = first.version()
+    second.add_job("Ship web apps", "Initech", "Frontend Engineer")
+    assert first.version() != before
+    assert first.version() == second.version()
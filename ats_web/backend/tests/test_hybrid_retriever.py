@@ -0,0 +1,117 @@
+"""Tests for hybrid RAG retrieval (FTS queries, rank fusion, lexical index sync)"""
+import pytest
+
+from hybrid_retriever import FeedbackLexicalIndex, fts_query, reciprocal_rank_fusion
+
+
+class FakeFeedbackLog:
+    """interactions.jsonl stand-in: read_since() over an in-memory list"""
+
+    def __init__(self):
+        self.epoch = 1
+        self.records = []
+
+    def add(self, interaction_id, query, rating=5):
+        self.records.append({"id": interaction_id, "query": query, "feedback": {"rating": rating}})
+
+    def rewrite(self, keep):
+        self.records = [r for r in self.records if r["id"] in keep]
+        self.epoch += 1
+
+    def read_since(self, position):
+        if position is None or position[0] != self.epoch:
+            offset, rewritten = 0, position is not None
+        else:
+            offset, rewritten = position[1], False
+        return self.records[offset:], (self.epoch, len(self.records)), rewritten
+
+
+def test_fts_query_quotes_unique_lowercase_words():
+    assert fts_query("Python, python AND SQL?") == '"python" OR "and" OR "sql"'
+    assert fts_query("  ?! ") is None
+
+
+def test_fts_query_quotes_fts_operators():
+    # Words like NEAR/NOT are searched for, not interpreted
+    assert fts_query("NOT near") == '"not" OR "near"'
+
+
+def test_rrf_sums_reciprocal_ranks():
+    fused = dict(reciprocal_rank_fusion([["a", "b"], ["b", "c"]], k=60))
+    assert fused["a"] == pytest.approx(1 / 61)
+    assert fused["b"] == pytest.approx(1 / 62 + 1 / 61)
+    assert fused["c"] == pytest.approx(1 / 62)
+
+
+def test_rrf_ranks_agreement_first():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["d", "b", "e"]])
+    keys = [key for key, _ in fused]
+    assert keys[0] == "b"  # second in both lists beats first in one
+    assert set(keys[1:3]) == {"a", "d"}
+    assert set(keys[3:]) == {"c", "e"}
+
+
+def test_rrf_k_controls_weight_of_top_ranks():
+    # With a small k a single first place outweighs two middling ranks
+    rankings = [["x", "y"], ["z", "w", "y"]]
+    assert reciprocal_rank_fusion(rankings, k=60)[0][0] == "y"
+    assert reciprocal_rank_fusion(rankings, k=0)[0][0] == "x"
+
+
+def test_rrf_of_nothing_is_empty():
+    assert reciprocal_rank_fusion([[], []]) == []
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = FeedbackLexicalIndex(tmp_path / "fts.db")
+    yield index
+    index.close()
+
+
+def test_lexical_index_syncs_incrementally(index):
+    log = FakeFeedbackLog()
+    log.add("i1", "Does the candidate know Python?")
+    log.add("i2", "How many years of Java experience?")
+    assert index.sync(log) == 2
+    assert index.sync(log) == 0
+
+    log.add("i3", "Python and Django projects", rating=2)
+    assert index.sync(log) == 1
+    assert {key for key, _ in index.search("python")} == {"i1", "i3"}
+    assert [key for key, _ in index.search("python", min_rating=4)] == ["i1"]
+    assert index.search("?!") == []
+
+
+def test_lexical_index_reindexes_after_rewrite(index):
+    log = FakeFeedbackLog()
+    for n in range(3):
+        log.add(f"i{n}", f"question {n} about kubernetes")
+    index.sync(log)
+
+    log.rewrite(keep={"i2"})
+    index.sync(log)
+    assert index.count() == 1
+    assert [key for key, _ in index.search("kubernetes")] == ["i2"]
+
+
+def test_lexical_index_position_survives_reopen(tmp_path):
+    log = FakeFeedbackLog()
+    log.add("i1", "react frontend")
+    first = FeedbackLexicalIndex(tmp_path / "fts.db")
+    first.sync(log)
+    first.close()
+
+    log.add("i2", "react native")
+    second = FeedbackLexicalIndex(tmp_path / "fts.db")
+    assert second.sync(log) == 1
+    assert second.count() == 2
+    second.close()
+
+
+def test_lexical_index_skips_records_without_rating(index):
+    log = FakeFeedbackLog()
+    log.records.append({"id": "bad", "query": "no feedback"})
+    log.add("ok", "has feedback")
+    index.sync(log)
+    assert [key for key, _ in index.search("feedback")] == ["ok"]
@@ -0,0 +1,114 @@
+"""Tests for IndexLog replay, compaction and sharing between processes"""
+import json
+import multiprocessing
+
+from index_log import IndexLog
+
+
+def test_replay_after_reopen(tmp_path):
+    index = IndexLog(tmp_path / "index.json")
+    index.set("a", {"n": 1})
+    index.set("b", {"n": 2})
+    index.increment("a", "n", 5)
+    index.delete("b")
+    index.close()
+
+    reopened = IndexLog(tmp_path / "index.json")
+    assert reopened.as_dict() == {"a": {"n": 6}}
+
+
+def test_torn_final_line_is_ignored_and_cut(tmp_path):
+    index = IndexLog(tmp_path / "index.json")
+    index.set("a", {"n": 1})
+    index.close()
+    with open(tmp_path / "index.log", 'ab') as f:
+        f.write(b'{"op": "set", "key": "b", "val')
+
+    reopened = IndexLog(tmp_path / "index.json")
+    assert "b" not in reopened
+    reopened.set("c", {"n": 3})
+    reopened.close()
+    assert IndexLog(tmp_path / "index.json").as_dict() == {"a": {"n": 1}, "c": {"n": 3}}
+
+
+def test_compaction_folds_log_into_snapshot(tmp_path):
+    index = IndexLog(tmp_path / "index.json", compact_threshold=10)
+    for i in range(25):
+        index.set(f"k{i}", {"i": i})
+    index.compact()
+    index.close()
+
+    assert not (tmp_path / "index.log.compacting").exists()
+    with open(tmp_path / "index.json") as f:
+        assert len(json.load(f)) == 25
+    assert len(IndexLog(tmp_path / "index.json")) == 25
+
+
+def test_leftover_compacting_log_is_recovered(tmp_path):
+    index = IndexLog(tmp_path / "index.json")
+    index.set("a", {"n": 1})
+    index.close()
+    (tmp_path / "index.log").rename(tmp_path / "index.log.compacting")
+
+    reopened = IndexLog(tmp_path / "index.json")
+    assert reopened.get("a") == {"n": 1}
+    assert not (tmp_path / "index.log.compacting").exists()
+
+
+def test_two_instances_see_each_others_writes(tmp_path):
+    first = IndexLog(tmp_path / "index.json", compact_threshold=5)
+    second = IndexLog(tmp_path / "index.json", compact_threshold=5)
+    for i in range(12):
+        first.set(f"a{i}", {"i": i})
+        second.set(f"b{i}", {"i": i})
+    first.increment("b0", "i", 10)
+    second.delete("a0")
+    first.compact()
+
+    expected = {**{f"a{i}": {"i": i} for i in range(1, 12)},
+                **{f"b{i}": {"i": i} for i in range(12)}, "b0": {"i": 10}}
+    assert first.as_dict() == expected
+    assert second.as_dict() == expected
+    assert second.generation > 0
+    first.close()
+    second.close()
+    assert IndexLog(tmp_path / "index.json").as_dict() == expected
+
+
+
+def test_signature_is_shared_and_tracks_changes(tmp_path):
+    first = IndexLog(tmp_path / "index.json", compact_threshold=5)
+    second = IndexLog(tmp_path / "index.json", compact_threshold=5)
+    first.set("a", {"n": 1})
+    assert first.signature() == second.signature()
+
+    before = second.signature()
+    first.increment("a", "n")
+    assert second.signature() != before
+    assert first.signature() == second.signature()
+
+    for i in range(10):
+        second.set(f"k{i}", {"i": i})
+    second.compact()
+    assert first.signature() == second.signature()
+    first.close()
+    second.close()
+
+def _writer(path, prefix, count):
+    index = IndexLog(path, compact_threshold=20)
+    for i in range(count):
+        index.set(f"{prefix}{i}", {"i": i})
+    index.close()
+
+
+def test_concurrent_processes_lose_no_entries(tmp_path):
+    path = tmp_path / "index.json"
+    workers = [multiprocessing.Process(target=_writer, args=(path, f"w{n}-", 200)) for n in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    index = IndexLog(path)
+    assert len(index) == 800
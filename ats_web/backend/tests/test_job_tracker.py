@@ -0,0 +1,99 @@
+"""Tests for the indexed job application tracker"""
+import threading
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+import job_tracker
+from job_tracker import HEADERS, JobTracker, normalize_key
+
+
+@pytest.fixture(autouse=True)
+def no_export_delay(monkeypatch):
+    monkeypatch.setattr(job_tracker, "EXPORT_DELAY", 0)
+
+
+def test_normalize_key_ignores_case_and_outer_whitespace():
+    assert normalize_key("  Acme Corp ", "Data ENGINEER") == ("acme corp", "data engineer")
+    assert normalize_key(None, None) == ("", "")
+
+
+def test_duplicate_detection(tmp_path):
+    tracker = JobTracker(str(tmp_path / "jobs.xlsx"))
+    tracker.add_job_application("Acme", "Data Engineer")
+    assert tracker.check_if_applied(" acme", "data engineer ")
+    assert not tracker.check_if_applied("Acme", "Data Scientist")
+
+
+def test_counters_and_duplicates_across_instances(tmp_path):
+    first = JobTracker(str(tmp_path / "jobs.xlsx"))
+    second = JobTracker(str(tmp_path / "jobs.xlsx"))
+    first.add_job_application("Acme", "Engineer", portal="LinkedIn")
+    result = second.add_job_application("Beta", "Engineer", portal="Indeed", employment_type="Contract")
+    assert result["total_applications"] == 2
+
+    assert first.get_application_count() == 2
+    assert first.check_if_applied("beta", "engineer")
+    stats = JobTracker(str(tmp_path / "jobs.xlsx")).get_statistics()
+    assert stats["total"] == 2 and stats["recent_7_days"] == 2
+    assert stats["by_portal"] == {"LinkedIn": 1, "Indeed": 1}
+    assert stats["by_type"] == {"Full Time": 1, "Contract": 1}
+    assert [a["company"] for a in first.get_recent_applications()] == ["Beta", "Acme"]
+
+
+def test_existing_sheet_is_imported_once(tmp_path):
+    excel_path = tmp_path / "jobs.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.append(HEADERS)
+    ws.append(["Acme", "Engineer", "LinkedIn", "Full Time", datetime(2025, 3, 1)])
+    ws.append(["Beta", "Analyst", "Indeed", "Part Time", "2025-03-02"])
+    ws.append([None, None, None, None, None])
+    wb.save(excel_path)
+
+    tracker = JobTracker(str(excel_path))
+    assert tracker.get_application_count() == 2
+    assert tracker.check_if_applied("ACME", "engineer")
+    assert [a["date"] for a in tracker.get_recent_applications()] == ["2025-03-02", "2025-03-01"]
+    assert tracker.get_statistics()["by_type"] == {"Full Time": 1, "Part Time": 1}
+
+    # Reopening uses the store, not the sheet
+    tracker.add_job_application("Gamma", "Engineer")
+    tracker.export_excel()
+    assert JobTracker(str(excel_path)).get_application_count() == 3
+
+
+def test_export_writes_all_applications_oldest_first(tmp_path):
+    excel_path = tmp_path / "jobs.xlsx"
+    tracker = JobTracker(str(excel_path))
+    for company in ("Acme", "Beta"):
+        tracker.add_job_application(company, "Engineer")
+    tracker.export_excel()
+
+    rows = list(load_workbook(excel_path, read_only=True).active.iter_rows(values_only=True))
+    assert list(rows[0]) == HEADERS
+    assert [row[0] for row in rows[1:]] == ["Acme", "Beta"]
+
+
+def test_concurrent_exports_do_not_collide(tmp_path):
+    excel_path = tmp_path / "jobs.xlsx"
+    trackers = [JobTracker(str(excel_path)) for _ in range(2)]
+    trackers[0].add_job_application("Acme", "Engineer")
+    errors = []
+
+    def export(tracker):
+        try:
+            for _ in range(5):
+                tracker.export_excel()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=export, args=(tracker,)) for tracker in trackers * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    rows = list(load_workbook(excel_path, read_only=True).active.iter_rows(values_only=True))
+    assert [row[0] for row in rows[1:]] == ["Acme"]
@@ -0,0 +1,82 @@
+"""Tests for JsonlOffsetIndex lookups, rewrites and sharing between processes"""
+import json
+import multiprocessing
+
+from jsonl_offset_index import JsonlOffsetIndex
+
+
+def _records(path):
+    with open(path, 'rb') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_lines_appended_after_the_sidecar_are_scanned(tmp_path):
+    path = tmp_path / "items.jsonl"
+    index = JsonlOffsetIndex(path, "id", persist_every=2)
+    for i in range(5):
+        index.append({"id": f"i{i}", "n": i})
+    with open(path, 'ab') as f:
+        f.write(b'{"id": "late", "n": 99}\n{"id": "torn"')
+
+    reopened = JsonlOffsetIndex(path, "id")
+    assert reopened.get("i4") == {"id": "i4", "n": 4}
+    assert reopened.get("late") == {"id": "late", "n": 99}
+    assert "torn" not in reopened
+
+
+def test_rewrite_keeps_selected_records_and_changes_epoch(tmp_path):
+    path = tmp_path / "items.jsonl"
+    index = JsonlOffsetIndex(path, "id")
+    for i in range(6):
+        index.append({"id": f"i{i}", "n": i})
+    epoch = index.epoch()
+
+    reclaimed = index.rewrite(lambda key: int(key[1:]) % 2 == 0)
+    assert reclaimed > 0
+    assert index.epoch() != epoch
+    assert [r['id'] for r in _records(path)] == ["i0", "i2", "i4"]
+    assert index.get("i1") is None
+    index.append({"id": "i6", "n": 6})
+    assert index.get("i4") == {"id": "i4", "n": 4}
+    assert JsonlOffsetIndex(path, "id").get("i6") == {"id": "i6", "n": 6}
+
+
+def test_two_instances_follow_each_others_appends_and_rewrites(tmp_path):
+    path = tmp_path / "items.jsonl"
+    first = JsonlOffsetIndex(path, "id")
+    second = JsonlOffsetIndex(path, "id")
+    for i in range(4):
+        first.append({"id": f"a{i}"})
+        second.append({"id": f"b{i}"})
+    assert second.get("a3") == {"id": "a3"}
+    assert first.get("b3") == {"id": "b3"}
+
+    first.rewrite(lambda key: key.startswith("b"))
+    second.append({"id": "b4"})
+    assert second.get("a0") is None
+    assert second.get("b1") == {"id": "b1"}
+    assert first.get("b4") == {"id": "b4"}
+    assert sorted(r['id'] for r in _records(path)) == ["b0", "b1", "b2", "b3", "b4"]
+
+
+def _appender(path, prefix, count):
+    index = JsonlOffsetIndex(path, "id", persist_every=7)
+    for i in range(count):
+        offset, length = index.append({"id": f"{prefix}{i}", "pad": "x" * (i % 13)})
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            assert json.loads(f.read(length))['id'] == f"{prefix}{i}"
+
+
+def test_concurrent_appends_record_their_own_offsets(tmp_path):
+    path = tmp_path / "items.jsonl"
+    workers = [multiprocessing.Process(target=_appender, args=(path, f"w{n}-", 100)) for n in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    index = JsonlOffsetIndex(path, "id")
+    assert len(index) == 400
+    assert all(index.get(f"w{n}-{i}") for n in range(4) for i in range(100))
@@ -0,0 +1,90 @@
+"""Tests for the per-job candidate rankings"""
+import pytest
+
+from analysis_storage import AnalysisStorage
+from leaderboard import JobLeaderboard
+
+
+def _entry(analysis_id, overall, skill=0, experience=0, job_id="j1",
+           created_at="2026-01-01T00:00:00"):
+    return {"analysis_id": analysis_id, "job_id": job_id, "created_at": created_at,
+            "overall_score": overall, "skill_match_score": skill,
+            "experience_match_score": experience}
+
+
+def _result(overall, skill=0, experience=0):
+    return {"overall_score": overall, "skill_match_score": skill,
+            "experience_match_score": experience}
+
+
+def test_ties_break_on_other_scores_then_age_then_id():
+    board = JobLeaderboard([
+        _entry("late", 80, 50, created_at="2026-01-03T00:00:00"),
+        _entry("b", 80, 50, created_at="2026-01-02T00:00:00"),
+        _entry("a", 80, 50, created_at="2026-01-02T00:00:00"),
+        _entry("skill", 80, 70),
+        _entry("exp", 80, 50, 90),
+        _entry("best", 95),
+    ])
+    assert board.top("j1") == ["best", "skill", "exp", "a", "b", "late"]
+    assert board.top("j1", "skill", k=2) == ["skill", "exp"]
+
+
+def test_score_ranges_are_inclusive():
+    board = JobLeaderboard(_entry(f"s{score}", score) for score in (10, 40, 50, 60, 90))
+    assert board.top("j1", min_score=50) == ["s90", "s60", "s50"]
+    assert board.top("j1", max_score=50) == ["s50", "s40", "s10"]
+    assert board.top("j1", min_score=40, max_score=60, k=2) == ["s60", "s50"]
+    assert board.top("j1", min_score=95) == []
+
+
+def test_jobs_are_ranked_separately_and_k_is_bounded():
+    board = JobLeaderboard([_entry("a", 70), _entry("b", 90, job_id="j2")])
+    assert board.top("j1") == ["a"] and board.top("j2") == ["b"]
+    assert board.top("j1", k=0) == [] and board.top("missing") == []
+    with pytest.raises(ValueError):
+        board.top("j1", metric="salary")
+
+
+def test_remove_and_repeated_add():
+    entry = _entry("a", 70)
+    board = JobLeaderboard([entry, _entry("b", 60)])
+    board.add(entry)  # already ranked: no duplicate
+    assert board.top("j1") == ["a", "b"] and board.count("j1") == 2
+
+    board.remove(entry)
+    board.remove(entry)
+    assert board.top("j1") == ["b"]
+    board.remove(_entry("b", 60))
+    assert board.count("j1") == 0
+
+
+def test_top_analyses_follow_saves_and_deletes(tmp_path):
+    storage = AnalysisStorage(str(tmp_path / "analyses"))
+    saved = [storage.save_analysis("j1", f"r{n}", _result(score, 100 - score), f"C{n}")
+             for n, score in enumerate((70, 90, 80))]
+    top = storage.top_analyses("j1", k=2)
+    assert [(a["candidate_name"], a["rank"]) for a in top] == [("C1", 1), ("C2", 2)]
+    assert storage.top_analyses("j1", "skill", k=1)[0]["candidate_name"] == "C0"
+
+    storage.save_analysis("j1", "r3", _result(95), "C3")
+    storage.delete_analysis(saved[1]["analysis_id"])
+    assert [a["candidate_name"] for a in storage.top_analyses("j1")] == ["C3", "C2", "C0"]
+
+
+def test_rankings_follow_another_instance_without_rebuilding(tmp_path):
+    first = AnalysisStorage(str(tmp_path / "analyses"))
+    second = AnalysisStorage(str(tmp_path / "analyses"))
+    saved = first.save_analysis("j1", "r0", _result(60), "C0")
+    assert [a["candidate_name"] for a in second.top_analyses("j1")] == ["C0"]
+    ranked, ordered = second._ranked, second._order()
+
+    first.increment_feedback_count(saved["analysis_id"])
+    first.save_analysis("j1", "r1", _result(75), "C1")
+    assert [a["candidate_name"] for a in second.top_analyses("j1")] == ["C1", "C0"]
+    assert second.top_analyses("j1")[1]["feedback_count"] == 1
+
+    first.delete_analysis(saved["analysis_id"])
+    assert [a["candidate_name"] for a in second.top_analyses("j1")] == ["C1"]
+    assert [a["candidate_name"] for a in second.list_analyses()] == ["C1"]
+    assert second._ranked is ranked and second._order() is ordered  # updated in place
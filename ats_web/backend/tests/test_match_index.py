@@ -0,0 +1,79 @@
+"""Tests for DocumentVectors search over snapshot + tail rows"""
+import numpy as np
+
+import match_index
+from match_index import DocumentVectors
+
+DIM = 8
+
+
+def unit(i):
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[i] = 1.0
+    return vector
+
+
+def test_replaced_document_is_not_found_by_its_old_vectors(tmp_path):
+    store = DocumentVectors(tmp_path / "resume", DIM)
+    store.add("a", {"whole": unit(0), "skills": unit(1)})
+    store.add("b", {"whole": unit(2)})
+    assert store.candidates([unit(0)], k=3)["a"] > 0.99
+
+    store.add("a", {"whole": unit(3), "skills": unit(4)})
+    found = store.candidates([unit(0)], k=5)
+    assert found.get("a", 0) < 0.5
+    assert store.candidates([unit(3)], k=5)["a"] > 0.99
+
+
+def test_snapshot_hits_of_replaced_rows_are_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(match_index, "MATCH_REBUILD_ROWS", 1)
+    store = DocumentVectors(tmp_path / "resume", DIM)
+    store.add("a", {"whole": unit(0)})
+    store.add("b", {"whole": unit(1)})
+    assert store.maybe_rebuild() is not None
+    assert store.candidates([unit(0)], k=2)["a"] > 0.99
+
+    store.add("a", {"whole": unit(5)})  # old row stays in the snapshot
+    assert store.candidates([unit(0)], k=3).get("a", 0) < 0.5
+    assert store.maybe_rebuild() is not None
+    assert store.candidates([unit(5)], k=3)["a"] > 0.99
+    assert store.candidates([unit(0)], k=3).get("a", 0) < 0.5
+
+
+def test_two_instances_share_documents(tmp_path):
+    first = DocumentVectors(tmp_path / "job", DIM)
+    second = DocumentVectors(tmp_path / "job", DIM)
+    first.add("j1", {"whole": unit(0)})
+    second.add("j2", {"whole": unit(1)})
+    assert second.candidates([unit(0)], k=2)["j1"] > 0.99
+    assert first.candidates([unit(1)], k=2)["j2"] > 0.99
+
+    first.add("j2", {"whole": unit(6)})
+    assert second.candidates([unit(1)], k=3).get("j2", 0) < 0.5
+    assert second.candidates([unit(6)], k=3)["j2"] > 0.99
+
+
+def test_rebuild_leaves_dead_rows_out_of_the_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(match_index, "MATCH_REBUILD_ROWS", 1)
+    store = DocumentVectors(tmp_path / "resume", DIM)
+    for _ in range(5):  # re-indexed: four dead "whole" rows pile up in vectors.bin
+        store.add("a", {"whole": unit(0)})
+    store.add("b", {"whole": unit(1)})
+    store.add("c", {"whole": unit(2)})
+    store.remove("c")
+    meta = store.maybe_rebuild()
+    assert len(store.log) == 7
+    assert meta["count"] == 2 and meta["source_rows"] == 7
+
+    # The dead copies of "a" no longer take the places of other documents
+    found = store.candidates([unit(0)], k=2)
+    assert set(found) == {"a", "b"} and found["a"] > 0.99
+    assert store.candidates([unit(2)], k=3).get("c") is None
+
+
+def test_dead_tail_rows_do_not_crowd_out_current_ones(tmp_path):
+    store = DocumentVectors(tmp_path / "resume", DIM)
+    store.add("b", {"whole": unit(1)})
+    for _ in range(4):
+        store.add("a", {"whole": unit(0)})
+    assert set(store.candidates([unit(0)], k=2)) == {"a", "b"}
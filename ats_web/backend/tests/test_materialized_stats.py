@@ -0,0 +1,95 @@
+"""Tests for materialized statistics shared by several store instances"""
+import pytest
+
+from analysis_storage import AnalysisStorage
+from job_storage import JobStorage
+from materialized_stats import MaterializedStats
+from resume_storage import ResumeStorage
+
+
+def _result(score, recommendation="HIRE"):
+    return {"overall_score": score, "hiring_recommendation": recommendation}
+
+
+def test_transactions_from_two_instances_both_count(tmp_path):
+    first = MaterializedStats(tmp_path / "stats.json")
+    second = MaterializedStats(tmp_path / "stats.json")
+    for stats in (first, second, first):
+        with stats.transaction():
+            stats.incr("total")
+            stats.incr_group("by_kind", "a")
+
+    assert second.counter("total") == 3  # reloaded after first's last save
+    assert MaterializedStats(tmp_path / "stats.json").group("by_kind") == {"a": 3}
+
+
+def test_failed_transaction_is_rolled_back_and_marked_stale(tmp_path):
+    stats = MaterializedStats(tmp_path / "stats.json")
+    with stats.transaction():
+        stats.incr("total")
+    with pytest.raises(RuntimeError):
+        with stats.transaction():
+            stats.incr("total")
+            raise RuntimeError("store write failed")
+
+    assert stats.counter("total") == 1
+    assert not MaterializedStats(tmp_path / "stats.json").exists
+
+
+def test_analysis_stats_count_writes_from_two_instances(tmp_path):
+    first = AnalysisStorage(str(tmp_path / "analyses"))
+    second = AnalysisStorage(str(tmp_path / "analyses"))
+    first.save_analysis("j1", "r1", _result(80), "Ann")
+    second.save_analysis("j1", "r2", _result(20, "NO HIRE"), "Bob")
+
+    for storage in (first, second, AnalysisStorage(str(tmp_path / "analyses"))):
+        stats = storage.get_stats()
+        assert stats["total"] == 2
+        assert stats["average_score"] == 50.0
+        assert stats["by_job"] == {"j1": 2}
+        assert stats["by_recommendation"] == {"HIRE": 1, "NO HIRE": 1}
+        assert [a["candidate_name"] for a in stats["recent"]] == ["Bob", "Ann"]
+
+
+def test_analysis_delete_from_another_instance_is_counted_once(tmp_path):
+    first = AnalysisStorage(str(tmp_path / "analyses"))
+    second = AnalysisStorage(str(tmp_path / "analyses"))
+    saved = first.save_analysis("j1", "r1", _result(60), "Ann")
+    first.save_analysis("j1", "r2", _result(40), "Bob")
+
+    assert second.delete_analysis(saved["analysis_id"])
+    assert not first.delete_analysis(saved["analysis_id"])
+    stats = first.get_stats()
+    assert stats["total"] == 1 and stats["average_score"] == 40.0
+    assert stats["by_job"] == {"j1": 1}
+
+
+def test_interrupted_write_is_rebuilt_from_the_index(tmp_path):
+    storage = AnalysisStorage(str(tmp_path / "analyses"))
+    storage.save_analysis("j1", "r1", _result(70), "Ann")
+    # A process died between the index append and the stats save
+    storage.index.set("orphan", {
+        "candidate_id": "c", "job_id": "j2", "resume_id": "r9", "candidate_name": "Eve",
+        "created_at": "2026-01-02T00:00:00", "overall_score": 30,
+        "hiring_recommendation": "MAYBE", "company_name": ""
+    })
+    storage.stats.pending_file.touch()
+
+    stats = AnalysisStorage(str(tmp_path / "analyses")).get_stats()
+    assert stats["average_score"] == 50.0
+    assert stats["by_job"] == {"j1": 1, "j2": 1}
+    assert not storage.stats.pending_file.exists()
+
+
+def test_job_and_resume_stats_across_instances(tmp_path):
+    jobs = [JobStorage(str(tmp_path / "jobs")) for _ in range(2)]
+    jobs[0].add_job("Job A", "Acme", "Engineer")
+    jobs[1].add_job("Job B", "Beta", "Engineer")
+    assert [j["company_name"] for j in jobs[0].get_stats()["recent"]] == ["Beta", "Acme"]
+
+    resumes = [ResumeStorage(str(tmp_path / "resumes")) for _ in range(2)]
+    first = resumes[0].save_resume(b"%PDF-1" * 10, "text one", "a.pdf")
+    resumes[1].save_resume(b"%PDF-2" * 20, "text two", "b.pdf")
+    assert resumes[0].get_stats()["total_file_size"] == 180
+    resumes[1].delete_resume(first["resume_id"])
+    assert resumes[0].get_stats()["total_file_size"] == 120
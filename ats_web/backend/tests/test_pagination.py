@@ -0,0 +1,115 @@
+"""Tests for keyset pagination cursors and the stores' paged listings"""
+import pytest
+
+from job_storage import JobStorage
+from pagination import (
+    MAX_PAGE_SIZE, SortedKeyIndex, clamp_limit, decode_cursor, encode_cursor, paginate
+)
+from sqlite_storage import SQLiteDatabase, SQLiteJobStorage
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("2026-01-02T03:04:05.000001", "id/with+chars é")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == ("2026-01-02T03:04:05.000001", "id/with+chars é")
+    assert decode_cursor(None) is None
+    assert decode_cursor("") is None
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "e30", encode_cursor("a", "b")[:-3]])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_clamp_limit():
+    assert clamp_limit(0) == 1
+    assert clamp_limit(-5) == 1
+    assert clamp_limit("20") == 20
+    assert clamp_limit(10 ** 6) == MAX_PAGE_SIZE
+
+
+def test_iter_desc_after_cursor_and_within_dates():
+    index = SortedKeyIndex([("2026-01-01T10:00", "a"), ("2026-01-02T09:00", "b"),
+                            ("2026-01-02T18:00", "c"), ("2026-01-03T08:00", "d")])
+    assert [k for _, k in index.iter_desc()] == ["d", "c", "b", "a"]
+    assert [k for _, k in index.iter_desc(before=("2026-01-02T18:00", "c"))] == ["b", "a"]
+    # date_to covers the whole day, date_from is inclusive
+    assert [k for _, k in index.iter_desc(date_from="2026-01-02", date_to="2026-01-02")] == ["c", "b"]
+    index.remove("2026-01-02T18:00", "c")
+    index.add("2026-01-02T18:00", "c2")
+    assert [k for _, k in index.iter_desc(date_to="2026-01-02")] == ["c2", "b", "a"]
+
+
+def test_paginate_walks_every_matching_item_once():
+    index = SortedKeyIndex((f"2026-01-01T00:00:{i:02d}", f"k{i:02d}") for i in range(25))
+    seen, cursor = [], None
+    while True:
+        page = paginate(index.iter_desc(decode_cursor(cursor)), lambda key: {"key": key},
+                        lambda item: int(item["key"][1:]) % 3, limit=4)
+        seen += [item["key"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    expected = [f"k{i:02d}" for i in range(24, -1, -1) if i % 3]
+    assert seen == expected
+
+
+@pytest.fixture(params=["jsonl", "sqlite"])
+def job_storage(request, tmp_path):
+    if request.param == "jsonl":
+        return JobStorage(str(tmp_path / "jobs"))
+    return SQLiteJobStorage(SQLiteDatabase(str(tmp_path / "ats.db")))
+
+
+def test_pages_stay_stable_when_jobs_are_added_between_them(job_storage):
+    for i in range(7):
+        job_storage.add_job(f"Job {i}", f"Company {i}", "Engineer")
+    first = job_storage.list_jobs_page(limit=3)
+    assert len(first["items"]) == 3 and first["next_cursor"]
+
+    job_storage.add_job("Newest job", "Company new", "Engineer")
+    rest, cursor = [], first["next_cursor"]
+    while cursor:
+        page = job_storage.list_jobs_page(limit=3, cursor=cursor)
+        rest += page["items"]
+        cursor = page["next_cursor"]
+    names = [job["company_name"] for job in first["items"] + rest]
+    assert sorted(names) == [f"Company {i}" for i in range(7)]  # each once, none of the newer
+
+    with pytest.raises(ValueError):
+        job_storage.list_jobs_page(cursor="garbage")
+
+
+@pytest.mark.parametrize("backend", ["jsonl", "sqlite"])
+def test_listing_sees_jobs_changed_by_another_instance(backend, tmp_path):
+    def open_storage():
+        if backend == "jsonl":
+            return JobStorage(str(tmp_path / "jobs"))
+        return SQLiteJobStorage(SQLiteDatabase(str(tmp_path / "ats.db")))
+
+    writer, reader = open_storage(), open_storage()
+    first = writer.add_job("Job 1", "Company 1", "Engineer")["job_id"]
+    writer.add_job("Job 2", "Company 2", "Engineer")
+    assert [job["company_name"] for job in reader.list_jobs_page(limit=10)["items"]] == \
+        ["Company 2", "Company 1"]  # ordering now built in the reader
+
+    writer.add_job("Job 3", "Company 3", "Engineer")
+    writer.delete_job(first)
+    page = reader.list_jobs_page(limit=10)
+    assert [job["company_name"] for job in page["items"]] == ["Company 3", "Company 2"]
+    assert reader.version() == writer.version()
+
+
+def test_name_filters_match_wildcard_characters_literally(job_storage):
+    for company in ("a_b", "axb", "100%", "1000", "c\\d", "cd"):
+        job_storage.add_job(f"Job at {company}", company, "Engineer")
+
+    def companies(**filters):
+        return sorted(job["company_name"] for job in job_storage.list_jobs_page(limit=10, **filters)["items"])
+
+    assert companies(company="a_b") == ["a_b"]
+    assert companies(company="0%") == ["100%"]
+    assert companies(company="c\\") == ["c\\d"]
+    assert companies(company="A_", role="ENG") == ["a_b"]  # still case-insensitive
+    assert sorted(job["company_name"] for job in job_storage.search_jobs("_")) == ["a_b"]
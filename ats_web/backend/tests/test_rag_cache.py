@@ -0,0 +1,119 @@
+"""Tests for the RAG retrieval cache and the query embedding cache"""
+import importlib
+
+import numpy as np
+import pytest
+
+from archive_store import ArchiveStore
+
+
+class CountingRetriever:
+    """HybridRetriever stand-in that counts the retrievals it runs"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def retrieve(self, query, n_results=3, min_rating=4):
+        self.calls += 1
+        return [{"query": query, "response": f"Answer {self.calls}"}], {}
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return np.full(4, len(text), dtype=np.float32)
+
+
+@pytest.fixture
+def modules(tmp_path, monkeypatch):
+    # Both modules open their default instances in the working directory on import
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("feedback_store"), importlib.import_module("rag_service")
+
+
+def open_store(module, path):
+    store = module.FeedbackStore(str(path))
+    store.embedding_model = None  # logs only
+    store.primary = "none"
+    store._loaded = True
+    return store
+
+
+@pytest.fixture
+def rag(modules, tmp_path):
+    feedback_module, rag_module = modules
+    service = rag_module.RAGService()
+    service.feedback_store = open_store(feedback_module, tmp_path / "db")
+    service.retriever = CountingRetriever()
+    return service
+
+
+def _interaction(interaction_id, timestamp="2026-01-01T00:00:00"):
+    return {"id": interaction_id, "timestamp": timestamp, "query": "Question",
+            "response": "Answer", "feedback": {"rating": 5}}
+
+
+def test_repeated_query_is_served_from_the_cache(rag):
+    first = rag.get_relevant_examples("How many years of Python?")
+    first[0]["response"] = "changed by the caller"
+    again = rag.get_relevant_examples("  how many YEARS of python? ")
+
+    assert rag.retriever.calls == 1
+    assert again == [{"query": "How many years of Python?", "response": "Answer 1"}]
+    assert rag.cache_stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+    rag.get_relevant_examples("How many years of Python?", min_rating=5)
+    assert rag.retriever.calls == 2  # other filters are cached separately
+
+
+def test_write_version_change_invalidates_cached_retrievals(rag, modules, tmp_path):
+    feedback_module, _ = modules
+    store = rag.feedback_store
+    rag.get_relevant_examples("Python?")
+    version = store.write_version()
+
+    store._store_batch([_interaction("fb-1")])
+    assert store.write_version() != version
+    assert rag.get_relevant_examples("Python?")[0]["response"] == "Answer 2"
+    assert rag.get_relevant_examples("Python?")[0]["response"] == "Answer 2"
+
+    # Writes by another worker change the log's size, so they are noticed too
+    open_store(feedback_module, tmp_path / "db")._store_batch([_interaction("fb-2")])
+    assert rag.get_relevant_examples("Python?")[0]["response"] == "Answer 3"
+
+    archive = ArchiveStore(str(tmp_path / "archive"), "feedback", "id")
+    assert store.archive_interactions(lambda record: record["id"] == "fb-1", archive) == 1
+    assert rag.get_relevant_examples("Python?")[0]["response"] == "Answer 4"
+    assert rag.retriever.calls == 4
+
+
+def test_retrieval_cache_is_bounded(rag, modules, monkeypatch):
+    _, rag_module = modules
+    monkeypatch.setattr(rag_module, "RAG_CACHE_SIZE", 2)
+    for query in ("a", "b", "c"):
+        rag.get_relevant_examples(query)
+    assert rag.cache_stats()["entries"] == 2
+
+    rag.get_relevant_examples("c")
+    rag.get_relevant_examples("a")  # evicted as the least recently used
+    assert rag.retriever.calls == 4
+
+
+def test_query_embeddings_are_cached_by_normalized_query(modules, tmp_path, monkeypatch):
+    feedback_module, _ = modules
+    monkeypatch.setattr(feedback_module, "QUERY_EMBEDDING_CACHE_SIZE", 2)
+    store = open_store(feedback_module, tmp_path / "db")
+    store.embedding_model = CountingEncoder()
+
+    embedding = store.encode_query("Python  Skills")
+    assert store.encode_query("python skills") is embedding
+    assert not embedding.flags.writeable  # shared between callers
+    assert (store.query_cache_hits, store.query_cache_misses) == (1, 1)
+
+    store.encode_query("b")
+    store.encode_query("c")
+    store.encode_query("python skills")
+    assert store.embedding_model.calls == 4
@@ -0,0 +1,55 @@
+"""Tests for reading analyses incrementally across a log rewrite"""
+import pytest
+
+from analysis_storage import AnalysisStorage
+from archive_store import ArchiveStore
+from result_cache import ResultCache
+from sqlite_storage import SQLiteAnalysisStorage, SQLiteDatabase
+
+
+def _result(score):
+    return {"overall_score": score, "timestamp": f"2026-01-01T00:00:{score:02d}"}
+
+
+@pytest.fixture(params=["jsonl", "sqlite"])
+def open_storage(request, tmp_path):
+    if request.param == "jsonl":
+        return lambda: AnalysisStorage(str(tmp_path / "analyses"))
+    return lambda: SQLiteAnalysisStorage(SQLiteDatabase(str(tmp_path / "ats.db")))
+
+
+def test_read_since_reports_a_rewrite_by_another_instance(open_storage, tmp_path):
+    writer, reader = open_storage(), open_storage()
+    saved = [writer.save_analysis("job", f"r{i}", _result(i), f"C{i}") for i in range(5)]
+    position = reader.tail_position()
+
+    writer.save_analysis("job", "r5", _result(5), "C5")
+    records, position, rewritten = reader.read_since(position)
+    assert [r['resume_id'] for r in records] == ["r5"] and not rewritten
+
+    archive = ArchiveStore(str(tmp_path / "archive"), "analyses", "analysis_id", [], "created_at")
+    writer.archive_analyses([a['analysis_id'] for a in saved[:3]], archive)
+    writer.save_analysis("job", "r6", _result(6), "C6")
+
+    records, position, rewritten = reader.read_since(position)
+    assert records == [] and rewritten
+    assert position == reader.tail_position()
+
+
+def test_result_cache_reloads_after_archive(open_storage, tmp_path):
+    storage = open_storage()
+    saved = [storage.save_analysis("job", f"r{i}", _result(i), f"C{i}") for i in range(4)]
+    cache = ResultCache(open_storage(), max_entries=10)
+    cache.refresh()
+    assert len(cache) == 4
+
+    archive = ArchiveStore(str(tmp_path / "archive"), "analyses", "analysis_id", [], "created_at")
+    storage.archive_analyses([saved[0]['analysis_id']], archive)
+    cache.refresh()
+    assert sorted(r['overall_score'] for r in cache.results()) == [1, 2, 3]
+
+    snapshot = tmp_path / "state.json"
+    cache.save_snapshot(snapshot)
+    assert ResultCache(storage).load_snapshot(snapshot)
+    storage.archive_analyses([saved[1]['analysis_id']], archive)
+    assert not ResultCache(storage).load_snapshot(snapshot)
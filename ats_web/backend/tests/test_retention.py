@@ -0,0 +1,148 @@
+"""Tests for the retention job, the cold archive and the retention lock"""
+import importlib
+import json
+import threading
+from datetime import datetime
+
+import pytest
+
+import analysis_storage as analysis_storage_module
+from analysis_storage import AnalysisStorage
+from archive_store import ArchiveStore, archive_in_batches
+from file_lock import FileLock
+from job_storage import JobStorage
+from retention import RetentionPolicy, open_archives, run_retention
+
+
+def _record(n, job_id="j1"):
+    return {"analysis_id": f"a{n}", "job_id": job_id, "created_at": f"2026-01-{n + 1:02d}T00:00:00",
+            "candidate_name": f"C{n}", "overall_score": n, "notes": "x" * 50}
+
+
+def test_archive_round_trip_and_reopen(tmp_path):
+    archive = ArchiveStore(str(tmp_path), "analyses", "analysis_id",
+                           ("job_id", "created_at", "candidate_name"), "created_at")
+    records = [_record(n, "j1" if n % 2 else "j2") for n in range(5)]
+    assert archive.archive(records) > 0
+
+    assert archive.get("a3") == records[3]
+    assert archive.get("missing") is None
+    assert [s["analysis_id"] for s in archive.list()] == ["a4", "a3", "a2", "a1", "a0"]
+    assert archive.list(limit=1, job_id="j1") == [
+        {"analysis_id": "a3", "job_id": "j1", "created_at": "2026-01-04T00:00:00", "candidate_name": "C3"}
+    ]
+    archive.close()
+
+    reopened = ArchiveStore(str(tmp_path), "analyses", "analysis_id", ("job_id",), "created_at")
+    assert "a0" in reopened and len(reopened) == 5
+    assert sorted(r["analysis_id"] for r in reopened.iter_records()) == [f"a{n}" for n in range(5)]
+    assert reopened.get_stats()["records"] == 5 and reopened.get_stats()["segments"] == 1
+
+
+def test_archive_in_batches_splits_segments(tmp_path, monkeypatch):
+    monkeypatch.setattr("archive_store.SEGMENT_RECORDS", 2)
+    archive = ArchiveStore(str(tmp_path), "analyses", "analysis_id")
+    removed = []
+    assert archive_in_batches(iter(_record(n) for n in range(5)), archive, removed.append) == 5
+    assert [len(batch) for batch in removed] == [2, 2, 1]
+    assert archive.get_stats()["segments"] == 3
+    assert archive.get("a4")["candidate_name"] == "C4"
+
+
+@pytest.fixture
+def stores(tmp_path, monkeypatch):
+    # The feedback module opens its default store in the working directory on import
+    monkeypatch.chdir(tmp_path)
+    feedback_store = importlib.import_module("feedback_store")
+    feedback = feedback_store.FeedbackStore(str(tmp_path / "feedback"))
+    feedback.embedding_model = None  # logs only
+    feedback.primary = "none"
+    feedback._loaded = True
+    analyses = AnalysisStorage(str(tmp_path / "analyses"))
+    jobs = JobStorage(str(tmp_path / "jobs"))
+    return analyses, jobs, feedback, open_archives(str(tmp_path / "archive"))
+
+
+def _save(analyses, monkeypatch, job_id, name, created_at):
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromisoformat(created_at)
+
+    monkeypatch.setattr(analysis_storage_module, "datetime", FrozenDatetime)
+    return analyses.save_analysis(job_id, "r1", {"overall_score": 50}, name)
+
+
+def _interaction(interaction_id, timestamp, job_id):
+    return {"id": interaction_id, "timestamp": timestamp, "job_id": job_id,
+            "query": "Question", "response": "Answer", "feedback": {"rating": 4}}
+
+
+def test_run_retention_archives_old_and_closed_job_records(stores, monkeypatch):
+    analyses, jobs, feedback, (analysis_archive, feedback_archive) = stores
+    open_job = jobs.add_job("Open", "Acme", "Engineer")["job_id"]
+    closed_job = jobs.add_job("Closed", "Beta", "Engineer")["job_id"]
+    old = _save(analyses, monkeypatch, open_job, "Old", "2020-01-01T00:00:00")
+    _save(analyses, monkeypatch, closed_job, "Closed", datetime.now().isoformat())
+    recent = _save(analyses, monkeypatch, open_job, "Recent", datetime.now().isoformat())
+    now = datetime.now().isoformat()
+    feedback._store_batch([
+        _interaction("fb-old", "2020-01-01T00:00:00", open_job),
+        _interaction("fb-closed", now, closed_job),
+        _interaction("fb-recent", now, open_job),
+    ])
+    jobs.delete_job(closed_job)
+    policy = RetentionPolicy(max_age_days=365, archive_closed_jobs=True)
+
+    report = run_retention(analyses, jobs, feedback, analysis_archive, feedback_archive,
+                           policy, dry_run=True)
+    assert report["dry_run"] and report["closed_jobs"] == 1
+    assert report["analyses"]["selected"] == 2 and report["feedback"]["selected"] == 2
+    assert "archived" not in report["analyses"] and len(analysis_archive) == 0
+    assert analyses.get_analysis(old["analysis_id"])
+
+    report = run_retention(analyses, jobs, feedback, analysis_archive, feedback_archive, policy)
+    assert report["analyses"]["archived"] == 2 and report["feedback"]["archived"] == 2
+    assert report["analyses"]["bytes_reclaimed"] > 0 and report["feedback"]["bytes_reclaimed"] > 0
+    assert report["archive"]["analyses"]["records"] == 2
+
+    assert [a["candidate_name"] for a in analyses.list_analyses()] == ["Recent"]
+    assert analyses.get_analysis(recent["analysis_id"])
+    assert analysis_archive.get(old["analysis_id"])["candidate_name"] == "Old"
+    assert [json.loads(line)["id"] for line in open(feedback.jsonl_file)] == ["fb-recent"]
+    assert sorted(r["id"] for r in feedback_archive.iter_records()) == ["fb-closed", "fb-old"]
+
+
+def test_disabled_policy_archives_nothing(stores, monkeypatch):
+    analyses, jobs, feedback, (analysis_archive, feedback_archive) = stores
+    _save(analyses, monkeypatch, "j1", "Old", "2020-01-01T00:00:00")
+    assert not RetentionPolicy().enabled and RetentionPolicy().cutoff() is None
+
+    report = run_retention(analyses, jobs, feedback, analysis_archive, feedback_archive,
+                           RetentionPolicy())
+    assert report["analyses"]["archived"] == 0 and report["feedback"]["archived"] == 0
+    assert len(analyses.list_analyses()) == 1
+
+
+def test_try_exclusive_does_not_wait(tmp_path):
+    holder = FileLock(tmp_path / "retention.lock")
+    other = FileLock(tmp_path / "retention.lock")  # as opened by another worker
+    results = []
+
+    def probe():  # another thread of the same worker
+        with holder.try_exclusive() as acquired_by_thread:
+            results.append(acquired_by_thread)
+
+    with holder.try_exclusive() as acquired:
+        assert acquired
+        with holder.try_exclusive() as nested:  # same thread: reused
+            assert nested
+        with other.try_exclusive() as acquired_elsewhere:
+            results.append(acquired_elsewhere)
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join(timeout=5)
+
+    assert results == [False, False]
+    with other.try_exclusive() as acquired:
+        assert acquired
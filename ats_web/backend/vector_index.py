@@ -0,0 +1,171 @@
+"""
+FAISS Index Tiers
+Builds and tunes the FAISS indexes behind the feedback store. A store starts
+with an exact flat index; once it holds FAISS_PROMOTE_AT vectors it is
+retrained into an approximate index (HNSW or IVF-Flat) so searches stay
+sub-millisecond as feedback grows. Every tier is wrapped in an IndexIDMap
+with stable int64 IDs derived from the interaction IDs.
+
+Run this module to report recall and latency of each index type at each
+size tier on synthetic data:
+
+    python vector_index.py --sizes 10000 100000 1000000
+"""
+import argparse
+import hashlib
+import math
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+# Index type used once the store outgrows an exact search: hnsw, ivf or flat (never promote)
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "hnsw").lower()
+FAISS_PROMOTE_AT = int(os.getenv("FAISS_PROMOTE_AT", "50000"))
+# Search-time knobs: IVF lists probed per query, HNSW candidate list size
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+
+# Vectors sampled to train the IVF coarse quantizer (per list)
+IVF_TRAIN_PER_LIST = 64
+
+
+def faiss_id(interaction_id: str) -> int:
+    """Stable non-negative int64 ID of an interaction ID"""
+    digest = hashlib.blake2b(interaction_id.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') & 0x7FFFFFFFFFFFFFFF
+
+
+def ivf_lists(n: int) -> int:
+    """Number of IVF lists for n vectors (about 4 * sqrt(n))"""
+    return max(1, int(4 * math.sqrt(max(n, 1))))
+
+
+def index_type(index) -> str:
+    """"flat", "ivf" or "hnsw" for an (ID-mapped) index"""
+    import faiss
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def apply_search_params(index):
+    """Set nprobe / efSearch on an index from the environment"""
+    import faiss
+    kind = index_type(index)
+    if kind == "ivf":
+        faiss.ParameterSpace().set_index_parameter(index, "nprobe", FAISS_NPROBE)
+    elif kind == "hnsw":
+        faiss.ParameterSpace().set_index_parameter(index, "efSearch", FAISS_EF_SEARCH)
+
+
+def build_index(kind: str, dim: int, vectors: Optional[np.ndarray] = None,
+                ids: Optional[np.ndarray] = None):
+    """Create an IndexIDMap of the given type, trained and filled with vectors
+
+    Args:
+        kind: "flat", "ivf" or "hnsw"
+        dim: Embedding dimension
+        vectors: float32 matrix (n x dim) to train on and add
+        ids: int64 IDs of the vectors
+
+    Returns:
+        The index, with search parameters applied
+    """
+    import faiss
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type '{kind}', expected one of: {', '.join(INDEX_TYPES)}")
+    n = 0 if vectors is None else len(vectors)
+    if kind == "ivf":
+        nlist = ivf_lists(n)
+        index = faiss.index_factory(dim, f"IDMap,IVF{nlist},Flat")
+        train_size = min(n, nlist * IVF_TRAIN_PER_LIST)
+        sample = vectors[np.random.default_rng(0).choice(n, train_size, replace=False)] if n else vectors
+        index.train(sample)
+    elif kind == "hnsw":
+        index = faiss.index_factory(dim, f"IDMap,HNSW{FAISS_HNSW_M}")
+    else:
+        index = faiss.index_factory(dim, "IDMap,Flat")
+    if n:
+        index.add_with_ids(vectors, ids)
+    apply_search_params(index)
+    return index
+
+
+def index_contents(index):
+    """(vectors, ids) of an ID-mapped index, in insertion order"""
+    import faiss
+    ids = faiss.vector_to_array(index.id_map).astype(np.int64)
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexIVF):
+        inner.make_direct_map()
+    vectors = inner.reconstruct_n(0, inner.ntotal) if inner.ntotal else np.zeros((0, index.d), dtype=np.float32)
+    return vectors, ids
+
+
+def measure(index, exact, queries: np.ndarray, k: int = 10) -> Dict:
+    """Recall@k of an index against exact search, and its per-query latency
+
+    Returns:
+        Dict with recall_at_k, p50_ms and p99_ms
+    """
+    _, truth = exact.search(queries, k)
+    latencies, hits = [], 0
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, found = index.search(queries[i:i + 1], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(set(found[0]) & set(truth[i]))
+    latencies.sort()
+    return {
+        "recall_at_k": round(hits / (len(queries) * k), 4) if len(queries) else 1.0,
+        "p50_ms": round(latencies[len(latencies) // 2], 3) if latencies else 0.0,
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3) if latencies else 0.0,
+    }
+
+
+def benchmark(sizes: Sequence[int] = (10000, 100000, 1000000), dim: int = 384,
+              kinds: Sequence[str] = INDEX_TYPES, queries: int = 200, k: int = 10) -> List[Dict]:
+    """Recall and latency of each index type at each size tier (synthetic data)"""
+    rng = np.random.default_rng(42)
+    report = []
+    for size in sizes:
+        # Clustered unit vectors, roughly like sentence embeddings of related texts
+        centers = rng.standard_normal((max(1, size // 100), dim), dtype=np.float32)
+        vectors = centers[rng.integers(0, len(centers), size)] + \
+            0.5 * rng.standard_normal((size, dim), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        ids = np.arange(size, dtype=np.int64)
+        query_vectors = vectors[rng.choice(size, queries, replace=False)] + \
+            rng.normal(0, 0.01, (queries, dim)).astype(np.float32)
+        exact = build_index("flat", dim, vectors, ids)
+        for kind in kinds:
+            start = time.perf_counter()
+            index = exact if kind == "flat" else build_index(kind, dim, vectors, ids)
+            build_s = round(time.perf_counter() - start, 2)
+            report.append({"size": size, "type": kind, "build_s": build_s,
+                           **measure(index, exact, query_vectors, k)})
+            print(f"{size:>9} {kind:>5}  build {build_s:>7.2f}s  recall@{k} "
+                  f"{report[-1]['recall_at_k']:.3f}  p50 {report[-1]['p50_ms']:.3f}ms  "
+                  f"p99 {report[-1]['p99_ms']:.3f}ms")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall/latency of FAISS index types by corpus size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+    print(f"nprobe={FAISS_NPROBE} efSearch={FAISS_EF_SEARCH} HNSW M={FAISS_HNSW_M}")
+    benchmark(args.sizes, args.dim, args.types, args.queries, args.k)
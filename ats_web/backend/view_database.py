@@ -14,7 +14,7 @@ def view_statistics():
     print("FEEDBACK DATABASE STATISTICS")
     print_separator()
     
-    stats = feedback_store.get_statistics()
+    stats = feedback_store.get_statistics(include_backends=True)
     
     print(f"\n📊 Total Feedback Entries: {stats['total_feedback']}")
     print(f"⭐ Average Rating: {stats['average_rating']:.2f}/5.0")
@@ -188,7 +188,7 @@ def search_feedback(query_text, n_results=5):
 
 def export_to_csv():
     """Export feedback to CSV for Excel/analysis"""
-    import csv
+    from export_stream import FEEDBACK_COLUMNS, stream_export
     
     jsonl_file = Path("feedback_db/interactions.jsonl")
     if not jsonl_file.exists():
@@ -197,27 +197,10 @@ def export_to_csv():
     
     csv_file = Path("feedback_db/feedback_export.csv")
     
-    with open(jsonl_file, 'r', encoding='utf-8') as f_in:
-        with open(csv_file, 'w', newline='', encoding='utf-8') as f_out:
-            writer = csv.writer(f_out)
-            writer.writerow([
-                'ID', 'Timestamp', 'Rating', 'Query', 'Response',
-                'Correct Points', 'Incorrect Points', 'Missing Points', 'Ideal Response'
-            ])
-            
-            for line in f_in:
-                data = json.loads(line)
-                writer.writerow([
-                    data['id'],
-                    data['timestamp'],
-                    data['feedback']['rating'],
-                    data['query'],
-                    data['response'],
-                    ', '.join(data['feedback']['correct_points']),
-                    ', '.join(data['feedback']['incorrect_points']),
-                    ', '.join(data['feedback'].get('missing_points', [])),
-                    data['feedback']['ideal_response']
-                ])
+    # Written chunk by chunk, so large logs export in constant memory
+    with open(csv_file, 'wb') as f_out:
+        for chunk in stream_export(feedback_store.iter_feedback(), "csv", FEEDBACK_COLUMNS):
+            f_out.write(chunk)
     
     print(f"✅ Exported to: {csv_file.absolute()}")
     print("   You can open this in Excel or Google Sheets!")